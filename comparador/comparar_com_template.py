@@ -4,6 +4,10 @@ Comparador Excel HAP - Usa template formatado
 Lê um template com a formatação desejada e preenche com dados de comparação.
 Mantém a formatação do template (cores, bordas) e preenche os dados.
 
+Cada ficheiro de input é aberto uma só vez (read_only) e as folhas ficam em
+cache; as células de dados usam named styles registados uma vez por
+combinação de cor/bordas, em vez de estilos criados célula a célula.
+
 Usage:
     python comparar_com_template.py <template.xlsx> <ficheiro1.xlsx> <ficheiro2.xlsx> [output.xlsx]
 """
@@ -11,11 +15,12 @@ Usage:
 import sys
 import os
 import re
-import copy
 import openpyxl
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+from openpyxl.styles import Font, PatternFill, Border, Side, Alignment, NamedStyle
 from openpyxl.utils import get_column_letter
 
+from emparelhar import match_rows, print_matching
+
 # Cores para resultados
 GREEN_FILL = PatternFill(start_color='C6EFCE', end_color='C6EFCE', fill_type='solid')
 RED_FILL = PatternFill(start_color='FFC7CE', end_color='FFC7CE', fill_type='solid')
@@ -83,54 +88,94 @@ def get_short_name(filepath):
         name = name[:17] + '...'
     return name
 
-def read_excel_data(filepath):
-    """Lê dados do Excel HAP - folha Espacos"""
-    wb = openpyxl.load_workbook(filepath)
-    ws = wb['Espacos']
-
-    # Dados (linha 4+)
-    data = {}
-    for row in range(4, ws.max_row + 1):
-        name = ws.cell(row, 1).value
+# Folhas lidas de cada ficheiro de input
+INPUT_SHEETS = ('Espacos', 'Windows', 'Walls', 'Roofs')
+
+# {caminho absoluto: {folha: [linhas]}} - cada input é aberto uma só vez
+_sheet_cache = {}
+
+
+def read_workbook_sheets(filepath):
+    """Linhas (tuplos de valores) das folhas INPUT_SHEETS, lidas uma vez em read_only"""
+    key = os.path.abspath(filepath)
+    if key not in _sheet_cache:
+        wb = openpyxl.load_workbook(filepath, read_only=True)
+        try:
+            _sheet_cache[key] = {name: list(wb[name].iter_rows(values_only=True))
+                                 for name in INPUT_SHEETS if name in wb.sheetnames}
+        finally:
+            wb.close()
+    return _sheet_cache[key]
+
+
+def _named_rows(rows, data_start_row, num_cols):
+    """Linhas com nome na coluna 1, com num_cols valores e o nome sem espaços"""
+    data = []
+    for values in rows[data_start_row - 1:]:
+        name = values[0] if values else None
         if not name or str(name).strip() == '':
             continue
-        name = str(name).strip()
-        row_data = [ws.cell(row, col).value for col in range(1, 148)]
-        data[name] = row_data
-
+        row_data = list(values[:num_cols]) + [None] * (num_cols - len(values))
+        row_data[0] = str(name).strip()
+        data.append(row_data)
     return data
 
 
+def read_excel_data(filepath):
+    """Lê dados do Excel HAP - folha Espacos (lista de linhas, nome na coluna 0)"""
+    return _named_rows(read_workbook_sheets(filepath)['Espacos'], 4, 147)
+
+
 def read_sheet_data(filepath, sheet_name, data_start_row=4):
     """Lê dados de uma folha específica (Windows, Walls, Roofs)"""
     try:
-        wb = openpyxl.load_workbook(filepath)
-        if sheet_name not in wb.sheetnames:
-            return {}
-        ws = wb[sheet_name]
-
-        # Dados (linha data_start_row+)
-        data = {}
-        for row in range(data_start_row, ws.max_row + 1):
-            name = ws.cell(row, 1).value
-            if not name or str(name).strip() == '':
-                continue
-            name = str(name).strip()
-            row_data = [ws.cell(row, col).value for col in range(1, ws.max_column + 1)]
-            data[name] = row_data
-
-        return data
+        rows = read_workbook_sheets(filepath).get(sheet_name)
+        if not rows:
+            return []
+        return _named_rows(rows, data_start_row, max(len(r) for r in rows))
     except:
-        return {}
+        return []
+
+
+# =============================================================================
+# ESTILOS
+# =============================================================================
+
+# Preenchimento e alinhamento de cada tipo de célula de dados
+CELL_KINDS = {
+    'F1': (FILE1_DATA, None),
+    'F2': (FILE2_DATA, None),
+    'EMPTY': (CHECK_DATA, Alignment(horizontal='center')),
+    'OK': (GREEN_FILL, Alignment(horizontal='center')),
+    'DIFF': (RED_FILL, Alignment(horizontal='center')),
+}
+
+
+def cell_style(wb, kind, edges=None):
+    """Nome do named style para um tipo de célula (e bordas left/right/bottom grossas).
+
+    Cada combinação é registada no workbook uma só vez; atribuir o estilo
+    pelo nome evita criar e comparar objectos de estilo célula a célula.
+    """
+    name = f"CMP_{kind}" if edges is None else f"CMP_{kind}_{''.join('T' if e else 't' for e in edges)}"
+    if name not in wb.named_styles:
+        fill, alignment = CELL_KINDS[kind]
+        style = NamedStyle(name=name, fill=fill)
+        if alignment is not None:
+            style.alignment = alignment
+        if edges is not None:
+            left, right, bottom = edges
+            style.border = Border(left=THICK if left else THIN, right=THICK if right else THIN,
+                                  top=THIN, bottom=THICK if bottom else THIN)
+        wb.add_named_style(style)
+    return name
+
+
+def check_kind(match, status):
+    if status == '':
+        return 'EMPTY'
+    return 'OK' if match else 'DIFF'
 
-def copy_cell_style(source_cell, target_cell):
-    """Copia o estilo de uma célula para outra"""
-    if source_cell.has_style:
-        target_cell.font = copy.copy(source_cell.font)
-        target_cell.fill = copy.copy(source_cell.fill)
-        target_cell.border = copy.copy(source_cell.border)
-        target_cell.alignment = copy.copy(source_cell.alignment)
-        target_cell.number_format = source_cell.number_format
 
 def detect_section_borders(ws, max_col):
     """Detecta onde estão as bordas grossas (secções) na linha 3"""
@@ -173,6 +218,10 @@ def create_comparison_from_template(template_path, file1_path, file2_path, outpu
     print(f"\nEspaços em {name1}: {len(data1)}")
     print(f"Espaços em {name2}: {len(data2)}")
 
+    # Emparelhar espaços pelo nome (exacto + renomeados)
+    matching = match_rows(data1, data2)
+    print_matching(matching, name1, name2)
+
     max_col = 147 * 3  # 441 colunas
 
     # Detectar secções (bordas grossas)
@@ -193,68 +242,56 @@ def create_comparison_from_template(template_path, file1_path, file2_path, outpu
     # Estatísticas
     stats = {'ok': 0, 'diff': 0, 'f1_only': 0, 'f2_only': 0, 'both_empty': 0}
 
-    # Escrever dados
-    all_spaces = sorted(set(data1.keys()) | set(data2.keys()))
-    row = 4
-    last_row = 4 + len([s for s in all_spaces if s in data1 and s in data2]) - 1
+    # Bordas por coluna: (esquerda grossa, direita grossa) dentro das secções
+    column_edges = {}
+    for start_col, end_col in sections:
+        for c in range(start_col, end_col + 1):
+            column_edges[c] = (c == start_col, c == end_col)
 
-    for space_name in all_spaces:
-        d1 = data1.get(space_name)
-        d2 = data2.get(space_name)
+    # Escrever dados (só espaços emparelhados, por ordem do nome)
+    pairs = sorted(matching['matched'], key=lambda m: m[0])
+    last_row = 4 + len(pairs) - 1
+    styles = {}  # (tipo, coluna, última linha) -> nome do named style
 
-        if d1 is None or d2 is None:
-            continue
+    def style_for(kind, col, is_last):
+        key = (kind, col, is_last)
+        if key not in styles:
+            edges = column_edges.get(col)
+            styles[key] = cell_style(wb, kind, None if edges is None else edges + (is_last,))
+        return styles[key]
 
+    row = 4
+    for _, d1, d2 in pairs:
+        is_last = row == last_row
         out_col = 1
         for in_col in range(1, 148):
             v1 = d1[in_col - 1]
             v2 = d2[in_col - 1]
 
-            # Coluna Ficheiro 1 (azul claro)
-            c1 = ws.cell(row, out_col, value=v1)
-            c1.fill = FILE1_DATA
-
-            # Coluna Ficheiro 2 (laranja claro)
-            c2 = ws.cell(row, out_col + 1, value=v2)
-            c2.fill = FILE2_DATA
+            # Coluna Ficheiro 1 (azul claro) e Ficheiro 2 (laranja claro)
+            ws.cell(row, out_col, value=v1).style = style_for('F1', out_col, is_last)
+            ws.cell(row, out_col + 1, value=v2).style = style_for('F2', out_col + 1, is_last)
 
             # Coluna Check
             match, status = compare_values(v1, v2)
-            c3 = ws.cell(row, out_col + 2, value=status)
-            c3.alignment = Alignment(horizontal='center')
+            kind = check_kind(match, status)
+            ws.cell(row, out_col + 2, value=status).style = style_for(kind, out_col + 2, is_last)
 
-            if status == '':
-                c3.fill = CHECK_DATA
+            if kind == 'EMPTY':
                 stats['both_empty'] += 1
-            elif match:
-                c3.fill = GREEN_FILL
+            elif kind == 'OK':
                 stats['ok'] += 1
+            elif status == 'F1':
+                stats['f1_only'] += 1
+            elif status == 'F2':
+                stats['f2_only'] += 1
             else:
-                c3.fill = RED_FILL
-                if status == 'F1':
-                    stats['f1_only'] += 1
-                elif status == 'F2':
-                    stats['f2_only'] += 1
-                else:
-                    stats['diff'] += 1
+                stats['diff'] += 1
 
             out_col += 3
 
         row += 1
 
-    last_row = row - 1
-
-    # Aplicar bordas grossas às secções (dados)
-    for start_col, end_col in sections:
-        for r in range(4, last_row + 1):
-            for c in range(start_col, end_col + 1):
-                cell = ws.cell(r, c)
-                left = THICK if c == start_col else THIN
-                right = THICK if c == end_col else THIN
-                top = THIN
-                bottom = THICK if r == last_row else THIN
-                cell.border = Border(left=left, right=right, top=top, bottom=bottom)
-
     # Comparar folhas Windows, Walls, Roofs
     for sheet_name in ['Windows', 'Walls', 'Roofs']:
         if sheet_name in wb.sheetnames:
@@ -265,7 +302,8 @@ def create_comparison_from_template(template_path, file1_path, file2_path, outpu
 
     # Mostrar estatísticas
     print(f'\n=== SUMÁRIO ESPACOS ===')
-    print(f'Espaços:        {len(all_spaces)}')
+    print(f'Espaços:        {len(pairs)} emparelhados ({len(matching["renamed"])} renomeados)')
+    print(f'Sem par:        {len(matching["only1"])} em {name1}, {len(matching["only2"])} em {name2}')
     print(f'Campos OK:      {stats["ok"]}')
     print(f'Diferentes:     {stats["diff"]}')
     print(f'Só em {name1}:  {stats["f1_only"]}')
@@ -292,6 +330,8 @@ def compare_simple_sheet(wb, sheet_name, file1_path, file2_path, name1, name2):
         return
 
     print(f'\n{sheet_name}: {len(data1)} em {name1}, {len(data2)} em {name2}')
+    matching = match_rows(data1, data2)
+    print_matching(matching, name1, name2)
 
     # Determinar número de colunas de dados (excluindo F1/F2/?)
     # No template v7, cada campo tem 3 colunas
@@ -310,49 +350,35 @@ def compare_simple_sheet(wb, sheet_name, file1_path, file2_path, name1, name2):
             elif col_type == 1:
                 cell.value = f"{val} ({name2})"
 
-    # Todos os itens (união)
-    all_items = sorted(set(data1.keys()) | set(data2.keys()))
+    # Emparelhados primeiro, depois os que só existem num dos ficheiros
+    items = [(d1, d2) for _, d1, d2 in sorted(matching['matched'], key=lambda m: m[0])]
+    first1 = {d[0]: d for d in reversed(data1)}
+    first2 = {d[0]: d for d in reversed(data2)}
+    items += [(first1[name], []) for name in matching['only1']]
+    items += [([], first2[name]) for name in matching['only2']]
 
     # Escrever dados a partir da linha 4
     row = 4
     stats = {'ok': 0, 'diff': 0}
 
-    for item_name in all_items:
-        d1 = data1.get(item_name, [])
-        d2 = data2.get(item_name, [])
-
-        # Normalizar tamanho
-        max_len = max(len(d1), len(d2), num_fields)
-        while len(d1) < max_len:
-            d1.append(None)
-        while len(d2) < max_len:
-            d2.append(None)
+    styles = {kind: cell_style(wb, kind) for kind in CELL_KINDS}
 
+    for d1, d2 in items:
         out_col = 1
         for i in range(num_fields):
             v1 = d1[i] if i < len(d1) else None
             v2 = d2[i] if i < len(d2) else None
 
-            # Coluna F1
-            c1 = ws.cell(row, out_col, value=v1)
-            c1.fill = FILE1_DATA
-
-            # Coluna F2
-            c2 = ws.cell(row, out_col + 1, value=v2)
-            c2.fill = FILE2_DATA
-
-            # Coluna Check
+            # Colunas F1 / F2 / Check
+            ws.cell(row, out_col, value=v1).style = styles['F1']
+            ws.cell(row, out_col + 1, value=v2).style = styles['F2']
             match, status = compare_values(v1, v2)
-            c3 = ws.cell(row, out_col + 2, value=status)
-            c3.alignment = Alignment(horizontal='center')
+            kind = check_kind(match, status)
+            ws.cell(row, out_col + 2, value=status).style = styles[kind]
 
-            if status == '':
-                c3.fill = CHECK_DATA
-            elif match:
-                c3.fill = GREEN_FILL
+            if kind == 'OK':
                 stats['ok'] += 1
-            else:
-                c3.fill = RED_FILL
+            elif kind == 'DIFF':
                 stats['diff'] += 1
 
             out_col += 3
@@ -0,0 +1,253 @@
+"""
+Comparador directo E3A <-> E3A
+
+Compara dois ficheiros HAP 5.1 sem passar por Excel: os dois E3A são
+descodificados (via hap_cache, por isso um E3A já visto não volta a ser
+descodificado), os espaços, schedules, walls, roofs e windows são
+emparelhados pelo nome (emparelhar.py: dicionário para os nomes iguais,
+aproximado só para as sobras - renomeados são reportados) e os campos são
+comparados coluna a coluna com uma tolerância por tipo de campo. Nos
+schedules é comparado o hash do registo (perfis horários e calendário).
+
+As colunas dos espaços são as mesmas 147 da folha Espacos do extractor
+(IDs já resolvidos em nomes), por isso as diferenças são as mesmas que o
+comparador de Excels encontraria - sem gerar nem ler os dois Excels.
+
+Usage:
+    python comparar_e3a.py <ficheiro1.E3A> <ficheiro2.E3A> [diferencas.csv]
+
+Exemplo:
+    python comparar_e3a.py Malhoa22.E3A Malhoa22_Final.E3A
+    python comparar_e3a.py v1.E3A v2.E3A diferencas.csv
+"""
+
+import sys
+import os
+import csv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extractor'))
+
+from hap_extractor import (
+    space_headers, space_row, window_row, assembly_row,
+    is_listed_window, is_listed_assembly,
+)
+from hap_cache import load_project
+from emparelhar import match_rows, print_matching
+
+# Grupos de colunas da folha Espacos (1-based, como no Excel)
+SPACE_GROUPS = [
+    ('GENERAL', 1, 6), ('PEOPLE', 7, 11), ('LIGHTING', 12, 16), ('EQUIPMENT', 17, 18),
+    ('MISC', 19, 22), ('INFILTRATION', 23, 26), ('FLOOR', 27, 39),
+    ('CEILING', 40, 45), ('PARTITION', 46, 51),
+]
+WALL_FIRST_COL, WALL_FIELDS = 52, 9
+ROOF_FIRST_COL, ROOF_FIELDS = 124, 6
+
+WINDOW_FIELDS = ['U-Value (W/m2K)', 'SHGC', 'Height (m)', 'Width (m)']
+# Os perfis horários e o calendário não são descodificados: compara-se o hash
+# do registo sem o nome (hap_manifest.record_hashes)
+SCHEDULE_FIELDS = ['Perfis/calendário (hash)']
+ASSEMBLY_FIELDS = ['U-Value (W/m2K)', 'Thickness (m)', 'Mass (kg/m2)', 'Absorptivity']
+
+# Tolerância absoluta por tipo de campo (primeira marca encontrada no nome).
+# Os valores descodificados já vêm arredondados, por isso a tolerância é
+# cerca de meio passo de arredondamento.
+FIELD_TOLERANCES = [
+    ('U-Value', 0.001),
+    ('SHGC', 0.001),
+    ('Absorptivity', 0.005),
+    ('R\n', 0.001),
+    ('(m2)', 0.01),
+    ('(m)', 0.005),
+    ('(C)', 0.05),
+    ('(kg/m2)', 0.05),
+    ('(W/m2)', 0.005),
+    ('(W/person)', 0.5),
+    ('(W)', 0.5),
+    ('(ACH)', 0.005),
+    ('(deg)', 0.05),
+]
+DEFAULT_TOLERANCE = 0.01
+
+
+def tolerance_for(label):
+    for marker, tolerance in FIELD_TOLERANCES:
+        if marker in label:
+            return tolerance
+    return DEFAULT_TOLERANCE
+
+
+def space_columns():
+    """Nomes únicos das 147 colunas (com grupo / nº da wall ou roof)"""
+    headers = space_headers()
+    labels = []
+    for col, header in enumerate(headers, 1):
+        if col >= ROOF_FIRST_COL:
+            prefix = f"Roof {(col - ROOF_FIRST_COL) // ROOF_FIELDS + 1}"
+        elif col >= WALL_FIRST_COL:
+            prefix = f"Wall {(col - WALL_FIRST_COL) // WALL_FIELDS + 1}"
+        else:
+            prefix = next(name for name, first, last in SPACE_GROUPS if first <= col <= last)
+        labels.append(f"{prefix} {header}")
+    return labels
+
+
+def label_text(label):
+    return label.replace('\n', ' ')
+
+
+# =============================================================================
+# COMPARAÇÃO
+# =============================================================================
+
+def _blank(v):
+    return v is None or v == ''
+
+
+def values_equal(v1, v2, tolerance):
+    """Igual se ambos vazios/zero, números dentro da tolerância ou texto igual"""
+    if _blank(v1) or v1 == 0:
+        return _blank(v2) or v2 == 0
+    if _blank(v2) or v2 == 0:
+        return False
+    if isinstance(v1, (int, float)) and isinstance(v2, (int, float)):
+        return abs(v1 - v2) <= tolerance
+    return str(v1).strip() == str(v2).strip()
+
+
+def compare_rows(matched, labels):
+    """Compara as linhas emparelhadas coluna a coluna.
+
+    As linhas são transpostas uma vez (zip) e cada coluna é comparada de
+    seguida com a sua tolerância. Retorna [(nome, campo, valor1, valor2)].
+    """
+    if not matched:
+        return []
+    names = [name for name, _, _ in matched]
+    columns1 = list(zip(*(row for _, row, _ in matched)))
+    columns2 = list(zip(*(row for _, _, row in matched)))
+
+    diffs = []
+    for col, label in enumerate(labels, 1):  # coluna 0 = nome
+        tolerance = tolerance_for(label)
+        for name, v1, v2 in zip(names, columns1[col], columns2[col]):
+            if not values_equal(v1, v2, tolerance):
+                diffs.append((name, label_text(label), v1, v2))
+    diffs.sort(key=lambda d: d[0])
+    return diffs
+
+
+def project_rows(project):
+    """Linhas (nome primeiro) de cada secção comparável do projecto"""
+    names = (project['schedules'], project['walls'], project['roofs'], project['windows'])
+    return {
+        'Espacos': [space_row(space, *names) for space in project['spaces'][1:]],
+        'Schedules': [[name, digest] for name, digest in zip(project['schedules'], project['schedules_hash'])
+                      if name],
+        'Walls': [assembly_row(w) for w in project['walls_detail'] if is_listed_assembly(w)],
+        'Roofs': [assembly_row(r) for r in project['roofs_detail'] if is_listed_assembly(r)],
+        'Windows': [window_row(w) for w in project['windows_detail'] if is_listed_window(w)],
+    }
+
+
+SECTION_FIELDS = {
+    'Espacos': None,  # space_columns()
+    'Schedules': SCHEDULE_FIELDS,
+    'Walls': ASSEMBLY_FIELDS,
+    'Roofs': ASSEMBLY_FIELDS,
+    'Windows': WINDOW_FIELDS,
+}
+
+
+def compare_projects(project1, project2):
+    """Compara dois projectos descodificados. Retorna {secção: resultado}."""
+    rows1 = project_rows(project1)
+    rows2 = project_rows(project2)
+    space_labels = space_columns()[1:]
+
+    result = {}
+    for section, fields in SECTION_FIELDS.items():
+        joined = match_rows(rows1[section], rows2[section])
+        labels = space_labels if fields is None else fields
+        joined['diffs'] = compare_rows(joined['matched'], labels)
+        joined['count1'] = len(rows1[section])
+        joined['count2'] = len(rows2[section])
+        result[section] = joined
+    return result
+
+
+def compare_e3a(path1, path2):
+    return compare_projects(load_project(path1), load_project(path2))
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def print_diff(result, name1, name2, limit=30):
+    print("=" * 70)
+    print(f"COMPARAÇÃO E3A: {name1}  vs  {name2}")
+    print("=" * 70)
+
+    total = 0
+    for section, r in result.items():
+        changed = len({d[0] for d in r['diffs']})
+        total += len(r['diffs']) + len(r['only1']) + len(r['only2']) + len(r['renamed'])
+        print(f"\n[{section}] {r['count1']} vs {r['count2']} - "
+              f"{len(r['matched'])} emparelhados, {changed} com diferenças ({len(r['diffs'])} campos)")
+        print_matching(r, name1, name2)
+        for name, field, v1, v2 in r['diffs'][:limit]:
+            print(f"    {name[:24]:24s}  {field[:32]:32s}  {str(v1):>16s} -> {v2}")
+        if len(r['diffs']) > limit:
+            print(f"    ... e mais {len(r['diffs']) - limit} diferenças")
+
+    print()
+    print("=" * 70)
+    print("✓ Ficheiros iguais" if total == 0 else f"✗ {total} diferenças")
+    print("=" * 70)
+    return total
+
+
+def write_csv(result, output_path):
+    """Uma linha por diferença: Secção;Nome;Campo;Ficheiro1;Ficheiro2"""
+    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['Secção', 'Nome', 'Campo', 'Ficheiro1', 'Ficheiro2'])
+        for section, r in result.items():
+            for name in r['only1']:
+                writer.writerow([section, name, '(só no ficheiro 1)', '', ''])
+            for name in r['only2']:
+                writer.writerow([section, name, '(só no ficheiro 2)', '', ''])
+            for name1, name2, _ in r['renamed']:
+                writer.writerow([section, name1, '(renomeado)', name1, name2])
+            for name, field, v1, v2 in r['diffs']:
+                writer.writerow([section, name, field, v1, v2])
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    path1, path2 = sys.argv[1], sys.argv[2]
+    for path in (path1, path2):
+        if not os.path.exists(path):
+            print(f"Erro: Ficheiro não encontrado: {path}")
+            sys.exit(1)
+
+    result = compare_e3a(path1, path2)
+    total = print_diff(result, os.path.basename(path1), os.path.basename(path2))
+
+    if len(sys.argv) > 3:
+        write_csv(result, sys.argv[3])
+        print(f"\nDiferenças gravadas: {sys.argv[3]}")
+
+    sys.exit(0 if total == 0 else 1)
+
+
+if __name__ == '__main__':
+    main()
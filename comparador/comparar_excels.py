@@ -15,6 +15,8 @@ import os
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 
+from emparelhar import match_rows, print_matching
+
 # Cores
 GREEN_FILL = PatternFill(start_color='C6EFCE', end_color='C6EFCE', fill_type='solid')
 RED_FILL = PatternFill(start_color='FFC7CE', end_color='FFC7CE', fill_type='solid')
@@ -82,14 +84,14 @@ def read_excel_data(filepath):
     headers = [ws.cell(3, col).value or '' for col in range(1, 148)]
 
     # Dados (linha 4+)
-    data = {}
+    data = []
     for row in range(4, ws.max_row + 1):
         name = ws.cell(row, 1).value
         if not name or str(name).strip() == '':
             continue
-        name = str(name).strip()
         row_data = [ws.cell(row, col).value for col in range(1, 148)]
-        data[name] = row_data
+        row_data[0] = str(name).strip()
+        data.append(row_data)
 
     return headers, data
 
@@ -146,12 +148,19 @@ def create_comparison_excel(headers, data1, data2, output_path):
     matching_fields = 0
     diff_fields = 0
 
-    # Todos os espaços (união)
-    all_spaces = sorted(set(list(data1.keys()) + list(data2.keys())))
+    # Espaços emparelhados pelo nome (renomeados aparecem como "original -> extraído"),
+    # seguidos dos que só existem num dos ficheiros
+    matching = match_rows(data1, data2)
+    print_matching(matching, 'original', 'extraído')
+    renamed = {a: b for a, b, _ in matching['renamed']}
+    first1 = {d[0]: d for d in reversed(data1)}
+    first2 = {d[0]: d for d in reversed(data2)}
+    entries = [(f'{name} -> {renamed[name]}' if name in renamed else name, orig, extr)
+               for name, orig, extr in sorted(matching['matched'], key=lambda m: m[0])]
+    entries += [(name, first1[name], None) for name in matching['only1']]
+    entries += [(name, None, first2[name]) for name in matching['only2']]
 
-    for space_name in all_spaces:
-        orig = data1.get(space_name)
-        extr = data2.get(space_name)
+    for space_name, orig, extr in entries:
 
         if orig is None:
             # Só existe no extraído
@@ -230,7 +239,10 @@ def create_comparison_excel(headers, data1, data2, output_path):
     ws_sum.cell(4, 2, value=len(data2))
 
     ws_sum.cell(5, 1, value='Espaços em comum:')
-    ws_sum.cell(5, 2, value=len(set(data1.keys()) & set(data2.keys())))
+    ws_sum.cell(5, 2, value=len(matching['matched']))
+
+    ws_sum.cell(6, 1, value='Espaços renomeados:')
+    ws_sum.cell(6, 2, value=len(matching['renamed']))
 
     ws_sum.cell(7, 1, value='Total de campos comparados:')
     ws_sum.cell(7, 2, value=total_fields)
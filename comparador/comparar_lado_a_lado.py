@@ -18,6 +18,8 @@ from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 from openpyxl.utils import get_column_letter
 from openpyxl.utils.cell import range_boundaries
 
+from emparelhar import match_rows, print_matching
+
 # Bordas
 THIN_BORDER = Side(style='thin', color='000000')
 THICK_BORDER = Side(style='thick', color='000000')
@@ -131,14 +133,14 @@ def read_excel_data(filepath):
     headers = [ws.cell(3, col).value or '' for col in range(1, 148)]
 
     # Dados (linha 4+)
-    data = {}
+    data = []
     for row in range(4, ws.max_row + 1):
         name = ws.cell(row, 1).value
         if not name or str(name).strip() == '':
             continue
-        name = str(name).strip()
         row_data = [ws.cell(row, col).value for col in range(1, 148)]
-        data[name] = row_data
+        row_data[0] = str(name).strip()
+        data.append(row_data)
 
     return categories, subcategories, headers, data
 
@@ -276,15 +278,12 @@ def create_comparison_excel(categories, subcategories, headers, data1, data2, ou
     FILE1_DATA = PatternFill(start_color='DCE6F1', end_color='DCE6F1', fill_type='solid')  # Azul muito claro
     FILE2_DATA = PatternFill(start_color='FDE9D9', end_color='FDE9D9', fill_type='solid')  # Laranja muito claro
 
-    all_spaces = sorted(set(data1.keys()) | set(data2.keys()))
-
-    for space_name in all_spaces:
-        orig = data1.get(space_name)
-        extr = data2.get(space_name)
-
-        if orig is None or extr is None:
-            continue  # Skip espaços que não existem em ambos
+    # Espaços emparelhados pelo nome (exacto + renomeados); os sem par não são escritos
+    matching = match_rows(data1, data2)
+    print_matching(matching, name1, name2)
+    all_spaces = sorted(matching['matched'], key=lambda m: m[0])
 
+    for _, orig, extr in all_spaces:
         out_col = 1
         for in_col in range(1, 148):
             v1 = orig[in_col - 1]
@@ -434,7 +433,8 @@ def create_comparison_excel(categories, subcategories, headers, data1, data2, ou
     wb.save(output_path)
 
     print(f'\n=== SUMÁRIO ===')
-    print(f'Espaços:        {len(all_spaces)}')
+    print(f'Espaços:        {len(all_spaces)} emparelhados ({len(matching["renamed"])} renomeados)')
+    print(f'Sem par:        {len(matching["only1"])} em {name1}, {len(matching["only2"])} em {name2}')
     print(f'Campos OK:      {stats["ok"]}')
     print(f'Diferentes:     {stats["diff"]}')
     print(f'Só original:    {stats["orig_only"]}')
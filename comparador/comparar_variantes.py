@@ -0,0 +1,208 @@
+"""
+Comparador N-way - um E3A base contra N variantes
+
+Para séries de revisões ou variantes paramétricas (ex: output do
+gerar_variantes.py): cada E3A é descodificado uma só vez (em paralelo, via
+hap_cache), as linhas de cada variante são emparelhadas com as da base pelo
+nome (emparelhar.py) e cada coluna é comparada contra todas as variantes de
+uma vez. O relatório só tem os campos que mudaram em pelo menos uma variante.
+
+Usage:
+    python comparar_variantes.py <base.E3A> <variante.E3A|pasta> [...] [--csv relatorio.csv] [--workers N]
+
+Exemplo:
+    python comparar_variantes.py Malhoa22.E3A Malhoa22_v2.E3A Malhoa22_v3.E3A
+    python comparar_variantes.py base.E3A variantes/ --csv diferencas.csv
+"""
+
+import sys
+import os
+import csv
+from concurrent.futures import ProcessPoolExecutor
+
+from comparar_e3a import (
+    SECTION_FIELDS, space_columns, label_text, tolerance_for, values_equal,
+    project_rows, load_project,
+)
+from emparelhar import match_rows
+from hap_cli import option  # ../extractor já está no sys.path (comparar_e3a)
+
+MISSING = '(não existe)'
+
+
+def expand_paths(args, base_path):
+    """Ficheiros das variantes (pastas -> todos os .E3A, excepto a base), por ordem"""
+    base = os.path.abspath(base_path)
+    paths = []
+    for arg in args:
+        if os.path.isdir(arg):
+            paths.extend(sorted(os.path.join(arg, f) for f in os.listdir(arg)
+                                if f.lower().endswith('.e3a')))
+        else:
+            paths.append(arg)
+    return [p for p in paths if os.path.abspath(p) != base]
+
+
+def load_projects(paths, workers=None):
+    """Descodifica cada E3A uma vez (processos em paralelo)"""
+    if len(paths) == 1:
+        return [load_project(paths[0])]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(load_project, paths))
+
+
+# =============================================================================
+# COMPARAÇÃO
+# =============================================================================
+
+def compare_section(base_rows, variant_rows, labels):
+    """Compara uma secção da base com todas as variantes.
+
+    As linhas de cada variante são alinhadas com as da base (None se o nome
+    não existir) e cada coluna é percorrida uma vez para todas as variantes.
+    Retorna (diferenças, sumário por variante), com diferenças =
+    [(nome, campo, valor base, [valor em cada variante])] só para os campos
+    que mudaram em alguma variante.
+    """
+    base_names = [str(row[0]).strip() for row in base_rows]
+    position = {}
+    for i, name in enumerate(base_names):
+        position.setdefault(name, i)
+    aligned = []
+    summaries = []
+    extra = []
+
+    for k, rows in enumerate(variant_rows):
+        matching = match_rows(base_rows, rows)
+        by_base = [None] * len(base_rows)
+        for name, _, row in matching['matched']:
+            by_base[position[name]] = row
+        aligned.append(by_base)
+        summaries.append({
+            'renamed': matching['renamed'],
+            'only_base': matching['only1'],
+            'only_variant': matching['only2'],
+            'changed': set(),
+            'fields': 0,
+        })
+        extra.extend((name, k) for name in matching['only2'])
+
+    diffs = []
+    num_variants = len(variant_rows)
+    for col, label in enumerate(labels, 1):  # coluna 0 = nome
+        tolerance = tolerance_for(label)
+        field = label_text(label)
+        for i, base_row in enumerate(base_rows):
+            base_value = base_row[col]
+            values = [rows[i][col] if rows[i] is not None else MISSING for rows in aligned]
+            changed = [k for k in range(num_variants)
+                       if values[k] is not MISSING and not values_equal(base_value, values[k], tolerance)]
+            if not changed:
+                continue
+            for k in changed:
+                summaries[k]['changed'].add(base_names[i])
+                summaries[k]['fields'] += 1
+            diffs.append((base_names[i], field, base_value, values))
+
+    # Existência: nomes só na base ou só nalguma variante
+    for i, name in enumerate(base_names):
+        if position[name] != i:
+            continue
+        values = ['' if rows[i] is not None else MISSING for rows in aligned]
+        if MISSING in values:
+            diffs.append((name, '(existe)', 'sim', values))
+    for name, k in extra:
+        values = [MISSING] * num_variants
+        values[k] = 'sim'
+        diffs.append((name, '(existe)', MISSING, values))
+
+    diffs.sort(key=lambda d: d[0])
+    return diffs, summaries
+
+
+def compare_variants(base_project, variant_projects):
+    """Compara a base com as variantes. Retorna {secção: (diferenças, sumários)}."""
+    base = project_rows(base_project)
+    variants = [project_rows(p) for p in variant_projects]
+    space_labels = space_columns()[1:]
+
+    result = {}
+    for section, fields in SECTION_FIELDS.items():
+        labels = space_labels if fields is None else fields
+        result[section] = compare_section(base[section], [v[section] for v in variants], labels)
+    return result
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def _short(path, width=18):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name if len(name) <= width else name[:width - 3] + '...'
+
+
+def print_summary(result, base_path, variant_paths):
+    print("=" * 70)
+    print(f"BASE: {os.path.basename(base_path)}  -  {len(variant_paths)} variantes")
+    print("=" * 70)
+
+    for section, (diffs, summaries) in result.items():
+        fields = {d[1] for d in diffs if d[1] != '(existe)'}
+        print(f"\n[{section}] {len(diffs)} linhas de diferenças ({len(fields)} campos distintos)")
+        if not diffs:
+            continue
+        print(f"  {'Variante':<18}  {'Alterados':>9}  {'Campos':>6}  {'Renom.':>6}  {'-Base':>5}  {'+Var':>5}")
+        for path, s in zip(variant_paths, summaries):
+            print(f"  {_short(path):<18}  {len(s['changed']):>9}  {s['fields']:>6}  "
+                  f"{len(s['renamed']):>6}  {len(s['only_base']):>5}  {len(s['only_variant']):>5}")
+        if fields:
+            print(f"  Campos alterados: {', '.join(sorted(fields)[:8])}"
+                  f"{' ...' if len(fields) > 8 else ''}")
+
+
+def write_csv(result, variant_paths, output_path):
+    """Secção;Nome;Campo;Base;<variante 1>;...;<variante N> - só campos alterados"""
+    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['Secção', 'Nome', 'Campo', 'Base'] +
+                        [os.path.basename(p) for p in variant_paths])
+        for section, (diffs, _) in result.items():
+            for name, field, base_value, values in diffs:
+                writer.writerow([section, name, field, base_value] + values)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    args = sys.argv[1:]
+    workers, args = option(args, '--workers', int)
+    csv_path, args = option(args, '--csv')
+
+    if len(args) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    base_path = args[0]
+    variant_paths = expand_paths(args[1:], base_path)
+    for path in [base_path] + variant_paths:
+        if not os.path.exists(path):
+            print(f"Erro: Ficheiro não encontrado: {path}")
+            sys.exit(1)
+    if not variant_paths:
+        print("Erro: Nenhuma variante para comparar")
+        sys.exit(1)
+
+    projects = load_projects([base_path] + variant_paths, workers)
+    result = compare_variants(projects[0], projects[1:])
+    print_summary(result, base_path, variant_paths)
+
+    if csv_path:
+        write_csv(result, variant_paths, csv_path)
+        print(f"\nRelatório gravado: {csv_path}")
+
+
+if __name__ == '__main__':
+    main()
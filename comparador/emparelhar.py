@@ -0,0 +1,156 @@
+"""
+Emparelhamento de linhas por nome (espaços, windows, walls, roofs)
+
+Usado pelos comparadores para decidir que linha do ficheiro 1 corresponde
+a que linha do ficheiro 2:
+
+1. Os nomes são normalizados (sem acentos, minúsculas, '_' e espaços
+   repetidos = um espaço) e indexados num dicionário de cada lado - os nomes
+   iguais emparelham em O(n), seja qual for a ordem das linhas.
+2. Só as sobras (nomes sem par exacto) passam pelo emparelhamento
+   aproximado (difflib), limitado a FUZZY_MAX_COMPARISONS comparações e com
+   filtro por comprimento, por isso nunca explode quadraticamente.
+3. O resultado indica os pares, os renomeados (par aproximado), os nomes
+   sem par de cada lado e os nomes repetidos (só o primeiro é comparado).
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from difflib import SequenceMatcher
+
+# Semelhança mínima (0-1) para considerar um nome renomeado
+FUZZY_CUTOFF = 0.85
+
+# Nº máximo de comparações aproximadas (difflib) por emparelhamento
+FUZZY_MAX_COMPARISONS = 20000
+
+_SEPARATORS = re.compile(r'[\s_]+')
+
+
+def normalize_name(name):
+    """Chave de emparelhamento: sem acentos, minúsculas, separadores unificados"""
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _SEPARATORS.sub(' ', text).strip().casefold()
+
+
+def index_names(names):
+    """{chave normalizada: primeiro nome} + lista dos nomes repetidos"""
+    index = {}
+    duplicates = []
+    for name in names:
+        key = normalize_name(name)
+        if key in index:
+            duplicates.append(name)
+        else:
+            index[key] = name
+    return index, duplicates
+
+
+def _fuzzy_pairs(keys1, keys2, cutoff, max_comparisons):
+    """Pares aproximados (score, chave1, chave2) entre as sobras.
+
+    Só compara chaves cujo comprimento permite atingir o cutoff
+    (ratio <= 2*min/(len1+len2)) e pára ao fim de max_comparisons.
+    Retorna (pares, truncado).
+    """
+    by_length = sorted(keys2, key=len)
+    lengths = [len(k) for k in by_length]
+    candidates = []
+    comparisons = 0
+    matcher = SequenceMatcher(autojunk=False)
+
+    for key1 in keys1:
+        n = len(key1)
+        lo = bisect_left(lengths, n * cutoff / (2 - cutoff))
+        hi = bisect_right(lengths, n * (2 - cutoff) / cutoff)
+        matcher.set_seq2(key1)
+        for key2 in by_length[lo:hi]:
+            if comparisons >= max_comparisons:
+                return candidates, True
+            comparisons += 1
+            matcher.set_seq1(key2)
+            if (matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff
+                    and matcher.ratio() >= cutoff):
+                candidates.append((matcher.ratio(), key1, key2))
+    return candidates, False
+
+
+def match_names(names1, names2, cutoff=FUZZY_CUTOFF, max_comparisons=FUZZY_MAX_COMPARISONS):
+    """Emparelha duas listas de nomes.
+
+    Retorna um dict com:
+        pairs        [(nome1, nome2)] pela ordem do ficheiro 1 (exactos + renomeados)
+        renamed      [(nome1, nome2, semelhança)]
+        only1/only2  nomes sem par
+        duplicates1/duplicates2  nomes repetidos (ignorados)
+        truncated    True se o limite de comparações aproximadas foi atingido
+    """
+    index1, duplicates1 = index_names(names1)
+    index2, duplicates2 = index_names(names2)
+
+    matched = {key: key for key in index1 if key in index2}
+    left1 = [key for key in index1 if key not in index2]
+    left2 = [key for key in index2 if key not in index1]
+
+    renamed = []
+    truncated = False
+    if left1 and left2 and cutoff < 1:
+        candidates, truncated = _fuzzy_pairs(left1, left2, cutoff, max_comparisons)
+        used2 = set()
+        for score, key1, key2 in sorted(candidates, key=lambda c: -c[0]):
+            if key1 in matched or key2 in used2:
+                continue
+            matched[key1] = key2
+            used2.add(key2)
+            renamed.append((index1[key1], index2[key2], round(score, 3)))
+
+    used2 = set(matched.values())
+    return {
+        'pairs': [(index1[k1], index2[matched[k1]]) for k1 in index1 if k1 in matched],
+        'renamed': renamed,
+        'only1': [index1[k] for k in index1 if k not in matched],
+        'only2': [index2[k] for k in index2 if k not in used2],
+        'duplicates1': duplicates1,
+        'duplicates2': duplicates2,
+        'truncated': truncated,
+    }
+
+
+def match_rows(rows1, rows2, cutoff=FUZZY_CUTOFF):
+    """match_names sobre linhas cuja coluna 0 é o nome.
+
+    Acrescenta 'matched' = [(nome1, linha1, linha2)] (primeira linha de cada nome).
+    """
+    first1, first2 = {}, {}
+    for first, rows in ((first1, rows1), (first2, rows2)):
+        for row in rows:
+            first.setdefault(str(row[0]).strip(), row)
+    result = match_names([str(r[0]).strip() for r in rows1],
+                         [str(r[0]).strip() for r in rows2], cutoff)
+    result['matched'] = [(name1, first1[name1], first2[name2]) for name1, name2 in result['pairs']]
+    return result
+
+
+def print_matching(result, name1, name2, limit=10):
+    """Resumo do emparelhamento (só mostra o que não é um par exacto)"""
+    sections = [
+        (f"Renomeados ({name1} -> {name2})",
+         [f"{a} -> {b} ({score:.0%})" for a, b, score in result['renamed']]),
+        (f"Só em {name1}", result['only1']),
+        (f"Só em {name2}", result['only2']),
+        (f"Nomes repetidos em {name1} (ignorados)", result['duplicates1']),
+        (f"Nomes repetidos em {name2} (ignorados)", result['duplicates2']),
+    ]
+    for title, items in sections:
+        if not items:
+            continue
+        print(f"  {title}: {len(items)}")
+        for item in items[:limit]:
+            print(f"    - {item}")
+        if len(items) > limit:
+            print(f"    ... e mais {len(items) - limit}")
+    if result['truncated']:
+        print(f"  AVISO: emparelhamento aproximado interrompido ao fim de "
+              f"{FUZZY_MAX_COMPARISONS} comparações")
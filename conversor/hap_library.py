@@ -142,6 +142,7 @@ IMPORTANT NOTES
 """
 
 import struct
+import sys
 import zipfile
 import os
 import tempfile
@@ -823,6 +824,15 @@ def encode_space(space: HAPSpace) -> bytes:
 # HAP PROJECT CLASS
 # =============================================================================
 
+def _journal_module():
+    """Import hap_journal from ../extractor (shared with the editor)."""
+    extractor_dir = str(Path(__file__).resolve().parent.parent / 'extractor')
+    if extractor_dir not in sys.path:
+        sys.path.insert(0, extractor_dir)
+    import hap_journal
+    return hap_journal
+
+
 class HAPProject:
     """Represents a HAP 5.1 project (.E3A file)."""
 
@@ -860,8 +870,16 @@ class HAPProject:
 
         return project
 
-    def save(self, filepath: Optional[str] = None):
-        """Save the project to an .E3A file."""
+    def save(self, filepath: Optional[str] = None, journal: bool = False):
+        """Save the project to an .E3A file.
+
+        With journal=True the byte changes to HAP51SPC.DAT are also recorded
+        in a .hapj journal beside the file (see extractor/hap_journal.py), so
+        the save can be undone, redone or replayed onto another E3A.
+        HAP_JOURNAL=0 disables the journal even when requested.
+        """
+        source = self.filepath
+        old_spc = self._archive_files.get('HAP51SPC.DAT')
         if filepath:
             self.filepath = Path(filepath)
 
@@ -888,6 +906,12 @@ class HAPProject:
             for name, data in self._archive_files.items():
                 zf.writestr(name, data)
 
+        if journal and old_spc is not None:
+            hap_journal = _journal_module()
+            hap_journal.record(str(source) if source else None, str(self.filepath),
+                               {'HAP51SPC.DAT': old_spc}, {'HAP51SPC.DAT': bytes(spc_data)},
+                               'HAPProject.save')
+
     def add_space(self, space: HAPSpace) -> None:
         """Add a new space to the project."""
         self.spaces.append(space)
@@ -3,18 +3,39 @@ Validador de Excel para HAP 5.1
 Verifica campo a campo se o ficheiro Excel está correcto para conversão.
 
 Usage:
-    python validar_excel_hap.py <ficheiro.xlsx>
+    python validar_excel_hap.py <ficheiro.xlsx> [--max-erros N]
+    python validar_excel_hap.py <pasta> [--max-erros N] [--workers N] [--json rel.json] [--junit rel.xml]
 
 Exemplo:
     python validar_excel_hap.py MeuProjeto.xlsx
+    python validar_excel_hap.py MeuProjeto.xlsx --max-erros 50   # Pára aos 50 erros
+    python validar_excel_hap.py entregas/ --junit validacao.xml   # Todos os .xlsx da pasta
+
+Com uma pasta valida os Excels em paralelo (um processo por ficheiro),
+mostra uma tabela resumo e pode gravar o relatório em JSON e/ou JUnit XML.
+O código de saída é 1 se algum ficheiro tiver erros.
+
+As regras de COLUNAS_ESPACOS são compiladas uma vez em validadores por
+coluna e as linhas são lidas em streaming (read_only), por isso a validação
+de Excels grandes é rápida e usa pouca memória.
 """
 
 import sys
 import os
+import io
+import json
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 import openpyxl
 from openpyxl.utils import get_column_letter
 from datetime import datetime
 
+# Funções partilhadas com o extractor (../extractor)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extractor'))
+
+from hap_cli import option, write_junit_report
+
 # =============================================================================
 # ESPECIFICAÇÃO DO FORMATO HAP
 # =============================================================================
@@ -168,18 +189,36 @@ for roof_idx in range(4):
     COLUNAS_ESPACOS[base_col + 5] = {'nome': f'Roof {roof_num} Sky Qty', 'tipo': 'number', 'obrigatorio': False, 'min': 0}
 
 
+# Conjuntos para validação (lookup O(1))
+VALORES_VALIDOS_SET = {chave: frozenset(valores) for chave, valores in VALORES_VALIDOS.items()}
+SCHEDULES_RSECE_SET = frozenset(SCHEDULES_RSECE)
+
+MAX_COLUNA_ESPACOS = max(COLUNAS_ESPACOS)
+
+
+def _linhas(ws, min_row, max_col):
+    """Linhas da sheet como tuplos de valores (numeradas), sempre com max_col valores"""
+    for row, valores in enumerate(ws.iter_rows(min_row=min_row, max_col=max_col, values_only=True), min_row):
+        if len(valores) < max_col:
+            valores = valores + (None,) * (max_col - len(valores))
+        yield row, valores
+
+
 # =============================================================================
 # CLASSE VALIDADOR
 # =============================================================================
 
 class ValidadorHAP:
-    def __init__(self, filepath):
+    def __init__(self, filepath, max_erros=None):
         self.filepath = filepath
+        self.max_erros = max_erros
         self.wb = None
         self.erros = []
         self.avisos = []
         self.ok = []
         self.estatisticas = {}
+        self.erros_campos = 0
+        self.interrompido = False
 
         # Referências carregadas das sheets
         self.windows = set()
@@ -207,10 +246,14 @@ class ValidadorHAP:
             'mensagem': mensagem
         })
 
+    def limite_atingido(self):
+        """True se max_erros foi definido e já há tantos erros (gerais + de campo)"""
+        return self.max_erros is not None and len(self.erros) + self.erros_campos >= self.max_erros
+
     def carregar_excel(self):
-        """Carrega o ficheiro Excel."""
+        """Carrega o ficheiro Excel (só leitura - as linhas são lidas em streaming)."""
         try:
-            self.wb = openpyxl.load_workbook(self.filepath, data_only=True)
+            self.wb = openpyxl.load_workbook(self.filepath, read_only=True, data_only=True)
             self.log_ok('FICHEIRO', f'Ficheiro carregado: {os.path.basename(self.filepath)}')
             return True
         except Exception as e:
@@ -232,43 +275,36 @@ class ValidadorHAP:
             if sheet not in SHEETS_OBRIGATORIAS:
                 self.log_aviso('SHEETS', f'Sheet extra encontrada: "{sheet}"')
 
+    def _nomes_coluna(self, sheet, min_row, coluna):
+        """Nomes não vazios de uma coluna de uma sheet"""
+        nomes = set()
+        for _, valores in _linhas(self.wb[sheet], min_row, coluna):
+            nome = valores[coluna - 1]
+            if nome and str(nome).strip():
+                nomes.add(str(nome).strip())
+        return nomes
+
     def carregar_referencias(self):
         """Carrega os tipos de Windows, Walls, Roofs das respectivas sheets."""
 
         # Windows
         if 'Windows' in self.wb.sheetnames:
-            ws = self.wb['Windows']
-            for row in range(4, ws.max_row + 1):
-                nome = ws.cell(row=row, column=1).value
-                if nome and str(nome).strip():
-                    self.windows.add(str(nome).strip())
+            self.windows = self._nomes_coluna('Windows', 4, 1)
             self.log_ok('REFERENCIAS', f'{len(self.windows)} tipos de Window carregados')
 
         # Walls
         if 'Walls' in self.wb.sheetnames:
-            ws = self.wb['Walls']
-            for row in range(4, ws.max_row + 1):
-                nome = ws.cell(row=row, column=1).value
-                if nome and str(nome).strip():
-                    self.walls.add(str(nome).strip())
+            self.walls = self._nomes_coluna('Walls', 4, 1)
             self.log_ok('REFERENCIAS', f'{len(self.walls)} tipos de Wall carregados')
 
         # Roofs
         if 'Roofs' in self.wb.sheetnames:
-            ws = self.wb['Roofs']
-            for row in range(4, ws.max_row + 1):
-                nome = ws.cell(row=row, column=1).value
-                if nome and str(nome).strip():
-                    self.roofs.add(str(nome).strip())
+            self.roofs = self._nomes_coluna('Roofs', 4, 1)
             self.log_ok('REFERENCIAS', f'{len(self.roofs)} tipos de Roof carregados')
 
-        # Doors (da sheet Tipos, se existir)
+        # Doors (da sheet Tipos, se existir) - Door Types na coluna 8
         if 'Tipos' in self.wb.sheetnames:
-            ws = self.wb['Tipos']
-            for row in range(3, ws.max_row + 1):
-                nome = ws.cell(row=row, column=8).value  # Door Types na coluna 8
-                if nome and str(nome).strip():
-                    self.doors.add(str(nome).strip())
+            self.doors = self._nomes_coluna('Tipos', 3, 8)
             if self.doors:
                 self.log_ok('REFERENCIAS', f'{len(self.doors)} tipos de Door carregados')
 
@@ -279,18 +315,29 @@ class ValidadorHAP:
             return
 
         ws = self.wb['Espacos']
-
-        # Verificar número de colunas
-        if ws.max_column >= 147:
-            self.log_ok('ESTRUTURA', f'Sheet Espacos tem {ws.max_column} colunas (mínimo 147)')
+        cabecalho = []                      # linhas 1-3
+        for row, valores in _linhas(ws, 1, MAX_COLUNA_ESPACOS):
+            cabecalho.append(valores)
+            if row == 3:
+                break
+        while len(cabecalho) < 3:
+            cabecalho.append((None,) * MAX_COLUNA_ESPACOS)
+
+        # Verificar número de colunas (sem <dimension> no XML a sheet em read_only
+        # não sabe o tamanho: calcula-o percorrendo as linhas)
+        if ws.max_column is None:
+            ws.calculate_dimension(force=True)
+        max_column = ws.max_column or 0
+        if max_column >= 147:
+            self.log_ok('ESTRUTURA', f'Sheet Espacos tem {max_column} colunas (mínimo 147)')
         else:
-            self.log_erro('ESTRUTURA', f'Sheet Espacos tem apenas {ws.max_column} colunas (necessário 147)')
+            self.log_erro('ESTRUTURA', f'Sheet Espacos tem apenas {max_column} colunas (necessário 147)')
 
         # Verificar linha 1 - Categorias
         categorias_esperadas = {1: 'GENERAL', 7: 'INTERNALS', 23: 'INFILTRATION',
                                27: 'FLOORS', 40: 'PARTITIONS', 52: 'WALLS', 124: 'ROOFS'}
         for col, esperado in categorias_esperadas.items():
-            valor = ws.cell(row=1, column=col).value
+            valor = cabecalho[0][col - 1]
             if valor == esperado:
                 self.log_ok('ESTRUTURA', f'Linha 1, Col {col}: "{esperado}" OK')
             else:
@@ -299,18 +346,110 @@ class ValidadorHAP:
         # Verificar linha 3 - Headers principais
         headers_check = {1: 'Space Name', 2: 'Floor Area', 6: 'OA Unit', 11: 'Schedule', 16: 'Schedule'}
         for col, esperado in headers_check.items():
-            valor = ws.cell(row=3, column=col).value
+            valor = cabecalho[2][col - 1]
             if valor and esperado.lower() in str(valor).lower():
                 self.log_ok('ESTRUTURA', f'Header Col {col}: contém "{esperado}"')
             else:
                 self.log_aviso('ESTRUTURA', f'Header Col {col}: esperado conter "{esperado}", encontrado "{valor}"')
 
+    def compilar_colunas(self):
+        """Compila COLUNAS_ESPACOS numa lista de (coluna, índice, validador).
+
+        Cada validador recebe o valor da célula e devolve a mensagem de erro
+        (sem o prefixo da linha) ou None. Deve ser chamado depois de
+        carregar_referencias (as referências são capturadas pelos validadores).
+        """
+        return [(col, col - 1, self._compilar_campo(spec)) for col, spec in COLUNAS_ESPACOS.items()]
+
+    def _compilar_campo(self, spec):
+        """Validador de um campo a partir da sua especificação."""
+        obrigatorio = spec.get('obrigatorio')
+        max_length = spec.get('max_length')
+        tipo = spec.get('tipo')
+        verificar = None
+
+        # Validar tipo number
+        if tipo == 'number':
+            minimo = spec.get('min')
+
+            def verificar(valor, valor_str):
+                try:
+                    num = float(valor)
+                except (TypeError, ValueError):
+                    return f'Valor "{valor}" não é número'
+                if minimo is not None and num < minimo:
+                    return f'Valor {num} abaixo do mínimo {minimo}'
+                return None
+
+        # Validar tipo enum
+        elif tipo == 'enum':
+            validos = VALORES_VALIDOS_SET.get(spec.get('valores'), frozenset())
+            sugestao = f'Válidos: {VALORES_VALIDOS.get(spec.get("valores"), [])[:3]}...'
+
+            def verificar(valor, valor_str):
+                if valor_str not in validos:
+                    return f'Valor "{valor_str}" inválido. {sugestao}'
+                return None
+
+        # Validar schedule (e sufixo correcto)
+        elif tipo == 'schedule':
+            sufixo = spec.get('sufixo')
+
+            def verificar(valor, valor_str):
+                if valor_str not in SCHEDULES_RSECE_SET:
+                    return f'Schedule "{valor_str}" não existe'
+                if sufixo and not valor_str.endswith(sufixo) and valor_str != 'Sample Schedule':
+                    return f'Schedule "{valor_str}" deveria terminar em "{sufixo}"'
+                return None
+
+        # Validar referências a Windows / Walls / Roofs / Doors
+        elif tipo in ('ref_window', 'ref_wall', 'ref_roof'):
+            referencias, mensagem = {
+                'ref_window': (self.windows, 'Window "{}" não existe na sheet Windows'),
+                'ref_wall': (self.walls, 'Wall Type "{}" não existe na sheet Walls'),
+                'ref_roof': (self.roofs, 'Roof Type "{}" não existe na sheet Roofs'),
+            }[tipo]
+            referencias = frozenset(referencias)
+
+            def verificar(valor, valor_str):
+                if valor_str not in referencias:
+                    return mensagem.format(valor_str)
+                return None
+
+        elif tipo == 'ref_door':
+            doors = frozenset(self.doors)
+
+            def verificar(valor, valor_str):
+                if doors and valor_str not in doors:
+                    return f'Door Type "{valor_str}" não existe'
+                return None
+
+        def validar(valor):
+            valor_str = '' if valor is None else str(valor).strip()
+
+            # Se vazio: erro se obrigatório, senão OK
+            if valor_str == '':
+                return 'Campo obrigatório vazio' if obrigatorio else None
+
+            if verificar is not None:
+                erro = verificar(valor, valor_str)
+                if erro:
+                    return erro
+
+            # Validar tamanho máximo
+            if max_length is not None and len(valor_str) > max_length:
+                return f'Valor excede {max_length} caracteres'
+            return None
+
+        return validar
+
     def validar_espacos(self):
-        """Valida os dados de cada espaço."""
+        """Valida os dados de cada espaço (linhas lidas em streaming)."""
         if 'Espacos' not in self.wb.sheetnames:
             return
 
         ws = self.wb['Espacos']
+        colunas = self.compilar_colunas()
 
         nomes_encontrados = set()
         total_espacos = 0
@@ -318,8 +457,8 @@ class ValidadorHAP:
         erros_por_coluna = {col: [] for col in COLUNAS_ESPACOS.keys()}
 
         # Iterar sobre cada linha de dados (a partir da linha 4)
-        for row in range(4, ws.max_row + 1):
-            nome = ws.cell(row=row, column=1).value
+        for row, valores in _linhas(ws, 4, MAX_COLUNA_ESPACOS):
+            nome = valores[0]
             if not nome or str(nome).strip() == '':
                 continue
 
@@ -327,17 +466,17 @@ class ValidadorHAP:
             nome_str = str(nome).strip()
 
             # Validar cada coluna
-            for col, spec in COLUNAS_ESPACOS.items():
-                valor = ws.cell(row=row, column=col).value
+            for col, idx, validar in colunas:
+                valor = valores[idx]
 
                 # Contabilizar preenchidos
                 if valor is not None and str(valor).strip() != '':
                     campos_preenchidos[col] += 1
 
-                # Validar campo
-                erro = self._validar_campo(valor, spec, row, col, nome_str)
+                erro = validar(valor)
                 if erro:
-                    erros_por_coluna[col].append(erro)
+                    erros_por_coluna[col].append(f'Linha {row} ({nome_str}): {erro}')
+                    self.erros_campos += 1
 
             # Verificar nome duplicado
             if nome_str in nomes_encontrados:
@@ -348,97 +487,31 @@ class ValidadorHAP:
             if len(nome_str) > 24:
                 self.log_erro('DADOS', f'Nome excede 24 caracteres: "{nome_str}" ({len(nome_str)} chars)', f'Linha {row}')
 
+            if self.limite_atingido():
+                self.interrompido = True
+                self.log_aviso('DADOS', f'Validação interrompida após {self.max_erros} erros', f'Linha {row}')
+                break
+
         self.estatisticas['total_espacos'] = total_espacos
         self.estatisticas['campos_preenchidos'] = campos_preenchidos
         self.estatisticas['erros_por_coluna'] = erros_por_coluna
 
         self.log_ok('DADOS', f'Total de espaços: {total_espacos}')
 
-    def _validar_campo(self, valor, spec, row, col, nome_espaco):
-        """Valida um campo individual."""
-
-        # Se vazio e obrigatório
-        if (valor is None or str(valor).strip() == '') and spec.get('obrigatorio'):
-            return f'Linha {row} ({nome_espaco}): Campo obrigatório vazio'
-
-        # Se vazio e não obrigatório, OK
-        if valor is None or str(valor).strip() == '':
-            return None
-
-        valor_str = str(valor).strip()
-        tipo = spec.get('tipo')
-
-        # Validar tipo number
-        if tipo == 'number':
-            try:
-                num = float(valor)
-                if 'min' in spec and num < spec['min']:
-                    return f'Linha {row} ({nome_espaco}): Valor {num} abaixo do mínimo {spec["min"]}'
-            except:
-                return f'Linha {row} ({nome_espaco}): Valor "{valor}" não é número'
-
-        # Validar tipo enum
-        elif tipo == 'enum':
-            valores_validos = VALORES_VALIDOS.get(spec.get('valores'), [])
-            if valor_str not in valores_validos:
-                return f'Linha {row} ({nome_espaco}): Valor "{valor_str}" inválido. Válidos: {valores_validos[:3]}...'
-
-        # Validar schedule
-        elif tipo == 'schedule':
-            if valor_str not in SCHEDULES_RSECE:
-                return f'Linha {row} ({nome_espaco}): Schedule "{valor_str}" não existe'
-            # Verificar sufixo correcto
-            sufixo = spec.get('sufixo')
-            if sufixo and not valor_str.endswith(sufixo) and valor_str != 'Sample Schedule':
-                return f'Linha {row} ({nome_espaco}): Schedule "{valor_str}" deveria terminar em "{sufixo}"'
-
-        # Validar referência a Window
-        elif tipo == 'ref_window':
-            if valor_str not in self.windows:
-                return f'Linha {row} ({nome_espaco}): Window "{valor_str}" não existe na sheet Windows'
-
-        # Validar referência a Wall
-        elif tipo == 'ref_wall':
-            if valor_str not in self.walls:
-                return f'Linha {row} ({nome_espaco}): Wall Type "{valor_str}" não existe na sheet Walls'
-
-        # Validar referência a Roof
-        elif tipo == 'ref_roof':
-            if valor_str not in self.roofs:
-                return f'Linha {row} ({nome_espaco}): Roof Type "{valor_str}" não existe na sheet Roofs'
-
-        # Validar referência a Door
-        elif tipo == 'ref_door':
-            if self.doors and valor_str not in self.doors:
-                return f'Linha {row} ({nome_espaco}): Door Type "{valor_str}" não existe'
-
-        # Validar tamanho máximo
-        if 'max_length' in spec and len(valor_str) > spec['max_length']:
-            return f'Linha {row} ({nome_espaco}): Valor excede {spec["max_length"]} caracteres'
-
-        return None
-
     def validar_sheet_windows(self):
         """Valida a sheet Windows."""
         if 'Windows' not in self.wb.sheetnames:
             self.log_aviso('WINDOWS', 'Sheet Windows não existe')
             return
 
-        ws = self.wb['Windows']
         count = 0
 
-        for row in range(4, ws.max_row + 1):
-            nome = ws.cell(row=row, column=1).value
+        for row, (nome, u_value, shgc, altura, largura) in _linhas(self.wb['Windows'], 4, 5):
             if not nome:
                 continue
             count += 1
 
             # Verificar campos obrigatórios
-            u_value = ws.cell(row=row, column=2).value
-            shgc = ws.cell(row=row, column=3).value
-            altura = ws.cell(row=row, column=4).value
-            largura = ws.cell(row=row, column=5).value
-
             if u_value is None:
                 self.log_erro('WINDOWS', f'U-Value em falta', f'Linha {row}: {nome}')
             if shgc is None:
@@ -452,50 +525,34 @@ class ValidadorHAP:
 
         self.log_ok('WINDOWS', f'{count} tipos de janela validados')
 
-    def validar_sheet_walls(self):
-        """Valida a sheet Walls."""
-        if 'Walls' not in self.wb.sheetnames:
-            self.log_aviso('WALLS', 'Sheet Walls não existe')
+    def _validar_sheet_assemblies(self, sheet, categoria, descricao):
+        """Valida uma sheet de assemblies (Walls/Roofs): nome + U-Value."""
+        if sheet not in self.wb.sheetnames:
+            self.log_aviso(categoria, f'Sheet {sheet} não existe')
             return
 
-        ws = self.wb['Walls']
         count = 0
 
-        for row in range(4, ws.max_row + 1):
-            nome = ws.cell(row=row, column=1).value
+        for row, (nome, u_value) in _linhas(self.wb[sheet], 4, 2):
             if not nome:
                 continue
             count += 1
 
-            u_value = ws.cell(row=row, column=2).value
             if u_value is None:
-                self.log_erro('WALLS', f'U-Value em falta', f'Linha {row}: {nome}')
+                self.log_erro(categoria, f'U-Value em falta', f'Linha {row}: {nome}')
 
-        self.log_ok('WALLS', f'{count} tipos de parede validados')
+        self.log_ok(categoria, f'{count} tipos de {descricao} validados')
+
+    def validar_sheet_walls(self):
+        """Valida a sheet Walls."""
+        self._validar_sheet_assemblies('Walls', 'WALLS', 'parede')
 
     def validar_sheet_roofs(self):
         """Valida a sheet Roofs."""
-        if 'Roofs' not in self.wb.sheetnames:
-            self.log_aviso('ROOFS', 'Sheet Roofs não existe')
-            return
-
-        ws = self.wb['Roofs']
-        count = 0
-
-        for row in range(4, ws.max_row + 1):
-            nome = ws.cell(row=row, column=1).value
-            if not nome:
-                continue
-            count += 1
-
-            u_value = ws.cell(row=row, column=2).value
-            if u_value is None:
-                self.log_erro('ROOFS', f'U-Value em falta', f'Linha {row}: {nome}')
-
-        self.log_ok('ROOFS', f'{count} tipos de cobertura validados')
+        self._validar_sheet_assemblies('Roofs', 'ROOFS', 'cobertura')
 
     def executar(self):
-        """Executa todas as validações."""
+        """Executa todas as validações (pára quando max_erros é atingido)."""
         print("=" * 70)
         print("VALIDADOR HAP 5.1 - Verificação de Excel")
         print("=" * 70)
@@ -504,13 +561,19 @@ class ValidadorHAP:
         if not self.carregar_excel():
             return False
 
-        self.validar_sheets()
-        self.carregar_referencias()
-        self.validar_estrutura_espacos()
-        self.validar_espacos()
-        self.validar_sheet_windows()
-        self.validar_sheet_walls()
-        self.validar_sheet_roofs()
+        try:
+            for passo in (self.validar_sheets, self.carregar_referencias,
+                          self.validar_estrutura_espacos, self.validar_espacos,
+                          self.validar_sheet_windows, self.validar_sheet_walls,
+                          self.validar_sheet_roofs):
+                passo()
+                if self.limite_atingido():
+                    if not self.interrompido:
+                        self.interrompido = True
+                        self.log_aviso('VALIDAÇÃO', f'Validação interrompida após {self.max_erros} erros')
+                    break
+        finally:
+            self.wb.close()
 
         return True
 
@@ -659,25 +722,131 @@ class ValidadorHAP:
                 print(f"  Col {col:3d} [{obrig}] {spec['nome'][:30]:30s} {status}")
 
 
+# =============================================================================
+# VALIDAR PASTA
+# =============================================================================
+
+def _validar_ficheiro(args):
+    """Valida um Excel num processo do pool (sem output na consola)."""
+    filepath, max_erros = args
+    inicio = time.perf_counter()
+    validador = ValidadorHAP(filepath, max_erros=max_erros)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            validador.executar()
+    except Exception as e:  # Um ficheiro com problemas não impede o relatório da pasta
+        erro = f"Erro ao validar ficheiro: {type(e).__name__}: {e}"
+        return {
+            'ficheiro': os.path.basename(filepath),
+            'caminho': filepath,
+            'erros': [{'categoria': 'Ficheiro', 'mensagem': erro, 'detalhe': None}],
+            'avisos': [],
+            'erros_campos': [],
+            'total_espacos': 0,
+            'interrompido': False,
+            'erro': erro,
+            'segundos': round(time.perf_counter() - inicio, 3),
+        }
+
+    erros_por_coluna = validador.estatisticas.get('erros_por_coluna', {})
+    return {
+        'ficheiro': os.path.basename(filepath),
+        'caminho': filepath,
+        'erros': validador.erros,
+        'avisos': validador.avisos,
+        'erros_campos': [f"Col {col} ({COLUNAS_ESPACOS[col]['nome']}) {erro}"
+                         for col, erros in erros_por_coluna.items() for erro in erros],
+        'total_espacos': validador.estatisticas.get('total_espacos', 0),
+        'interrompido': validador.interrompido,
+        'erro': None,
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
+
+
+def validar_pasta(pasta, max_erros=None, workers=None):
+    """Valida todos os .xlsx da pasta em paralelo. Retorna os resultados (ordenados)."""
+    ficheiros = sorted(os.path.join(pasta, f) for f in os.listdir(pasta)
+                       if f.lower().endswith('.xlsx') and not f.startswith('~$'))
+    if not ficheiros:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_validar_ficheiro, [(f, max_erros) for f in ficheiros]))
+
+
+def _texto(item):
+    return f"[{item['categoria']}] {item['mensagem']}" + (f" ({item['detalhe']})" if item['detalhe'] else '')
+
+
+def imprimir_resumo(resultados, titulo):
+    largura = max([len(r['ficheiro']) for r in resultados] + [8])
+    print("=" * 70)
+    print(titulo)
+    print("=" * 70)
+    print(f"  {'Ficheiro':<{largura}}  {'Espaços':>7}  {'Erros':>6}  {'Campos':>6}  {'Avisos':>6}  {'Tempo':>7}  Estado")
+    print(f"  {'-'*largura}  {'-'*7}  {'-'*6}  {'-'*6}  {'-'*6}  {'-'*7}  ------")
+    for r in resultados:
+        estado = 'OK' if not r['erros'] else 'ERRO'
+        if r['interrompido']:
+            estado += ' (interrompido)'
+        print(f"  {r['ficheiro']:<{largura}}  {r['total_espacos']:>7}  {len(r['erros']):>6}  "
+              f"{len(r['erros_campos']):>6}  {len(r['avisos']):>6}  {r['segundos']:>6.2f}s  {estado}")
+    com_erros = sum(1 for r in resultados if r['erros'])
+    print()
+    print(f"  {len(resultados)} ficheiros: {len(resultados) - com_erros} OK, {com_erros} com erros")
+
+
+def gravar_json(resultados, caminho):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({'gerado': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'), 'ficheiros': resultados},
+                  f, ensure_ascii=False, indent=2, default=str)
+
+
+def casos_junit(resultados):
+    """Resultados da pasta no formato de hap_cli.write_junit_report"""
+    return [{'name': r['ficheiro'], 'seconds': r['segundos'], 'error': r['erro'],
+             'failures': [_texto(e) for e in r['erros']],
+             'output': [_texto(a) for a in r['avisos']] + r['erros_campos']} for r in resultados]
+
+
 # =============================================================================
 # MAIN
 # =============================================================================
 
 def main():
-    if len(sys.argv) < 2:
+    args = sys.argv[1:]
+    max_erros, args = option(args, '--max-erros', int)
+    workers, args = option(args, '--workers', int)
+    json_path, args = option(args, '--json')
+    junit_path, args = option(args, '--junit')
+
+    if len(args) < 1:
         print(__doc__)
         print("\nErro: Especifique o ficheiro Excel a validar")
         print("\nExemplo:")
         print("  python validar_excel_hap.py MeuProjeto.xlsx")
         sys.exit(1)
 
-    filepath = sys.argv[1]
+    filepath = args[0]
 
     if not os.path.exists(filepath):
         print(f"Erro: Ficheiro não encontrado: {filepath}")
         sys.exit(1)
 
-    validador = ValidadorHAP(filepath)
+    if os.path.isdir(filepath):
+        resultados = validar_pasta(filepath, max_erros=max_erros, workers=workers)
+        if not resultados:
+            print(f"Erro: Nenhum ficheiro .xlsx em {filepath}")
+            sys.exit(1)
+        imprimir_resumo(resultados, f"VALIDAÇÃO: {filepath}")
+        if json_path:
+            gravar_json(resultados, json_path)
+            print(f"\nRelatório JSON: {json_path}")
+        if junit_path:
+            write_junit_report(casos_junit(resultados), junit_path, 'validar_excel_hap')
+            print(f"Relatório JUnit: {junit_path}")
+        sys.exit(0 if not any(r['erros'] for r in resultados) else 1)
+
+    validador = ValidadorHAP(filepath, max_erros=max_erros)
 
     if validador.executar():
         validador.gerar_relatorio()
@@ -11,6 +11,24 @@ Fluxo:
 1. Extrair E3A para Excel: python editor_e3a.py extrair <ficheiro.E3A> <output.xlsx>
 2. Editar valores na coluna REF do Excel
 3. Aplicar alterações: python editor_e3a.py aplicar <original.E3A> <editor.xlsx> <output.E3A>
+
+Alternativa ao Excel - ficheiro de patch (CSV/JSON) aplicado a um ou mais E3A:
+    python editor_e3a.py patch <alteracoes.csv|json> <pasta_output> <a.E3A> [b.E3A ...]
+
+    CSV com colunas kind,name,field,value (valor em SI), por exemplo:
+        kind,name,field,value
+        space,Sala1,area_m2,60
+        space,Sala1,wall1_area_m2,12.5
+        window,V1,u_value,2.8
+        wall,Parede Ext,u_value,0.45
+
+    Com separador ';' os valores podem ter vírgula decimal (0,45).
+    Alterações que não podem ser aplicadas (nome inexistente, campo não
+    editável, valor inválido) são listadas e o código de saída é 1.
+
+Cada E3A gravado tem um journal (.hapj) com as alterações byte a byte:
+    python ../extractor/hap_journal.py desfazer|refazer|mostrar <output.E3A>
+Com HAP_JOURNAL=0 o journal não é gravado.
 """
 
 import sys
@@ -19,10 +37,22 @@ import struct
 import zipfile
 import tempfile
 import re
+import csv
+import json
 import math
-import subprocess
+import copy
 import openpyxl
-from openpyxl.styles import PatternFill, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Alignment, NamedStyle
+
+# Descodificação partilhada com o extractor (../extractor)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extractor'))
+
+from hap_extractor import (
+    space_row, window_row, assembly_row, is_listed_window, is_listed_assembly,
+)
+from hap_cache import load_project
+import hap_journal
 
 # Constantes
 SPACE_RECORD_SIZE = 682
@@ -213,74 +243,95 @@ def extract_name(raw_bytes, max_len=24):
 # EXTRACÇÃO PARA EXCEL
 # =============================================================================
 
+def _copy_template_header(ws_out, ws_template, header_rows=3):
+    """Copia as linhas de header do template (valores, estilos, larguras, freeze)"""
+    for key, dim in ws_template.column_dimensions.items():
+        if dim.width:
+            ws_out.column_dimensions[key].width = dim.width
+    ws_out.freeze_panes = ws_template.freeze_panes
+
+    for row in ws_template.iter_rows(min_row=1, max_row=header_rows):
+        out_row = []
+        for tcell in row:
+            cell = WriteOnlyCell(ws_out, value=tcell.value)
+            if tcell.has_style:
+                cell.font = copy.copy(tcell.font)
+                cell.fill = copy.copy(tcell.fill)
+                cell.border = copy.copy(tcell.border)
+                cell.alignment = copy.copy(tcell.alignment)
+                cell.number_format = tcell.number_format
+            out_row.append(cell)
+        ws_out.append(out_row)
+
+
+def _register_fill_styles(wb):
+    """Named styles PREV/REF/CHECK (atribuir por nome evita comparar estilos célula a célula)"""
+    for name, fill in (('PREV', PREV_FILL), ('REF', REF_FILL), ('CHECK', CHECK_FILL)):
+        wb.add_named_style(NamedStyle(name=name, fill=fill))
+
+
+def _prev_ref_check_row(ws_out, values, max_cols=None):
+    """Uma linha PREV/REF/CHECK: valor em PREV, REF e CHECK vazios"""
+    if max_cols is not None:
+        values = values[:max_cols // 3]
+    out_row = []
+    for value in values:
+        prev = WriteOnlyCell(ws_out, value=None if value == '' else value)
+        prev.style = 'PREV'
+        ref = WriteOnlyCell(ws_out)
+        ref.style = 'REF'
+        check = WriteOnlyCell(ws_out)
+        check.style = 'CHECK'
+        out_row.extend([prev, ref, check])
+    ws_out.append(out_row)
+
+
 def extract_for_editing(e3a_path, output_xlsx):
     """Extrai E3A para Excel com formato PREV/REF"""
 
     print(f"A extrair {e3a_path} para edição...")
 
-    extractor_path = os.path.join(os.path.dirname(__file__), '..', 'extractor', 'hap_extractor.py')
-    temp_xlsx = output_xlsx.replace('.xlsx', '_temp.xlsx')
-
-    result = subprocess.run(
-        [sys.executable, extractor_path, e3a_path, temp_xlsx],
-        capture_output=True, text=True
-    )
-    if result.returncode != 0:
-        print(f"Erro no extractor: {result.stderr}")
-        return
-    print(result.stdout)
-
     template_path = os.path.join(os.path.dirname(__file__), '..', 'comparador', 'Template_Comparacao.xlsx')
 
     if not os.path.exists(template_path):
         print(f"Template não encontrado: {template_path}")
         return
 
+    # Descodificar directamente (sem subprocesso nem Excel temporário)
+    data = load_project(e3a_path)
+    schedules, walls, roofs, windows = data['schedules'], data['walls'], data['roofs'], data['windows']
+
+    print(f"  Espacos: {len(data['spaces'])} (incluindo Default Space)")
+    print(f"  Windows: {len(windows)}  Walls: {len(walls)}  Roofs: {len(roofs)}")
+
     wb_template = openpyxl.load_workbook(template_path)
-    wb_data = openpyxl.load_workbook(temp_xlsx)
+    wb = openpyxl.Workbook(write_only=True)
+    _register_fill_styles(wb)
 
     # Processar Espacos
-    ws = wb_template['Comparacao']
-    ws_data = wb_data['Espacos']
-
-    row_out = 4
-    for row_in in range(4, ws_data.max_row + 1):
-        space_name = ws_data.cell(row_in, 1).value
-        if not space_name or str(space_name).strip() == '':
+    ws = wb.create_sheet('Comparacao')
+    _copy_template_header(ws, wb_template['Comparacao'])
+    for space in data['spaces']:
+        if space['_index'] == 0 or not space['name']:  # Skip Default Space
             continue
-
-        out_col = 1
-        for in_col in range(1, 148):
-            value = ws_data.cell(row_in, in_col).value
-            ws.cell(row_out, out_col, value=value).fill = PREV_FILL
-            ws.cell(row_out, out_col + 1).fill = REF_FILL
-            ws.cell(row_out, out_col + 2).fill = CHECK_FILL
-            out_col += 3
-        row_out += 1
+        _prev_ref_check_row(ws, space_row(space, schedules, walls, roofs, windows))
 
     # Processar Windows, Walls, Roofs
-    for sheet_name in ['Windows', 'Walls', 'Roofs']:
-        if sheet_name in wb_data.sheetnames and sheet_name in wb_template.sheetnames:
-            ws_t = wb_template[sheet_name]
-            ws_d = wb_data[sheet_name]
-            row_out = 4
-            for row_in in range(4, ws_d.max_row + 1):
-                if not ws_d.cell(row_in, 1).value:
-                    continue
-                out_col = 1
-                for in_col in range(1, ws_d.max_column + 1):
-                    if out_col > ws_t.max_column:
-                        break
-                    value = ws_d.cell(row_in, in_col).value
-                    ws_t.cell(row_out, out_col, value=value).fill = PREV_FILL
-                    ws_t.cell(row_out, out_col + 1).fill = REF_FILL
-                    ws_t.cell(row_out, out_col + 2).fill = CHECK_FILL
-                    out_col += 3
-                row_out += 1
-
-    wb_template.save(output_xlsx)
-    if os.path.exists(temp_xlsx):
-        os.remove(temp_xlsx)
+    sheets = [
+        ('Windows', [window_row(w) for w in data['windows_detail'] if is_listed_window(w)]),
+        ('Walls', [assembly_row(w) for w in data['walls_detail'] if is_listed_assembly(w)]),
+        ('Roofs', [assembly_row(r) for r in data['roofs_detail'] if is_listed_assembly(r)]),
+    ]
+    for sheet_name, rows in sheets:
+        if sheet_name not in wb_template.sheetnames:
+            continue
+        ws_t = wb_template[sheet_name]
+        ws = wb.create_sheet(sheet_name)
+        _copy_template_header(ws, ws_t)
+        for values in rows:
+            _prev_ref_check_row(ws, values, ws_t.max_column)
+
+    wb.save(output_xlsx)
 
     print(f"\nFicheiro criado: {output_xlsx}")
     print(f"  - Coluna PREV (amarelo): valores actuais")
@@ -288,574 +339,540 @@ def extract_for_editing(e3a_path, output_xlsx):
 
 
 # =============================================================================
-# APLICAR ALTERAÇÕES
+# MAPAS DE CAMPOS
 # =============================================================================
 
-def apply_changes(e3a_path, editor_xlsx, output_path):
-    """Aplica alterações do Excel ao E3A"""
+# Mapeamento de campos dos espaços (field_index 1-147) -> (offset, type, conversion)
+FIELD_MAP = {
+    # GENERAL
+    1: (0, 's24', None),           # Space Name
+    2: (24, 'f', m2_to_ft2),       # Floor Area
+    3: (28, 'f', m_to_ft),         # Ceiling Height
+    4: (32, 'f', kg_m2_to_lb_ft2), # Building Weight
+    5: (46, 'f', encode_oa),       # Outdoor Air (valor) - codificação especial
+    # 6: OA Unit - código
+
+    # PEOPLE
+    7: (580, 'f', None),           # Occupancy
+    # 8: Activity Level - código
+    9: (586, 'f', w_to_btu),       # Sensible
+    10: (590, 'f', w_to_btu),      # Latent
+    # 11: Schedule
+
+    # LIGHTING
+    12: (600, 'f', None),          # Task Lighting
+    13: (606, 'f', None),          # General Lighting
+    # 14: Fixture Type
+    15: (610, 'f', None),          # Ballast Mult
+    # 16: Schedule
+
+    # EQUIPMENT
+    17: (656, 'f', w_m2_to_w_ft2), # Equipment W/m2
+    # 18: Schedule
+
+    # MISC
+    19: (632, 'f', w_to_btu),      # Sensible
+    20: (636, 'f', w_to_btu),      # Latent
+    # 21, 22: Schedules
+
+    # INFILTRATION
+    # 23: Method
+    24: (556, 'f', None),          # Design Clg ACH
+    25: (562, 'f', None),          # Design Htg ACH
+    26: (568, 'f', None),          # Energy ACH
+
+    # FLOORS
+    # 27: Floor Type
+    28: (494, 'f', m2_to_ft2),     # Floor Area
+    29: (498, 'f', u_si_to_ip),    # U-Value
+    30: (502, 'f', m_to_ft),       # Exp Perim
+    31: (506, 'f', r_si_to_ip),    # Edge R
+    32: (510, 'f', m_to_ft),       # Depth
+    33: (514, 'f', u_si_to_ip),    # Bsmt Wall U
+    34: (518, 'f', r_si_to_ip),    # Wall Ins R
+    35: (522, 'f', m_to_ft),       # Ins Depth
+    36: (526, 'f', c_to_f),        # Unc Max
+    37: (530, 'f', c_to_f),        # Out Max
+    38: (534, 'f', c_to_f),        # Unc Min
+    39: (538, 'f', c_to_f),        # Out Min
+
+    # PARTITIONS - CEILING
+    40: (442, 'f', m2_to_ft2),     # Area
+    41: (446, 'f', u_si_to_ip),    # U-Value
+    42: (450, 'f', c_to_f),        # Unc Max
+    43: (454, 'f', c_to_f),        # Out Max
+    44: (458, 'f', c_to_f),        # Unc Min
+    45: (462, 'f', c_to_f),        # Out Min
+
+    # PARTITIONS - WALL
+    46: (468, 'f', m2_to_ft2),     # Area
+    47: (472, 'f', u_si_to_ip),    # U-Value
+    48: (476, 'f', c_to_f),        # Unc Max
+    49: (480, 'f', c_to_f),        # Out Max
+    50: (484, 'f', c_to_f),        # Unc Min
+    51: (488, 'f', c_to_f),        # Out Min
+}
+
+# WALLS (52-123) - 8 walls x 9 campos cada
+# Estrutura do Wall Block (34 bytes):
+#   +0-1: Exposure/Direction (H)
+#   +2-5: Gross Area (f)
+#   +6-7: Wall Type ID (H) <- ESTE é o campo do Wall Type!
+#   +8-9: Window 1 ID, etc.
+# Campos Excel: Exposure(52), Gross Area(53), Wall Type(54), ...
+for _w in range(8):
+    _base_field = 52 + _w * 9
+    _wall_offset = WALL_BLOCK_START + _w * WALL_BLOCK_SIZE
+    FIELD_MAP[_base_field + 1] = (_wall_offset + 2, 'f', m2_to_ft2)  # Gross Area (campo 53, 62, ...)
+    FIELD_MAP[_base_field + 2] = (_wall_offset + 6, 'wall_idx', None)  # Wall Type no offset +6 (campo 54, 63, ...)
+
+# ROOFS (124-147) - 4 roofs x 6 campos
+# Estrutura Roof Block (24 bytes): +0=Exposure, +4=Area, +8=Roof Type ID
+for _r in range(4):
+    _base_field = 124 + _r * 6
+    _roof_offset = ROOF_BLOCK_START + _r * ROOF_BLOCK_SIZE
+    FIELD_MAP[_base_field + 1] = (_roof_offset + 4, 'f', m2_to_ft2)  # Gross Area (campo 125, 131, ...)
+    FIELD_MAP[_base_field + 2] = (_roof_offset + 8, 'roof_idx', None)  # Roof Type no offset +8 (campo 126, 132, ...)
+
+# Infiltration: flag ACH mode (2) nos offsets 554/560/566
+INFIL_FLAG_OFFSETS = {24: 554, 25: 560, 26: 566}
+
+# Windows - campos: Nome(1), U-Value(2), SHGC(3), Altura(4), Largura(5)
+WIN_MAP = {
+    2: (269, 'f', u_si_to_ip),    # U-Value
+    3: (273, 'f', None),          # SHGC (offset 273, confirmado)
+    4: (257, 'f', m_to_ft),       # Altura
+    5: (261, 'f', m_to_ft),       # Largura
+}
+
+# Nomes dos campos para ficheiros de patch (iguais às chaves do extractor)
+SPACE_FIELD_NAMES = [
+    'name', 'area_m2', 'height_m', 'weight_kg_m2', 'oa_value', 'oa_unit',
+    'occupancy', 'activity', 'sensible_w', 'latent_w', 'people_schedule',
+    'task_light_w', 'gen_light_w', 'fixture_type', 'ballast', 'light_schedule',
+    'equip_w_m2', 'equip_schedule',
+    'misc_sensible_w', 'misc_latent_w', 'misc_sens_schedule', 'misc_lat_schedule',
+    'infil_method', 'design_clg_ach', 'design_htg_ach', 'energy_ach',
+    'floor_type', 'floor_area_m2', 'floor_u_value', 'floor_exp_perim', 'floor_edge_r',
+    'floor_depth', 'floor_bsmt_wall_u', 'floor_wall_ins_r', 'floor_ins_depth',
+    'floor_unc_max', 'floor_out_max', 'floor_unc_min', 'floor_out_min',
+    'ceil_area_m2', 'ceil_u_value', 'ceil_unc_max', 'ceil_out_max', 'ceil_unc_min', 'ceil_out_min',
+    'wall_part_area_m2', 'wall_part_u_value', 'wall_part_unc_max', 'wall_part_out_max',
+    'wall_part_unc_min', 'wall_part_out_min',
+]
+for _w in range(1, 9):
+    SPACE_FIELD_NAMES.extend(f'wall{_w}_{f}' for f in (
+        'exposure', 'area_m2', 'wall_type', 'window1', 'window1_qty',
+        'window2', 'window2_qty', 'door', 'door_qty'))
+for _r in range(1, 5):
+    SPACE_FIELD_NAMES.extend(f'roof{_r}_{f}' for f in (
+        'exposure', 'area_m2', 'slope', 'roof_type', 'skylight', 'skylight_qty'))
+
+WINDOW_FIELD_NAMES = ['name', 'u_value', 'shgc', 'height', 'width']
+ASSEMBLY_FIELD_NAMES = ['name', 'u_value', 'thickness', 'mass', 'absorptivity']
+
+# Tipo de objecto -> (folha do Excel de edição, nomes dos campos)
+EDIT_KINDS = {
+    'space': ('Comparacao', SPACE_FIELD_NAMES),
+    'window': ('Windows', WINDOW_FIELD_NAMES),
+    'wall': ('Walls', ASSEMBLY_FIELD_NAMES),
+    'roof': ('Roofs', ASSEMBLY_FIELD_NAMES),
+}
+
+# Membros do E3A que o editor pode alterar
+EDITABLE_MEMBERS = ('HAP51SPC.DAT', 'HAP51WIN.DAT', 'HAP51WAL.DAT', 'HAP51ROF.DAT', 'HAP51INX.MDB')
 
-    print(f"A aplicar alterações de {editor_xlsx}...")
 
-    wb = openpyxl.load_workbook(editor_xlsx, data_only=True)
+# =============================================================================
+# LER ALTERAÇÕES (Excel PREV/REF ou ficheiro de patch)
+# =============================================================================
+# Uma alteração é um tuplo (kind, nome, field_index, valor SI), com
+# kind em EDIT_KINDS e field_index igual ao índice do campo (1-147 nos
+# espaços, 1-5 em windows/walls/roofs).
+
+def read_workbook_edits(editor_xlsx):
+    """Lê as alterações (células REF preenchidas) do Excel de edição"""
+    wb = openpyxl.load_workbook(editor_xlsx, data_only=True, read_only=True)
+    edits = []
+    for kind, (sheet_name, names) in EDIT_KINDS.items():
+        if sheet_name not in wb.sheetnames:
+            continue
+        for row in wb[sheet_name].iter_rows(min_row=4, values_only=True):
+            if not row or not row[0]:  # Nome está no PREV
+                continue
+            # REF de cada campo está na 2ª das 3 colunas (PREV/REF/CHECK); colunas
+            # depois do último campo (notas do utilizador) são ignoradas
+            for ref_col in range(1, min(len(row), len(names) * 3), 3):
+                value = row[ref_col]
+                if value is None or value == '':
+                    continue
+                edits.append((kind, str(row[0]), ref_col // 3 + 1, value))
+    wb.close()
+    return edits
 
-    # Ler ficheiros do E3A
-    with zipfile.ZipFile(e3a_path, 'r') as zf:
-        spc_data = bytearray(zf.read('HAP51SPC.DAT'))
-        win_data = bytearray(zf.read('HAP51WIN.DAT')) if 'HAP51WIN.DAT' in zf.namelist() else None
-        wal_data = bytearray(zf.read('HAP51WAL.DAT')) if 'HAP51WAL.DAT' in zf.namelist() else None
-        rof_data = bytearray(zf.read('HAP51ROF.DAT')) if 'HAP51ROF.DAT' in zf.namelist() else None
-        inx_data = bytearray(zf.read('HAP51INX.MDB')) if 'HAP51INX.MDB' in zf.namelist() else None
 
-    total_changes = 0
+def _field_index(kind, field):
+    """Converte nome ou número de campo para field_index"""
+    names = EDIT_KINDS[kind][1]
+    field = str(field).strip()
+    if field.isdigit() and 1 <= int(field) <= len(names):
+        return int(field)
+    if field in names:
+        return names.index(field) + 1
+    raise ValueError(f"Campo desconhecido para '{kind}': {field}")
 
-    # =========================================================================
-    # MAPEAR WALL ASSEMBLIES (nome -> indice)
-    # =========================================================================
-    wall_name_to_idx = {}
-    if wal_data:
-        num_walls = len(wal_data) // WALL_ASSEMBLY_SIZE
-        for i in range(num_walls):
-            offset = i * WALL_ASSEMBLY_SIZE
-            name = wal_data[offset:offset+100].split(b'\x00')[0].decode('latin-1').strip()
-            wall_name_to_idx[name] = i
 
-    # Lista para guardar alteracoes de wall type para actualizar Space_Wall_Links
-    wall_type_changes = []  # [(space_index, wall_idx), ...]
+PATCH_COLUMNS = ('kind', 'name', 'field', 'value')
 
-    # =========================================================================
-    # MAPEAR ROOF ASSEMBLIES (nome -> indice)
-    # =========================================================================
-    roof_name_to_idx = {}
-    if rof_data:
-        num_roofs = len(rof_data) // ROOF_ASSEMBLY_SIZE
-        for i in range(num_roofs):
-            offset = i * ROOF_ASSEMBLY_SIZE
-            name = rof_data[offset:offset+100].split(b'\x00')[0].decode('latin-1').strip()
-            roof_name_to_idx[name] = i
+# Número com vírgula decimal (CSV com separador ';', ex. Excel em português)
+DECIMAL_COMMA = re.compile(r'\s*[+-]?\d*,\d+\s*')
 
-    # Lista para guardar alteracoes de roof type
-    roof_type_changes = []  # [(space_name, space_idx, roof_idx), ...]
 
-    # =========================================================================
-    # ESPAÇOS
-    # =========================================================================
-    ws = wb['Comparacao']
-
-    # Mapear nomes para offsets e indices
-    space_offsets = {}
-    space_indices = {}  # nome -> indice (para Space_Wall_Links)
-    num_spaces = len(spc_data) // SPACE_RECORD_SIZE
-    for i in range(num_spaces):
-        offset = i * SPACE_RECORD_SIZE
-        name = extract_name(spc_data[offset:offset+100])
-        if name and not name.startswith('Default'):
-            space_offsets[name] = offset
-            space_indices[name] = i  # indice 0-based, SpaceIndex usa 1-based (i+1)
-
-    # Mapeamento de campos (field_index 1-147) -> (offset, type, conversion)
-    FIELD_MAP = {
-        # GENERAL
-        1: (0, 's24', None),           # Space Name
-        2: (24, 'f', m2_to_ft2),       # Floor Area
-        3: (28, 'f', m_to_ft),         # Ceiling Height
-        4: (32, 'f', kg_m2_to_lb_ft2), # Building Weight
-        5: (46, 'f', encode_oa),       # Outdoor Air (valor) - codificação especial
-        # 6: OA Unit - código
-
-        # PEOPLE
-        7: (580, 'f', None),           # Occupancy
-        # 8: Activity Level - código
-        9: (586, 'f', w_to_btu),       # Sensible
-        10: (590, 'f', w_to_btu),      # Latent
-        # 11: Schedule
-
-        # LIGHTING
-        12: (600, 'f', None),          # Task Lighting
-        13: (606, 'f', None),          # General Lighting
-        # 14: Fixture Type
-        15: (610, 'f', None),          # Ballast Mult
-        # 16: Schedule
-
-        # EQUIPMENT
-        17: (656, 'f', w_m2_to_w_ft2), # Equipment W/m2
-        # 18: Schedule
-
-        # MISC
-        19: (632, 'f', w_to_btu),      # Sensible
-        20: (636, 'f', w_to_btu),      # Latent
-        # 21, 22: Schedules
-
-        # INFILTRATION
-        # 23: Method
-        24: (556, 'f', None),          # Design Clg ACH
-        25: (562, 'f', None),          # Design Htg ACH
-        26: (568, 'f', None),          # Energy ACH
-
-        # FLOORS
-        # 27: Floor Type
-        28: (494, 'f', m2_to_ft2),     # Floor Area
-        29: (498, 'f', u_si_to_ip),    # U-Value
-        30: (502, 'f', m_to_ft),       # Exp Perim
-        31: (506, 'f', r_si_to_ip),    # Edge R
-        32: (510, 'f', m_to_ft),       # Depth
-        33: (514, 'f', u_si_to_ip),    # Bsmt Wall U
-        34: (518, 'f', r_si_to_ip),    # Wall Ins R
-        35: (522, 'f', m_to_ft),       # Ins Depth
-        36: (526, 'f', c_to_f),        # Unc Max
-        37: (530, 'f', c_to_f),        # Out Max
-        38: (534, 'f', c_to_f),        # Unc Min
-        39: (538, 'f', c_to_f),        # Out Min
-
-        # PARTITIONS - CEILING
-        40: (442, 'f', m2_to_ft2),     # Area
-        41: (446, 'f', u_si_to_ip),    # U-Value
-        42: (450, 'f', c_to_f),        # Unc Max
-        43: (454, 'f', c_to_f),        # Out Max
-        44: (458, 'f', c_to_f),        # Unc Min
-        45: (462, 'f', c_to_f),        # Out Min
-
-        # PARTITIONS - WALL
-        46: (468, 'f', m2_to_ft2),     # Area
-        47: (472, 'f', u_si_to_ip),    # U-Value
-        48: (476, 'f', c_to_f),        # Unc Max
-        49: (480, 'f', c_to_f),        # Out Max
-        50: (484, 'f', c_to_f),        # Unc Min
-        51: (488, 'f', c_to_f),        # Out Min
-    }
-
-    # WALLS (52-123) - 8 walls x 9 campos cada
-    # Estrutura do Wall Block (34 bytes):
-    #   +0-1: Exposure/Direction (H)
-    #   +2-5: Gross Area (f)
-    #   +6-7: Wall Type ID (H) <- ESTE é o campo do Wall Type!
-    #   +8-9: Window 1 ID, etc.
-    # Campos Excel: Exposure(52), Gross Area(53), Wall Type(54), ...
-    for w in range(8):
-        base_field = 52 + w * 9
-        wall_offset = WALL_BLOCK_START + w * WALL_BLOCK_SIZE
-        FIELD_MAP[base_field + 1] = (wall_offset + 2, 'f', m2_to_ft2)  # Gross Area (campo 53, 62, ...)
-        FIELD_MAP[base_field + 2] = (wall_offset + 6, 'wall_idx', None)  # Wall Type no offset +6 (campo 54, 63, ...)
-
-    # ROOFS (124-147) - 4 roofs x 6 campos
-    # Estrutura Roof Block (24 bytes): +0=Exposure, +4=Area, +8=Roof Type ID
-    for r in range(4):
-        base_field = 124 + r * 6
-        roof_offset = ROOF_BLOCK_START + r * ROOF_BLOCK_SIZE
-        FIELD_MAP[base_field + 1] = (roof_offset + 4, 'f', m2_to_ft2)  # Gross Area (campo 125, 131, ...)
-        FIELD_MAP[base_field + 2] = (roof_offset + 8, 'roof_idx', None)  # Roof Type no offset +8 (campo 126, 132, ...)
-
-    spc_changes_for_inx = []
+def read_patch_file(patch_path):
+    """Lê alterações de um ficheiro CSV ou JSON.
 
-    changes = 0
-    for row in range(4, ws.max_row + 1):
-        space_name = ws.cell(row, 1).value  # Nome está no PREV
-        if not space_name or space_name not in space_offsets:
+    CSV: cabeçalho kind,name,field,value (separador ',' ou ';'; com ';' os
+    valores podem ter vírgula decimal).
+    JSON: lista de objectos {"kind", "name", "field", "value"}.
+    kind: space, window, wall ou roof. field: nome (ex. 'area_m2',
+    'wall1_area_m2', 'u_value') ou índice do campo. value em unidades SI.
+    """
+    if patch_path.lower().endswith('.json'):
+        with open(patch_path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    else:
+        with open(patch_path, 'r', encoding='utf-8-sig', newline='') as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters=',;').delimiter
+            except csv.Error:
+                delimiter = ','  # Ex. ficheiro vazio ou só com uma coluna
+            reader = csv.DictReader(f, delimiter=delimiter)
+            missing = [c for c in PATCH_COLUMNS if c not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"{patch_path}: cabeçalho deve ter as colunas {','.join(PATCH_COLUMNS)} "
+                                 f"(separador ',' ou ';') - em falta: {', '.join(missing)}")
+            rows = list(reader)
+        if delimiter == ';':
+            for row in rows:
+                value = row.get('value')
+                if value and DECIMAL_COMMA.fullmatch(value):
+                    row['value'] = value.replace(',', '.')
+
+    edits = []
+    for line, row in enumerate(rows, 1):
+        kind = str(row.get('kind', '')).strip().lower()
+        if kind not in EDIT_KINDS:
+            raise ValueError(f"{patch_path} linha {line}: kind desconhecido '{kind}'")
+        value = row.get('value')
+        if value is None or value == '':
             continue
+        edits.append((kind, str(row['name']).strip(), _field_index(kind, row['field']), value))
+    return edits
 
-        space_offset = space_offsets[space_name]
-        spc_inx_vals = {'name': space_name, 'area': None, 'occ': None}
-
-        for col_prev in range(1, ws.max_column + 1, 3):
-            col_ref = col_prev + 1
-            ref_value = ws.cell(row, col_ref).value
-
-            if ref_value is None or ref_value == '':
-                continue
 
-            field_idx = (col_prev - 1) // 3 + 1
-            if field_idx not in FIELD_MAP:
-                continue
-
-            offset, ftype, conv = FIELD_MAP[field_idx]
-            abs_offset = space_offset + offset
-
-            try:
-                if ftype == 'f':
-                    val = float(ref_value)
-                    val_converted = conv(val) if conv else val
-                    spc_data[abs_offset:abs_offset+4] = struct.pack('<f', val_converted)
-                    changes += 1
-
-                    # Infiltration: garantir flag ACH mode (2) nos offsets 554/560/566
-                    if field_idx in (24, 25, 26):
-                        flag_offsets = {24: 554, 25: 560, 26: 566}
-                        flag_abs = space_offset + flag_offsets[field_idx]
-                        struct.pack_into('<H', spc_data, flag_abs, 2)
-
-                    # Guardar para INX
-                    if field_idx == 2:  # Floor Area
-                        spc_inx_vals['area'] = val_converted
-                    elif field_idx == 7:  # Occupancy
-                        spc_inx_vals['occ'] = val  # Occupancy nao tem conversao
-                elif ftype.startswith('s'):
-                    str_len = int(ftype[1:])
-                    encoded = str(ref_value).encode('latin-1')[:str_len-1]
-                    encoded = encoded + b'\x00' * (str_len - len(encoded))
-                    spc_data[abs_offset:abs_offset+str_len] = encoded
-                    changes += 1
-                elif ftype == 'wall_idx':
-                    # Mapear nome da wall assembly para indice
-                    wall_name = str(ref_value).strip()
-                    if wall_name in wall_name_to_idx:
-                        wall_idx = wall_name_to_idx[wall_name]
-                        # Wall Type ID está no offset +6 do wall block (2 bytes, little-endian)
-                        struct.pack_into('<H', spc_data, abs_offset, wall_idx)
-                        changes += 1
-                        # Guardar para actualizar Space_Wall_Links
-                        space_idx_1based = space_indices[space_name]
-                        wall_type_changes.append((space_name, space_idx_1based, wall_idx))
-                elif ftype == 'roof_idx':
-                    # Mapear nome do roof assembly para indice
-                    roof_name = str(ref_value).strip()
-                    if roof_name in roof_name_to_idx:
-                        roof_idx = roof_name_to_idx[roof_name]
-                        # Roof Type ID está no offset +8 do roof block (2 bytes, little-endian)
-                        struct.pack_into('<H', spc_data, abs_offset, roof_idx)
-                        changes += 1
-                        # Guardar para actualizar Space_Roof_Links (se existir)
-                        space_idx_1based = space_indices[space_name]
-                        roof_type_changes.append((space_name, space_idx_1based, roof_idx))
-            except:
-                pass
-
-        if spc_inx_vals['area'] is not None or spc_inx_vals['occ'] is not None:
-            spc_changes_for_inx.append(spc_inx_vals)
-
-    print(f"  Espaços: {changes} campos")
-    total_changes += changes
-
-    # Actualizar INX para Espacos
-    if inx_data and spc_changes_for_inx:
-        spc_inx_changes = 0
-        for spc_vals in spc_changes_for_inx:
-            name_bytes = spc_vals['name'].encode('latin-1')
-            idx = inx_data.find(name_bytes)
-            if idx != -1:
-                if spc_vals['area'] is not None:
-                    inx_data[idx-14:idx-10] = struct.pack('<f', spc_vals['area'])
-                    spc_inx_changes += 1
-                if spc_vals['occ'] is not None:
-                    inx_data[idx-10:idx-6] = struct.pack('<f', spc_vals['occ'])
-                    spc_inx_changes += 1
-        print(f"  Espaços INX (display): {spc_inx_changes} campos")
+# =============================================================================
+# COMPILAR ALTERAÇÕES EM PATCHES DE BYTES
+# =============================================================================
+# Um patch é um tuplo (membro, offset, bytes novos) sobre o conteúdo original
+# do membro. Os patches são calculados contra os dados originais de cada E3A
+# (nomes -> offsets), por isso o mesmo conjunto de alterações pode ser aplicado
+# a vários ficheiros.
+
+def _record_offsets(data, record_size, name_len, skip_default=False):
+    """Mapeia nome -> (offset, índice) dos registos de um DAT"""
+    offsets = {}
+    if not data:
+        return offsets
+    for i in range(len(data) // record_size):
+        offset = i * record_size
+        name = extract_name(data[offset:offset + name_len])
+        if name and not (skip_default and name.startswith('Default')):
+            offsets[name] = (offset, i)
+    return offsets
+
+
+def _assembly_name_to_idx(data):
+    """Nome do assembly (até 100 bytes) -> índice, como no HAP"""
+    name_to_idx = {}
+    if not data:
+        return name_to_idx
+    for i in range(len(data) // ASSEMBLY_SIZE):
+        offset = i * ASSEMBLY_SIZE
+        name = data[offset:offset+100].split(b'\x00')[0].decode('latin-1').strip()
+        name_to_idx[name] = i
+    return name_to_idx
+
+
+def _span_patch(member, base, old, new):
+    """Patch mínimo (primeiro..último byte diferente) entre dois buffers"""
+    first = next((i for i in range(len(old)) if old[i] != new[i]), None)
+    if first is None:
+        return None
+    last = next(i for i in range(len(old) - 1, -1, -1) if old[i] != new[i])
+    return (member, base + first, bytes(new[first:last + 1]))
+
+
+def compile_patches(edits, files):
+    """Compila alterações em patches de bytes contra os membros de um E3A.
+
+    Retorna (patches, wall_type_changes, stats, rejected), em que
+    wall_type_changes alimenta a actualização de Space_Wall_Links, stats tem
+    as contagens por secção para o relatório e rejected as alterações não
+    aplicadas como [(alteração, motivo)] (nome ou assembly inexistente, campo
+    não editável, valor inválido).
+    """
+    spc_data = files.get('HAP51SPC.DAT')
+    win_data = files.get('HAP51WIN.DAT')
+    wal_data = files.get('HAP51WAL.DAT')
+    rof_data = files.get('HAP51ROF.DAT')
+    inx_data = files.get('HAP51INX.MDB')
+
+    patches = []
+    stats = {}
+    rejected = []
+
+    def reject(edit, reason):
+        rejected.append((edit, reason))
+
+    def inx_patch(name, rel_offset, value):
+        """Valor de display no HAP51INX.MDB, posicionado antes do nome"""
+        idx = inx_data.find(name.encode('latin-1'))
+        if idx == -1:
+            return False
+        patches.append(('HAP51INX.MDB', idx + rel_offset, struct.pack('<f', value)))
+        return True
 
     # =========================================================================
-    # WINDOWS
+    # ESPAÇOS
     # =========================================================================
-    win_changes_for_inx = []  # Guardar alteracoes para actualizar INX
-
-    if win_data and 'Windows' in wb.sheetnames:
-        ws_win = wb['Windows']
-
-        # Mapear nomes para offsets
-        win_offsets = {}
-        num_windows = len(win_data) // WINDOW_RECORD_SIZE
-        for i in range(num_windows):
-            offset = i * WINDOW_RECORD_SIZE
-            name = extract_name(win_data[offset:offset+100])
-            if name:
-                win_offsets[name] = offset
-
-        # Campos: Nome(1), U-Value(2), SHGC(3), Altura(4), Largura(5)
-        WIN_MAP = {
-            2: (269, 'f', u_si_to_ip),    # U-Value
-            3: (273, 'f', None),          # SHGC (offset 273, confirmado)
-            4: (257, 'f', m_to_ft),       # Altura
-            5: (261, 'f', m_to_ft),       # Largura
-        }
-
-        changes = 0
-        for row in range(4, ws_win.max_row + 1):
-            win_name = ws_win.cell(row, 1).value
-            if not win_name or win_name not in win_offsets:
-                continue
-
-            win_offset = win_offsets[win_name]
+    space_offsets = _record_offsets(spc_data, SPACE_RECORD_SIZE, 100, skip_default=True)
+    wall_name_to_idx = _assembly_name_to_idx(wal_data)
+    roof_name_to_idx = _assembly_name_to_idx(rof_data)
 
-            # Guardar valores para INX (todos os 4 campos)
-            win_inx_vals = {'name': win_name, 'u': None, 'shgc': None, 'h': None, 'w': None}
+    wall_type_changes = []  # [(space_name, space_idx, wall_idx), ...] para Space_Wall_Links
+    spc_inx = {}            # nome -> {'area': ..., 'occ': ...}
+    changes = 0
 
-            for col_prev in range(1, 16, 3):  # 5 campos x 3 = 15 colunas
-                col_ref = col_prev + 1
-                ref_value = ws_win.cell(row, col_ref).value
+    for edit in edits:
+        kind, space_name, field_idx, value = edit
+        if kind != 'space':
+            continue
+        if space_name not in space_offsets:
+            reject(edit, "espaço não existe")
+            continue
+        if field_idx not in FIELD_MAP:
+            reject(edit, "campo não editável")
+            continue
+        space_offset, space_idx = space_offsets[space_name]
+        offset, ftype, conv = FIELD_MAP[field_idx]
+        abs_offset = space_offset + offset
+
+        try:
+            if ftype == 'f':
+                val = float(value)
+                val_converted = conv(val) if conv else val
+                patches.append(('HAP51SPC.DAT', abs_offset, struct.pack('<f', val_converted)))
+                changes += 1
 
-                if ref_value is None or ref_value == '':
+                # Infiltration: garantir flag ACH mode (2) nos offsets 554/560/566
+                if field_idx in INFIL_FLAG_OFFSETS:
+                    patches.append(('HAP51SPC.DAT', space_offset + INFIL_FLAG_OFFSETS[field_idx],
+                                    struct.pack('<H', 2)))
+
+                # Guardar para INX
+                if field_idx == 2:  # Floor Area
+                    spc_inx.setdefault(space_name, {})['area'] = val_converted
+                elif field_idx == 7:  # Occupancy
+                    spc_inx.setdefault(space_name, {})['occ'] = val  # Occupancy nao tem conversao
+            elif ftype.startswith('s'):
+                str_len = int(ftype[1:])
+                encoded = str(value).encode('latin-1')[:str_len-1]
+                encoded = encoded + b'\x00' * (str_len - len(encoded))
+                patches.append(('HAP51SPC.DAT', abs_offset, encoded))
+                changes += 1
+            elif ftype == 'wall_idx':
+                # Mapear nome da wall assembly para indice
+                wall_name = str(value).strip()
+                if wall_name not in wall_name_to_idx:
+                    reject(edit, f"wall assembly '{wall_name}' não existe")
                     continue
-
-                field_idx = (col_prev - 1) // 3 + 1
-                if field_idx not in WIN_MAP:
+                wall_idx = wall_name_to_idx[wall_name]
+                patches.append(('HAP51SPC.DAT', abs_offset, struct.pack('<H', wall_idx)))
+                changes += 1
+                wall_type_changes.append((space_name, space_idx, wall_idx))
+            elif ftype == 'roof_idx':
+                # Mapear nome do roof assembly para indice
+                roof_name = str(value).strip()
+                if roof_name not in roof_name_to_idx:
+                    reject(edit, f"roof assembly '{roof_name}' não existe")
                     continue
+                roof_idx = roof_name_to_idx[roof_name]
+                patches.append(('HAP51SPC.DAT', abs_offset, struct.pack('<H', roof_idx)))
+                changes += 1
+        except (ValueError, TypeError, OverflowError, UnicodeEncodeError):
+            reject(edit, "valor inválido")
 
-                offset, ftype, conv = WIN_MAP[field_idx]
-                abs_offset = win_offset + offset
-
-                try:
-                    val = float(ref_value)
-                    val_converted = conv(val) if conv else val
-                    win_data[abs_offset:abs_offset+4] = struct.pack('<f', val_converted)
-                    changes += 1
-
-                    # Guardar para INX (valores ja convertidos para IP)
-                    if field_idx == 2:
-                        win_inx_vals['u'] = val_converted
-                    elif field_idx == 3:
-                        win_inx_vals['shgc'] = val_converted
-                    elif field_idx == 4:
-                        win_inx_vals['h'] = val_converted
-                    elif field_idx == 5:
-                        win_inx_vals['w'] = val_converted
-                except:
-                    pass
-
-            # Se houve alteracoes, guardar para INX
-            if any([win_inx_vals['u'], win_inx_vals['shgc'], win_inx_vals['h'], win_inx_vals['w']]):
-                win_changes_for_inx.append(win_inx_vals)
-
-        print(f"  Windows: {changes} campos")
-        total_changes += changes
-
-    # =========================================================================
-    # ACTUALIZAR HAP51INX.MDB (display values para Windows)
-    # =========================================================================
-    inx_changes = 0
-    if inx_data and win_changes_for_inx:
-        for win_vals in win_changes_for_inx:
-            win_name = win_vals['name']
-            # Procurar nome da janela no INX
-            name_bytes = win_name.encode('latin-1')
-            idx = inx_data.find(name_bytes)
-
-            if idx == -1:
-                continue
+    stats['Espaços'] = changes
 
-            # Estrutura: U-Value(-18), SHGC(-14), Height(-10), Width(-6) antes do nome
-            if win_vals['u'] is not None:
-                inx_data[idx-18:idx-14] = struct.pack('<f', win_vals['u'])
-                inx_changes += 1
-            if win_vals['shgc'] is not None:
-                inx_data[idx-14:idx-10] = struct.pack('<f', win_vals['shgc'])
+    # Actualizar INX para Espacos: Area(-14), Occupancy(-10) antes do nome
+    if inx_data and spc_inx:
+        inx_changes = 0
+        for space_name, vals in spc_inx.items():
+            if 'area' in vals and inx_patch(space_name, -14, vals['area']):
                 inx_changes += 1
-            if win_vals['h'] is not None:
-                inx_data[idx-10:idx-6] = struct.pack('<f', win_vals['h'])
+            if 'occ' in vals and inx_patch(space_name, -10, vals['occ']):
                 inx_changes += 1
-            if win_vals['w'] is not None:
-                inx_data[idx-6:idx-2] = struct.pack('<f', win_vals['w'])
-                inx_changes += 1
-
-        print(f"  Windows INX (display): {inx_changes} campos")
+        stats['Espaços INX (display)'] = inx_changes
 
     # =========================================================================
-    # WALLS (Assemblies) - Usa fill_assembly_layers para U-Value correcto
+    # WINDOWS
     # =========================================================================
-    wal_changes_for_inx = []
-
-    if wal_data and 'Walls' in wb.sheetnames:
-        ws_wal = wb['Walls']
-
-        # Mapear nomes para offsets
-        wal_offsets = {}
-        num_walls = len(wal_data) // WALL_ASSEMBLY_SIZE
-        for i in range(num_walls):
-            offset = i * WALL_ASSEMBLY_SIZE
-            name = extract_name(wal_data[offset:offset+255])
-            if name:
-                wal_offsets[name] = offset
-
-        # Campos: Nome(1), U-Value(2), Espessura(3), Massa(4), Absorptivity(5)
-        # Nota: Espessura é ignorada (calculada automaticamente nas layers)
-
+    win_offsets = _record_offsets(win_data, WINDOW_RECORD_SIZE, 100)
+    if win_data:
+        win_inx = {}  # nome -> {field_idx: valor IP}
         changes = 0
-        for row in range(4, ws_wal.max_row + 1):
-            wal_name = ws_wal.cell(row, 1).value
-            if not wal_name or wal_name not in wal_offsets:
-                continue
-
-            wal_offset = wal_offsets[wal_name]
-
-            # Recolher valores REF para esta wall
-            u_value_si = None
-            weight_si = None
-            absorptivity = 0.9  # default
-
-            # Campo 2: U-Value (coluna REF = 5)
-            ref_u = ws_wal.cell(row, 5).value
-            if ref_u is not None and ref_u != '':
-                try:
-                    u_value_si = float(ref_u)
-                except:
-                    pass
-
-            # Campo 4: Massa (coluna REF = 11)
-            ref_massa = ws_wal.cell(row, 11).value
-            if ref_massa is not None and ref_massa != '':
-                try:
-                    weight_si = float(ref_massa)
-                except:
-                    pass
-
-            # Campo 5: Absorptivity (coluna REF = 14) - se existir
-            if ws_wal.max_column >= 14:
-                ref_abs = ws_wal.cell(row, 14).value
-                if ref_abs is not None and ref_abs != '':
-                    try:
-                        absorptivity = float(ref_abs)
-                    except:
-                        pass
-
-            # Se temos U-Value ou Weight, preencher layers
-            if u_value_si is not None or weight_si is not None:
-                # Usar valores existentes se não foram especificados
-                if u_value_si is None:
-                    # Ler U-Value actual do offset 269 (display value)
-                    u_ip = struct.unpack_from('<f', wal_data, wal_offset + 269)[0]
-                    u_value_si = u_ip * 5.678 if u_ip > 0 else 1.0
-
-                if weight_si is None:
-                    # Ler Weight actual do offset 273
-                    w_ip = struct.unpack_from('<f', wal_data, wal_offset + 273)[0]
-                    weight_si = w_ip / 0.2048 if w_ip > 0 else 50.0
-
-                # Preencher layers com valores calculados
-                fill_assembly_layers(wal_data, wal_offset, u_value_si, weight_si, absorptivity)
-                changes += 1
-
-                # Guardar U-Value para INX (em IP)
-                u_ip_for_inx = u_value_si / 5.678
-                wal_changes_for_inx.append({'name': wal_name, 'u': u_ip_for_inx})
-
-        print(f"  Walls: {changes} assemblies actualizados (layers)")
-        total_changes += changes
 
-    # Actualizar INX para Walls
-    if inx_data and wal_changes_for_inx:
-        wal_inx_changes = 0
-        for wal_vals in wal_changes_for_inx:
-            name_bytes = wal_vals['name'].encode('latin-1')
-            idx = inx_data.find(name_bytes)
-            if idx != -1 and wal_vals['u'] is not None:
-                inx_data[idx-14:idx-10] = struct.pack('<f', wal_vals['u'])
-                wal_inx_changes += 1
-        print(f"  Walls INX (display): {wal_inx_changes} campos")
+        for edit in edits:
+            kind, win_name, field_idx, value = edit
+            if kind != 'window':
+                continue
+            if win_name not in win_offsets:
+                reject(edit, "window não existe")
+                continue
+            if field_idx not in WIN_MAP:
+                reject(edit, "campo não editável")
+                continue
+            offset, ftype, conv = WIN_MAP[field_idx]
+            try:
+                val = float(value)
+                val_converted = conv(val) if conv else val
+                packed = struct.pack('<f', val_converted)
+            except (ValueError, TypeError, OverflowError):
+                reject(edit, "valor inválido")
+                continue
+            patches.append(('HAP51WIN.DAT', win_offsets[win_name][0] + offset, packed))
+            win_inx.setdefault(win_name, {})[field_idx] = val_converted
+            changes += 1
+
+        stats['Windows'] = changes
+
+        # Estrutura INX: U-Value(-18), SHGC(-14), Height(-10), Width(-6) antes do nome
+        if inx_data and win_inx:
+            inx_rel = {2: -18, 3: -14, 4: -10, 5: -6}
+            inx_changes = 0
+            for win_name, vals in win_inx.items():
+                for field_idx, val in vals.items():
+                    if inx_patch(win_name, inx_rel[field_idx], val):
+                        inx_changes += 1
+            stats['Windows INX (display)'] = inx_changes
+    else:
+        for edit in edits:
+            if edit[0] == 'window':
+                reject(edit, "E3A sem HAP51WIN.DAT")
 
     # =========================================================================
-    # ROOFS (Assemblies) - Usa fill_assembly_layers para U-Value correcto
+    # WALLS / ROOFS (Assemblies) - Usa fill_assembly_layers para U-Value correcto
     # =========================================================================
-    rof_changes_for_inx = []
-
-    if rof_data and 'Roofs' in wb.sheetnames:
-        ws_rof = wb['Roofs']
-
-        # Mapear nomes para offsets
-        rof_offsets = {}
-        num_roofs = len(rof_data) // ROOF_ASSEMBLY_SIZE
-        for i in range(num_roofs):
-            offset = i * ROOF_ASSEMBLY_SIZE
-            name = extract_name(rof_data[offset:offset+255])
-            if name:
-                rof_offsets[name] = offset
-
-        # Campos: Nome(1), U-Value(2), Espessura(3), Massa(4), Absorptivity(5)
-        # Nota: Espessura é ignorada (calculada automaticamente nas layers)
+    for kind, member, data, label in (('wall', 'HAP51WAL.DAT', wal_data, 'Walls'),
+                                      ('roof', 'HAP51ROF.DAT', rof_data, 'Roofs')):
+        if not data:
+            for edit in edits:
+                if edit[0] == kind:
+                    reject(edit, f"E3A sem {member}")
+            continue
+        asm_offsets = _record_offsets(data, ASSEMBLY_SIZE, 255)
+
+        # Recolher valores por assembly: U-Value(2), Massa(4), Absorptivity(5)
+        # Nota: Espessura (3) é ignorada (calculada automaticamente nas layers)
+        requested = {}
+        requested_edits = {}
+        for edit in edits:
+            edit_kind, name, field_idx, value = edit
+            if edit_kind != kind:
+                continue
+            if name not in asm_offsets:
+                reject(edit, f"{kind} assembly não existe")
+                continue
+            if field_idx == 3:
+                reject(edit, "espessura é calculada pelas layers")
+                continue
+            if field_idx not in (2, 4, 5):
+                reject(edit, "campo não editável")
+                continue
+            try:
+                val = float(value)
+            except (ValueError, TypeError):
+                reject(edit, "valor inválido")
+                continue
+            requested.setdefault(name, {})[field_idx] = val
+            requested_edits.setdefault(name, []).append(edit)
 
         changes = 0
-        for row in range(4, ws_rof.max_row + 1):
-            rof_name = ws_rof.cell(row, 1).value
-            if not rof_name or rof_name not in rof_offsets:
+        inx_changes = 0
+        for name, vals in requested.items():
+            if 2 not in vals and 4 not in vals:
+                for edit in requested_edits[name]:
+                    reject(edit, "absorptivity só é aplicada com u_value ou mass")
                 continue
+            asm_offset = asm_offsets[name][0]
+
+            # Usar valores existentes se não foram especificados
+            u_value_si = vals.get(2)
+            if u_value_si is None:
+                # Ler U-Value actual do offset 269 (display value)
+                u_ip = struct.unpack_from('<f', data, asm_offset + 269)[0]
+                u_value_si = u_ip * 5.678 if u_ip > 0 else 1.0
+            weight_si = vals.get(4)
+            if weight_si is None:
+                # Ler Weight actual do offset 273
+                w_ip = struct.unpack_from('<f', data, asm_offset + 273)[0]
+                weight_si = w_ip / 0.2048 if w_ip > 0 else 50.0
+
+            # Preencher layers numa cópia do registo e guardar só os bytes alterados
+            old = data[asm_offset:asm_offset + ASSEMBLY_SIZE]
+            new = bytearray(old)
+            fill_assembly_layers(new, 0, u_value_si, weight_si, vals.get(5, 0.9))
+            patch = _span_patch(member, asm_offset, old, new)
+            if patch:
+                patches.append(patch)
+            changes += 1
+
+            # U-Value para INX (em IP), offset -14 antes do nome
+            if inx_data and inx_patch(name, -14, u_value_si / 5.678):
+                inx_changes += 1
 
-            rof_offset = rof_offsets[rof_name]
-
-            # Recolher valores REF para este roof
-            u_value_si = None
-            weight_si = None
-            absorptivity = 0.9  # default
-
-            # Campo 2: U-Value (coluna REF = 5)
-            ref_u = ws_rof.cell(row, 5).value
-            if ref_u is not None and ref_u != '':
-                try:
-                    u_value_si = float(ref_u)
-                except:
-                    pass
-
-            # Campo 4: Massa (coluna REF = 11)
-            ref_massa = ws_rof.cell(row, 11).value
-            if ref_massa is not None and ref_massa != '':
-                try:
-                    weight_si = float(ref_massa)
-                except:
-                    pass
-
-            # Campo 5: Absorptivity (coluna REF = 14) - se existir
-            if ws_rof.max_column >= 14:
-                ref_abs = ws_rof.cell(row, 14).value
-                if ref_abs is not None and ref_abs != '':
-                    try:
-                        absorptivity = float(ref_abs)
-                    except:
-                        pass
-
-            # Se temos U-Value ou Weight, preencher layers
-            if u_value_si is not None or weight_si is not None:
-                # Usar valores existentes se não foram especificados
-                if u_value_si is None:
-                    # Ler U-Value actual do offset 269 (display value)
-                    u_ip = struct.unpack_from('<f', rof_data, rof_offset + 269)[0]
-                    u_value_si = u_ip * 5.678 if u_ip > 0 else 1.0
-
-                if weight_si is None:
-                    # Ler Weight actual do offset 273
-                    w_ip = struct.unpack_from('<f', rof_data, rof_offset + 273)[0]
-                    weight_si = w_ip / 0.2048 if w_ip > 0 else 50.0
-
-                # Preencher layers com valores calculados
-                fill_assembly_layers(rof_data, rof_offset, u_value_si, weight_si, absorptivity)
-                changes += 1
+        stats[f'{label}'] = changes
+        if inx_data and inx_changes:
+            stats[f'{label} INX (display)'] = inx_changes
 
-                # Guardar U-Value para INX (em IP)
-                u_ip_for_inx = u_value_si / 5.678
-                rof_changes_for_inx.append({'name': rof_name, 'u': u_ip_for_inx})
+    return patches, wall_type_changes, stats, rejected
 
-        print(f"  Roofs: {changes} assemblies actualizados (layers)")
-        total_changes += changes
 
-    # Actualizar INX para Roofs
-    if inx_data and rof_changes_for_inx:
-        rof_inx_changes = 0
-        for rof_vals in rof_changes_for_inx:
-            name_bytes = rof_vals['name'].encode('latin-1')
-            idx = inx_data.find(name_bytes)
-            if idx != -1 and rof_vals['u'] is not None:
-                inx_data[idx-14:idx-10] = struct.pack('<f', rof_vals['u'])
-                rof_inx_changes += 1
-        print(f"  Roofs INX (display): {rof_inx_changes} campos")
+def apply_patches(files, patches):
+    """Aplica patches aos membros (bytearrays) em ordem"""
+    for member, offset, new_bytes in patches:
+        files[member][offset:offset + len(new_bytes)] = new_bytes
 
-    # =========================================================================
-    # GUARDAR E3A
-    # =========================================================================
-    if total_changes == 0:
-        print("\nNenhuma alteração encontrada na coluna REF")
-        return
 
+# =============================================================================
+# GRAVAR E3A
+# =============================================================================
+
+def write_e3a(e3a_path, output_path, files, wall_type_changes=(), label='editor'):
+    """Grava o E3A com os membros alterados (o resto é copiado do original).
+
+    As diferenças byte a byte ficam no journal (.hapj) ao lado do output.
+    """
     with tempfile.TemporaryDirectory() as tmpdir:
         with zipfile.ZipFile(e3a_path, 'r') as zf:
             zf.extractall(tmpdir)
 
         # Guardar ficheiros modificados
-        with open(os.path.join(tmpdir, 'HAP51SPC.DAT'), 'wb') as f:
-            f.write(spc_data)
-        if win_data:
-            with open(os.path.join(tmpdir, 'HAP51WIN.DAT'), 'wb') as f:
-                f.write(win_data)
-        if wal_data:
-            with open(os.path.join(tmpdir, 'HAP51WAL.DAT'), 'wb') as f:
-                f.write(wal_data)
-        if rof_data:
-            with open(os.path.join(tmpdir, 'HAP51ROF.DAT'), 'wb') as f:
-                f.write(rof_data)
-        if inx_data:
-            with open(os.path.join(tmpdir, 'HAP51INX.MDB'), 'wb') as f:
-                f.write(inx_data)
+        for member, data in files.items():
+            with open(os.path.join(tmpdir, member), 'wb') as f:
+                f.write(data)
 
         # =====================================================================
         # ACTUALIZAR Space_Wall_Links no HAP51INX.MDB (para Wall Type aparecer no HAP)
@@ -871,11 +888,6 @@ def apply_changes(e3a_path, editor_xlsx, output_path):
                 cursor.execute('SELECT nIndex, szName FROM SpaceIndex')
                 space_name_to_inx_id = {row[1]: row[0] for row in cursor.fetchall()}
 
-                # Obter mapeamento de wall indices do DAT para WallIndex.nIndex
-                # WallIndex tem nIndex que corresponde ao indice no DAT
-                cursor.execute('SELECT nIndex, szName FROM WallIndex')
-                wall_inx = {row[1]: row[0] for row in cursor.fetchall()}
-
                 wall_links_updated = 0
                 for space_name, space_dat_idx, wall_dat_idx in wall_type_changes:
                     # Obter Space_ID do SpaceIndex
@@ -884,8 +896,8 @@ def apply_changes(e3a_path, editor_xlsx, output_path):
                     space_id = space_name_to_inx_id[space_name]
 
                     # O wall_dat_idx e o indice no ficheiro DAT (0-based)
-                    # Mas WallIndex so tem as walls "validas" com nIndex = indice no DAT
-                    # Então precisamos usar wall_dat_idx directamente como Wall_ID
+                    # WallIndex so tem as walls "validas" com nIndex = indice no DAT
+                    # Então usamos wall_dat_idx directamente como Wall_ID
 
                     # Primeiro remover link existente se houver
                     cursor.execute('DELETE FROM Space_Wall_Links WHERE Space_ID = ?', (space_id,))
@@ -901,15 +913,108 @@ def apply_changes(e3a_path, editor_xlsx, output_path):
             except Exception as e:
                 print(f"  AVISO: Não foi possível actualizar Space_Wall_Links: {e}")
 
+        # Estado final dos membros editáveis (inclui o MDB depois dos links)
+        new_files = {}
+        for member in files:
+            with open(os.path.join(tmpdir, member), 'rb') as f:
+                new_files[member] = f.read()
+
         with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for root, dirs, files in os.walk(tmpdir):
-                for file in files:
+            for root, dirs, files_in_dir in os.walk(tmpdir):
+                for file in files_in_dir:
                     file_path = os.path.join(root, file)
                     arc_name = os.path.relpath(file_path, tmpdir)
                     zf.write(file_path, arc_name)
 
+    with zipfile.ZipFile(e3a_path, 'r') as zf:
+        old_files = {member: zf.read(member) for member in new_files}
+    hap_journal.record(e3a_path, output_path, old_files, new_files, label)
+
+
+# =============================================================================
+# APLICAR ALTERAÇÕES
+# =============================================================================
+
+def read_editable_members(e3a_path):
+    """Lê os membros editáveis do E3A como bytearrays"""
+    with zipfile.ZipFile(e3a_path, 'r') as zf:
+        names = set(zf.namelist())
+        return {m: bytearray(zf.read(m)) for m in EDITABLE_MEMBERS if m in names}
+
+
+def print_rejected(rejected, limit=20):
+    """Lista as alterações não aplicadas (kind, nome, campo, valor, motivo)"""
+    print(f"\n  AVISO: {len(rejected)} alterações não aplicadas:")
+    for (kind, name, field_idx, value), reason in rejected[:limit]:
+        names = EDIT_KINDS[kind][1]
+        field = names[field_idx - 1] if 1 <= field_idx <= len(names) else f"campo {field_idx}"
+        print(f"    {kind} '{name}' {field} = {value!r}: {reason}")
+    if len(rejected) > limit:
+        print(f"    ... e mais {len(rejected) - limit}")
+
+
+def apply_edits(e3a_path, edits, output_path, label='editor'):
+    """Compila e aplica alterações a um E3A.
+
+    Retorna (nº de campos alterados, alterações rejeitadas - ver compile_patches).
+    """
+    files = read_editable_members(e3a_path)
+    patches, wall_type_changes, stats, rejected = compile_patches(edits, files)
+
+    total_changes = 0
+    for section, count in stats.items():
+        if 'INX' in section:
+            print(f"  {section}: {count} campos")
+        elif section in ('Walls', 'Roofs'):
+            print(f"  {section}: {count} assemblies actualizados (layers)")
+            total_changes += count
+        else:
+            print(f"  {section}: {count} campos")
+            total_changes += count
+
+    if rejected:
+        print_rejected(rejected)
+
+    if total_changes == 0:
+        print("\nNenhuma alteração aplicável encontrada")
+        return 0, rejected
+
+    apply_patches(files, patches)
+    write_e3a(e3a_path, output_path, files, wall_type_changes, label)
+
     print(f"\n  TOTAL: {total_changes} campos actualizados")
     print(f"  Ficheiro criado: {output_path}")
+    return total_changes, rejected
+
+
+def apply_changes(e3a_path, editor_xlsx, output_path):
+    """Aplica alterações do Excel ao E3A. Retorna como apply_edits."""
+
+    print(f"A aplicar alterações de {editor_xlsx}...")
+    return apply_edits(e3a_path, read_workbook_edits(editor_xlsx), output_path,
+                       f"aplicar {os.path.basename(editor_xlsx)}")
+
+
+def apply_patch_file(patch_path, e3a_paths, output_dir):
+    """Aplica o mesmo ficheiro de patch (CSV/JSON) a vários E3A.
+
+    Retorna True se todas as alterações foram aplicadas em todos os E3A.
+    """
+    edits = read_patch_file(patch_path)
+    print(f"Patch {patch_path}: {len(edits)} alterações")
+
+    os.makedirs(output_dir, exist_ok=True)
+    ok = True
+    for e3a_path in e3a_paths:
+        output_path = os.path.join(output_dir, os.path.basename(e3a_path))
+        if os.path.abspath(output_path) == os.path.abspath(e3a_path):
+            print(f"\nERRO: {e3a_path} seria substituído - usar outra pasta de output")
+            ok = False
+            continue
+        print(f"\n{os.path.basename(e3a_path)}:")
+        _, rejected = apply_edits(e3a_path, edits, output_path, f"patch {os.path.basename(patch_path)}")
+        ok = ok and not rejected
+    return ok
 
 
 # =============================================================================
@@ -933,7 +1038,19 @@ def main():
         if len(sys.argv) < 5:
             print("Uso: python editor_e3a.py aplicar <original.E3A> <editor.xlsx> <output.E3A>")
             sys.exit(1)
-        apply_changes(sys.argv[2], sys.argv[3], sys.argv[4])
+        _, rejected = apply_changes(sys.argv[2], sys.argv[3], sys.argv[4])
+        sys.exit(1 if rejected else 0)
+
+    elif cmd == 'patch':
+        if len(sys.argv) < 5:
+            print("Uso: python editor_e3a.py patch <alteracoes.csv|json> <pasta_output> <a.E3A> [b.E3A ...]")
+            sys.exit(1)
+        try:
+            ok = apply_patch_file(sys.argv[2], sys.argv[4:], sys.argv[3])
+        except (ValueError, KeyError) as e:
+            print(f"Erro no ficheiro de patch: {e}")
+            sys.exit(1)
+        sys.exit(0 if ok else 1)
 
     else:
         print(f"Comando desconhecido: {cmd}")
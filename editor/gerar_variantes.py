@@ -0,0 +1,203 @@
+"""
+Gerador de Variantes E3A - Estudos paramétricos / de sensibilidade
+
+A partir de um E3A base e de uma grelha de parâmetros (ex: U das paredes ×
+SHGC dos vãos × densidade de iluminação) gera um E3A por combinação, em
+paralelo. Usa as mesmas alterações do editor (FIELD_MAP / WIN_MAP / layers).
+
+Cada variante reutiliza os bytes já comprimidos do E3A base; só os membros
+DAT efectivamente alterados são recomprimidos (ver ../extractor/hap_zip.py).
+
+Usage:
+    python gerar_variantes.py <base.E3A> <grelha.json> <pasta_output> [--workers N]
+
+Grelha (JSON):
+    {
+      "parametros": [
+        {"nome": "U_parede", "kind": "wall",   "name": "Parede Ext", "field": "u_value",        "valores": [0.3, 0.45, 0.6]},
+        {"nome": "SHGC",     "kind": "window", "name": "*",          "field": "shgc",           "valores": [0.3, 0.5]},
+        {"nome": "Ilum",     "kind": "space",  "name": "*",          "field": "gen_light_w_m2", "valores": [6, 8, 10]}
+      ]
+    }
+
+    kind/field como nos ficheiros de patch do editor (editor_e3a.py patch).
+    name "*" = todos os objectos desse tipo.
+    Campos derivados nos espaços: gen_light_w_m2 (W/m² x área -> General Ltg W).
+
+Output: <base>_V001.E3A ... + variantes.csv com os valores de cada variante.
+"""
+
+import csv
+import itertools
+import json
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from editor_e3a import (
+    EDIT_KINDS, EDITABLE_MEMBERS, SPACE_FIELD_NAMES,
+    _field_index, compile_patches, apply_patches,
+)
+from hap_extractor import is_listed_window, is_listed_assembly
+from hap_cli import option
+from hap_zip import read_raw_members, replace_members
+from hap_cache import load_project
+
+# Campos derivados: campo -> (campo real, chave do espaço que multiplica o valor)
+DERIVED_SPACE_FIELDS = {
+    'gen_light_w_m2': ('gen_light_w', 'area_m2'),
+}
+
+
+# =============================================================================
+# GRELHA DE PARÂMETROS
+# =============================================================================
+
+def load_grid(grid_path):
+    with open(grid_path, 'r', encoding='utf-8') as f:
+        grid = json.load(f)
+    params = grid.get('parametros', grid) if isinstance(grid, dict) else grid
+    for p in params:
+        p['kind'] = str(p['kind']).strip().lower()
+        if p['kind'] not in EDIT_KINDS:
+            raise ValueError(f"Parâmetro '{p.get('nome')}': kind desconhecido '{p['kind']}'")
+        if not p.get('valores'):
+            raise ValueError(f"Parâmetro '{p.get('nome')}': sem valores")
+        p.setdefault('nome', f"{p['kind']}_{p['field']}")
+    return params
+
+
+def _object_names(project, kind):
+    """Nomes de todos os objectos de um tipo (para name = '*')"""
+    if kind == 'space':
+        return [s['name'] for s in project['spaces'] if s['_index'] != 0 and s['name']]
+    if kind == 'window':
+        return [w['name'] for w in project['windows_detail'] if is_listed_window(w)]
+    if kind == 'wall':
+        return [w['name'] for w in project['walls_detail'] if is_listed_assembly(w)]
+    return [r['name'] for r in project['roofs_detail'] if is_listed_assembly(r)]
+
+
+def param_edits(param, value, project):
+    """Alterações (kind, nome, field_index, valor) de um parâmetro com um valor"""
+    kind = param['kind']
+    names = _object_names(project, kind) if param['name'] == '*' else [param['name']]
+
+    if kind == 'space' and param['field'] in DERIVED_SPACE_FIELDS:
+        target, factor_key = DERIVED_SPACE_FIELDS[param['field']]
+        field_idx = SPACE_FIELD_NAMES.index(target) + 1
+        spaces = {s['name']: s for s in project['spaces']}
+        return [(kind, n, field_idx, float(value) * spaces[n][factor_key])
+                for n in names if n in spaces]
+
+    field_idx = _field_index(kind, param['field'])
+    return [(kind, n, field_idx, value) for n in names]
+
+
+def expand_variants(params, project):
+    """Produto cartesiano da grelha: [(valores, alterações), ...]"""
+    variants = []
+    for values in itertools.product(*(p['valores'] for p in params)):
+        edits = []
+        for param, value in zip(params, values):
+            edits.extend(param_edits(param, value, project))
+        variants.append((values, edits))
+    return variants
+
+
+# =============================================================================
+# GERAÇÃO (pool de processos)
+# =============================================================================
+
+_base_path = None
+_base_raw = None
+_base_files = None
+
+
+def _init_worker(base_path):
+    """Cada processo lê o E3A base uma só vez"""
+    global _base_path, _base_raw, _base_files
+    _base_path = base_path
+    _base_raw = read_raw_members(base_path)
+    _base_files = {}
+    with zipfile.ZipFile(base_path, 'r') as zf:
+        for member in EDITABLE_MEMBERS:
+            if member in _base_raw:
+                _base_files[member] = zf.read(member)
+
+
+def _build_variant(task):
+    """Aplica as alterações de uma variante e grava o E3A"""
+    output_path, edits = task
+    files = {m: bytearray(data) for m, data in _base_files.items()}
+    patches, wall_type_changes, stats, rejected = compile_patches(edits, files)
+    apply_patches(files, patches)
+    changed = replace_members(_base_path, files, output_path, _base_raw)
+    return output_path, changed, len(wall_type_changes), len(rejected)
+
+
+def generate_variants(base_path, grid_path, output_dir, workers=None):
+    params = load_grid(grid_path)
+    project = load_project(base_path)
+    variants = expand_variants(params, project)
+
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(base_path))[0]
+    width = max(3, len(str(len(variants))))
+    tasks = [(os.path.join(output_dir, f'{base_name}_V{i:0{width}d}.E3A'), edits)
+             for i, (_, edits) in enumerate(variants, 1)]
+
+    print(f"Base: {base_path}")
+    print(f"Parâmetros: {', '.join(p['nome'] for p in params)}")
+    print(f"Variantes: {len(variants)}")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(base_path,)) as pool:
+        results = list(pool.map(_build_variant, tasks))
+
+    if any(n for _, _, n, _ in results):
+        print("  AVISO: alterações de Wall Type não actualizam Space_Wall_Links nas variantes")
+    rejected = sum(n for _, _, _, n in results)
+    if rejected:
+        print(f"  AVISO: {rejected} alterações não aplicadas (valor inválido ou campo não editável)")
+
+    # Tabela de variantes
+    table_path = os.path.join(output_dir, 'variantes.csv')
+    with open(table_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['Variante'] + [p['nome'] for p in params] + ['Membros alterados'])
+        for (values, _), (path, changed, _, _) in zip(variants, results):
+            writer.writerow([os.path.basename(path)] + list(values) + [' '.join(changed)])
+
+    print(f"\nVariantes criadas em: {output_dir}")
+    print(f"Tabela: {table_path}")
+    return results
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    args = sys.argv[1:]
+    workers, args = option(args, '--workers', int)
+
+    if len(args) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    base_path, grid_path, output_dir = args[:3]
+    if not os.path.exists(base_path):
+        print(f"Erro: Ficheiro '{base_path}' nao encontrado!")
+        sys.exit(1)
+
+    try:
+        generate_variants(base_path, grid_path, output_dir, workers)
+    except (ValueError, KeyError) as e:
+        print(f"Erro na grelha: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+"""
+HAP 5.1 Cache - Cache em disco de projectos E3A já descodificados
+
+Guarda o projecto descodificado (espaços, schedules, assemblies, windows e
+linhas das tabelas de índice do MDB) num ficheiro compacto: JSON, seguido
+dos bytes e colunas array em binário, comprimido com zlib (encode_value).
+Nenhum formato executável (pickle): ler uma entrada de uma pasta partilhada
+nunca corre código. A chave é o hash blake2b dos membros do E3A usados na
+descodificação, por isso um E3A que não mudou nunca é descodificado duas vezes,
+seja pelo extractor, editor, validador ou comparador.
+
+O mesmo mecanismo (cached) guarda também as tabelas do HAP51INX.MDB lidas
+pelo verificar_referencias.py e os relatórios do validar_e3a.py. Como as
+tabelas do MDB só são lidas com pyodbc, a disponibilidade do pyodbc entra na
+chave: uma entrada gravada sem pyodbc não é reutilizada depois de o instalar.
+A mesma pasta guarda ainda os CSV lidos pelos scripts IEE (iee/hap_csv.py),
+que contam para o tamanho máximo e são apagados pelo `limpar`.
+
+Os descodificadores do hap_extractor só são importados quando é preciso
+descodificar, por isso este módulo pode ser importado pelo hap_extractor sem
+import circular.
+
+Configuração (variáveis de ambiente):
+    HAP_CACHE_DIR     Pasta da cache (default: ~/.hap_cache)
+    HAP_CACHE_MAX_MB  Tamanho máximo total (default: 256) - remove os
+                      ficheiros menos usados (LRU) quando é ultrapassado
+    HAP_CACHE=0       Desactiva a cache
+
+Usage:
+    python hap_cache.py info      # Mostra pasta, nº de entradas e tamanho
+    python hap_cache.py limpar    # Apaga todas as entradas
+"""
+
+import datetime
+import decimal
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import zipfile
+import zlib
+from array import array
+
+# Incrementar sempre que a descodificação mudar (invalida entradas antigas)
+CACHE_VERSION = 3
+
+CACHE_SUFFIX = '.hapc'
+
+# Membros do E3A que entram na descodificação (e portanto na chave)
+PROJECT_MEMBERS = (
+    'HAP51SPC.DAT', 'HAP51SCH.DAT', 'HAP51WAL.DAT',
+    'HAP51ROF.DAT', 'HAP51WIN.DAT', 'HAP51INX.MDB',
+)
+
+
+def cache_dir():
+    return os.environ.get('HAP_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.hap_cache')
+
+
+def cache_max_bytes():
+    return int(float(os.environ.get('HAP_CACHE_MAX_MB', '256')) * 1024 * 1024)
+
+
+def cache_enabled():
+    return os.environ.get('HAP_CACHE', '1') != '0'
+
+
+def index_reader_available():
+    """pyodbc instalado (sem ele as tabelas do MDB são sempre None)"""
+    return importlib.util.find_spec('pyodbc') is not None
+
+
+# =============================================================================
+# DESCODIFICAÇÃO
+# =============================================================================
+
+def read_project_members(e3a_path):
+    """Lê só os membros do E3A necessários para descodificar o projecto"""
+    with zipfile.ZipFile(e3a_path, 'r') as z:
+        names = set(z.namelist())
+        return {name: z.read(name) for name in PROJECT_MEMBERS if name in names}
+
+
+def content_key(kind, files, members):
+    """Hash blake2b do tipo de entrada + membros (nome + conteúdo), em ordem fixa"""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f'{kind}:v{CACHE_VERSION}'.encode())
+    for name in members:
+        data = files.get(name)
+        if data is None:
+            continue
+        h.update(name.encode('ascii'))
+        h.update(len(data).to_bytes(8, 'little'))
+        h.update(data)
+    return h.hexdigest()
+
+
+def _index_kind(kind):
+    return kind + ('+odbc' if index_reader_available() else '')
+
+
+def project_key(files):
+    """Chave do projecto: membros descodificados + disponibilidade do pyodbc"""
+    return content_key(_index_kind('projecto'), files, PROJECT_MEMBERS)
+
+
+def decode_project(files):
+    """Descodifica os membros de um E3A num dicionário com todos os dados"""
+    from hap_extractor import (
+        extract_spaces, extract_schedules, extract_walls_assemblies,
+        extract_roofs_assemblies, extract_windows, read_index_tables,
+        SCHEDULE_RECORD_SIZE,
+    )
+    from hap_manifest import DIGEST_SIZE, record_hashes
+
+    walls, walls_detail = extract_walls_assemblies(files.get('HAP51WAL.DAT', b''))
+    roofs, roofs_detail = extract_roofs_assemblies(files.get('HAP51ROF.DAT', b''))
+    windows, windows_detail = extract_windows(files.get('HAP51WIN.DAT', b''))
+    # Conteúdo de cada schedule (perfis e calendário, sem o nome - bytes 0-79)
+    digests = record_hashes(files.get('HAP51SCH.DAT', b''), SCHEDULE_RECORD_SIZE, skip=80)
+    return {
+        'spaces': extract_spaces(files.get('HAP51SPC.DAT', b'')),
+        'schedules': extract_schedules(files.get('HAP51SCH.DAT', b'')),
+        'schedules_hash': [digests[i:i + DIGEST_SIZE].hex() for i in range(0, len(digests), DIGEST_SIZE)],
+        'walls': walls,
+        'walls_detail': walls_detail,
+        'roofs': roofs,
+        'roofs_detail': roofs_detail,
+        'windows': windows,
+        'windows_detail': windows_detail,
+        'index_rows': read_index_tables(files.get('HAP51INX.MDB')),
+    }
+
+
+# =============================================================================
+# FORMATO DAS ENTRADAS (JSON + BINÁRIO)
+# =============================================================================
+# Tipos além dos do JSON vão como objectos marcados: bytes e array (em
+# binário, a seguir ao JSON), datetime/date e Decimal (em texto). Os tuplos
+# voltam como listas e as chaves dos dicionários têm de ser texto.
+
+def encode_value(value):
+    """Serializa value: 8 bytes com o tamanho do JSON + JSON + blocos binários"""
+    blocks = []
+    offset = 0
+
+    def block(raw):
+        nonlocal offset
+        blocks.append(raw)
+        start, offset = offset, offset + len(raw)
+        return start, len(raw)
+
+    def default(obj):
+        if isinstance(obj, array):
+            start, size = block(obj.tobytes())
+            return {'__array__': obj.typecode, 'start': start, 'size': size, 'order': sys.byteorder}
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            start, size = block(bytes(obj))
+            return {'__bytes__': True, 'start': start, 'size': size}
+        if isinstance(obj, datetime.datetime):
+            return {'__datetime__': obj.isoformat()}
+        if isinstance(obj, datetime.date):
+            return {'__date__': obj.isoformat()}
+        if isinstance(obj, decimal.Decimal):
+            return {'__decimal__': str(obj)}
+        raise TypeError(f'{type(obj).__name__} não suportado na cache')
+
+    text = json.dumps(value, default=default, separators=(',', ':')).encode('utf-8')
+    return len(text).to_bytes(8, 'little') + text + b''.join(blocks)
+
+
+def decode_value(blob):
+    """Inverso de encode_value. ValueError se o conteúdo não for válido."""
+    size = int.from_bytes(blob[:8], 'little')
+    data = memoryview(blob)[8 + size:]
+
+    def raw(obj):
+        start = obj['start']
+        if start + obj['size'] > len(data):
+            raise ValueError('entrada da cache truncada')
+        return data[start:start + obj['size']]
+
+    def hook(obj):
+        if '__array__' in obj:
+            column = array(obj['__array__'])
+            column.frombytes(raw(obj))
+            if obj['order'] != sys.byteorder:
+                column.byteswap()
+            return column
+        if '__bytes__' in obj:
+            return bytes(raw(obj))
+        if '__datetime__' in obj:
+            return datetime.datetime.fromisoformat(obj['__datetime__'])
+        if '__date__' in obj:
+            return datetime.date.fromisoformat(obj['__date__'])
+        if '__decimal__' in obj:
+            return decimal.Decimal(obj['__decimal__'])
+        return obj
+
+    try:
+        return json.loads(bytes(blob[8:8 + size]).decode('utf-8'), object_hook=hook)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f'entrada da cache inválida: {e}') from None
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+def _entry_path(key, directory=None):
+    return os.path.join(directory or cache_dir(), key + CACHE_SUFFIX)
+
+
+def _read_entry(path):
+    try:
+        with open(path, 'rb') as f:
+            project = decode_value(zlib.decompress(f.read()))
+    except (OSError, zlib.error, ValueError):
+        return None
+    try:
+        os.utime(path)  # Marca como usado recentemente (LRU)
+    except OSError:
+        pass
+    return project
+
+
+def _write_entry(path, project):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    blob = zlib.compress(encode_value(project), 6)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(blob)
+    os.replace(tmp_path, path)  # Atómico: nunca deixa entradas a meio
+
+
+def list_entries(directory=None):
+    """Entradas da cache como [(mtime, tamanho, caminho)], mais antigas primeiro"""
+    directory = directory or cache_dir()
+    entries = []
+    if not os.path.isdir(directory):
+        return entries
+    for name in os.listdir(directory):
+        if not name.endswith(CACHE_SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    entries.sort()
+    return entries
+
+
+def evict(directory=None, max_bytes=None):
+    """Remove as entradas menos usadas até o total caber em max_bytes"""
+    max_bytes = cache_max_bytes() if max_bytes is None else max_bytes
+    entries = list_entries(directory)
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def _store(path, value):
+    try:
+        _write_entry(path, value)
+        evict()
+    except OSError:
+        pass  # Cache é só uma optimização - nunca falha a extracção
+
+
+def cached(kind, files, members, compute, use_cache=True):
+    """Resultado de compute(), da cache se os membros dados não mudaram.
+
+    kind distingue os tipos de entrada (e deve mudar com a versão de quem
+    calcula). Resultados None nunca são guardados.
+    """
+    if not (use_cache and cache_enabled()):
+        return compute()
+
+    path = _entry_path(content_key(kind, files, members))
+    value = _read_entry(path) if os.path.exists(path) else None
+    if value is not None:
+        return value
+
+    value = compute()
+    if value is not None:
+        _store(path, value)
+    return value
+
+
+def load_project(e3a_path, use_cache=True):
+    """Devolve o projecto descodificado, da cache se o conteúdo não mudou"""
+    files = read_project_members(e3a_path)
+    if not (use_cache and cache_enabled()):
+        return decode_project(files)
+
+    path = _entry_path(project_key(files))
+    project = _read_entry(path) if os.path.exists(path) else None
+    if project is not None:
+        return project
+
+    project = decode_project(files)
+    # Com pyodbc mas sem o driver do Access as tabelas ficam None - não guardar,
+    # para serem lidas quando o driver estiver instalado
+    if not (project['index_rows'] is None and files.get('HAP51INX.MDB') and index_reader_available()):
+        _store(path, project)
+    return project
+
+
+def load_index_tables(inx_data, use_cache=True):
+    """Tabelas de índice/links do HAP51INX.MDB (ver read_index_tables), via cache"""
+    from hap_extractor import read_index_tables
+
+    if not inx_data:
+        return None
+    return cached(_index_kind('indices'), {'HAP51INX.MDB': inx_data}, ('HAP51INX.MDB',),
+                  lambda: read_index_tables(inx_data), use_cache)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    cmd = sys.argv[1].lower()
+    entries = list_entries()
+
+    if cmd == 'info':
+        total = sum(size for _, size, _ in entries)
+        print(f"Pasta: {cache_dir()}")
+        print(f"  Entradas: {len(entries)}")
+        print(f"  Tamanho: {total / 1024 / 1024:.1f} MB (máximo {cache_max_bytes() / 1024 / 1024:.0f} MB)")
+
+    elif cmd == 'limpar':
+        removed = 0
+        for _, _, path in entries:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue  # Já removida por outro processo (evict)
+            removed += 1
+        print(f"Cache limpa: {removed} entradas removidas")
+
+    else:
+        print(f"Comando desconhecido: {cmd}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
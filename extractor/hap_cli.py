@@ -0,0 +1,48 @@
+"""
+HAP 5.1 CLI - Funções partilhadas pelas linhas de comando das ferramentas
+
+- option: lê e remove `--flag valor` dos argumentos
+- write_junit_report: relatório JUnit XML (um testcase por ficheiro) dos
+  validadores em modo pasta (validar_e3a.py, validar_excel_hap.py)
+
+As ferramentas fora desta pasta importam este módulo acrescentando
+../extractor ao sys.path, como para o hap_extractor.
+"""
+
+import xml.etree.ElementTree as ET
+
+
+def option(args, flag, convert=str, default=None):
+    """Remove '--flag valor' de args. Retorna (valor ou default, args)."""
+    if flag not in args:
+        return default, args
+    i = args.index(flag)
+    return convert(args[i + 1]), args[:i] + args[i + 2:]
+
+
+def write_junit_report(cases, path, suite_name):
+    """Grava um relatório JUnit XML com um testcase por ficheiro.
+
+    cases: [{'name', 'seconds', 'failures': [...], 'output': [...], 'error'}]
+      failures  mensagens dos erros de validação (<failure>)
+      output    avisos e outras linhas informativas (<system-out>)
+      error     excepção ao validar o ficheiro, ou None (<error>)
+    """
+    root = ET.Element('testsuites')
+    suite = ET.SubElement(root, 'testsuite', name=suite_name, tests=str(len(cases)),
+                          failures=str(sum(1 for c in cases if c['failures'] and not c.get('error'))),
+                          errors=str(sum(1 for c in cases if c.get('error'))),
+                          time=f"{sum(c['seconds'] for c in cases):.3f}")
+    for c in cases:
+        case = ET.SubElement(suite, 'testcase', classname=suite_name, name=c['name'],
+                             time=f"{c['seconds']:.3f}")
+        if c.get('error'):
+            ET.SubElement(case, 'error', message=c['error'].splitlines()[0]).text = c['error']
+        elif c['failures']:
+            failure = ET.SubElement(case, 'failure', message=f"{len(c['failures'])} erros")
+            failure.text = '\n'.join(c['failures'])
+        if c.get('output'):
+            ET.SubElement(case, 'system-out').text = '\n'.join(c['output'])
+    tree = ET.ElementTree(root)
+    ET.indent(tree)
+    tree.write(path, encoding='utf-8', xml_declaration=True)
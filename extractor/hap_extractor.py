@@ -5,9 +5,19 @@ Usa o mesmo formato do template HAP_Template_RSECE.xlsx com 147 colunas.
 
 Usage:
     python hap_extractor.py <input.E3A> [output.xlsx]
+    python hap_extractor.py <input.E3A> --ndjson [output.ndjson | -]
+    python hap_extractor.py --portfolio <pasta_E3A> [output.xlsx] [--workers N]
 
 Exemplo:
     python hap_extractor.py Malhoa22_ComSistemas.E3A Malhoa22_Extraido.xlsx
+    python hap_extractor.py Malhoa22_ComSistemas.E3A --ndjson - | loader
+
+O modo --portfolio extrai todos os E3A de uma pasta em paralelo para um único
+Excel: folha Espacos com a coluna Projecto + folha Resumo com uma linha por
+projecto (área, ocupação, iluminação, área de vidro por orientação).
+
+O modo --ndjson escreve um espaço por linha (JSON), já com os nomes de
+schedules, walls, windows e roofs resolvidos, sem criar o Excel.
 """
 
 import zipfile
@@ -15,9 +25,15 @@ import struct
 import sys
 import os
 import re
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 
+from hap_cache import load_project
+from hap_cli import option
+
 # =============================================================================
 # CONSTANTES
 # =============================================================================
@@ -571,10 +587,214 @@ def extract_windows(win_data):
 
     return windows, windows_detail
 
+# Tabelas de índice e links do HAP51INX.MDB
+INDEX_TABLES = (
+    'SpaceIndex', 'ScheduleIndex', 'WallIndex', 'WindowIndex', 'DoorIndex', 'RoofIndex',
+    'Space_Schedule_Links', 'Space_Wall_Links', 'Space_Window_Links',
+    'Space_Door_Links', 'Space_Roof_Links',
+)
+
+def read_index_tables(inx_data):
+    """Lê as tabelas de índice/links do HAP51INX.MDB.
+
+    Requer pyodbc + Microsoft Access Driver. Retorna None se não estiverem
+    disponíveis; tabelas inexistentes ficam como lista vazia.
+    """
+    if not inx_data:
+        return None
+    try:
+        import pyodbc
+    except ImportError:
+        return None
+
+    tables = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        mdb_path = os.path.join(tmpdir, 'HAP51INX.MDB')
+        with open(mdb_path, 'wb') as f:
+            f.write(inx_data)
+        try:
+            conn = pyodbc.connect(f'DRIVER={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={mdb_path}')
+        except Exception:
+            return None
+        try:
+            cursor = conn.cursor()
+            for table in INDEX_TABLES:
+                try:
+                    cursor.execute(f'SELECT * FROM {table}')
+                    tables[table] = [tuple(row) for row in cursor.fetchall()]
+                except Exception:
+                    tables[table] = []
+        finally:
+            conn.close()
+    return tables
+
+# =============================================================================
+# EXTRACÇÃO EM STREAMING (NDJSON)
+# =============================================================================
+
+SCHEDULE_ID_FIELDS = ('people_schedule_id', 'light_schedule_id', 'equip_schedule_id',
+                      'misc_sens_schedule_id', 'misc_lat_schedule_id')
+
+def _name_at(names, idx):
+    return names[idx] if idx < len(names) else ''
+
+def resolve_space_names(space, schedules, walls, roofs, windows):
+    """Acrescenta ao espaço os nomes referidos pelos IDs (schedules, assemblies, windows)"""
+    for key in SCHEDULE_ID_FIELDS:
+        space[key[:-3]] = _name_at(schedules, space[key])  # 'people_schedule_id' -> 'people_schedule'
+
+    for wall in space['walls']:
+        wall['wall_type'] = _name_at(walls, wall['wall_type_id'])
+        wall['window1'] = _name_at(windows, wall['window1_type_id'])
+        wall['window2'] = _name_at(windows, wall['window2_type_id'])
+
+    for roof in space['roofs']:
+        roof['roof_type'] = _name_at(roofs, roof['roof_type_id'])
+        roof['skylight'] = _name_at(windows, roof['skylight_type_id'])  # Skylights usam WindowIndex
+
+    return space
+
+def iter_spaces(e3a_path, include_default=False):
+    """Gera os espaços de um E3A um a um, já com os nomes resolvidos.
+
+    Só as listas de nomes (schedules, walls, roofs, windows) ficam em memória;
+    o HAP51SPC.DAT é lido do ZIP registo a registo (682 bytes de cada vez).
+    """
+    with zipfile.ZipFile(e3a_path, 'r') as z:
+        members = set(z.namelist())
+
+        def read_member(name):
+            return z.read(name) if name in members else b''
+
+        schedules = extract_schedules(read_member('HAP51SCH.DAT'))
+        walls, _ = extract_walls_assemblies(read_member('HAP51WAL.DAT'))
+        roofs, _ = extract_roofs_assemblies(read_member('HAP51ROF.DAT'))
+        windows, _ = extract_windows(read_member('HAP51WIN.DAT'))
+
+        if 'HAP51SPC.DAT' not in members:
+            return
+
+        with z.open('HAP51SPC.DAT') as f:
+            index = 0
+            while True:
+                record = f.read(SPACE_RECORD_SIZE)
+                if len(record) < SPACE_RECORD_SIZE:
+                    break
+                if index > 0 or include_default:  # Index 0 = Default Space
+                    space = extract_space_record(record, index)
+                    yield resolve_space_names(space, schedules, walls, roofs, windows)
+                index += 1
+
+def write_ndjson(e3a_path, out, include_default=False):
+    """Escreve um espaço por linha (NDJSON) em `out`. Retorna o número de espaços."""
+    count = 0
+    for space in iter_spaces(e3a_path, include_default):
+        out.write(json.dumps(space, ensure_ascii=False))
+        out.write('\n')
+        count += 1
+    return count
+
 # =============================================================================
 # ESCRITA DO EXCEL
 # =============================================================================
 
+def space_headers():
+    """Headers das 147 colunas da folha Espacos"""
+    headers = [
+        # GENERAL (1-6)
+        'Space Name', 'Floor Area\n(m2)', 'Avg Ceiling Ht\n(m)', 'Building Wt\n(kg/m2)',
+        'Outdoor Air\n(valor)', 'OA Unit',
+        # PEOPLE (7-11)
+        'Occupancy\n(people)', 'Activity Level', 'Sensible\n(W/person)', 'Latent\n(W/person)', 'Schedule',
+        # LIGHTING (12-16)
+        'Task Lighting\n(W)', 'General Ltg\n(W)', 'Fixture Type', 'Ballast Mult', 'Schedule',
+        # EQUIPMENT (17-18)
+        'Equipment\n(W/m2)', 'Schedule',
+        # MISC (19-22)
+        'Sensible\n(W)', 'Latent\n(W)', 'Sens Sch', 'Lat Sch',
+        # INFILTRATION (23-26)
+        'Infil Method', 'Design Clg\n(ACH)', 'Design Htg\n(ACH)', 'Energy\n(ACH)',
+        # FLOORS (27-39) - 13 campos
+        'Floor Type', 'Floor Area\n(m2)', 'U-Value\n(W/m2K)', 'Exp Perim\n(m)',
+        'Edge R\n(m2K/W)', 'Depth\n(m)', 'Bsmt Wall U\n(W/m2K)', 'Wall Ins R\n(m2K/W)',
+        'Ins Depth\n(m)', 'Unc Max\n(C)', 'Out Max\n(C)', 'Unc Min\n(C)', 'Out Min\n(C)',
+        # PARTITIONS - CEILING (40-45) - 6 campos
+        'Area\n(m2)', 'U-Value\n(W/m2K)', 'Unc Max\n(C)', 'Out Max\n(C)', 'Unc Min\n(C)', 'Out Min\n(C)',
+        # PARTITIONS - WALL (46-51) - 6 campos
+        'Area\n(m2)', 'U-Value\n(W/m2K)', 'Unc Max\n(C)', 'Out Max\n(C)', 'Unc Min\n(C)', 'Out Min\n(C)',
+    ]
+
+    # WALLS (52-123) - 8 walls x 9 campos = 72 colunas
+    wall_headers = ['Exposure', 'Gross Area\n(m2)', 'Wall Type', 'Window 1', 'Win1 Qty',
+                    'Window 2', 'Win2 Qty', 'Door', 'Door Qty']
+    for w in range(8):
+        headers.extend(wall_headers)
+
+    # ROOFS (124-147) - 4 roofs x 6 campos = 24 colunas
+    roof_headers = ['Exposure', 'Gross Area\n(m2)', 'Slope\n(deg)', 'Roof Type', 'Skylight', 'Sky Qty']
+    for r in range(4):
+        headers.extend(roof_headers)
+
+    return headers
+
+def space_row(space, schedules, walls, roofs, windows):
+    """Valores das 147 colunas da folha Espacos para um espaço"""
+    row = [
+        # GENERAL (1-6)
+        space['name'], space['area_m2'], space['height_m'], space['weight_kg_m2'],
+        space['oa_value'], space['oa_unit'],
+        # PEOPLE (7-11)
+        space['occupancy'], space['activity'], space['sensible_w'], space['latent_w'],
+        _name_at(schedules, space['people_schedule_id']),
+        # LIGHTING (12-16)
+        space['task_light_w'], space['gen_light_w'], space['fixture_type'], space['ballast'],
+        _name_at(schedules, space['light_schedule_id']),
+        # EQUIPMENT (17-18)
+        space['equip_w_m2'], _name_at(schedules, space['equip_schedule_id']),
+        # MISC (19-22)
+        space['misc_sensible_w'], space['misc_latent_w'],
+        _name_at(schedules, space['misc_sens_schedule_id']),
+        _name_at(schedules, space['misc_lat_schedule_id']),
+        # INFILTRATION (23-26)
+        space['infil_method'], space['design_clg_ach'], space['design_htg_ach'], space['energy_ach'],
+        # FLOORS (27-39)
+        space['floor_type'], space['floor_area_m2'], space['floor_u_value'], space['floor_exp_perim'],
+        space['floor_edge_r'], space['floor_depth'], space['floor_bsmt_wall_u'], space['floor_wall_ins_r'],
+        space['floor_ins_depth'], space['floor_unc_max'], space['floor_out_max'],
+        space['floor_unc_min'], space['floor_out_min'],
+        # PARTITIONS - CEILING (40-45)
+        space['ceil_area_m2'], space['ceil_u_value'], space['ceil_unc_max'], space['ceil_out_max'],
+        space['ceil_unc_min'], space['ceil_out_min'],
+        # PARTITIONS - WALL (46-51)
+        space['wall_part_area_m2'], space['wall_part_u_value'], space['wall_part_unc_max'],
+        space['wall_part_out_max'], space['wall_part_unc_min'], space['wall_part_out_min'],
+    ]
+
+    # WALLS (52-123) - 8 walls x 9 campos
+    for wall in space['walls']:
+        row.extend([
+            wall['exposure'], wall['area_m2'],
+            _name_at(walls, wall['wall_type_id']),
+            _name_at(windows, wall['window1_type_id']),
+            wall['window1_qty'] if wall['window1_qty'] else '',
+            _name_at(windows, wall['window2_type_id']),
+            wall['window2_qty'] if wall['window2_qty'] else '',
+            '',  # Door name (not extracted)
+            wall['door_qty'] if wall['door_qty'] else '',
+        ])
+
+    # ROOFS (124-147) - 4 roofs x 6 campos
+    for roof in space['roofs']:
+        row.extend([
+            roof['exposure'], roof['area_m2'],
+            roof['slope'] if roof['slope'] else '',
+            _name_at(roofs, roof['roof_type_id']),
+            '',  # Skylight name
+            roof['skylight_qty'] if roof['skylight_qty'] else '',
+        ])
+
+    return row
+
 def create_excel(spaces, schedules, walls, roofs, windows, output_path):
     """Cria Excel com todos os dados extraídos no formato do template"""
 
@@ -615,42 +835,7 @@ def create_excel(spaces, schedules, walls, roofs, windows, output_path):
         cell.font = Font(bold=True)
 
     # === LINHA 3: Headers dos campos (147 colunas) ===
-    headers = [
-        # GENERAL (1-6)
-        'Space Name', 'Floor Area\n(m2)', 'Avg Ceiling Ht\n(m)', 'Building Wt\n(kg/m2)',
-        'Outdoor Air\n(valor)', 'OA Unit',
-        # PEOPLE (7-11)
-        'Occupancy\n(people)', 'Activity Level', 'Sensible\n(W/person)', 'Latent\n(W/person)', 'Schedule',
-        # LIGHTING (12-16)
-        'Task Lighting\n(W)', 'General Ltg\n(W)', 'Fixture Type', 'Ballast Mult', 'Schedule',
-        # EQUIPMENT (17-18)
-        'Equipment\n(W/m2)', 'Schedule',
-        # MISC (19-22)
-        'Sensible\n(W)', 'Latent\n(W)', 'Sens Sch', 'Lat Sch',
-        # INFILTRATION (23-26)
-        'Infil Method', 'Design Clg\n(ACH)', 'Design Htg\n(ACH)', 'Energy\n(ACH)',
-        # FLOORS (27-39) - 13 campos
-        'Floor Type', 'Floor Area\n(m2)', 'U-Value\n(W/m2K)', 'Exp Perim\n(m)',
-        'Edge R\n(m2K/W)', 'Depth\n(m)', 'Bsmt Wall U\n(W/m2K)', 'Wall Ins R\n(m2K/W)',
-        'Ins Depth\n(m)', 'Unc Max\n(C)', 'Out Max\n(C)', 'Unc Min\n(C)', 'Out Min\n(C)',
-        # PARTITIONS - CEILING (40-45) - 6 campos
-        'Area\n(m2)', 'U-Value\n(W/m2K)', 'Unc Max\n(C)', 'Out Max\n(C)', 'Unc Min\n(C)', 'Out Min\n(C)',
-        # PARTITIONS - WALL (46-51) - 6 campos
-        'Area\n(m2)', 'U-Value\n(W/m2K)', 'Unc Max\n(C)', 'Out Max\n(C)', 'Unc Min\n(C)', 'Out Min\n(C)',
-    ]
-
-    # WALLS (52-123) - 8 walls x 9 campos = 72 colunas
-    wall_headers = ['Exposure', 'Gross Area\n(m2)', 'Wall Type', 'Window 1', 'Win1 Qty',
-                    'Window 2', 'Win2 Qty', 'Door', 'Door Qty']
-    for w in range(8):
-        headers.extend(wall_headers)
-
-    # ROOFS (124-147) - 4 roofs x 6 campos = 24 colunas
-    roof_headers = ['Exposure', 'Gross Area\n(m2)', 'Slope\n(deg)', 'Roof Type', 'Skylight', 'Sky Qty']
-    for r in range(4):
-        headers.extend(roof_headers)
-
-    for col, h in enumerate(headers, 1):
+    for col, h in enumerate(space_headers(), 1):
         cell = ws.cell(row=3, column=col, value=h)
         cell.fill = subheader_fill
         cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
@@ -662,106 +847,8 @@ def create_excel(spaces, schedules, walls, roofs, windows, output_path):
         if space['_index'] == 0:  # Skip Default Space
             continue
 
-        col = 1
-
-        # GENERAL (1-6)
-        ws.cell(row=row_idx, column=col, value=space['name']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['area_m2']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['height_m']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['weight_kg_m2']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['oa_value']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['oa_unit']); col += 1
-
-        # PEOPLE (7-11)
-        ws.cell(row=row_idx, column=col, value=space['occupancy']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['activity']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['sensible_w']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['latent_w']); col += 1
-        sch_name = schedules[space['people_schedule_id']] if space['people_schedule_id'] < len(schedules) else ''
-        ws.cell(row=row_idx, column=col, value=sch_name); col += 1
-
-        # LIGHTING (12-16)
-        ws.cell(row=row_idx, column=col, value=space['task_light_w']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['gen_light_w']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['fixture_type']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['ballast']); col += 1
-        sch_name = schedules[space['light_schedule_id']] if space['light_schedule_id'] < len(schedules) else ''
-        ws.cell(row=row_idx, column=col, value=sch_name); col += 1
-
-        # EQUIPMENT (17-18)
-        ws.cell(row=row_idx, column=col, value=space['equip_w_m2']); col += 1
-        sch_name = schedules[space['equip_schedule_id']] if space['equip_schedule_id'] < len(schedules) else ''
-        ws.cell(row=row_idx, column=col, value=sch_name); col += 1
-
-        # MISC (19-22)
-        ws.cell(row=row_idx, column=col, value=space['misc_sensible_w']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['misc_latent_w']); col += 1
-        sch_name = schedules[space['misc_sens_schedule_id']] if space['misc_sens_schedule_id'] < len(schedules) else ''
-        ws.cell(row=row_idx, column=col, value=sch_name); col += 1
-        sch_name = schedules[space['misc_lat_schedule_id']] if space['misc_lat_schedule_id'] < len(schedules) else ''
-        ws.cell(row=row_idx, column=col, value=sch_name); col += 1
-
-        # INFILTRATION (23-26)
-        ws.cell(row=row_idx, column=col, value=space['infil_method']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['design_clg_ach']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['design_htg_ach']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['energy_ach']); col += 1
-
-        # FLOORS (27-39)
-        ws.cell(row=row_idx, column=col, value=space['floor_type']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_area_m2']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_u_value']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_exp_perim']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_edge_r']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_depth']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_bsmt_wall_u']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_wall_ins_r']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_ins_depth']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_unc_max']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_out_max']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_unc_min']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['floor_out_min']); col += 1
-
-        # PARTITIONS - CEILING (40-45)
-        ws.cell(row=row_idx, column=col, value=space['ceil_area_m2']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['ceil_u_value']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['ceil_unc_max']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['ceil_out_max']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['ceil_unc_min']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['ceil_out_min']); col += 1
-
-        # PARTITIONS - WALL (46-51)
-        ws.cell(row=row_idx, column=col, value=space['wall_part_area_m2']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['wall_part_u_value']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['wall_part_unc_max']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['wall_part_out_max']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['wall_part_unc_min']); col += 1
-        ws.cell(row=row_idx, column=col, value=space['wall_part_out_min']); col += 1
-
-        # WALLS (52-123) - 8 walls x 9 campos
-        for wall in space['walls']:
-            ws.cell(row=row_idx, column=col, value=wall['exposure']); col += 1
-            ws.cell(row=row_idx, column=col, value=wall['area_m2']); col += 1
-            wall_name = walls[wall['wall_type_id']] if wall['wall_type_id'] < len(walls) else ''
-            ws.cell(row=row_idx, column=col, value=wall_name); col += 1
-            win1_name = windows[wall['window1_type_id']] if wall['window1_type_id'] < len(windows) else ''
-            ws.cell(row=row_idx, column=col, value=win1_name); col += 1
-            ws.cell(row=row_idx, column=col, value=wall['window1_qty'] if wall['window1_qty'] else ''); col += 1
-            win2_name = windows[wall['window2_type_id']] if wall['window2_type_id'] < len(windows) else ''
-            ws.cell(row=row_idx, column=col, value=win2_name); col += 1
-            ws.cell(row=row_idx, column=col, value=wall['window2_qty'] if wall['window2_qty'] else ''); col += 1
-            ws.cell(row=row_idx, column=col, value=''); col += 1  # Door name (not extracted)
-            ws.cell(row=row_idx, column=col, value=wall['door_qty'] if wall['door_qty'] else ''); col += 1
-
-        # ROOFS (124-147) - 4 roofs x 6 campos
-        for roof in space['roofs']:
-            ws.cell(row=row_idx, column=col, value=roof['exposure']); col += 1
-            ws.cell(row=row_idx, column=col, value=roof['area_m2']); col += 1
-            ws.cell(row=row_idx, column=col, value=roof['slope'] if roof['slope'] else ''); col += 1
-            roof_name = roofs[roof['roof_type_id']] if roof['roof_type_id'] < len(roofs) else ''
-            ws.cell(row=row_idx, column=col, value=roof_name); col += 1
-            ws.cell(row=row_idx, column=col, value=''); col += 1  # Skylight name
-            ws.cell(row=row_idx, column=col, value=roof['skylight_qty'] if roof['skylight_qty'] else ''); col += 1
+        for col, value in enumerate(space_row(space, schedules, walls, roofs, windows), 1):
+            ws.cell(row=row_idx, column=col, value=value)
 
         row_idx += 1  # Próxima linha
 
@@ -776,6 +863,34 @@ def create_excel(spaces, schedules, walls, roofs, windows, output_path):
     wb.save(output_path)
     return wb
 
+def is_listed_window(win):
+    """Windows que aparecem na folha Windows (ignora as 'Sample' do HAP)"""
+    return bool(win['name']) and not win['name'].startswith('Sample')
+
+def window_row(win):
+    """Valores da folha Windows: Nome, U-Value, SHGC, Altura, Largura"""
+    return [
+        win['name'],
+        win['u_value'] if win['u_value'] else '',
+        win['shgc'] if win['shgc'] else '',
+        win['height'] if win['height'] else '',
+        win['width'] if win['width'] else '',
+    ]
+
+def is_listed_assembly(item):
+    """Assemblies que aparecem nas folhas Walls/Roofs (ignora 'Sample' e 'Default')"""
+    return bool(item['name']) and not item['name'].startswith('Sample') and not item['name'].startswith('Default')
+
+def assembly_row(item):
+    """Valores das folhas Walls/Roofs: Nome, U-Value, Espessura, Massa, Absorptivity"""
+    return [
+        item['name'],
+        item['u_value'] if item['u_value'] else '',
+        item['thickness'] if item.get('thickness') else '',
+        item['mass'] if item.get('mass') else '',
+        item.get('absorptivity', 0.9),
+    ]
+
 def create_windows_sheet(wb, windows_detail):
     """Cria folha Windows"""
     ws = wb.create_sheet('Windows')
@@ -794,12 +909,9 @@ def create_windows_sheet(wb, windows_detail):
 
     # Dados
     for i, win in enumerate(windows_detail, 4):
-        if win['name'] and not win['name'].startswith('Sample'):
-            ws.cell(i, 1, value=win['name'])
-            ws.cell(i, 2, value=win['u_value'] if win['u_value'] else '')
-            ws.cell(i, 3, value=win['shgc'] if win['shgc'] else '')
-            ws.cell(i, 4, value=win['height'] if win['height'] else '')
-            ws.cell(i, 5, value=win['width'] if win['width'] else '')
+        if is_listed_window(win):
+            for col, value in enumerate(window_row(win), 1):
+                ws.cell(i, col, value=value)
 
     # Ajustar colunas
     ws.column_dimensions['A'].width = 30
@@ -826,12 +938,9 @@ def create_walls_sheet(wb, walls_detail):
     # Dados
     row = 4
     for wall in walls_detail:
-        if wall['name'] and not wall['name'].startswith('Sample') and not wall['name'].startswith('Default'):
-            ws.cell(row, 1, value=wall['name'])
-            ws.cell(row, 2, value=wall['u_value'] if wall['u_value'] else '')
-            ws.cell(row, 3, value=wall['thickness'] if wall.get('thickness') else '')
-            ws.cell(row, 4, value=wall['mass'] if wall.get('mass') else '')
-            ws.cell(row, 5, value=wall.get('absorptivity', 0.9))
+        if is_listed_assembly(wall):
+            for col, value in enumerate(assembly_row(wall), 1):
+                ws.cell(row, col, value=value)
             row += 1
 
     # Ajustar colunas
@@ -859,12 +968,9 @@ def create_roofs_sheet(wb, roofs_detail):
     # Dados
     row = 4
     for roof in roofs_detail:
-        if roof['name'] and not roof['name'].startswith('Sample') and not roof['name'].startswith('Default'):
-            ws.cell(row, 1, value=roof['name'])
-            ws.cell(row, 2, value=roof['u_value'] if roof['u_value'] else '')
-            ws.cell(row, 3, value=roof['thickness'] if roof.get('thickness') else '')
-            ws.cell(row, 4, value=roof['mass'] if roof.get('mass') else '')
-            ws.cell(row, 5, value=roof.get('absorptivity', 0.9))
+        if is_listed_assembly(roof):
+            for col, value in enumerate(assembly_row(roof), 1):
+                ws.cell(row, col, value=value)
             row += 1
 
     # Ajustar colunas
@@ -872,6 +978,124 @@ def create_roofs_sheet(wb, roofs_detail):
     for col in ['B', 'C', 'D', 'E']:
         ws.column_dimensions[col].width = 12
 
+# =============================================================================
+# PORTFOLIO (vários E3A em paralelo)
+# =============================================================================
+
+GLAZING_ORIENTATIONS = [d for d in DIRECTION_NAMES.values() if d]
+
+def summarize_project(spaces, windows_detail):
+    """Totais de um projecto: área, ocupação, iluminação e vidro por orientação"""
+    summary = {
+        'spaces': 0, 'area_m2': 0.0, 'occupancy': 0.0, 'lighting_w': 0.0,
+        'glazing_m2': {d: 0.0 for d in GLAZING_ORIENTATIONS},
+    }
+
+    def window_area(win_id):
+        if win_id >= len(windows_detail):
+            return 0
+        win = windows_detail[win_id]
+        return win['height'] * win['width']
+
+    for space in spaces:
+        if space['_index'] == 0:  # Skip Default Space
+            continue
+        summary['spaces'] += 1
+        summary['area_m2'] += space['area_m2']
+        summary['occupancy'] += space['occupancy']
+        summary['lighting_w'] += space['task_light_w'] + space['gen_light_w']
+
+        for wall in space['walls']:
+            if wall['exposure'] not in summary['glazing_m2']:
+                continue
+            area = (window_area(wall['window1_type_id']) * wall['window1_qty'] +
+                    window_area(wall['window2_type_id']) * wall['window2_qty'])
+            summary['glazing_m2'][wall['exposure']] += area
+
+        for roof in space['roofs']:
+            if roof['exposure'] in summary['glazing_m2'] and roof['skylight_qty']:
+                summary['glazing_m2'][roof['exposure']] += \
+                    window_area(roof['skylight_type_id']) * roof['skylight_qty']
+
+    return summary
+
+def extract_project(e3a_path):
+    """Extrai um E3A para linhas da folha Espacos + resumo (corre num processo do pool)"""
+    project = os.path.splitext(os.path.basename(e3a_path))[0]
+    try:
+        data = load_project(e3a_path)
+    except Exception as e:
+        return {'project': project, 'error': str(e)}
+
+    rows = [space_row(space, data['schedules'], data['walls'], data['roofs'], data['windows'])
+            for space in data['spaces'] if space['_index'] != 0]
+    return {
+        'project': project,
+        'rows': rows,
+        'summary': summarize_project(data['spaces'], data['windows_detail']),
+    }
+
+def extract_portfolio(folder, workers=None):
+    """Extrai todos os .E3A de uma pasta num pool de processos (ordem alfabética)"""
+    paths = sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith('.e3a')
+    )
+    if not paths:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(extract_project, paths))
+
+def create_portfolio_excel(results, output_path):
+    """Escreve o Excel consolidado (Espacos + Resumo) em modo write-only"""
+    wb = openpyxl.Workbook(write_only=True)
+
+    ws = wb.create_sheet('Espacos')
+    ws.append(['Projecto'] + space_headers())
+    for result in results:
+        for row in result.get('rows', []):
+            ws.append([result['project']] + row)
+
+    ws = wb.create_sheet('Resumo')
+    ws.append(['Projecto', 'Espacos', 'Area Total\n(m2)', 'Ocupacao\n(pessoas)', 'Iluminacao\n(W)'] +
+              [f'Vidro {d}\n(m2)' for d in GLAZING_ORIENTATIONS] + ['Vidro Total\n(m2)'])
+    for result in results:
+        if 'error' in result:
+            ws.append([result['project'], f"ERRO: {result['error']}"])
+            continue
+        summary = result['summary']
+        glazing = [round(summary['glazing_m2'][d], 2) for d in GLAZING_ORIENTATIONS]
+        ws.append([result['project'], summary['spaces'], round(summary['area_m2'], 2),
+                   round(summary['occupancy'], 1), round(summary['lighting_w'], 0)] +
+                  glazing + [round(sum(glazing), 2)])
+
+    wb.save(output_path)
+
+def main_portfolio(args):
+    workers, args = option(args, '--workers', int)
+    folder = args[0] if args else ''
+    output_file = args[1] if len(args) > 1 else os.path.join(folder, 'Portfolio_Extraido.xlsx')
+
+    if not os.path.isdir(folder):
+        print(f"Erro: Pasta '{folder}' nao encontrada!")
+        sys.exit(1)
+
+    print(f"A extrair portfolio de: {folder}")
+    results = extract_portfolio(folder, workers)
+    if not results:
+        print("Erro: Nenhum ficheiro .E3A encontrado!")
+        sys.exit(1)
+
+    for result in results:
+        if 'error' in result:
+            print(f"  {result['project']}: ERRO - {result['error']}")
+        else:
+            print(f"  {result['project']}: {len(result['rows'])} espacos")
+
+    create_portfolio_excel(results, output_file)
+    print(f"\nFicheiro criado: {output_file}")
+    print("Folhas: Espacos, Resumo")
+
 # =============================================================================
 # MAIN
 # =============================================================================
@@ -881,24 +1105,39 @@ def main():
         print(__doc__)
         sys.exit(1)
 
+    if sys.argv[1] == '--portfolio':
+        main_portfolio(sys.argv[2:])
+        return
+
     input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else input_file.replace('.E3A', '_Extraido.xlsx').replace('.e3a', '_Extraido.xlsx')
 
     if not os.path.exists(input_file):
         print(f"Erro: Ficheiro '{input_file}' nao encontrado!")
         sys.exit(1)
 
+    if '--ndjson' in sys.argv:
+        args = [a for a in sys.argv[2:] if a != '--ndjson']
+        output_file = args[0] if args else '-'
+        if output_file == '-':
+            count = write_ndjson(input_file, sys.stdout)
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                count = write_ndjson(input_file, f)
+        print(f"Espacos exportados (NDJSON): {count}", file=sys.stderr)
+        return
+
+    output_file = sys.argv[2] if len(sys.argv) > 2 else input_file.replace('.E3A', '_Extraido.xlsx').replace('.e3a', '_Extraido.xlsx')
+
     print(f"A extrair dados de: {input_file}")
 
-    # Ler E3A
-    files = read_e3a(input_file)
+    # Ler e descodificar E3A (via cache em disco, ver hap_cache.py)
+    data = load_project(input_file)
 
-    # Extrair dados
-    spaces = extract_spaces(files.get('HAP51SPC.DAT', b''))
-    schedules = extract_schedules(files.get('HAP51SCH.DAT', b''))
-    walls, walls_detail = extract_walls_assemblies(files.get('HAP51WAL.DAT', b''))
-    roofs, roofs_detail = extract_roofs_assemblies(files.get('HAP51ROF.DAT', b''))
-    windows, windows_detail = extract_windows(files.get('HAP51WIN.DAT', b''))
+    spaces = data['spaces']
+    schedules = data['schedules']
+    walls, walls_detail = data['walls'], data['walls_detail']
+    roofs, roofs_detail = data['roofs'], data['roofs_detail']
+    windows, windows_detail = data['windows'], data['windows_detail']
 
     print(f"  Espacos: {len(spaces)} (incluindo Default Space)")
     print(f"  Schedules: {len(schedules)}")
@@ -0,0 +1,410 @@
+"""
+HAP 5.1 Journal - Registo byte a byte das alterações a um E3A
+
+Cada gravação do editor (aplicar / patch), da biblioteca de climas (aplicar)
+e do HAPProject.save(journal=True) é registada como um lote de entradas (membro, offset, bytes antigos, bytes novos) num
+ficheiro .hapj ao lado do E3A gravado. Desfazer, refazer ou reproduzir
+noutro E3A é só trocar esses bytes - não é preciso voltar a extrair nem
+reaplicar o Excel, nem repor o ficheiro inteiro de _arquivo.
+
+Membros substituídos por inteiro a partir da biblioteca de climas
+(hap_weather_library.py) ficam no lote só como (membro, SHA-256 antigo,
+SHA-256 novo): os ~2.6 MB de WTA/WTD não são copiados para o journal e
+desfazer / refazer / reproduzir vão buscar os bytes à biblioteca
+(HAP_WEATHER_DIR).
+
+Antes de trocar bytes confirma que o E3A tem o conteúdo esperado
+(um E3A alterado fora do editor não é desfeito às cegas). Ao regravar o E3A
+só os membros alterados são recomprimidos (ver hap_zip.py).
+
+Configuração (variáveis de ambiente):
+    HAP_JOURNAL=0     Não grava journal
+
+Usage:
+    python hap_journal.py mostrar <ficheiro.E3A>
+    python hap_journal.py desfazer <ficheiro.E3A>
+    python hap_journal.py refazer <ficheiro.E3A>
+    python hap_journal.py reproduzir <origem.E3A> <destino.E3A> <output.E3A> [--forcar]
+"""
+
+import hashlib
+import os
+import struct
+import sys
+import time
+import zipfile
+
+from hap_zip import replace_members
+
+JOURNAL_MAGIC = b'HAPJ'
+JOURNAL_VERSION = 2
+JOURNAL_SUFFIX = '.hapj'
+
+_HEADER = struct.Struct('<4sBII')        # magic, versão, posição, nº de lotes
+_BATCH = struct.Struct('<dHII')          # timestamp, tamanho da descrição, nº de entradas, nº de objectos
+_BATCH_V1 = struct.Struct('<dHI')        # versão 1: sem objectos
+_ENTRY = struct.Struct('<12sIII')        # membro, offset, nº bytes antigos, nº bytes novos
+_OBJECT = struct.Struct('<12s32s32s')    # membro, SHA-256 antigo, SHA-256 novo
+
+# Bytes iguais entre duas diferenças abaixo deste valor ficam na mesma entrada
+MERGE_GAP = 8
+_CHUNK = 64
+
+
+def journal_enabled():
+    return os.environ.get('HAP_JOURNAL', '1') != '0'
+
+
+def journal_path(e3a_path):
+    return os.path.splitext(e3a_path)[0] + JOURNAL_SUFFIX
+
+
+# =============================================================================
+# DIFERENÇAS
+# =============================================================================
+
+def diff_member(old, new):
+    """Entradas (offset, antigos, novos) que transformam `old` em `new`.
+
+    Compara em blocos de _CHUNK bytes e só desce ao byte nos blocos diferentes.
+    Se o tamanho mudar, a última entrada substitui o fim do membro.
+    """
+    if old == new:
+        return []
+    n = min(len(old), len(new))
+    spans = []
+    pos = 0
+    while pos < n:
+        stop = min(pos + _CHUNK, n)
+        if old[pos:stop] != new[pos:stop]:
+            for i in range(pos, stop):
+                if old[i] != new[i]:
+                    if spans and i - spans[-1][1] <= MERGE_GAP:
+                        spans[-1][1] = i + 1
+                    else:
+                        spans.append([i, i + 1])
+        pos = stop
+
+    if len(old) != len(new):
+        if spans and n - spans[-1][1] <= MERGE_GAP:
+            spans[-1][1] = None
+        else:
+            spans.append([n, None])
+
+    entries = []
+    for start, end in spans:
+        if end is None:
+            entries.append((start, bytes(old[start:]), bytes(new[start:])))
+        else:
+            entries.append((start, bytes(old[start:end]), bytes(new[start:end])))
+    return entries
+
+
+def diff_files(old_files, new_files):
+    """Entradas (membro, offset, antigos, novos) para os membros presentes nos dois"""
+    entries = []
+    for member, new in new_files.items():
+        old = old_files.get(member)
+        if old is None:
+            continue
+        entries.extend((member,) + e for e in diff_member(old, new))
+    return entries
+
+
+def apply_entries(files, entries, reverse=False, check=True):
+    """Troca os bytes das entradas nos membros (bytearrays).
+
+    reverse=True desfaz (entradas pela ordem inversa). Com check=True falha
+    se os bytes actuais não forem os esperados.
+    """
+    for member, offset, old, new in (reversed(entries) if reverse else entries):
+        expected, replacement = (new, old) if reverse else (old, new)
+        data = files[member]
+        if check and data[offset:offset + len(expected)] != expected:
+            raise ValueError(f"{member} offset {offset}: conteúdo diferente do registado no journal")
+        data[offset:offset + len(expected)] = replacement
+
+
+# =============================================================================
+# OBJECTOS DA BIBLIOTECA DE CLIMAS
+# =============================================================================
+
+def load_object(member, sha):
+    """Bytes de um membro guardado na biblioteca de climas pelo SHA-256"""
+    # Import tardio: o hap_weather_library importa este módulo
+    from hap_weather_library import library_dir, read_object
+
+    try:
+        return read_object(sha)
+    except OSError:
+        raise ValueError(f"{member}: objecto {sha[:12]} não está na biblioteca de climas "
+                         f"({library_dir()})") from None
+
+
+def store_object(data):
+    """Guarda `data` na biblioteca de climas (se ainda não existir). Retorna o SHA-256."""
+    from hap_weather_library import store_object as store
+
+    return store(bytes(data))[0]
+
+
+def apply_objects(files, objects, reverse=False, check=True):
+    """Substitui os membros (bytearrays) pelos objectos da biblioteca.
+
+    Como apply_entries: reverse=True repõe os antigos e check=True falha se
+    o membro actual não tiver o SHA-256 esperado.
+    """
+    for member, old, new in (reversed(objects) if reverse else objects):
+        expected, replacement = (new, old) if reverse else (old, new)
+        if check and hashlib.sha256(files[member]).hexdigest() != expected:
+            raise ValueError(f"{member}: conteúdo diferente do registado no journal")
+        files[member] = bytearray(load_object(member, replacement))
+
+
+def apply_batch(files, batch, reverse=False, check=True):
+    """Aplica (ou desfaz) um lote: objectos inteiros e entradas byte a byte"""
+    if reverse:
+        apply_entries(files, batch['entries'], reverse=True, check=check)
+        apply_objects(files, batch['objects'], reverse=True, check=check)
+    else:
+        apply_objects(files, batch['objects'], check=check)
+        apply_entries(files, batch['entries'], check=check)
+
+
+# =============================================================================
+# FICHEIRO .hapj
+# =============================================================================
+
+def new_journal():
+    return {'position': 0, 'batches': []}
+
+
+def write_journal(journal, path):
+    parts = [_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, journal['position'], len(journal['batches']))]
+    for batch in journal['batches']:
+        label = batch['label'].encode('utf-8')[:0xFFFF]
+        parts.append(_BATCH.pack(batch['time'], len(label), len(batch['entries']), len(batch['objects'])))
+        parts.append(label)
+        for member, offset, old, new in batch['entries']:
+            parts.append(_ENTRY.pack(member.encode('ascii'), offset, len(old), len(new)))
+            parts.append(old)
+            parts.append(new)
+        for member, old, new in batch['objects']:
+            parts.append(_OBJECT.pack(member.encode('ascii'), bytes.fromhex(old), bytes.fromhex(new)))
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(b''.join(parts))
+    os.replace(tmp_path, path)
+
+
+def read_journal(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, position, num_batches = _HEADER.unpack_from(data, 0)
+    if magic != JOURNAL_MAGIC or version not in (1, JOURNAL_VERSION):
+        raise ValueError(f"'{path}' não é um journal HAP válido")
+
+    batches = []
+    pos = _HEADER.size
+    for _ in range(num_batches):
+        if version == 1:
+            (timestamp, label_len, num_entries), num_objects = _BATCH_V1.unpack_from(data, pos), 0
+            pos += _BATCH_V1.size
+        else:
+            timestamp, label_len, num_entries, num_objects = _BATCH.unpack_from(data, pos)
+            pos += _BATCH.size
+        label = data[pos:pos + label_len].decode('utf-8')
+        pos += label_len
+        entries = []
+        for _ in range(num_entries):
+            raw_name, offset, old_len, new_len = _ENTRY.unpack_from(data, pos)
+            pos += _ENTRY.size
+            old = data[pos:pos + old_len]
+            pos += old_len
+            new = data[pos:pos + new_len]
+            pos += new_len
+            entries.append((raw_name.rstrip(b'\x00').decode('ascii'), offset, old, new))
+        objects = []
+        for _ in range(num_objects):
+            raw_name, old, new = _OBJECT.unpack_from(data, pos)
+            pos += _OBJECT.size
+            objects.append((raw_name.rstrip(b'\x00').decode('ascii'), old.hex(), new.hex()))
+        batches.append({'time': timestamp, 'label': label, 'entries': entries, 'objects': objects})
+    return {'position': position, 'batches': batches}
+
+
+def load_journal(e3a_path):
+    """Journal de um E3A (vazio se não existir)"""
+    path = journal_path(e3a_path)
+    return read_journal(path) if os.path.exists(path) else new_journal()
+
+
+# =============================================================================
+# REGISTAR GRAVAÇÕES
+# =============================================================================
+
+def record(source_path, output_path, old_files, new_files, label, objects=()):
+    """Regista a gravação de `output_path` a partir de `source_path`.
+
+    O histórico do output é o do ficheiro de origem (até à posição actual)
+    mais um lote com as diferenças old_files -> new_files e os membros
+    substituídos por objectos da biblioteca de climas, `objects` =
+    [(membro, SHA-256 antigo, SHA-256 novo)] (os dois já guardados na
+    biblioteca). Lotes desfeitos que ainda se podiam refazer são descartados.
+    Retorna o nº de entradas.
+    """
+    if not journal_enabled():
+        return 0
+    entries = diff_files(old_files, new_files)
+    objects = [o for o in objects if o[1] != o[2]]
+    if not entries and not objects:
+        return 0
+
+    journal = load_journal(source_path) if source_path else new_journal()
+    journal['batches'] = journal['batches'][:journal['position']]
+    journal['batches'].append({'time': time.time(), 'label': label, 'entries': entries, 'objects': objects})
+    journal['position'] = len(journal['batches'])
+    write_journal(journal, journal_path(output_path))
+    return len(entries) + len(objects)
+
+
+# =============================================================================
+# DESFAZER / REFAZER / REPRODUZIR
+# =============================================================================
+
+def _read_members(e3a_path, members):
+    with zipfile.ZipFile(e3a_path, 'r') as zf:
+        return {m: bytearray(zf.read(m)) for m in members}
+
+
+def _rewrite_e3a(e3a_path, files, output_path):
+    """Grava o E3A com os membros de `files` substituídos (via ficheiro temporário).
+
+    Os membros não alterados são copiados comprimidos, sem descomprimir.
+    """
+    replace_members(e3a_path, files, output_path)
+
+
+def _batch_members(batch):
+    return sorted({member for member, _, _, _ in batch['entries']}
+                  | {member for member, _, _ in batch['objects']})
+
+
+def undo(e3a_path):
+    """Desfaz o último lote aplicado. Retorna o lote ou None."""
+    journal = load_journal(e3a_path)
+    if journal['position'] == 0:
+        return None
+    batch = journal['batches'][journal['position'] - 1]
+    files = _read_members(e3a_path, _batch_members(batch))
+    apply_batch(files, batch, reverse=True)
+    _rewrite_e3a(e3a_path, files, e3a_path)
+    journal['position'] -= 1
+    write_journal(journal, journal_path(e3a_path))
+    return batch
+
+
+def redo(e3a_path):
+    """Refaz o próximo lote desfeito. Retorna o lote ou None."""
+    journal = load_journal(e3a_path)
+    if journal['position'] >= len(journal['batches']):
+        return None
+    batch = journal['batches'][journal['position']]
+    files = _read_members(e3a_path, _batch_members(batch))
+    apply_batch(files, batch)
+    _rewrite_e3a(e3a_path, files, e3a_path)
+    journal['position'] += 1
+    write_journal(journal, journal_path(e3a_path))
+    return batch
+
+
+def replay(source_path, target_path, output_path, force=False):
+    """Aplica os lotes activos do journal de `source_path` a outro E3A.
+
+    Com force=True grava os bytes novos mesmo que os antigos não coincidam.
+    Retorna o nº de entradas aplicadas.
+    """
+    journal = load_journal(source_path)
+    batches = journal['batches'][:journal['position']]
+    count = sum(len(batch['entries']) + len(batch['objects']) for batch in batches)
+    if not count:
+        return 0
+
+    members = sorted({member for batch in batches for member in _batch_members(batch)})
+    files = _read_members(target_path, members)
+    old_files = {m: bytes(data) for m, data in files.items()}
+    for batch in batches:
+        apply_batch(files, batch, check=not force)
+    _rewrite_e3a(target_path, files, output_path)
+
+    # Os membros vindos da biblioteca voltam a ficar no journal do output só pelo
+    # SHA-256 (o conteúdo antigo do destino é guardado na biblioteca para desfazer)
+    object_members = {member for batch in batches for member, _, _ in batch['objects']}
+    objects = []
+    if journal_enabled():
+        objects = [(m, store_object(old_files[m]), store_object(files[m])) for m in sorted(object_members)]
+    record(target_path, output_path,
+           {m: data for m, data in old_files.items() if m not in object_members},
+           {m: data for m, data in files.items() if m not in object_members},
+           f"reproduzir {os.path.basename(source_path)}", objects)
+    return count
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def _describe(batch):
+    when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(batch['time']))
+    size = sum(len(new) for _, _, _, new in batch['entries'])
+    objects = f", {len(batch['objects'])} membros da biblioteca de climas" if batch['objects'] else ''
+    return f"{when}  {batch['label']}  ({len(batch['entries'])} entradas, {size} bytes{objects})"
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    cmd = sys.argv[1].lower()
+    e3a_path = sys.argv[2]
+
+    try:
+        if cmd == 'mostrar':
+            journal = load_journal(e3a_path)
+            if not journal['batches']:
+                print("Sem journal")
+                return
+            for i, batch in enumerate(journal['batches'], 1):
+                marker = '*' if i <= journal['position'] else ' '
+                print(f"  {marker} {i:3d}. {_describe(batch)}")
+            print(f"\n  * = aplicado ({journal['position']} de {len(journal['batches'])})")
+
+        elif cmd == 'desfazer':
+            batch = undo(e3a_path)
+            print(f"Desfeito: {_describe(batch)}" if batch else "Nada para desfazer")
+
+        elif cmd == 'refazer':
+            batch = redo(e3a_path)
+            print(f"Refeito: {_describe(batch)}" if batch else "Nada para refazer")
+
+        elif cmd == 'reproduzir':
+            args = [a for a in sys.argv[2:] if a != '--forcar']
+            if len(args) < 3:
+                print("Uso: python hap_journal.py reproduzir <origem.E3A> <destino.E3A> <output.E3A> [--forcar]")
+                sys.exit(1)
+            count = replay(args[0], args[1], args[2], force='--forcar' in sys.argv)
+            print(f"{count} entradas aplicadas -> {args[2]}")
+
+        else:
+            print(f"Comando desconhecido: {cmd}")
+            sys.exit(1)
+
+    except ValueError as e:
+        print(f"ERRO: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+HAP 5.1 Manifest - Hash por registo para detectar alterações entre versões
+
+Calcula, numa só passagem, um hash blake2b (8 bytes) de cada registo de
+espaço (682 bytes), schedule (792), wall/roof assembly (3187) e window (555)
+de um E3A, e grava-os num manifest binário compacto (.hapm).
+
+Comparar dois manifests diz quais registos mudaram, foram acrescentados ou
+removidos sem descodificar nenhum campo - útil para saltar trabalho em
+extracção, validação e sincronização do MDB quando só alguns registos mudam.
+
+Usage:
+    python hap_manifest.py criar <ficheiro.E3A> [output.hapm]
+    python hap_manifest.py comparar <antigo.E3A|.hapm> <novo.E3A|.hapm>
+"""
+
+import hashlib
+import struct
+import sys
+import os
+import zipfile
+
+from hap_extractor import (
+    SPACE_RECORD_SIZE, SCHEDULE_RECORD_SIZE, WALL_ASSEMBLY_SIZE,
+    ROOF_ASSEMBLY_SIZE, WINDOW_RECORD_SIZE,
+)
+
+MANIFEST_MAGIC = b'HAPM'
+MANIFEST_VERSION = 1
+DIGEST_SIZE = 8
+
+# Membro -> tamanho do registo
+RECORD_MEMBERS = {
+    'HAP51SPC.DAT': SPACE_RECORD_SIZE,
+    'HAP51SCH.DAT': SCHEDULE_RECORD_SIZE,
+    'HAP51WAL.DAT': WALL_ASSEMBLY_SIZE,
+    'HAP51ROF.DAT': ROOF_ASSEMBLY_SIZE,
+    'HAP51WIN.DAT': WINDOW_RECORD_SIZE,
+}
+
+_HEADER = struct.Struct('<4sBH')         # magic, versão, nº de membros
+_MEMBER = struct.Struct('<12sII')        # nome, tamanho do registo, nº de registos
+
+
+def record_hashes(data, record_size, skip=0):
+    """Hash (DIGEST_SIZE bytes) de cada registo completo de `data`, concatenados.
+
+    Os primeiros `skip` bytes de cada registo (ex: o nome) ficam fora do hash.
+    """
+    view = memoryview(data)
+    count = len(data) // record_size
+    blake2b = hashlib.blake2b
+    return b''.join(
+        blake2b(view[i * record_size + skip:(i + 1) * record_size], digest_size=DIGEST_SIZE).digest()
+        for i in range(count)
+    )
+
+
+def build_manifest(e3a_path):
+    """Manifest de um E3A: {membro: (tamanho do registo, hashes concatenados)}"""
+    manifest = {}
+    with zipfile.ZipFile(e3a_path, 'r') as z:
+        names = set(z.namelist())
+        for member, record_size in RECORD_MEMBERS.items():
+            if member in names:
+                manifest[member] = (record_size, record_hashes(z.read(member), record_size))
+    return manifest
+
+
+def write_manifest(manifest, path):
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MANIFEST_MAGIC, MANIFEST_VERSION, len(manifest)))
+        for member, (record_size, digests) in manifest.items():
+            f.write(_MEMBER.pack(member.encode('ascii'), record_size, len(digests) // DIGEST_SIZE))
+            f.write(digests)
+
+
+def read_manifest(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, num_members = _HEADER.unpack_from(data, 0)
+    if magic != MANIFEST_MAGIC or version != MANIFEST_VERSION:
+        raise ValueError(f"'{path}' não é um manifest HAP válido")
+
+    manifest = {}
+    pos = _HEADER.size
+    for _ in range(num_members):
+        raw_name, record_size, count = _MEMBER.unpack_from(data, pos)
+        pos += _MEMBER.size
+        member = raw_name.rstrip(b'\x00').decode('ascii')
+        manifest[member] = (record_size, data[pos:pos + count * DIGEST_SIZE])
+        pos += count * DIGEST_SIZE
+    return manifest
+
+
+def load_manifest(path):
+    """Lê um .hapm ou calcula o manifest de um .E3A"""
+    if path.lower().endswith('.e3a'):
+        return build_manifest(path)
+    return read_manifest(path)
+
+
+def diff_manifests(old, new):
+    """Índices dos registos alterados/acrescentados/removidos por membro.
+
+    Só inclui membros com diferenças: {membro: {'changed': [...], 'added': [...], 'removed': [...]}}
+    """
+    diff = {}
+    for member in RECORD_MEMBERS:
+        old_digests = old.get(member, (0, b''))[1]
+        new_digests = new.get(member, (0, b''))[1]
+        n_old = len(old_digests) // DIGEST_SIZE
+        n_new = len(new_digests) // DIGEST_SIZE
+
+        changed = [
+            i for i in range(min(n_old, n_new))
+            if old_digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE] != new_digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE]
+        ]
+        added = list(range(n_old, n_new))
+        removed = list(range(n_new, n_old))
+
+        if changed or added or removed:
+            diff[member] = {'changed': changed, 'added': added, 'removed': removed}
+    return diff
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    cmd = sys.argv[1].lower()
+
+    if cmd == 'criar':
+        e3a_path = sys.argv[2]
+        output = sys.argv[3] if len(sys.argv) > 3 else os.path.splitext(e3a_path)[0] + '.hapm'
+        manifest = build_manifest(e3a_path)
+        write_manifest(manifest, output)
+        for member, (record_size, digests) in manifest.items():
+            print(f"  {member}: {len(digests) // DIGEST_SIZE} registos")
+        print(f"\nManifest criado: {output}")
+
+    elif cmd == 'comparar':
+        if len(sys.argv) < 4:
+            print("Uso: python hap_manifest.py comparar <antigo.E3A|.hapm> <novo.E3A|.hapm>")
+            sys.exit(1)
+        diff = diff_manifests(load_manifest(sys.argv[2]), load_manifest(sys.argv[3]))
+        if not diff:
+            print("Nenhum registo alterado")
+            return
+        for member, d in diff.items():
+            print(f"  {member}: {len(d['changed'])} alterados, "
+                  f"{len(d['added'])} novos, {len(d['removed'])} removidos")
+            if d['changed']:
+                print(f"    alterados: {d['changed'][:20]}{' ...' if len(d['changed']) > 20 else ''}")
+
+    else:
+        print(f"Comando desconhecido: {cmd}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
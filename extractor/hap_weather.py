@@ -0,0 +1,532 @@
+"""
+HAP 5.1 Weather - Leitura do clima de simulação (HAP51WTA.DAT) e de projecto (HAP51WTD.DAT)
+
+O HAP51WTA.DAT é o maior membro de um E3A (~2.5 MB): um cabeçalho com o
+local e um registo por dia com as 24 horas de temperatura, humidade, radiação
+solar em cada exposição e posição do sol. O ficheiro é lido uma vez para um
+buffer e as séries horárias são lidas por memoryview sobre esse buffer, sem
+descodificar o resto.
+
+Estrutura (little-endian):
+    Cabeçalho (799 bytes)
+        0-19:   Cidade
+        20-39:  Região / país
+        42:     Latitude [°N]                 (float)
+        46:     Longitude [°W]                (float)
+        50:     Fuso horário [h]              (float)
+        54:     Altitude [ft]                 (float)
+        58:     Pressão atmosférica [psia]    (float)
+    Dia (1777 floats = 7108 bytes), 365 dias, 1 Jan a 31 Dez
+        0:      Temperatura seca [°F]                          x24
+        24:     Humidade absoluta [lb/lb]                      x24
+        48:     Radiação directa normal [BTU/h.ft²]            x24
+        72:     Radiação difusa por exposição [BTU/h.ft²]      x24 x17 (N..NNW, H)
+        480:    Radiação total por exposição [BTU/h.ft²]       x24 x17
+        888:    (não descodificado, 2 x 17 exposições)
+        1704:   Altura solar [rad] (-99 de noite)              x24
+        1728:   Azimute solar [rad] (-99 de noite)             x24
+        1752:   Ângulo horário [rad]                           x24
+        1776:   Declinação [rad]                               x1
+
+O HAP51WTD.DAT (86 KB) tem as condições de projecto (dimensionamento):
+    Cabeçalho (334 bytes)
+        4-23:   Cidade
+        24-43:  País / estado
+        44:     Latitude, longitude, altitude [ft], Tbs e Tbh de verão [°F],
+                amplitude diária [°F], Tbs e Tbh de inverno [°F], claridade,
+                pressão [psia], reflectância do solo   (floats)
+        112:    Fonte dos dados (30 caracteres, ex: '2001 ASHRAE Handbook')
+        142:    Por mês (12 floats cada): Tbs máxima, Tbs mínima,
+                Tbh coincidente com a máxima e com a mínima [°F]
+    Dia de projecto de cada mês (1795 floats): os 1777 floats do dia do
+    HAP51WTA.DAT + 18 não descodificados
+
+O vento não faz parte do ficheiro (o HAP não o usa na simulação). A
+temperatura húmida é calculada (psicrometria ASHRAE) a partir da seca, da
+humidade absoluta e da pressão do local.
+
+Usage:
+    python hap_weather.py resumo <ficheiro.E3A|HAP51WTA.DAT> [--base-aquecimento 18] [--base-arrefecimento 25]
+    python hap_weather.py comparar <ficheiro1.E3A> <ficheiro2.E3A> ...
+    python hap_weather.py exportar <ficheiro.E3A|HAP51WTA.DAT> <saida.csv>
+    python hap_weather.py dimensionamento <ficheiro.E3A|HAP51WTD.DAT>
+
+O hap_weather_library.py guarda os pares WTA/WTD numa biblioteca local.
+"""
+
+import csv
+import hashlib
+import math
+import os
+import struct
+import sys
+import zipfile
+from array import array
+
+from hap_cli import option
+from hap_extractor import DIRECTION_NAMES
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+WTA_MEMBER = 'HAP51WTA.DAT'
+WTA_HEADER_SIZE = 799
+WTA_DAY_FLOATS = 1777
+WTA_DAY_SIZE = WTA_DAY_FLOATS * 4
+DAYS = 365
+
+# Offsets (em floats) dentro do registo de um dia
+OFF_DRY_BULB = 0
+OFF_HUMIDITY = 24
+OFF_DIRECT_NORMAL = 48
+OFF_DIFFUSE = 72
+OFF_TOTAL = 480
+OFF_ALTITUDE = 1704
+OFF_AZIMUTH = 1728
+OFF_HOUR_ANGLE = 1752
+OFF_DECLINATION = 1776
+
+# Exposições pela ordem do ficheiro: 16 orientações (N, NNE, ... NNW) + horizontal
+EXPOSURES = [DIRECTION_NAMES[i] for i in range(1, 18)]
+
+NIGHT = -99.0
+
+_LOCATION = struct.Struct('<20s20s2x5f')   # cidade, região, lat, lon, fuso, altitude, pressão
+
+WTD_MEMBER = 'HAP51WTD.DAT'
+WTD_HEADER_SIZE = 334
+WTD_DAY_FLOATS = 1795
+WTD_DAY_SIZE = WTD_DAY_FLOATS * 4
+WTD_MONTHLY_OFFSET = 142
+
+# nº do registo, cidade, país, lat, lon, altitude, Tbs/Tbh verão, amplitude,
+# Tbs/Tbh inverno, claridade, pressão, reflectância do solo, (não descodificado)
+_DESIGN = struct.Struct('<i20s20s12f')
+_SOURCE = struct.Struct('<30s')
+_MONTHLY = struct.Struct('<48f')
+
+BTUH_FT2_TO_W_M2 = 3.154591
+FT_TO_M = 0.3048
+PSI_TO_KPA = 6.894757
+
+MONTHS = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+MONTH_DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+# Hora do ano em que começa cada mês (+ fim do ano)
+MONTH_START = [0]
+for _days in MONTH_DAYS:
+    MONTH_START.append(MONTH_START[-1] + _days * 24)
+
+
+# =============================================================================
+# LEITURA
+# =============================================================================
+
+def read_member(path, member=WTA_MEMBER):
+    """Bytes do membro de um E3A, ou do próprio ficheiro se for o .DAT"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path, 'r') as z:
+            if member not in z.namelist():
+                raise ValueError(f"'{path}' não tem {member}")
+            return z.read(member)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _text(raw):
+    return raw.split(b'\x00')[0].decode('latin-1').strip()
+
+
+def parse_wta(data):
+    """Clima de simulação: {'local': {...}, 'dias': n, 'buffer': memoryview dos registos diários}
+
+    Não copia os registos: as séries são lidas do buffer quando pedidas.
+    """
+    if len(data) < WTA_HEADER_SIZE:
+        raise ValueError(f"{WTA_MEMBER} com {len(data)} bytes (cabeçalho tem {WTA_HEADER_SIZE})")
+    city, region, lat, lon, tz, elevation, pressure = _LOCATION.unpack_from(data, 0)
+    days = min((len(data) - WTA_HEADER_SIZE) // WTA_DAY_SIZE, DAYS)
+    return {
+        'local': {
+            'cidade': _text(city),
+            'regiao': _text(region),
+            'latitude': round(lat, 4),
+            'longitude': round(lon, 4),
+            'fuso': tz + 0.0,
+            'altitude_m': round(elevation * FT_TO_M, 1),
+            'pressao_kpa': round(pressure * PSI_TO_KPA, 3),
+        },
+        'dias': days,
+        'registo': WTA_DAY_SIZE,
+        'buffer': memoryview(data)[WTA_HEADER_SIZE:WTA_HEADER_SIZE + days * WTA_DAY_SIZE],
+        'sha256': hashlib.sha256(data).hexdigest(),
+    }
+
+
+def load_wta(path):
+    """parse_wta do HAP51WTA.DAT de um E3A (ou do .DAT)"""
+    return parse_wta(read_member(path))
+
+
+def hourly(wta, offset):
+    """array('f') com as 24 x dias horas de um bloco do registo diário (valores em bruto)"""
+    buffer = wta['buffer']
+    size = wta['registo']
+    start = offset * 4
+    values = array('f')
+    for day in range(wta['dias']):
+        base = day * size + start
+        values.frombytes(buffer[base:base + 96])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def daily(wta, offset):
+    """array('f') com um valor por dia (ex: OFF_DECLINATION)"""
+    buffer = wta['buffer']
+    size = wta['registo']
+    values = array('f')
+    for day in range(wta['dias']):
+        base = day * size + offset * 4
+        values.frombytes(buffer[base:base + 4])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def _celsius(t):
+    return round((t - 32.0) / 1.8, 2)
+
+
+def parse_wtd(data):
+    """Clima de projecto: {'local', 'projecto', 'mensal', 'dias' (12), 'buffer', 'sha256'}
+
+    Os 12 dias de projecto têm o mesmo formato dos dias do HAP51WTA.DAT, por
+    isso hourly(), dry_bulb(), solar(), ... funcionam também sobre o resultado
+    (12 x 24 horas, de Janeiro a Dezembro).
+    """
+    if len(data) < WTD_HEADER_SIZE:
+        raise ValueError(f"{WTD_MEMBER} com {len(data)} bytes (cabeçalho tem {WTD_HEADER_SIZE})")
+    (_, city, country, lat, lon, elevation, summer_db, summer_wb, daily_range,
+     winter_db, winter_wb, clearness, pressure, reflectance, _) = _DESIGN.unpack_from(data, 0)
+    monthly_values = _MONTHLY.unpack_from(data, WTD_MONTHLY_OFFSET)
+    days = min((len(data) - WTD_HEADER_SIZE) // WTD_DAY_SIZE, 12)
+    return {
+        'local': {
+            'cidade': _text(city),
+            'regiao': _text(country),
+            'latitude': round(lat, 4),
+            'longitude': round(lon, 4),
+            'altitude_m': round(elevation * FT_TO_M, 1),
+            'pressao_kpa': round(pressure * PSI_TO_KPA, 3),
+        },
+        'projecto': {
+            'fonte': _text(_SOURCE.unpack_from(data, 112)[0]),
+            'tbs_verao': _celsius(summer_db),
+            'tbh_verao': _celsius(summer_wb),
+            'amplitude_diaria': round(daily_range / 1.8, 2),
+            'tbs_inverno': _celsius(winter_db),
+            'tbh_inverno': _celsius(winter_wb),
+            'claridade': round(clearness, 3),
+            'reflectancia_solo': round(reflectance, 3),
+        },
+        'mensal': [
+            {
+                'mes': MONTHS[m],
+                'tbs_max': _celsius(monthly_values[m]),
+                'tbs_min': _celsius(monthly_values[12 + m]),
+                'tbh_max': _celsius(monthly_values[24 + m]),
+                'tbh_min': _celsius(monthly_values[36 + m]),
+            }
+            for m in range(12)
+        ],
+        'dias': days,
+        'registo': WTD_DAY_SIZE,
+        'buffer': memoryview(data)[WTD_HEADER_SIZE:WTD_HEADER_SIZE + days * WTD_DAY_SIZE],
+        'sha256': hashlib.sha256(data).hexdigest(),
+    }
+
+
+def load_wtd(path):
+    """parse_wtd do HAP51WTD.DAT de um E3A (ou do .DAT)"""
+    return parse_wtd(read_member(path, WTD_MEMBER))
+
+
+# =============================================================================
+# SÉRIES HORÁRIAS (SI)
+# =============================================================================
+
+def dry_bulb(wta):
+    """Temperatura seca [°C]"""
+    return array('d', ((t - 32.0) / 1.8 for t in hourly(wta, OFF_DRY_BULB)))
+
+
+def humidity_ratio(wta):
+    """Humidade absoluta [kg/kg ar seco]"""
+    return array('d', hourly(wta, OFF_HUMIDITY))
+
+
+def direct_normal(wta):
+    """Radiação directa normal [W/m²]"""
+    return array('d', (v * BTUH_FT2_TO_W_M2 for v in hourly(wta, OFF_DIRECT_NORMAL)))
+
+
+def solar(wta, exposure='H', component='total'):
+    """Radiação numa exposição ('N', ..., 'NNW', 'H') [W/m²]; component 'total' ou 'difusa'"""
+    if exposure not in EXPOSURES:
+        raise ValueError(f"Exposição desconhecida: {exposure} (válidas: {', '.join(EXPOSURES)})")
+    base = OFF_TOTAL if component == 'total' else OFF_DIFFUSE
+    offset = base + 24 * EXPOSURES.index(exposure)
+    return array('d', (v * BTUH_FT2_TO_W_M2 for v in hourly(wta, offset)))
+
+
+def solar_altitude(wta):
+    """Altura solar [°] (0 de noite)"""
+    return array('d', (0.0 if v <= NIGHT else math.degrees(v) for v in hourly(wta, OFF_ALTITUDE)))
+
+
+def _saturation_pressure(t):
+    """Pressão de saturação [kPa] (Hyland-Wexler, ASHRAE Fundamentals)"""
+    T = t + 273.15
+    if t < 0:
+        ln_p = (-5.6745359e3 / T + 6.3925247 - 9.677843e-3 * T + 6.2215701e-7 * T ** 2
+                + 2.0747825e-9 * T ** 3 - 9.484024e-13 * T ** 4 + 4.1635019 * math.log(T))
+    else:
+        ln_p = (-5.8002206e3 / T + 1.3914993 - 4.8640239e-2 * T + 4.1764768e-5 * T ** 2
+                - 1.4452093e-8 * T ** 3 + 6.5459673 * math.log(T))
+    return math.exp(ln_p) / 1000.0
+
+
+def _ratio_from_wet_bulb(t, twb, p):
+    pws = _saturation_pressure(twb)
+    ws = 0.621945 * pws / (p - pws)
+    if twb >= 0:
+        return ((2501 - 2.326 * twb) * ws - 1.006 * (t - twb)) / (2501 + 1.86 * t - 4.186 * twb)
+    return ((2830 - 0.24 * twb) * ws - 1.006 * (t - twb)) / (2830 + 1.86 * t - 2.1 * twb)
+
+
+def wet_bulb_temperature(t, w, p=101.325):
+    """Temperatura húmida [°C] de (seca [°C], humidade absoluta [kg/kg], pressão [kPa])"""
+    low, high = -50.0, t
+    if _ratio_from_wet_bulb(t, high, p) <= w:
+        return t  # Saturado
+    for _ in range(40):
+        mid = (low + high) / 2
+        if _ratio_from_wet_bulb(t, mid, p) > w:
+            high = mid
+        else:
+            low = mid
+    return (low + high) / 2
+
+
+def wet_bulb(wta):
+    """Temperatura húmida [°C]"""
+    p = wta['local']['pressao_kpa'] or 101.325
+    return array('d', (wet_bulb_temperature(t, w, p)
+                       for t, w in zip(dry_bulb(wta), humidity_ratio(wta))))
+
+
+# =============================================================================
+# GRANDEZAS DERIVADAS
+# =============================================================================
+
+def degree_hours(temperatures, base, kind='aquecimento'):
+    """Graus-hora [°C.h]: soma de (base - t) (aquecimento) ou (t - base) (arrefecimento) quando positivo"""
+    if kind == 'aquecimento':
+        return sum(base - t for t in temperatures if t < base)
+    return sum(t - base for t in temperatures if t > base)
+
+
+def monthly(values, reducer):
+    """reducer(valores do mês) para cada mês com dados"""
+    result = []
+    for m in range(12):
+        segment = values[MONTH_START[m]:MONTH_START[m + 1]]
+        if not len(segment):
+            break
+        result.append(reducer(segment))
+    return result
+
+
+def _mean(values):
+    return sum(values) / len(values) if len(values) else 0.0
+
+
+def monthly_means(values):
+    return monthly(values, _mean)
+
+
+def summarize(wta, base_heating=18.0, base_cooling=25.0):
+    """Tabela mensal + anual: temperaturas, humidade, radiação horizontal e graus-hora"""
+    tbs = dry_bulb(wta)
+    tbh = wet_bulb(wta)
+    w = humidity_ratio(wta)
+    horizontal = solar(wta, 'H')
+    dn = direct_normal(wta)
+
+    def row(name, sl):
+        t = tbs[sl]
+        return {
+            'mes': name,
+            'tbs_media': _mean(t),
+            'tbs_max': max(t),
+            'tbs_min': min(t),
+            'tbh_media': _mean(tbh[sl]),
+            'tbh_max': max(tbh[sl]),
+            'w_media_g_kg': _mean(w[sl]) * 1000,
+            'solar_h_kwh_m2': sum(horizontal[sl]) / 1000,
+            'directa_normal_kwh_m2': sum(dn[sl]) / 1000,
+            'gh_aquecimento': degree_hours(t, base_heating, 'aquecimento'),
+            'gh_arrefecimento': degree_hours(t, base_cooling, 'arrefecimento'),
+        }
+
+    rows = [row(MONTHS[m], slice(MONTH_START[m], MONTH_START[m + 1]))
+            for m in range(12) if MONTH_START[m] < len(tbs)]
+    rows.append(row('Ano', slice(0, len(tbs))))
+    return rows
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def _describe(wta):
+    loc = wta['local']
+    return (f"{loc['cidade']} ({loc['regiao']})  lat {loc['latitude']:.2f}  lon {loc['longitude']:.2f}  "
+            f"alt {loc['altitude_m']:.0f} m  {loc['pressao_kpa']:.2f} kPa  {wta['dias']} dias")
+
+
+def print_summary(wta, base_heating, base_cooling):
+    print(_describe(wta))
+    if not wta['dias']:
+        print("  Sem dados horários")
+        return
+    print(f"\n{'Mês':<5} {'Tbs méd':>8} {'máx':>6} {'mín':>6} {'Tbh méd':>8} {'W g/kg':>7} "
+          f"{'Solar H':>8} {'DN':>7} {f'GH<{base_heating:g}':>9} {f'GH>{base_cooling:g}':>9}")
+    print('-' * 84)
+    for r in summarize(wta, base_heating, base_cooling):
+        if r['mes'] == 'Ano':
+            print('-' * 84)
+        print(f"{r['mes']:<5} {r['tbs_media']:>8.1f} {r['tbs_max']:>6.1f} {r['tbs_min']:>6.1f} "
+              f"{r['tbh_media']:>8.1f} {r['w_media_g_kg']:>7.2f} {r['solar_h_kwh_m2']:>8.1f} "
+              f"{r['directa_normal_kwh_m2']:>7.1f} {r['gh_aquecimento']:>9.0f} {r['gh_arrefecimento']:>9.0f}")
+    print("\nTemperaturas em °C, radiação em kWh/m², graus-hora em °C.h")
+
+
+def print_comparison(paths, base_heating, base_cooling):
+    print(f"{'Ficheiro':<30} {'Local':<16} {'Lat':>6} {'Lon':>6} {'Tbs méd':>8} "
+          f"{'Solar H':>8} {f'GH<{base_heating:g}':>9} {f'GH>{base_cooling:g}':>9}  SHA-256")
+    print('-' * 112)
+    for path in paths:
+        name = os.path.basename(path)[:30]
+        try:
+            wta = load_wta(path)
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            print(f"{name:<30} ERRO: {e}")
+            continue
+        loc = wta['local']
+        if not wta['dias']:
+            print(f"{name:<30} {loc['cidade'][:16]:<16} {'sem dados horários':>30}  {wta['sha256'][:12]}")
+            continue
+        year = summarize(wta, base_heating, base_cooling)[-1]
+        print(f"{name:<30} {loc['cidade'][:16]:<16} {loc['latitude']:>6.2f} {loc['longitude']:>6.2f} "
+              f"{year['tbs_media']:>8.1f} {year['solar_h_kwh_m2']:>8.0f} {year['gh_aquecimento']:>9.0f} "
+              f"{year['gh_arrefecimento']:>9.0f}  {wta['sha256'][:12]}")
+
+
+def print_design(wtd):
+    loc, design = wtd['local'], wtd['projecto']
+    print(f"{loc['cidade']} ({loc['regiao']})  lat {loc['latitude']:.2f}  lon {loc['longitude']:.2f}  "
+          f"alt {loc['altitude_m']:.0f} m  {loc['pressao_kpa']:.2f} kPa  [{design['fonte']}]")
+    print(f"  Verão:   Tbs {design['tbs_verao']:.1f} °C / Tbh {design['tbh_verao']:.1f} °C  "
+          f"(amplitude diária {design['amplitude_diaria']:.1f} K)")
+    print(f"  Inverno: Tbs {design['tbs_inverno']:.1f} °C / Tbh {design['tbh_inverno']:.1f} °C")
+    print(f"  Claridade {design['claridade']:g}  -  reflectância do solo {design['reflectancia_solo']:g}")
+
+    dn = direct_normal(wtd)
+    horizontal = solar(wtd, 'H')
+    print(f"\n{'Mês':<5} {'Tbs máx':>8} {'Tbs mín':>8} {'Tbh máx':>8} {'Tbh mín':>8} "
+          f"{'DN máx':>8} {'H máx':>8}   (dia de projecto, W/m²)")
+    print('-' * 70)
+    for m, row in enumerate(wtd['mensal']):
+        day = slice(m * 24, m * 24 + 24)
+        peaks = (f"{max(dn[day]):>8.0f} {max(horizontal[day]):>8.0f}" if m < wtd['dias'] else '')
+        print(f"{row['mes']:<5} {row['tbs_max']:>8.1f} {row['tbs_min']:>8.1f} "
+              f"{row['tbh_max']:>8.1f} {row['tbh_min']:>8.1f} {peaks}")
+
+
+def write_hourly_csv(wta, output_path):
+    """Uma linha por hora: Tbs, Tbh, W, directa normal, horizontal total/difusa, altura solar"""
+    columns = [dry_bulb(wta), wet_bulb(wta), humidity_ratio(wta), direct_normal(wta),
+               solar(wta, 'H'), solar(wta, 'H', 'difusa'), solar_altitude(wta)]
+    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['Mês', 'Dia', 'Hora', 'Tbs [°C]', 'Tbh [°C]', 'W [g/kg]', 'Directa normal [W/m²]',
+                         'Horizontal total [W/m²]', 'Horizontal difusa [W/m²]', 'Altura solar [°]'])
+        hour = 0
+        for m, days in enumerate(MONTH_DAYS):
+            for day in range(1, days + 1):
+                for h in range(24):
+                    if hour >= len(columns[0]):
+                        return
+                    tbs, tbh, w, dn, total, diffuse, altitude = (c[hour] for c in columns)
+                    writer.writerow([MONTHS[m], day, h, round(tbs, 2), round(tbh, 2), round(w * 1000, 3),
+                                     round(dn, 1), round(total, 1), round(diffuse, 1), round(altitude, 2)])
+                    hour += 1
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    args = sys.argv[1:]
+    base_heating, args = option(args, '--base-aquecimento', float, 18.0)
+    base_cooling, args = option(args, '--base-arrefecimento', float, 25.0)
+
+    if len(args) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    cmd, paths = args[0].lower(), args[1:]
+    for path in paths[:1] if cmd == 'exportar' else paths:
+        if not os.path.exists(path):
+            print(f"Erro: Ficheiro não encontrado: {path}")
+            sys.exit(1)
+
+    if cmd == 'resumo':
+        try:
+            wta = load_wta(paths[0])
+        except (ValueError, zipfile.BadZipFile) as e:
+            print(f"Erro: {e}")
+            sys.exit(1)
+        print_summary(wta, base_heating, base_cooling)
+
+    elif cmd == 'dimensionamento':
+        try:
+            wtd = load_wtd(paths[0])
+        except (ValueError, zipfile.BadZipFile) as e:
+            print(f"Erro: {e}")
+            sys.exit(1)
+        print_design(wtd)
+
+    elif cmd == 'comparar':
+        print_comparison(paths, base_heating, base_cooling)
+
+    elif cmd == 'exportar':
+        if len(paths) < 2:
+            print("Uso: python hap_weather.py exportar <ficheiro.E3A|HAP51WTA.DAT> <saida.csv>")
+            sys.exit(1)
+        wta = load_wta(paths[0])
+        write_hourly_csv(wta, paths[1])
+        print(f"{wta['dias'] * 24} horas gravadas: {paths[1]}")
+
+    else:
+        print(f"Comando desconhecido: {cmd}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+"""
+HAP 5.1 Weather Library - Biblioteca local de climas (pares HAP51WTA/WTD)
+
+Os E3A de um mesmo local repetem os mesmos ~2.6 MB de clima (HAP51WTA.DAT +
+HAP51WTD.DAT). A biblioteca guarda cada ficheiro uma só vez, endereçado pelo
+seu SHA-256 (objectos/<ab>/<sha256>, comprimido com zlib), e um índice JSON
+com um clima por par WTA/WTD: local, coordenadas e hash, CRC32 e tamanho de
+cada membro.
+
+O CRC32 e o tamanho estão no directório do zip, por isso identificar o
+clima de um E3A não descomprime nada; 'verificar' confirma pelo SHA-256.
+Trocar o clima de um projecto ('aplicar') grava um novo E3A com os membros
+da biblioteca (só esses são recomprimidos) e regista a alteração no journal
+(hap_journal.py) apenas pelo SHA-256 dos membros antigos e novos: os antigos
+ficam também na biblioteca e desfazer / reproduzir vão lá buscar os bytes.
+
+Configuração (variáveis de ambiente):
+    HAP_WEATHER_DIR   Pasta da biblioteca (default: ~/.hap_weather)
+    HAP_JOURNAL=0     'aplicar' não grava journal (nem guarda o clima antigo)
+
+Usage:
+    python hap_weather_library.py adicionar <ficheiro.E3A> [...]
+    python hap_weather_library.py listar
+    python hap_weather_library.py identificar <ficheiro.E3A> [...]
+    python hap_weather_library.py verificar <ficheiro.E3A> [clima]
+    python hap_weather_library.py aplicar <ficheiro.E3A> <clima> [output.E3A]
+
+<clima> é o id (ou o início do id) ou parte do nome da cidade, ex: 'lisboa'.
+A cidade do WTA (clima da simulação) tem prioridade sobre a do WTD (projecto).
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+import zipfile
+import zlib
+
+import hap_journal
+from hap_zip import replace_members
+from hap_weather import WTA_MEMBER, WTD_MEMBER, parse_wta, parse_wtd
+
+INDEX_NAME = 'index.json'
+INDEX_VERSION = 1
+OBJECTS_DIR = 'objectos'
+
+WEATHER_MEMBERS = (WTA_MEMBER, WTD_MEMBER)
+
+# Caracteres do id de um clima (hash do par WTA/WTD)
+ID_LENGTH = 16
+
+
+def library_dir():
+    return os.environ.get('HAP_WEATHER_DIR') or os.path.join(os.path.expanduser('~'), '.hap_weather')
+
+
+# =============================================================================
+# OBJECTOS (CONTEÚDO ENDEREÇADO POR SHA-256)
+# =============================================================================
+
+def _object_path(sha, directory=None):
+    return os.path.join(directory or library_dir(), OBJECTS_DIR, sha[:2], sha)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def store_object(data, directory=None):
+    """Guarda `data` (se ainda não existir). Retorna (sha256, novo)."""
+    sha = hashlib.sha256(data).hexdigest()
+    path = _object_path(sha, directory)
+    if os.path.exists(path):
+        return sha, False
+    _write_atomic(path, zlib.compress(data, 6))
+    return sha, True
+
+
+def read_object(sha, directory=None):
+    """Conteúdo de um objecto, confirmado pelo SHA-256"""
+    with open(_object_path(sha, directory), 'rb') as f:
+        data = zlib.decompress(f.read())
+    if hashlib.sha256(data).hexdigest() != sha:
+        raise ValueError(f"Objecto corrompido na biblioteca: {sha}")
+    return data
+
+
+# =============================================================================
+# ÍNDICE
+# =============================================================================
+
+def load_index(directory=None):
+    """{id: clima} (vazio se a biblioteca ainda não existir)"""
+    try:
+        with open(os.path.join(directory or library_dir(), INDEX_NAME), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if index.get('version') != INDEX_VERSION:
+        return {}
+    return index['climas']
+
+
+def save_index(climas, directory=None):
+    path = os.path.join(directory or library_dir(), INDEX_NAME)
+    blob = json.dumps({'version': INDEX_VERSION, 'climas': climas}, ensure_ascii=False, indent=1)
+    _write_atomic(path, blob.encode('utf-8'))
+
+
+def weather_id(wta_sha, wtd_sha):
+    return hashlib.sha256(f'{wta_sha}:{wtd_sha}'.encode('ascii')).hexdigest()[:ID_LENGTH]
+
+
+def member_signatures(e3a_path):
+    """{membro: (crc32, tamanho)} lidos do directório do zip (sem descomprimir)"""
+    with zipfile.ZipFile(e3a_path, 'r') as z:
+        infos = {info.filename: info for info in z.infolist()}
+    return {m: (infos[m].CRC, infos[m].file_size) for m in WEATHER_MEMBERS if m in infos}
+
+
+def find(climas, query):
+    """(ids, campo) dos climas que correspondem a `query`.
+
+    Procura pela ordem: início do id ('id'), cidade do WTA ('WTA') e cidade
+    do WTD ('WTD'); campo é o primeiro que tem resultados (None se nenhum).
+    """
+    query = query.lower()
+    by_id = [i for i in climas if i.startswith(query)]
+    if by_id:
+        return by_id, 'id'
+    for field in ('wta', 'wtd'):
+        matches = [i for i, c in climas.items() if query in c[field]['cidade'].lower()]
+        if matches:
+            return matches, field.upper()
+    return [], None
+
+
+# =============================================================================
+# OPERAÇÕES
+# =============================================================================
+
+def add_project(e3a_path, climas, directory=None):
+    """Guarda o clima do E3A na biblioteca. Retorna (id, novo, bytes novos guardados)."""
+    with zipfile.ZipFile(e3a_path, 'r') as z:
+        names = set(z.namelist())
+        missing = [m for m in WEATHER_MEMBERS if m not in names]
+        if missing:
+            raise ValueError(f"'{e3a_path}' não tem {', '.join(missing)}")
+        files = {m: z.read(m) for m in WEATHER_MEMBERS}
+
+    wta = parse_wta(files[WTA_MEMBER])
+    wtd = parse_wtd(files[WTD_MEMBER])
+    stored = 0
+    entry = {}
+    for member in WEATHER_MEMBERS:
+        data = files[member]
+        sha, new = store_object(data, directory)
+        stored += len(data) if new else 0
+        entry[member] = {'sha256': sha, 'crc32': zlib.crc32(data), 'tamanho': len(data)}
+
+    key = weather_id(entry[WTA_MEMBER]['sha256'], entry[WTD_MEMBER]['sha256'])
+    if key in climas:
+        return key, False, stored
+
+    climas[key] = {
+        'wta': {'cidade': wta['local']['cidade'], 'regiao': wta['local']['regiao'], 'dias': wta['dias']},
+        'wtd': {'cidade': wtd['local']['cidade'], 'regiao': wtd['local']['regiao']},
+        'latitude': wta['local']['latitude'] if wta['dias'] else wtd['local']['latitude'],
+        'longitude': wta['local']['longitude'] if wta['dias'] else wtd['local']['longitude'],
+        'membros': entry,
+        'origem': os.path.basename(e3a_path),
+        'adicionado': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    return key, True, stored
+
+
+def identify(e3a_path, climas):
+    """id do clima do E3A pelo CRC32 + tamanho dos membros, ou None"""
+    signatures = member_signatures(e3a_path)
+    if len(signatures) != len(WEATHER_MEMBERS):
+        return None
+    for key, clima in climas.items():
+        if all((clima['membros'][m]['crc32'], clima['membros'][m]['tamanho']) == signatures[m]
+               for m in WEATHER_MEMBERS):
+            return key
+    return None
+
+
+def verify(e3a_path, key, climas):
+    """{membro: True/False} - o membro do E3A tem o mesmo SHA-256 do clima `key`?"""
+    with zipfile.ZipFile(e3a_path, 'r') as z:
+        names = set(z.namelist())
+        return {m: (m in names and hashlib.sha256(z.read(m)).hexdigest() == climas[key]['membros'][m]['sha256'])
+                for m in WEATHER_MEMBERS}
+
+
+def apply_weather(e3a_path, key, climas, output_path, directory=None):
+    """Grava output_path = E3A com o clima `key` da biblioteca.
+
+    Os restantes membros são copiados comprimidos. O journal guarda só os
+    SHA-256 (o clima antigo é guardado na biblioteca), e só com a biblioteca
+    por omissão, que é onde o hap_journal vai buscar os objectos.
+    """
+    membros = climas[key]['membros']
+    files = {m: read_object(membros[m]['sha256'], directory) for m in WEATHER_MEMBERS}
+    with zipfile.ZipFile(e3a_path, 'r') as z:
+        names = set(z.namelist())
+        old_files = {m: z.read(m) for m in WEATHER_MEMBERS if m in names}
+    replace_members(e3a_path, files, output_path)
+
+    if len(old_files) == len(WEATHER_MEMBERS) and directory is None and hap_journal.journal_enabled():
+        objects = [(m, store_object(old_files[m])[0], membros[m]['sha256']) for m in WEATHER_MEMBERS]
+        hap_journal.record(e3a_path, output_path, {}, {}, f"Clima {_label(climas[key])} ({key})", objects)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def _label(clima):
+    return f"{clima['wta']['cidade'] or clima['wtd']['cidade']} / {clima['wtd']['cidade']}"
+
+
+def _resolve(climas, query):
+    matches, field = find(climas, query)
+    if not matches:
+        print(f"Erro: Nenhum clima na biblioteca corresponde a '{query}'")
+        sys.exit(1)
+    if len(matches) > 1:
+        where = 'ao id' if field == 'id' else f'à cidade do {field}'
+        print(f"Erro: '{query}' corresponde {where} de {len(matches)} climas:")
+        for key in matches:
+            print(f"  {key} {_label(climas[key])}")
+        sys.exit(1)
+    if field == 'WTD':
+        print(f"Aviso: '{query}' corresponde à cidade do WTD (projecto) de {matches[0]}, não à do WTA")
+    return matches[0]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    cmd = sys.argv[1].lower()
+    args = sys.argv[2:]
+    climas = load_index()
+
+    for path in args[:1] if cmd in ('verificar', 'aplicar') else args:
+        if not os.path.exists(path):
+            print(f"Erro: Ficheiro não encontrado: {path}")
+            sys.exit(1)
+
+    if cmd == 'adicionar':
+        if not args:
+            print("Uso: python hap_weather_library.py adicionar <ficheiro.E3A> [...]")
+            sys.exit(1)
+        total = 0
+        for path in args:
+            try:
+                key, new, stored = add_project(path, climas)
+            except (ValueError, zipfile.BadZipFile) as e:
+                print(f"  {os.path.basename(path)}: ERRO: {e}")
+                continue
+            total += stored
+            print(f"  {os.path.basename(path)}: {key} {_label(climas[key])}"
+                  f"{' (novo)' if new else ''}{f', {stored / 1024:.0f} KB guardados' if stored else ''}")
+        save_index(climas)
+        print(f"\n{len(climas)} climas em {library_dir()} ({total / 1024:.0f} KB novos)")
+
+    elif cmd == 'listar':
+        if not climas:
+            print(f"Biblioteca vazia: {library_dir()}")
+            return
+        print(f"{'Id':<18} {'Simulação (WTA)':<20} {'Projecto (WTD)':<20} {'Lat':>6} {'Lon':>6}  Origem")
+        print('-' * 96)
+        for key, c in sorted(climas.items(), key=lambda item: _label(item[1])):
+            print(f"{key:<18} {c['wta']['cidade'][:20]:<20} {c['wtd']['cidade'][:20]:<20} "
+                  f"{c['latitude']:>6.2f} {c['longitude']:>6.2f}  {c['origem']}")
+
+    elif cmd == 'identificar':
+        for path in args:
+            try:
+                key = identify(path, climas)
+            except zipfile.BadZipFile as e:
+                print(f"  {os.path.basename(path)}: ERRO: {e}")
+                continue
+            print(f"  {os.path.basename(path)}: "
+                  + (f"{key} {_label(climas[key])}" if key else "clima não está na biblioteca"))
+
+    elif cmd == 'verificar':
+        if not args:
+            print("Uso: python hap_weather_library.py verificar <ficheiro.E3A> [clima]")
+            sys.exit(1)
+        key = _resolve(climas, args[1]) if len(args) > 1 else identify(args[0], climas)
+        if key is None:
+            print("Clima não está na biblioteca")
+            sys.exit(1)
+        result = verify(args[0], key, climas)
+        for member, ok in result.items():
+            print(f"  {member}: {'OK' if ok else 'DIFERENTE'}")
+        print(f"{key} {_label(climas[key])}: {'idêntico' if all(result.values()) else 'diferente'}")
+        sys.exit(0 if all(result.values()) else 1)
+
+    elif cmd == 'aplicar':
+        if len(args) < 2:
+            print("Uso: python hap_weather_library.py aplicar <ficheiro.E3A> <clima> [output.E3A]")
+            sys.exit(1)
+        key = _resolve(climas, args[1])
+        output = args[2] if len(args) > 2 else os.path.splitext(args[0])[0] + '_Clima.E3A'
+        apply_weather(args[0], key, climas, output)
+        print(f"Clima {_label(climas[key])} ({key}) aplicado: {output}")
+
+    else:
+        print(f"Comando desconhecido: {cmd}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+HAP 5.1 ZIP - Regravar E3A copiando os membros comprimidos sem descomprimir
+
+Um E3A é um ZIP. Para gravar um E3A em que só alguns membros mudaram, os
+restantes são copiados tal como estão (bytes comprimidos, CRC e tamanho do
+original) e só os alterados são recomprimidos. Usado pelo gerador de
+variantes e pelo journal (desfazer / refazer / reproduzir).
+"""
+
+import os
+import struct
+import time
+import zipfile
+import zlib
+
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END_RECORD = struct.Struct('<IHHHHIIH')
+
+
+def read_raw_members(e3a_path):
+    """Membros do ZIP como {nome: (método, crc, tamanho, bytes comprimidos, date_time)}"""
+    with open(e3a_path, 'rb') as f:
+        blob = f.read()
+    members = {}
+    with zipfile.ZipFile(e3a_path, 'r') as zf:
+        for info in zf.infolist():
+            name_len, extra_len = struct.unpack_from('<HH', blob, info.header_offset + 26)
+            start = info.header_offset + _LOCAL_HEADER.size + name_len + extra_len
+            members[info.filename] = (info.compress_type, info.CRC, info.file_size,
+                                      blob[start:start + info.compress_size], info.date_time)
+    return members
+
+
+def compress_member(data, date_time):
+    """Comprime um membro alterado (deflate raw, como o zipfile)"""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    raw = compressor.compress(bytes(data)) + compressor.flush()
+    return (zipfile.ZIP_DEFLATED, zlib.crc32(data), len(data), raw, date_time)
+
+
+def _dos_datetime(date_time):
+    y, mo, d, h, mi, s = date_time
+    return (h << 11) | (mi << 5) | (s // 2), ((y - 1980) << 9) | (mo << 5) | d
+
+
+def write_raw_zip(output_path, members):
+    """Escreve um ZIP a partir de membros já comprimidos (ver read_raw_members)"""
+    central = []
+    with open(output_path, 'wb') as f:
+        for name, (method, crc, size, raw, date_time) in members.items():
+            try:
+                encoded, flags = name.encode('ascii'), 0
+            except UnicodeEncodeError:
+                encoded, flags = name.encode('utf-8'), 0x800
+            dos_time, dos_date = _dos_datetime(date_time)
+            offset = f.tell()
+            f.write(_LOCAL_HEADER.pack(0x04034b50, 20, flags, method, dos_time, dos_date,
+                                       crc, len(raw), size, len(encoded), 0))
+            f.write(encoded)
+            f.write(raw)
+            central.append(_CENTRAL_HEADER.pack(0x02014b50, 20, 20, flags, method, dos_time, dos_date,
+                                                crc, len(raw), size, len(encoded), 0, 0, 0, 0, 0, offset)
+                           + encoded)
+
+        cd_offset = f.tell()
+        for entry in central:
+            f.write(entry)
+        f.write(_END_RECORD.pack(0x06054b50, 0, 0, len(central), len(central),
+                                 f.tell() - cd_offset, cd_offset, 0))
+
+
+def replace_members(e3a_path, files, output_path, members=None):
+    """Grava `output_path` = E3A com os membros de `files` substituídos.
+
+    Só os membros de `files` cujo conteúdo mudou são recomprimidos; os outros
+    são copiados comprimidos. Escreve num temporário e substitui no fim, por
+    isso output_path pode ser o próprio e3a_path. `members` são os membros
+    do E3A já lidos com read_raw_members (para gravar várias cópias do mesmo
+    E3A sem o reler). Retorna os membros recomprimidos.
+    """
+    members = dict(members) if members is not None else read_raw_members(e3a_path)
+    now = time.localtime()[:6]
+    changed = []
+    for name, data in files.items():
+        _, crc, size, _, _ = members.get(name, (None,) * 5)
+        if crc == zlib.crc32(data) and size == len(data):
+            continue
+        members[name] = compress_member(data, now)
+        changed.append(name)
+
+    tmp_path = f'{output_path}.{os.getpid()}.tmp'
+    write_raw_zip(tmp_path, members)
+    os.replace(tmp_path, output_path)
+    return changed
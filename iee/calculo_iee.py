@@ -16,13 +16,15 @@ Exemplo:
 
 import os
 import sys
-import glob
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment, NamedStyle
 from openpyxl.utils import get_column_letter
 from openpyxl.formatting.rule import FormulaRule
 from openpyxl.chart import BarChart, Reference
 
+from hap_csv import load_project_data
+from valores_excel import save_with_values
+
 # =============================================================================
 # ESTILOS
 # =============================================================================
@@ -101,53 +103,6 @@ CSV_COLUMNS = [
 # FUNÇÕES
 # =============================================================================
 
-def read_hap_csv(filepath):
-    """Lê um CSV do HAP e retorna dicionário com totais anuais"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    if len(lines) < 5:
-        return None, {}
-
-    sistema = lines[1].split(';')[0].replace('Monthly Simulation Results for ', '').strip()
-    headers = lines[3].strip().split(';')
-    totals = {}
-
-    for line in lines[4:]:
-        line = line.strip()
-        if not line or line.startswith('Month'):
-            continue
-        values = line.split(';')
-        for i, val in enumerate(values[1:], 1):
-            if i < len(headers) and val:
-                col = headers[i]
-                try:
-                    totals[col] = totals.get(col, 0) + int(val)
-                except:
-                    pass
-
-    return sistema, {'totals': totals, 'headers': headers}
-
-
-def find_hap_csvs(project_folder):
-    """Encontra todos os CSVs do HAP numa pasta"""
-    pattern = os.path.join(project_folder, 'HAP51_Monthly_*.csv')
-    return sorted(glob.glob(pattern))
-
-
-def load_project_data(project_folder):
-    """Carrega todos os dados de um projecto HAP"""
-    csv_files = find_hap_csvs(project_folder)
-    systems_data = {}
-
-    for csv_file in csv_files:
-        sistema, data = read_hap_csv(csv_file)
-        if sistema and data and sistema != 'TODOS':
-            systems_data[sistema] = data
-
-    return systems_data
-
-
 def create_iee_excel(prev_data, ref_data, output_path):
     """Cria a folha Excel completa de cálculo IEE"""
 
@@ -403,7 +358,8 @@ def create_iee_excel(prev_data, ref_data, output_path):
 
     # IEEprev
     ws_calc.cell(row, 2, value='IEEprev')
-    ws_calc.cell(row, 3, value='= Ep_prev / Área')
+    # data_type 's': texto começado por '=' não é fórmula
+    ws_calc.cell(row, 3, value='= Ep_prev / Área').data_type = 's'
     ws_calc.cell(row, 4, value=f'=E{row_total_prev}/$C$6')
     ws_calc.cell(row, 4).fill = RESULT_FILL
     ws_calc.cell(row, 5, value='kWhEP/m².ano')
@@ -412,7 +368,7 @@ def create_iee_excel(prev_data, ref_data, output_path):
 
     # IEEref
     ws_calc.cell(row, 2, value='IEEref')
-    ws_calc.cell(row, 3, value='= Ep_ref / Área')
+    ws_calc.cell(row, 3, value='= Ep_ref / Área').data_type = 's'
     ws_calc.cell(row, 4, value=f'=E{row_total_ref}/$C$6')
     ws_calc.cell(row, 4).fill = RESULT_FILL
     ws_calc.cell(row, 5, value='kWhEP/m².ano')
@@ -421,7 +377,7 @@ def create_iee_excel(prev_data, ref_data, output_path):
 
     # IEEren
     ws_calc.cell(row, 2, value='IEEren')
-    ws_calc.cell(row, 3, value='= Ep_ren / Área')
+    ws_calc.cell(row, 3, value='= Ep_ren / Área').data_type = 's'
     ws_calc.cell(row, 4, value=f'=E{row_ren_total}/$C$6')
     ws_calc.cell(row, 4).fill = RESULT_FILL
     ws_calc.cell(row, 5, value='kWhEP/m².ano')
@@ -430,7 +386,7 @@ def create_iee_excel(prev_data, ref_data, output_path):
 
     # RIEE
     ws_calc.cell(row, 2, value='RIEE').font = Font(bold=True, size=12)
-    ws_calc.cell(row, 3, value='= (IEEprev - IEEren) / IEEref')
+    ws_calc.cell(row, 3, value='= (IEEprev - IEEren) / IEEref').data_type = 's'
     ws_calc.cell(row, 4, value=f'=(D{row_iee_prev}-D{row_iee_ren})/D{row_iee_ref}')
     ws_calc.cell(row, 4).fill = RESULT_FILL
     ws_calc.cell(row, 4).font = Font(bold=True, size=12)
@@ -484,21 +440,22 @@ def create_iee_excel(prev_data, ref_data, output_path):
 
     ws_leg.cell(5, 2, value='Verde')
     ws_leg.cell(5, 2).fill = FORMULA_FILL
-    ws_leg.cell(5, 3, value='= Fórmula (valor calculado automaticamente)')
+    # data_type 's': texto começado por '=' não é fórmula
+    ws_leg.cell(5, 3, value='= Fórmula (valor calculado automaticamente)').data_type = 's'
 
     ws_leg.cell(6, 2, value='Amarelo')
     ws_leg.cell(6, 2).fill = INPUT_FILL
-    ws_leg.cell(6, 3, value='= Input (preencher manualmente)')
+    ws_leg.cell(6, 3, value='= Input (preencher manualmente)').data_type = 's'
 
     ws_leg.cell(7, 2, value='Laranja')
     ws_leg.cell(7, 2).fill = RESULT_FILL
-    ws_leg.cell(7, 3, value='= Resultado final')
+    ws_leg.cell(7, 3, value='= Resultado final').data_type = 's'
 
     ws_leg.cell(9, 2, value='TIPOS DE CONSUMO:').font = Font(bold=True)
     ws_leg.cell(10, 2, value='Tipo S')
-    ws_leg.cell(10, 3, value='= Conta para classificação energética')
+    ws_leg.cell(10, 3, value='= Conta para classificação energética').data_type = 's'
     ws_leg.cell(11, 2, value='Tipo T')
-    ws_leg.cell(11, 3, value='= NÃO conta para classificação')
+    ws_leg.cell(11, 3, value='= NÃO conta para classificação').data_type = 's'
 
     ws_leg.cell(13, 2, value='CONSUMOS TIPO S:').font = Font(bold=True)
     tipo_s = ['Aquecimento e Arrefecimento', 'Ventilação AVAC', 'Bombagem AVAC',
@@ -522,7 +479,7 @@ def create_iee_excel(prev_data, ref_data, output_path):
     # =========================================================================
     # GUARDAR
     # =========================================================================
-    wb.save(output_path)
+    save_with_values(wb, output_path)  # Fórmulas + valores calculados
     return len(prev_data), len(ref_data)
 
 
@@ -0,0 +1,273 @@
+"""
+Leitura dos CSV mensais do HAP (HAP51_Monthly_*.csv)
+
+Leitor único usado por todos os scripts IEE. Cada CSV é lido com o módulo
+csv e convertido numa matriz de inteiros (uma linha por mês, uma coluna por
+header), com um índice {header: coluna}, em vez de um dicionário por mês.
+As pastas com muitos sistemas são lidas em paralelo.
+
+Cache: o resultado de cada pasta fica na cache do utilizador (a mesma do
+hap_cache.py: HAP_CACHE_DIR ou ~/.hap_cache), numa entrada por pasta cuja
+chave é o caminho absoluto da pasta. Cada CSV é guardado com o seu (mtime,
+tamanho) e só os CSV novos ou alterados voltam a ser lidos - alterar apenas
+as entradas manuais (EER/COP, iluminação, ...) e recalcular não lê nenhum
+CSV. Nada é escrito na pasta do projecto. O formato é o das entradas do
+hap_cache (JSON + colunas array em binário + zlib, ver encode_value).
+HAP_CACHE=0 desactiva; `python hap_cache.py limpar` apaga.
+
+Formato do CSV (separador ';'):
+    linha 2: "Monthly Simulation Results for <sistema>"
+    linha 4: headers (Month;Lighting (kWh);...)
+    linha 5+: um mês por linha
+
+Cada sistema fica como:
+    {
+        'headers': [...],          # linha 4 tal como no CSV
+        'columns': {header: k},    # índice da coluna em cada linha de values
+        'months':  ['January', ...],
+        'values':  [[int, ...], ...],   # len(months) x K
+        'totals':  {header: soma anual},
+    }
+
+Usage:
+    python hap_csv.py <pasta> [--workers N] [--sem-cache]
+"""
+
+import os
+import sys
+import csv
+import glob
+import hashlib
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+# Cache e funções partilhadas com o extractor (../extractor)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extractor'))
+
+import hap_cache
+from hap_cli import option
+
+TITLE_PREFIX = 'Monthly Simulation Results for '
+CSV_PATTERN = 'HAP51_Monthly_*.csv'
+
+# Sistema agregado exportado pelo HAP (não é um sistema real)
+TOTAL_SYSTEM = 'TODOS'
+
+# Abaixo deste nº de ficheiros o arranque dos processos não compensa
+PARALLEL_MIN_FILES = 64
+
+CACHE_NAME = 'hap_csv'
+
+# Incrementar sempre que o formato dos dados lidos mudar (invalida caches antigas)
+CACHE_VERSION = 2
+
+
+def _decode(raw):
+    """Os CSV do HAP vêm em UTF-8 ou em Latin-1 (Windows)"""
+    try:
+        return raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return raw.decode('latin-1')
+
+
+def _to_int(text):
+    try:
+        return int(text)
+    except ValueError:
+        return 0
+
+
+def read_hap_csv(filepath):
+    """Lê um CSV do HAP. Retorna (sistema, dados) ou (None, {}) se o ficheiro for curto.
+
+    Células vazias ou não inteiras contam como 0.
+    """
+    with open(filepath, 'rb') as f:
+        lines = _decode(f.read()).splitlines()
+
+    if len(lines) < 5:
+        return None, {}
+
+    sistema = lines[1].split(';')[0].replace(TITLE_PREFIX, '').strip()
+    headers = lines[3].strip().split(';')
+    width = len(headers) - 1
+
+    months = []
+    values = []
+    for cells in csv.reader(lines[4:], delimiter=';'):
+        if not cells or not cells[0].strip() or cells[0].startswith('Month'):
+            continue
+        row = [int(v) if v.isdigit() else _to_int(v) for v in cells[1:width + 1]]
+        if len(row) < width:
+            row.extend([0] * (width - len(row)))
+        months.append(cells[0].strip())
+        values.append(row)
+
+    columns = {}
+    for k, header in enumerate(headers[1:]):
+        columns.setdefault(header, k)
+    sums = [sum(column) for column in zip(*values)] if values else [0] * width
+    totals = {header: sums[k] for header, k in columns.items()}
+
+    return sistema, {'headers': headers, 'columns': columns, 'months': months,
+                     'values': values, 'totals': totals}
+
+
+def monthly_values(data, column):
+    """Valores mensais de uma coluna (0 se a coluna não existir)"""
+    k = data['columns'].get(column)
+    if k is None:
+        return [0] * len(data['values'])
+    return [row[k] for row in data['values']]
+
+
+def month_row(data, month):
+    """Linha de values do mês (comparado pelas 3 primeiras letras), ou None"""
+    prefix = month[:3]
+    for i, name in enumerate(data['months']):
+        if name.startswith(prefix):
+            return data['values'][i]
+    return None
+
+
+def find_hap_csvs(project_folder):
+    """Encontra todos os CSVs do HAP numa pasta"""
+    return sorted(glob.glob(os.path.join(project_folder, CSV_PATTERN)))
+
+
+def read_hap_csvs(csv_files, workers=None, reader=read_hap_csv, min_files=PARALLEL_MIN_FILES, chunksize=32):
+    """reader (read_hap_csv) de vários ficheiros (em paralelo se forem muitos), pela mesma ordem"""
+    if workers == 1 or len(csv_files) < min_files:
+        return [reader(path) for path in csv_files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(reader, csv_files, chunksize=chunksize))
+
+
+# =============================================================================
+# CACHE POR PASTA
+# =============================================================================
+
+def _cache_path(project_folder, cache_name=CACHE_NAME, version=CACHE_VERSION):
+    """Entrada da cache da pasta: hash do tipo, versão e caminho absoluto"""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f'{cache_name}:v{version}:{os.path.abspath(project_folder)}'.encode('utf-8', 'surrogateescape'))
+    return os.path.join(hap_cache.cache_dir(), h.hexdigest() + hap_cache.CACHE_SUFFIX)
+
+
+def _read_cache(project_folder, cache_name=CACHE_NAME, version=CACHE_VERSION):
+    """{nome do ficheiro: [[mtime_ns, tamanho], [sistema, dados]]} ou {}"""
+    path = _cache_path(project_folder, cache_name, version)
+    try:
+        with open(path, 'rb') as f:
+            cache = hap_cache.decode_value(zlib.decompress(f.read()))
+    except (OSError, zlib.error, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    try:
+        os.utime(path)  # Marca como usada recentemente (LRU do hap_cache)
+    except OSError:
+        pass
+    return cache['entries']
+
+
+def _write_cache(project_folder, entries, cache_name=CACHE_NAME, version=CACHE_VERSION, level=6):
+    path = _cache_path(project_folder, cache_name, version)
+    blob = zlib.compress(hap_cache.encode_value({'entries': entries}), level)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp_path, path)  # Atómico: nunca deixa a cache a meio
+        hap_cache.evict()
+    except OSError:
+        pass  # Cache é só uma optimização
+
+
+def read_folder(project_folder, workers=None, use_cache=True):
+    """read_hap_csv de todos os CSV da pasta, reutilizando a cache.
+
+    Retorna ([(sistema, dados)] pela ordem dos ficheiros, nº lidos da cache).
+    """
+    return read_files_cached(project_folder, find_hap_csvs(project_folder), workers, use_cache)
+
+
+def read_files_cached(project_folder, csv_files, workers=None, use_cache=True,
+                      reader=read_hap_csv, cache_name=CACHE_NAME, version=CACHE_VERSION,
+                      level=6, **pool_options):
+    """reader de cada ficheiro, reutilizando a cache da pasta (comum aos CSV mensais e horários).
+
+    O resultado do reader tem de ser serializável pelo hap_cache.encode_value
+    (tuplos voltam como listas). Retorna ([resultado] pela ordem dos
+    ficheiros, nº lidos da cache).
+    """
+    if not (use_cache and hap_cache.cache_enabled()):
+        return read_hap_csvs(csv_files, workers, reader, **pool_options), 0
+
+    cached = _read_cache(project_folder, cache_name, version)
+    entries = {}
+    todo = []
+    for path in csv_files:
+        name = os.path.basename(path)
+        st = os.stat(path)
+        signature = [st.st_mtime_ns, st.st_size]
+        hit = cached.get(name)
+        if hit is not None and hit[0] == signature:
+            entries[name] = hit
+        else:
+            todo.append((name, signature, path))
+
+    parsed = read_hap_csvs([path for _, _, path in todo], workers, reader, **pool_options)
+    for (name, signature, _), result in zip(todo, parsed):
+        entries[name] = [signature, result]
+    if todo or len(entries) != len(cached):
+        _write_cache(project_folder, entries, cache_name, version, level)
+
+    return [entries[os.path.basename(path)][1] for path in csv_files], len(csv_files) - len(todo)
+
+
+def load_project_data(project_folder, workers=None, use_cache=True):
+    """Carrega todos os sistemas de um projecto HAP: {sistema: dados}"""
+    results, _ = read_folder(project_folder, workers, use_cache)
+    return _systems(results)
+
+
+def _systems(results):
+    systems_data = {}
+    for sistema, data in results:
+        if sistema and data and sistema != TOTAL_SYSTEM:
+            systems_data[sistema] = data
+    return systems_data
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main():
+    args = sys.argv[1:]
+    workers, args = option(args, '--workers', int)
+
+    use_cache = '--sem-cache' not in args
+    args = [a for a in args if a != '--sem-cache']
+
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    if not os.path.isdir(args[0]):
+        print(f"Erro: Pasta não encontrada: {args[0]}")
+        sys.exit(1)
+
+    results, hits = read_folder(args[0], workers, use_cache)
+    data = _systems(results)
+    print(f"{len(data)} sistemas ({len(results) - hits} CSV lidos, {hits} da cache)")
+    for sistema, d in data.items():
+        used = sum(1 for v in d['totals'].values() if v)
+        print(f"  {sistema:<30} {len(d['months']):>3} meses  {used:>3}/{len(d['columns'])} colunas com dados")
+
+
+if __name__ == '__main__':
+    main()
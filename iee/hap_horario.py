@@ -0,0 +1,392 @@
+"""
+Resultados horários do HAP (HAP51_Hourly_*.csv) - picos, simultaneidade e curvas de duração
+
+Os CSV horários (8760 linhas por sistema) são lidos em streaming, linha a
+linha, directamente para uma array('d') por coluna - o ficheiro nunca fica
+inteiro em memória nem passa pelo Excel. As linhas cujas colunas de
+data/hora não são numéricas (ex: uma linha 'Total' no fim) são ignoradas.
+O resultado de cada pasta fica na cache do utilizador, como no hap_csv.py
+(~/.hap_cache, chave = caminho da pasta; só os CSV novos ou alterados voltam
+a ser lidos; HAP_CACHE=0 desactiva).
+
+Para cada coluna (ex: 'Central Cooling Coil Load'):
+    - pico anual de cada sistema e a hora em que ocorre
+    - máximo de cada mês
+    - pico simultâneo (soma hora a hora de todos os sistemas), a contribuição
+      de cada sistema nessa hora e o factor de diversidade
+      (soma dos picos individuais / pico simultâneo)
+    - curva de duração de carga (valores por ordem decrescente) e horas
+      equivalentes à carga máxima
+
+Formato do CSV (separador ';'), como os mensais:
+    linha 2: "Hourly Simulation Results for <sistema>"
+    linha 4: headers (colunas de data/hora seguidas das colunas de resultados)
+    linha 5+: uma hora por linha (ano não bissexto, 1 Jan 00h em diante)
+
+Usage:
+    python hap_horario.py <pasta> [--coluna TEXTO] [--csv resumo.csv] [--curvas curvas.csv]
+                          [--workers N] [--sem-cache]
+
+Exemplo:
+    python hap_horario.py PREV/ --coluna "Cooling Coil" --curvas duracao.csv
+"""
+
+import os
+import sys
+import csv
+import glob
+from array import array
+from bisect import bisect_right
+from itertools import zip_longest
+
+# Funções partilhadas com o extractor (../extractor)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extractor'))
+
+from hap_cli import option
+from hap_csv import TOTAL_SYSTEM, read_files_cached
+
+TITLE_PREFIX = 'Hourly Simulation Results for '
+CSV_PATTERN = 'HAP51_Hourly_*.csv'
+
+CACHE_NAME = 'hap_horario'
+CACHE_VERSION = 3
+
+# Cada CSV horário tem ~8760 linhas: a partir de poucos ficheiros já compensa paralelizar
+PARALLEL_MIN_FILES = 4
+
+# Colunas de data/hora (não são resultados)
+TIME_HEADERS = {'month', 'day', 'hour', 'date', 'time', 'date/time', 'day of week', 'weekday'}
+
+MONTHS = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+MONTH_DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+# Hora do ano em que começa cada mês (+ fim do ano)
+MONTH_START = [0]
+for _days in MONTH_DAYS:
+    MONTH_START.append(MONTH_START[-1] + _days * 24)
+
+
+# =============================================================================
+# LEITURA
+# =============================================================================
+
+def _to_float(text):
+    try:
+        return float(text)
+    except ValueError:
+        try:
+            return float(text.replace(',', '.'))
+        except ValueError:
+            return 0.0
+
+
+def _is_number(text):
+    try:
+        float(text.replace(',', '.'))
+        return True
+    except ValueError:
+        return False
+
+
+def _is_time(text):
+    text = text.strip()
+    return text.isdigit() or (bool(text) and _is_number(text))
+
+
+def _is_hour_row(cells, time_keys):
+    """Linha de dados de uma hora: não vazia e com as colunas de data/hora numéricas"""
+    if not cells or not cells[0].strip():
+        return False
+    if not time_keys:
+        return not cells[0].strip().lower().startswith('total')
+    n = len(cells)
+    return all(k < n and _is_time(cells[k]) for k in time_keys)
+
+
+def _read_stream(f):
+    lines = [f.readline() for _ in range(4)]
+    if not lines[3]:
+        return None, {}
+
+    sistema = lines[1].split(';')[0].replace(TITLE_PREFIX, '').strip()
+    headers = [h.strip() for h in lines[3].rstrip('\r\n').split(';')]
+    rows = csv.reader(f, delimiter=';')
+
+    # A primeira linha decide quais colunas são resultados (as de data/hora são ignoradas)
+    first = None
+    for cells in rows:
+        if cells and cells[0].strip():
+            first = cells
+            break
+    if first is None:
+        return None, {}
+
+    keep = [k for k, header in enumerate(headers)
+            if header and header.lower() not in TIME_HEADERS
+            and k < len(first) and _is_number(first[k].strip() or '0')]
+    # Colunas de data/hora numéricas (Day, Hour): uma linha em que não o sejam
+    # (ex: 'Total' no fim do ficheiro) não é uma hora e é ignorada
+    time_keys = [k for k, header in enumerate(headers)
+                 if header.lower() in TIME_HEADERS and k < len(first) and _is_time(first[k])]
+    names = [headers[k] for k in keep]
+    values = [array('d') for _ in keep]
+    appends = [column.append for column in values]
+
+    cells = first
+    while True:
+        if _is_hour_row(cells, time_keys):
+            n = len(cells)
+            for append, k in zip(appends, keep):
+                append(_to_float(cells[k]) if k < n and cells[k] else 0.0)
+        cells = next(rows, None)
+        if cells is None:
+            break
+
+    columns = {}
+    for k, header in enumerate(names):
+        columns.setdefault(header, k)
+    return sistema, {'headers': names, 'columns': columns, 'values': values,
+                     'hours': len(values[0]) if values else 0,
+                     'totals': {header: sum(values[k]) for header, k in columns.items()}}
+
+
+def read_hourly_csv(filepath):
+    """Lê um CSV horário do HAP em streaming. Retorna (sistema, dados) ou (None, {}).
+
+    dados = {'headers', 'columns' {header: k}, 'values' [array('d') por coluna], 'hours', 'totals'}
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+            return _read_stream(f)
+    except UnicodeDecodeError:
+        with open(filepath, 'r', encoding='latin-1', newline='') as f:
+            return _read_stream(f)
+
+
+def find_hourly_csvs(project_folder):
+    """Encontra todos os CSVs horários do HAP numa pasta"""
+    return sorted(glob.glob(os.path.join(project_folder, CSV_PATTERN)))
+
+
+def load_hourly_data(project_folder, workers=None, use_cache=True):
+    """Todos os sistemas de uma pasta: ({sistema: dados}, nº de CSV lidos da cache)"""
+    results, hits = read_files_cached(project_folder, find_hourly_csvs(project_folder), workers, use_cache,
+                                      reader=read_hourly_csv, cache_name=CACHE_NAME, version=CACHE_VERSION,
+                                      level=1, min_files=PARALLEL_MIN_FILES, chunksize=1)
+    systems = {}
+    for sistema, data in results:
+        if sistema and data and sistema != TOTAL_SYSTEM:
+            systems[sistema] = data
+    return systems, hits
+
+
+def column_values(data, column):
+    """array('d') da coluna (None se não existir)"""
+    k = data['columns'].get(column)
+    return None if k is None else data['values'][k]
+
+
+# =============================================================================
+# ANÁLISE
+# =============================================================================
+
+def hour_label(index):
+    """Hora do ano (0..8759) -> 'Jul 15 14h'"""
+    month = min(bisect_right(MONTH_START, index) - 1, 11)
+    day_hour = index - MONTH_START[month]
+    return f"{MONTHS[month]} {day_hour // 24 + 1:02d} {day_hour % 24:02d}h"
+
+
+def peak(values):
+    """(valor máximo, hora do ano) - (0, None) se vazio"""
+    if not len(values):
+        return 0.0, None
+    value = max(values)
+    return value, values.index(value)
+
+
+def monthly_maxima(values):
+    """[(máximo, hora do ano)] para cada mês com dados"""
+    result = []
+    for m in range(12):
+        segment = values[MONTH_START[m]:MONTH_START[m + 1]]
+        if not len(segment):
+            break
+        value = max(segment)
+        result.append((value, MONTH_START[m] + segment.index(value)))
+    return result
+
+
+def load_duration(values):
+    """Curva de duração: valores por ordem decrescente"""
+    return sorted(values, reverse=True)
+
+
+def duration_summary(values, curve=None):
+    """Pico, total, horas equivalentes e horas acima de 50%/80% do pico"""
+    curve = curve if curve is not None else load_duration(values)
+    value = curve[0] if curve else 0.0
+    total = sum(values)
+
+    def hours_above(fraction):
+        limit = value * fraction
+        return sum(1 for v in curve if v >= limit) if value > 0 else 0
+
+    return {
+        'pico': value,
+        'total': total,
+        'horas_equivalentes': total / value if value > 0 else 0.0,
+        'horas_acima_50': hours_above(0.5),
+        'horas_acima_80': hours_above(0.8),
+    }
+
+
+def coincident_peak(systems, column):
+    """Pico simultâneo de uma coluna somada hora a hora em todos os sistemas.
+
+    Retorna None se nenhum sistema tiver a coluna.
+    """
+    series = {nome: column_values(data, column) for nome, data in systems.items()}
+    series = {nome: values for nome, values in series.items() if values is not None}
+    if not series:
+        return None
+
+    total = array('d', map(sum, zip_longest(*series.values(), fillvalue=0.0)))
+    value, hour = peak(total)
+    individual = {nome: peak(values) for nome, values in series.items()}
+    sum_peaks = sum(p for p, _ in individual.values())
+    return {
+        'coluna': column,
+        'total': total,
+        'pico': value,
+        'hora': hour,
+        'contribuicoes': {nome: (values[hour] if hour is not None and hour < len(values) else 0.0)
+                          for nome, values in series.items()},
+        'picos_individuais': individual,
+        'soma_picos': sum_peaks,
+        'diversidade': sum_peaks / value if value > 0 else None,
+    }
+
+
+def common_columns(systems, filtro=None):
+    """Colunas com dados em pelo menos um sistema (pela ordem em que aparecem)"""
+    columns = []
+    for data in systems.values():
+        for header in data['headers']:
+            if header in columns or not data['totals'].get(header):
+                continue
+            if filtro and filtro.lower() not in header.lower():
+                continue
+            columns.append(header)
+    return columns
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def print_report(systems, columns):
+    for column in columns:
+        result = coincident_peak(systems, column)
+        if result is None:
+            continue
+        print(f"\n{column}")
+        print(f"  {'Sistema':<28} {'Pico':>10} {'Hora':>12} {'No pico simult.':>16} {'Horas eq.':>10}")
+        for nome, (value, hour) in result['picos_individuais'].items():
+            values = column_values(systems[nome], column)
+            summary = duration_summary(values)
+            print(f"  {nome[:28]:<28} {value:>10.1f} {hour_label(hour) if hour is not None else '-':>12} "
+                  f"{result['contribuicoes'][nome]:>16.1f} {summary['horas_equivalentes']:>10.0f}")
+        print(f"  {'SIMULTÂNEO':<28} {result['pico']:>10.1f} "
+              f"{hour_label(result['hora']) if result['hora'] is not None else '-':>12}")
+        diversity = result['diversidade']
+        print(f"  Soma dos picos: {result['soma_picos']:.1f}  -  factor de diversidade: "
+              f"{'-' if diversity is None else f'{diversity:.2f}'}")
+        maxima = monthly_maxima(result['total'])
+        print("  Máx. mensal (simultâneo): " + '  '.join(f"{MONTHS[m]} {v:.0f}" for m, (v, _) in enumerate(maxima)))
+
+
+def write_summary_csv(systems, columns, output_path):
+    """Uma linha por sistema e coluna (+ SIMULTÂNEO): total, pico, hora, horas equivalentes e máximos mensais"""
+    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['Coluna', 'Sistema', 'Total', 'Pico', 'Hora do pico', 'Horas equivalentes',
+                         'Horas > 50% pico', 'Horas > 80% pico', 'Factor de diversidade'] + MONTHS)
+        for column in columns:
+            result = coincident_peak(systems, column)
+            if result is None:
+                continue
+            series = [(nome, column_values(systems[nome], column)) for nome in result['picos_individuais']]
+            series.append(('SIMULTÂNEO', result['total']))
+            for nome, values in series:
+                summary = duration_summary(values)
+                _, hour = peak(values)
+                maxima = [round(v, 2) for v, _ in monthly_maxima(values)]
+                diversity = result['diversidade'] if nome == 'SIMULTÂNEO' else None
+                writer.writerow([column, nome, round(summary['total'], 2), round(summary['pico'], 2),
+                                 hour_label(hour) if hour is not None else '',
+                                 round(summary['horas_equivalentes']),
+                                 summary['horas_acima_50'], summary['horas_acima_80'],
+                                 '' if diversity is None else round(diversity, 3)] + maxima)
+
+
+def write_duration_csv(systems, column, output_path):
+    """Curvas de duração de uma coluna: Hora;<sistema>...;SIMULTÂNEO"""
+    result = coincident_peak(systems, column)
+    if result is None:
+        return False
+    names = list(result['picos_individuais'])
+    curves = [load_duration(column_values(systems[nome], column)) for nome in names]
+    curves.append(load_duration(result['total']))
+    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['Hora'] + names + ['SIMULTÂNEO'])
+        for i, row in enumerate(zip_longest(*curves, fillvalue=''), 1):
+            writer.writerow([i] + [v if v == '' else round(v, 3) for v in row])
+    return True
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    args = sys.argv[1:]
+    workers, args = option(args, '--workers', int)
+    filtro, args = option(args, '--coluna')
+    csv_path, args = option(args, '--csv')
+    curves_path, args = option(args, '--curvas')
+    use_cache = '--sem-cache' not in args
+    args = [a for a in args if a != '--sem-cache']
+
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    if not os.path.isdir(args[0]):
+        print(f"Erro: Pasta não encontrada: {args[0]}")
+        sys.exit(1)
+
+    systems, hits = load_hourly_data(args[0], workers, use_cache)
+    if not systems:
+        print(f"Erro: Nenhum {CSV_PATTERN} em {args[0]}")
+        sys.exit(1)
+    print(f"{len(systems)} sistemas ({hits} CSV da cache)")
+
+    columns = common_columns(systems, filtro)
+    if not columns:
+        print(f"Erro: Nenhuma coluna com dados{f' contém {filtro!r}' if filtro else ''}")
+        sys.exit(1)
+
+    print_report(systems, columns)
+
+    if csv_path:
+        write_summary_csv(systems, columns, csv_path)
+        print(f"\nResumo gravado: {csv_path}")
+    if curves_path:
+        write_duration_csv(systems, columns[0], curves_path)
+        print(f"Curvas de duração ({columns[0]}) gravadas: {curves_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -18,11 +18,12 @@ Exemplo:
 
 import os
 import sys
-import glob
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 from openpyxl.utils import get_column_letter
 
+from hap_csv import find_hap_csvs, read_hap_csvs, month_row
+
 # =============================================================================
 # ESTILOS
 # =============================================================================
@@ -78,56 +79,6 @@ RESUMO_MAPPING = [
 # FUNÇÕES
 # =============================================================================
 
-def read_hap_csv(filepath):
-    """Lê um CSV do HAP e retorna dicionário com totais anuais e dados mensais"""
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    if len(lines) < 5:
-        return None, {}
-
-    # Nome do sistema (linha 2)
-    sistema = lines[1].split(';')[0].replace('Monthly Simulation Results for ', '').strip()
-
-    # Headers (linha 4, índice 3)
-    headers = lines[3].strip().split(';')
-
-    # Calcular totais e guardar dados mensais
-    totals = {}
-    monthly_data = []
-
-    for line in lines[4:]:
-        line = line.strip()
-        if not line or line.startswith('Month'):
-            continue
-
-        values = line.split(';')
-        month = values[0] if values else ''
-
-        month_data = {'Month': month}
-        for i, val in enumerate(values[1:], 1):
-            if i < len(headers) and val:
-                col = headers[i]
-                try:
-                    num_val = int(val)
-                    totals[col] = totals.get(col, 0) + num_val
-                    month_data[col] = num_val
-                except:
-                    pass
-
-        if month:
-            monthly_data.append(month_data)
-
-    return sistema, {'totals': totals, 'monthly': monthly_data, 'headers': headers}
-
-
-def find_hap_csvs(project_folder):
-    """Encontra todos os CSVs do HAP numa pasta"""
-    pattern = os.path.join(project_folder, 'HAP51_Monthly_*.csv')
-    return sorted(glob.glob(pattern))
-
-
 def create_excel(systems_data, output_path):
     """Cria Excel com os dados dos sistemas"""
 
@@ -311,8 +262,7 @@ def create_excel(systems_data, output_path):
     # Dados mensais
     row = 2
     for sistema, data in sistemas:
-        monthly = data.get('monthly', [])
-        if not monthly:
+        if not data['values']:
             continue
 
         # Para cada coluna com dados
@@ -323,16 +273,14 @@ def create_excel(systems_data, output_path):
             ws_mensal.cell(row, 1, value=sistema).border = THIN_BORDER
             ws_mensal.cell(row, 2, value=col_name).border = THIN_BORDER
 
-            total = 0
+            k = data['columns'][csv_col]
             for col, month in enumerate(months, 3):
-                for m_data in monthly:
-                    if m_data.get('Month', '').startswith(month[:3]):
-                        val = m_data.get(csv_col, 0)
-                        cell = ws_mensal.cell(row, col, value=val if val > 0 else '')
-                        cell.border = THIN_BORDER
-                        cell.alignment = Alignment(horizontal='right')
-                        total += val
-                        break
+                month_values = month_row(data, month)
+                if month_values is not None:
+                    val = month_values[k]
+                    cell = ws_mensal.cell(row, col, value=val if val > 0 else '')
+                    cell.border = THIN_BORDER
+                    cell.alignment = Alignment(horizontal='right')
 
             # Total com fórmula SUM
             formula = f'=SUM(C{row}:N{row})'
@@ -464,8 +412,7 @@ def main():
 
     # Ler dados
     systems_data = {}
-    for csv_file in csv_files:
-        sistema, data = read_hap_csv(csv_file)
+    for sistema, data in read_hap_csvs(csv_files):
         if sistema and data:
             systems_data[sistema] = data
             print(f"  Lido: {sistema}")
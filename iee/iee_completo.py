@@ -33,11 +33,13 @@ Usage:
 
 import os
 import sys
-import glob
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 from openpyxl.utils import get_column_letter
 
+from hap_csv import load_project_data, month_row
+from valores_excel import save_with_values
+
 # =============================================================================
 # ESTILOS
 # =============================================================================
@@ -125,68 +127,6 @@ MONTHS_FULL = ['January', 'February', 'March', 'April', 'May', 'June',
                'July', 'August', 'September', 'October', 'November', 'December']
 
 
-# =============================================================================
-# FUNÇÕES LEITURA CSV
-# =============================================================================
-
-def read_hap_csv(filepath):
-    """Lê um CSV do HAP e retorna dicionário com totais anuais e dados mensais"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    if len(lines) < 5:
-        return None, {}
-
-    sistema = lines[1].split(';')[0].replace('Monthly Simulation Results for ', '').strip()
-    headers = lines[3].strip().split(';')
-
-    totals = {}
-    monthly_data = []
-
-    for line in lines[4:]:
-        line = line.strip()
-        if not line or line.startswith('Month'):
-            continue
-
-        values = line.split(';')
-        month = values[0] if values else ''
-
-        month_data = {'Month': month}
-        for i, val in enumerate(values[1:], 1):
-            if i < len(headers) and val:
-                col = headers[i]
-                try:
-                    num_val = int(val)
-                    totals[col] = totals.get(col, 0) + num_val
-                    month_data[col] = num_val
-                except:
-                    pass
-
-        if month:
-            monthly_data.append(month_data)
-
-    return sistema, {'totals': totals, 'monthly': monthly_data, 'headers': headers}
-
-
-def find_hap_csvs(project_folder):
-    """Encontra todos os CSVs do HAP numa pasta"""
-    pattern = os.path.join(project_folder, 'HAP51_Monthly_*.csv')
-    return sorted(glob.glob(pattern))
-
-
-def load_project_data(project_folder):
-    """Carrega todos os dados de um projecto HAP"""
-    csv_files = find_hap_csvs(project_folder)
-    systems_data = {}
-
-    for csv_file in csv_files:
-        sistema, data = read_hap_csv(csv_file)
-        if sistema and data and sistema != 'TODOS':
-            systems_data[sistema] = data
-
-    return systems_data
-
-
 # =============================================================================
 # FOLHAS DETALHE E MENSAL
 # =============================================================================
@@ -274,8 +214,7 @@ def create_mensal_sheet(ws, data, title):
 
     row = 3
     for sistema in sistemas:
-        monthly = data[sistema].get('monthly', [])
-        if not monthly:
+        if not data[sistema]['values']:
             continue
 
         for csv_col, nome in cols_mensal:
@@ -285,13 +224,13 @@ def create_mensal_sheet(ws, data, title):
             ws.cell(row, 1, value=sistema).border = THIN_BORDER
             ws.cell(row, 2, value=nome).border = THIN_BORDER
 
+            k = data[sistema]['columns'][csv_col]
             for col, month_full in enumerate(MONTHS_FULL, 3):
-                for m_data in monthly:
-                    if m_data.get('Month', '').startswith(month_full[:3]):
-                        val = m_data.get(csv_col, 0)
-                        cell = ws.cell(row, col, value=val if val > 0 else '')
-                        cell.border = THIN_BORDER
-                        break
+                month_values = month_row(data[sistema], month_full)
+                if month_values is not None:
+                    val = month_values[k]
+                    cell = ws.cell(row, col, value=val if val > 0 else '')
+                    cell.border = THIN_BORDER
 
             cell = ws.cell(row, 15, value=f'=SUM(C{row}:N{row})')
             cell.border = THIN_BORDER
@@ -1318,7 +1257,8 @@ def create_iee_sheet(ws, row_total_s_prev, row_total_ren):
 
     # IEEprev,s
     ws.cell(4, 1, value='IEEprev,s').font = Font(bold=True)
-    ws.cell(4, 2, value='= EP_prev_s / Área')
+    # data_type 's': texto começado por '=' não é fórmula
+    ws.cell(4, 2, value='= EP_prev_s / Área').data_type = 's'
     ws.cell(4, 3, value=f"='Energia Primária'!D{row_total_s_prev}/'Energia Primária'!$B$3")
     ws.cell(4, 3).fill = RESULT_FILL
     ws.cell(4, 3).border = THICK_BORDER
@@ -1327,7 +1267,7 @@ def create_iee_sheet(ws, row_total_s_prev, row_total_ren):
 
     # IEEref,s (input manual)
     ws.cell(5, 1, value='IEEref,s').font = Font(bold=True)
-    ws.cell(5, 2, value='= Do cálculo REF')
+    ws.cell(5, 2, value='= Do cálculo REF').data_type = 's'
     ws.cell(5, 3).fill = INPUT_FILL
     ws.cell(5, 3).border = THICK_BORDER
     ws.cell(5, 3).number_format = '0.00'
@@ -1335,7 +1275,7 @@ def create_iee_sheet(ws, row_total_s_prev, row_total_ren):
 
     # IEEren
     ws.cell(6, 1, value='IEEren').font = Font(bold=True)
-    ws.cell(6, 2, value='= EP_ren / Área')
+    ws.cell(6, 2, value='= EP_ren / Área').data_type = 's'
     ws.cell(6, 3, value=f"='Energia Primária'!D{row_total_ren}/'Energia Primária'!$B$3")
     ws.cell(6, 3).fill = RESULT_FILL
     ws.cell(6, 3).border = THICK_BORDER
@@ -1344,7 +1284,7 @@ def create_iee_sheet(ws, row_total_s_prev, row_total_ren):
 
     # RIEE
     ws.cell(8, 1, value='RIEE').font = Font(bold=True, size=14)
-    ws.cell(8, 2, value='= (IEEprev,s - IEEren) / IEEref,s')
+    ws.cell(8, 2, value='= (IEEprev,s - IEEren) / IEEref,s').data_type = 's'
     ws.cell(8, 3, value='=(C4-C6)/C5')
     ws.cell(8, 3).fill = RESULT_FILL
     ws.cell(8, 3).border = THICK_BORDER
@@ -1412,23 +1352,24 @@ def create_legenda_sheet(ws):
 
     ws.cell(4, 1, value='Amarelo')
     ws.cell(4, 1).fill = INPUT_FILL
-    ws.cell(4, 2, value='= INPUT - Preencher manualmente')
+    # data_type 's': texto começado por '=' não é fórmula
+    ws.cell(4, 2, value='= INPUT - Preencher manualmente').data_type = 's'
 
     ws.cell(5, 1, value='Verde claro')
     ws.cell(5, 1).fill = FORMULA_FILL
-    ws.cell(5, 2, value='= FÓRMULA - Calculado automaticamente')
+    ws.cell(5, 2, value='= FÓRMULA - Calculado automaticamente').data_type = 's'
 
     ws.cell(6, 1, value='Laranja')
     ws.cell(6, 1).fill = RESULT_FILL
-    ws.cell(6, 2, value='= RESULTADO - Valor final')
+    ws.cell(6, 2, value='= RESULTADO - Valor final').data_type = 's'
 
     ws.cell(7, 1, value='Azul claro')
     ws.cell(7, 1).fill = PREV_FILL
-    ws.cell(7, 2, value='= Dados PREVISTO')
+    ws.cell(7, 2, value='= Dados PREVISTO').data_type = 's'
 
     ws.cell(8, 1, value='Rosa claro')
     ws.cell(8, 1).fill = REF_FILL
-    ws.cell(8, 2, value='= Dados REFERÊNCIA')
+    ws.cell(8, 2, value='= Dados REFERÊNCIA').data_type = 's'
 
     ws.cell(10, 1, value='FOLHAS DO FICHEIRO:').font = Font(bold=True)
 
@@ -1458,13 +1399,13 @@ def create_legenda_sheet(ws):
     ws.cell(row, 1, value='TIPOS DE CONSUMO:').font = Font(bold=True)
     row += 1
     ws.cell(row, 1, value='Tipo S')
-    ws.cell(row, 2, value='= CONTA para classificação (AVAC, AQS, Iluminação, Elevadores)')
+    ws.cell(row, 2, value='= CONTA para classificação (AVAC, AQS, Iluminação, Elevadores)').data_type = 's'
     row += 1
     ws.cell(row, 1, value='Tipo T')
-    ws.cell(row, 2, value='= NÃO conta para classificação (Equipamentos)')
+    ws.cell(row, 2, value='= NÃO conta para classificação (Equipamentos)').data_type = 's'
     row += 1
     ws.cell(row, 1, value='REN')
-    ws.cell(row, 2, value='= Energia renovável (deduzida ao IEEprev)')
+    ws.cell(row, 2, value='= Energia renovável (deduzida ao IEEprev)').data_type = 's'
 
     row += 2
     ws.cell(row, 1, value='FÓRMULAS SCE:').font = Font(bold=True)
@@ -1589,7 +1530,7 @@ def create_iee_completo(prev_data, ref_data, output_path):
     ws_leg = wb.create_sheet('Legenda')
     create_legenda_sheet(ws_leg)
 
-    wb.save(output_path)
+    save_with_values(wb, output_path)  # Fórmulas + valores calculados
 
     return num_sistemas_prev, num_sistemas_ref
 
@@ -22,13 +22,15 @@ Usage:
     python iee_completo_v3.py <pasta_prev> <pasta_ref> [output.xlsx]
 """
 
-import os
 import sys
-import glob
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 from openpyxl.utils import get_column_letter
 
+from hap_csv import load_project_data
+from motor_iee import RIEE_LIMITES, merge_entradas
+from valores_excel import save_with_values
+
 # =============================================================================
 # ESTILOS
 # =============================================================================
@@ -68,81 +70,9 @@ CLASS_COLORS = {
     'E': 'ED1C24', 'F': 'BE1E2D'
 }
 
-# =============================================================================
-# CONSTANTES SCE
-# =============================================================================
-
-FPU = {
-    'electricidade': 2.5,
-    'gas_natural': 1.0,
-}
-
-RIEE_LIMITES = [
-    ('A+', 0, 0.25), ('A', 0.26, 0.50), ('B', 0.51, 0.75),
-    ('B-', 0.76, 1.00), ('C', 1.01, 1.50), ('D', 1.51, 2.00),
-    ('E', 2.01, 2.50), ('F', 2.51, 999),
-]
-
 MONTHS = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
 
 
-# =============================================================================
-# FUNÇÕES LEITURA CSV
-# =============================================================================
-
-def read_hap_csv(filepath):
-    """Lê um CSV do HAP e retorna dados"""
-    with open(filepath, 'r', encoding='latin-1') as f:
-        lines = f.readlines()
-
-    if len(lines) < 5:
-        return None, {}
-
-    sistema = lines[1].split(';')[0].replace('Monthly Simulation Results for ', '').strip()
-    headers = lines[3].strip().split(';')
-
-    totals = {}
-    monthly_data = []
-
-    for line in lines[4:]:
-        line = line.strip()
-        if not line or line.startswith('Month'):
-            continue
-
-        values = line.split(';')
-        month = values[0] if values else ''
-
-        month_data = {'Month': month}
-        for i, val in enumerate(values[1:], 1):
-            if i < len(headers) and val:
-                col = headers[i]
-                try:
-                    num_val = int(val)
-                    totals[col] = totals.get(col, 0) + num_val
-                    month_data[col] = num_val
-                except:
-                    pass
-
-        if month:
-            monthly_data.append(month_data)
-
-    return sistema, {'totals': totals, 'monthly': monthly_data, 'headers': headers}
-
-
-def load_project_data(project_folder):
-    """Carrega todos os dados de um projecto HAP"""
-    pattern = os.path.join(project_folder, 'HAP51_Monthly_*.csv')
-    csv_files = sorted(glob.glob(pattern))
-    systems_data = {}
-
-    for csv_file in csv_files:
-        sistema, data = read_hap_csv(csv_file)
-        if sistema and data and sistema != 'TODOS':
-            systems_data[sistema] = data
-
-    return systems_data
-
-
 # =============================================================================
 # 1-2. FOLHAS DETALHE E MENSAL (Automáticas dos CSV)
 # =============================================================================
@@ -266,8 +196,8 @@ def create_mensal_sheet(ws, data, title):
 
     row = 3
     for sistema in sistemas:
-        monthly = data[sistema].get('monthly', [])
-        if not monthly:
+        values = data[sistema]['values']
+        if not values:
             continue
 
         for csv_col, nome in cols_show:
@@ -277,8 +207,9 @@ def create_mensal_sheet(ws, data, title):
             ws.cell(row, 1, value=sistema).border = THIN_BORDER
             ws.cell(row, 2, value=nome).border = THIN_BORDER
 
-            for col, month_data in enumerate(monthly[:12], 3):
-                val = month_data.get(csv_col, 0)
+            k = data[sistema]['columns'][csv_col]
+            for col, month_values in enumerate(values[:12], 3):
+                val = month_values[k]
                 ws.cell(row, col, value=val if val > 0 else '').border = THIN_BORDER
 
             ws.cell(row, 15, value=f'=SUM(C{row}:N{row})').border = THIN_BORDER
@@ -1516,20 +1447,21 @@ def create_legenda_sheet(ws):
         ws.cell(row, 4, value=resultado).border = THIN_BORDER
         row += 1
 
+    # data_type 's': texto começado por '=' não é fórmula
     row += 2
     ws.cell(row, 1, value='CORES:').font = Font(bold=True)
     row += 1
     ws.cell(row, 1, value='Amarelo').fill = INPUT_FILL
-    ws.cell(row, 2, value='= Preencher')
+    ws.cell(row, 2, value='= Preencher').data_type = 's'
     row += 1
     ws.cell(row, 1, value='Verde claro').fill = FORMULA_FILL
-    ws.cell(row, 2, value='= Fórmula automática')
+    ws.cell(row, 2, value='= Fórmula automática').data_type = 's'
     row += 1
     ws.cell(row, 1, value='Verde escuro').fill = REN_FILL
-    ws.cell(row, 2, value='= Energia renovável')
+    ws.cell(row, 2, value='= Energia renovável').data_type = 's'
     row += 1
     ws.cell(row, 1, value='Laranja').fill = RESULT_FILL
-    ws.cell(row, 2, value='= Resultado')
+    ws.cell(row, 2, value='= Resultado').data_type = 's'
 
     ws.column_dimensions['A'].width = 12
     ws.column_dimensions['B'].width = 20
@@ -1537,12 +1469,101 @@ def create_legenda_sheet(ws):
     ws.column_dimensions['D'].width = 25
 
 
+# =============================================================================
+# ENTRADAS (células amarelas a partir de um dict do motor_iee)
+# =============================================================================
+
+# Entradas simples: (secção ou None, campo) -> (folha, célula)
+INPUT_CELLS = {
+    (None, 'area_util'): ('EnergiaPrimaria', 'B4'),
+    ('fpu', 'electricidade'): ('EnergiaPrimaria', 'B7'),
+    ('fpu', 'gas_natural'): ('EnergiaPrimaria', 'B8'),
+    ('aqs', 'pessoas'): ('AQS', 'B5'),
+    ('aqs', 'litros_pessoa_dia'): ('AQS', 'B6'),
+    ('aqs', 'dias'): ('AQS', 'B7'),
+    ('aqs', 'temp_fria'): ('AQS', 'B8'),
+    ('aqs', 'temp_aqs'): ('AQS', 'B9'),
+    ('aqs', 'solar_termico'): ('AQS', 'B16'),
+    ('aqs', 'cop_bomba_calor'): ('AQS', 'B20'),
+    ('aqs', 'rend_caldeira'): ('AQS', 'B21'),
+    ('aqs', 'rend_resistencia'): ('AQS', 'B22'),
+    ('aqs', 'sistema'): ('AQS', 'B24'),
+    ('pv', 'potencia_kwp'): ('PV', 'B5'),
+    ('pv', 'horas'): ('PV', 'B6'),
+    ('pv', 'perdas_pct'): ('PV', 'B7'),
+    ('pv', 'autoconsumo'): ('PV', 'B8'),
+}
+
+# Entradas em lista: chave -> (folha, primeira linha, nº de linhas, {campo: coluna})
+# As linhas são as criadas pelas funções create_*_sheet acima.
+INPUT_TABLES = {
+    'iluminacao_enu': ('IluminacaoENU', 6, 5, {'potencia_w': 'B', 'horas': 'C'}),
+    'iluminacao_exterior': ('IluminacaoENU', 15, 4, {'potencia_w': 'B', 'horas': 'C'}),
+    'equipamentos_ee': ('EquipamentosExtra', 6, 4, {'potencia_w': 'B', 'horas': 'C', 'qtd': 'D'}),
+    'equipamentos_gn': ('EquipamentosExtra', 14, 2, {'consumo_kwh': 'B'}),
+    'ventilacao_extra': ('VentilacaoExtra', 6, 4, {'potencia_kw': 'B', 'horas_dia': 'C', 'dias': 'D'}),
+    'bombagem': ('Bombagem', 6, 4, {'potencia_kw': 'B', 'horas_dia': 'C', 'dias': 'D'}),
+}
+
+# Elevadores: um bloco de linhas por elevador (folha Elevadores)
+ELEVADOR_ROWS = [
+    {'carga_kg': 6, 'viagens': 7, 'paragens': 8, 'percurso_m': 9, 'dias': 12},
+    {'carga_kg': 16, 'viagens': 17, 'paragens': 18, 'percurso_m': 19, 'dias': 22},
+]
+
+
+def fill_entradas(wb, entradas):
+    """Escreve as entradas do motor_iee (ver ENTRADAS_DEFAULT) nas células amarelas.
+
+    Levanta ValueError se uma lista tiver mais linhas do que o livro.
+    """
+    entradas = merge_entradas(entradas)
+
+    for (section, field), (sheet, coord) in INPUT_CELLS.items():
+        values = entradas[section] if section else entradas
+        wb[sheet][coord] = values[field]
+
+    # EER/COP por sistema: linhas a seguir ao cabeçalho 'EER' da folha Simulação
+    ws = wb['Simulacao']
+    header = next(r for r in range(1, ws.max_row + 1)
+                  if ws.cell(r, 1).value == 'Sistema' and ws.cell(r, 4).value == 'EER')
+    row = header + 1
+    while ws.cell(row, 1).value not in (None, 'TOTAL'):
+        params = entradas['sistemas'].get(ws.cell(row, 1).value, {})
+        ws.cell(row, 4).value = params.get('eer', entradas['eer'])
+        ws.cell(row, 5).value = params.get('cop', entradas['cop'])
+        row += 1
+
+    for key, (sheet, first_row, num_rows, columns) in INPUT_TABLES.items():
+        items = entradas[key]
+        if len(items) > num_rows:
+            raise ValueError(f"{key}: {len(items)} linhas, o livro só tem {num_rows} ({sheet})")
+        ws = wb[sheet]
+        for row, item in enumerate(items, first_row):
+            if item.get('nome'):
+                ws[f'A{row}'] = item['nome']
+            for field, col in columns.items():
+                ws[f'{col}{row}'] = item.get(field)
+
+    elevadores = entradas['elevadores']
+    if len(elevadores) > len(ELEVADOR_ROWS):
+        raise ValueError(f"elevadores: {len(elevadores)}, o livro só tem {len(ELEVADOR_ROWS)}")
+    ws = wb['Elevadores']
+    for elevador, rows in zip(elevadores, ELEVADOR_ROWS):
+        for field, row in rows.items():
+            ws[f'B{row}'] = elevador.get(field)
+
+
 # =============================================================================
 # FUNÇÃO PRINCIPAL
 # =============================================================================
 
-def create_iee_completo(prev_data, ref_data, output_path):
-    """Cria a folha Excel completa"""
+def create_iee_completo(prev_data, ref_data, output_path, entradas=None):
+    """Cria a folha Excel completa.
+
+    Com entradas (dict do motor_iee) as células amarelas ficam preenchidas
+    com esses valores; sem elas ficam os valores por omissão para preencher.
+    """
     wb = openpyxl.Workbook()
 
     # 1. Detalhe PREV
@@ -1630,7 +1651,10 @@ def create_iee_completo(prev_data, ref_data, output_path):
     ws = wb.create_sheet('Legenda')
     create_legenda_sheet(ws)
 
-    wb.save(output_path)
+    if entradas is not None:
+        fill_entradas(wb, entradas)
+
+    save_with_values(wb, output_path)  # Fórmulas + valores calculados
     return len(prev_data), len(ref_data)
 
 
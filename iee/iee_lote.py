@@ -0,0 +1,243 @@
+"""
+IEE em lote - RIEE e classe energética de muitos projectos de uma vez
+
+Lê um manifesto com um projecto por linha, calcula cada projecto com o
+motor_iee.py (processos em paralelo) e grava uma tabela resumo com o RIEE,
+a classe, os IEE e a energia primária por utilização. Opcionalmente gera
+também o livro completo (iee_completo_v3) de cada projecto, com as entradas
+do projecto já escritas nas células amarelas.
+
+Manifesto CSV (separador ';', caminhos relativos à pasta do manifesto):
+
+    nome;pasta_prev;pasta_ref;area_util;entradas
+    Malhoa22;Malhoa22/PREV;Malhoa22/REF;1250;Malhoa22/entradas.json
+    Escola;Escola/PREV;Escola/REF;3400;
+
+ou JSON com a mesma informação (entradas pode vir inline):
+
+    [{"nome": "Malhoa22", "pasta_prev": "...", "pasta_ref": "...",
+      "area_util": 1250, "entradas": {"eer": 3.2, "cop": 3.6}}]
+
+A área do manifesto sobrepõe-se à das entradas. Sem nome, o projecto toma o
+nome da pasta que contém a pasta_prev. Os nomes têm de ser únicos (cada um
+dá o livro IEE_<nome>.xlsx); separadores de caminho passam a '_'.
+
+Usage:
+    python iee_lote.py <manifesto.csv|json> [--csv resumo.csv] [--excel pasta_saida] [--workers N]
+
+Exemplo:
+    python iee_lote.py projectos.csv --csv Resumo_IEE.csv
+    python iee_lote.py projectos.csv --excel livros/ --workers 8
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Funções partilhadas com o extractor (../extractor)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extractor'))
+
+from hap_cli import option
+from hap_csv import load_project_data
+from motor_iee import calculate_iee, load_entradas, merge_entradas
+
+
+# =============================================================================
+# MANIFESTO
+# =============================================================================
+
+def _resolve(base_dir, path):
+    return path if not path or os.path.isabs(path) else os.path.join(base_dir, path)
+
+
+# Caracteres que não podem entrar no nome do livro (IEE_<nome>.xlsx)
+UNSAFE_NAME_CHARS = '/\\:*?"<>|'
+
+
+def _safe_name(nome):
+    """Nome do projecto sem separadores de caminho nem caracteres inválidos no Windows"""
+    nome = ''.join('_' if c in UNSAFE_NAME_CHARS or ord(c) < 32 else c for c in str(nome))
+    return nome.strip(' .') or 'projecto'
+
+
+def read_manifest(path):
+    """Lista de projectos {nome, pasta_prev, pasta_ref, area_util, entradas}"""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    else:
+        with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+            rows = list(csv.DictReader(f, delimiter=';'))
+
+    projects = []
+    seen = {}
+    for i, row in enumerate(rows, 1):
+        row = {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items()}
+        missing = [key for key in ('pasta_prev', 'pasta_ref') if not row.get(key)]
+        if missing:
+            raise ValueError(f"Manifesto, linha {i}: falta {', '.join(missing)}")
+        entradas = row.get('entradas') or None
+        if isinstance(entradas, str):
+            entradas = _resolve(base_dir, entradas)
+        prev = _resolve(base_dir, row['pasta_prev'])
+        area = row.get('area_util')
+        nome = _safe_name(row.get('nome') or os.path.basename(os.path.dirname(os.path.abspath(prev))))
+        # Cada projecto grava IEE_<nome>.xlsx: nomes repetidos escreveriam o mesmo livro
+        if nome.lower() in seen:
+            raise ValueError(f"Manifesto, linha {i}: nome '{nome}' repetido (linha {seen[nome.lower()]})")
+        seen[nome.lower()] = i
+        projects.append({
+            'nome': nome,
+            'pasta_prev': prev,
+            'pasta_ref': _resolve(base_dir, row['pasta_ref']),
+            'area_util': float(str(area).replace(',', '.')) if area not in (None, '') else None,
+            'entradas': entradas,
+        })
+    return projects
+
+
+# =============================================================================
+# CÁLCULO
+# =============================================================================
+
+def _calcular_projecto(args):
+    """Worker: calcula um projecto (e gera o livro se pedido). Nunca levanta excepções."""
+    project, excel_dir = args
+    start = time.perf_counter()
+    result = {'nome': project['nome'], 'erro': None, 'calculo': None, 'livro': None}
+    try:
+        entradas = project['entradas']
+        entradas = load_entradas(entradas) if isinstance(entradas, str) else merge_entradas(entradas)
+        if project['area_util'] is not None:
+            entradas['area_util'] = project['area_util']
+
+        prev_data = load_project_data(project['pasta_prev'], workers=1)
+        ref_data = load_project_data(project['pasta_ref'], workers=1)
+        if not prev_data or not ref_data:
+            raise ValueError(f"CSV não encontrados ({'PREV' if not prev_data else 'REF'})")
+        result['calculo'] = calculate_iee(prev_data, ref_data, entradas)
+
+        if excel_dir:
+            from iee_completo_v3 import create_iee_completo
+            result['livro'] = os.path.join(excel_dir, f"IEE_{project['nome']}.xlsx")
+            create_iee_completo(prev_data, ref_data, result['livro'], entradas)
+    except Exception as e:
+        result['erro'] = f"{type(e).__name__}: {e}"
+    result['segundos'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def calcular_lote(projects, excel_dir=None, workers=None):
+    """Calcula todos os projectos (processos em paralelo), pela ordem do manifesto"""
+    jobs = [(project, excel_dir) for project in projects]
+    if workers == 1 or len(jobs) == 1:
+        return [_calcular_projecto(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_calcular_projecto, jobs))
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def _fmt(value, digits=2):
+    return '-' if value is None else f"{value:.{digits}f}"
+
+
+def print_summary(results):
+    print(f"\n{'Projecto':<28} {'Área':>10} {'IEEprev,s':>10} {'IEEref,s':>10} {'IEEren':>8} {'RIEE':>6}  Classe")
+    print('-' * 86)
+    for r in results:
+        if r['erro']:
+            print(f"{r['nome'][:28]:<28} ERRO: {r['erro']}")
+            continue
+        c = r['calculo']
+        print(f"{r['nome'][:28]:<28} {c['entradas']['area_util']:>10.2f} {c['iee_prev_s']:>10.2f} "
+              f"{c['iee_ref_s']:>10.2f} {c['iee_ren']:>8.2f} {_fmt(c['riee']):>6}  {c['classe']}")
+    print('-' * 86)
+
+    classes = {}
+    for r in results:
+        if not r['erro']:
+            classes[r['calculo']['classe']] = classes.get(r['calculo']['classe'], 0) + 1
+    errors = sum(1 for r in results if r['erro'])
+    print(f"{len(results)} projectos - " + ', '.join(f"{k}: {v}" for k, v in classes.items())
+          + (f" - {errors} com erro" if errors else ''))
+
+
+def write_summary_csv(results, output_path):
+    """Uma linha por projecto: IEE, RIEE, classe, totais S/T/REN/REF e kWhEP por utilização"""
+    usos = []
+    for r in results:
+        if not r['erro']:
+            usos = [linha['utilizacao'] for linha in r['calculo']['energia_primaria']['linhas']]
+            break
+
+    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['Projecto', 'Área útil [m²]', 'IEEprev,s', 'IEEref,s', 'IEEren', 'RIEE', 'Classe',
+                         'EP tipo S [kWhEP]', 'EP tipo T [kWhEP]', 'EP REN [kWhEP]', 'REF tipo S [kWh]']
+                        + [f"{uso} [kWhEP]" for uso in usos] + ['Livro', 'Erro'])
+        for r in results:
+            if r['erro']:
+                writer.writerow([r['nome']] + [''] * (10 + len(usos)) + ['', r['erro']])
+                continue
+            c = r['calculo']
+            ep = c['energia_primaria']
+            writer.writerow([r['nome'], c['entradas']['area_util'],
+                             round(c['iee_prev_s'], 2), round(c['iee_ref_s'], 2), round(c['iee_ren'], 2),
+                             '-' if c['riee'] is None else round(c['riee'], 3), c['classe'],
+                             round(ep['ep_s']), round(ep['ep_t']), round(ep['ep_ren']), round(c['ref_tipo_s'])]
+                            + [round(linha['ep']) for linha in ep['linhas']]
+                            + [r['livro'] or '', ''])
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    args = sys.argv[1:]
+    workers, args = option(args, '--workers', int)
+    csv_path, args = option(args, '--csv')
+    excel_dir, args = option(args, '--excel')
+
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    if not os.path.exists(args[0]):
+        print(f"Erro: Manifesto não encontrado: {args[0]}")
+        sys.exit(1)
+
+    try:
+        projects = read_manifest(args[0])
+    except (ValueError, KeyError, json.JSONDecodeError) as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+    if not projects:
+        print("Erro: Manifesto vazio")
+        sys.exit(1)
+
+    if excel_dir:
+        os.makedirs(excel_dir, exist_ok=True)
+
+    print(f"A calcular {len(projects)} projectos...")
+    start = time.perf_counter()
+    results = calcular_lote(projects, excel_dir, workers)
+    print_summary(results)
+    print(f"Tempo: {time.perf_counter() - start:.1f} s")
+
+    csv_path = csv_path or 'Resumo_IEE.csv'
+    write_summary_csv(results, csv_path)
+    print(f"\nResumo gravado: {csv_path}")
+
+    sys.exit(1 if any(r['erro'] for r in results) else 0)
+
+
+if __name__ == '__main__':
+    main()
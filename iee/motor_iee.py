@@ -0,0 +1,471 @@
+"""
+Motor IEE - cálculo do RIEE e da classe energética sem Excel
+
+Reproduz em Python as fórmulas do livro gerado pelo iee_completo_v3.py
+(Simulação → Desagregação → Energia Primária → IEE → Classe), a partir dos
+CSV mensais do HAP (PREV e REF) e das entradas manuais (EER/COP, iluminação
+ENU, AQS, PV, equipamentos, elevadores, ventilação, bombagem, área útil).
+
+As entradas têm os mesmos valores por omissão que as células amarelas do
+livro, por isso um JSON vazio dá o mesmo resultado que o livro por
+preencher. Só é preciso indicar o que muda, ex:
+
+    {
+        "area_util": 1250,
+        "eer": 3.2, "cop": 3.6,
+        "sistemas": {"AHU-01": {"eer": 4.1, "cop": 3.8}},
+        "iluminacao_enu": [{"nome": "Garagem", "potencia_w": 800, "horas": 8760}],
+        "aqs": {"pessoas": 40, "sistema": 1, "solar_termico": 2500},
+        "pv": {"potencia_kwp": 20},
+        "elevadores": [{"carga_kg": 630, "percurso_m": 12}]
+    }
+
+Usage:
+    python motor_iee.py <pasta_prev> <pasta_ref> [entradas.json] [--json resultado.json]
+
+Exemplo:
+    python motor_iee.py PREV/ REF/ entradas.json
+"""
+
+import os
+import sys
+import json
+import math
+
+# Funções partilhadas com o extractor (../extractor)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extractor'))
+
+from hap_cli import option
+from hap_csv import load_project_data
+
+# =============================================================================
+# CONSTANTES SCE
+# =============================================================================
+
+FPU = {
+    'electricidade': 2.5,
+    'gas_natural': 1.0,
+}
+
+RIEE_LIMITES = [
+    ('A+', 0, 0.25), ('A', 0.26, 0.50), ('B', 0.51, 0.75),
+    ('B-', 0.76, 1.00), ('C', 1.01, 1.50), ('D', 1.51, 2.00),
+    ('E', 2.01, 2.50), ('F', 2.51, 999),
+]
+
+# Colunas dos CSV do HAP usadas no cálculo (folha Detalhe)
+COL_ILUMINACAO = 'Lighting (kWh)'
+COL_EQUIPAMENTOS = 'Electric Equipment (kWh)'
+COL_CARGA_ARREF = 'Central Cooling Coil Load (kWh)'
+COL_CARGA_AQUEC = 'Central Heating Coil Load (kWh)'
+COLS_VENTILACAO = ['Supply Fan (kWh)', 'Return Fan (kWh)']
+
+# Consumos tipo S da referência (IEEref,s): iluminação + arrefecimento +
+# aquecimento (com apoio) + todos os ventiladores
+COLS_REF_TIPO_S = [
+    'Lighting (kWh)',
+    'Central Unit Clg Input (kWh)', 'Terminal Unit Clg Input (kWh)',
+    'Central Unit Htg Input (kWh)', 'Terminal Unit Htg Input (kWh)',
+    'Central Unit Aux. Htg. Input (kWh)', 'Terminal Unit Aux. Htg. Input (kWh)',
+    'Supply Fan (kWh)', 'Return Fan (kWh)', 'Exhaust Fan (kWh)', 'Ventilation Fan (kWh)',
+]
+
+# Folga na carga de aquecimento (Simulação: Heat+5%)
+FACTOR_AQUECIMENTO = 1.05
+
+# Elevadores: Edasc = (1.08 × Qasc × na × sm)/1000 + 100×21 [Wh/dia]
+ELEVADOR_STANDBY_WH = 100 * 21
+
+# =============================================================================
+# ENTRADAS (valores por omissão = células amarelas do livro)
+# =============================================================================
+
+ENTRADAS_DEFAULT = {
+    'area_util': 0,
+    'fpu': dict(FPU),               # kWhEP/kWh (folha EnergiaPrimaria)
+    'eer': 3.0,
+    'cop': 3.0,
+    'sistemas': {},                 # {sistema: {'eer': x, 'cop': y}}
+    'iluminacao_enu': [],           # [{'nome', 'potencia_w', 'horas'}]
+    'iluminacao_exterior': [],      # [{'nome', 'potencia_w', 'horas'}]
+    'aqs': {
+        'pessoas': 0,
+        'litros_pessoa_dia': 40,
+        'dias': 365,
+        'temp_fria': 15,
+        'temp_aqs': 60,
+        'solar_termico': 0,         # kWh/ano (SCE.ER)
+        'cop_bomba_calor': 3.5,
+        'rend_caldeira': 0.92,
+        'rend_resistencia': 1.0,
+        'sistema': 1,               # 1 - Bomba de calor, 2 - Caldeira gás, 3 - Resistência
+    },
+    'pv': {
+        'potencia_kwp': 0,
+        'horas': 1400,
+        'perdas_pct': 15,
+        'autoconsumo': 0.8,
+    },
+    'equipamentos_ee': [],          # [{'nome', 'potencia_w', 'horas', 'qtd'}]
+    'equipamentos_gn': [],          # [{'nome', 'consumo_kwh'}]
+    'elevadores': [                 # como no livro: 2 elevadores
+        {'carga_kg': 0, 'viagens': 750, 'paragens': 1, 'percurso_m': 0, 'dias': 365},
+        {'carga_kg': 0, 'viagens': 750, 'paragens': 0.67, 'percurso_m': 0, 'dias': 365},
+    ],
+    'ventilacao_extra': [],         # [{'nome', 'potencia_kw', 'horas_dia', 'dias'}]
+    'bombagem': [],                 # [{'nome', 'potencia_kw', 'horas_dia', 'dias'}]
+}
+
+
+def merge_entradas(entradas=None):
+    """Entradas completas: as dadas por cima dos valores por omissão.
+
+    Os dicionários (aqs, pv) são juntos campo a campo. Nas listas cada linha
+    é junta com a linha por omissão na mesma posição (as linhas a mais com a
+    primeira) e as linhas por omissão não indicadas ficam, como as linhas do
+    livro: um só elevador dado mantém o segundo elevador do livro.
+    Os restantes valores substituem o valor por omissão.
+    """
+    result = {}
+    entradas = entradas or {}
+    for key, default in ENTRADAS_DEFAULT.items():
+        value = entradas.get(key, default)
+        if isinstance(default, dict) and key != 'sistemas':
+            value = {**default, **(value or {})}
+        elif isinstance(default, list):
+            value = list(value or [])
+            value = [{**(default[i] if i < len(default) else default[0] if default else {}),
+                      **(value[i] if i < len(value) else {})}
+                     for i in range(max(len(value), len(default)))]
+        result[key] = value
+    return result
+
+
+def load_entradas(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return merge_entradas(json.load(f))
+
+
+# =============================================================================
+# AUXILIARES
+# =============================================================================
+
+def _num(value):
+    """Célula Excel: vazio/None conta como 0"""
+    return value if isinstance(value, (int, float)) else 0
+
+
+def _excel_round(value):
+    """ROUND(x, 0) do Excel (metades afastadas do zero)"""
+    return math.copysign(math.floor(abs(value) + 0.5), value)
+
+
+def _divide(a, b):
+    """a/b, ou 0 quando o Excel daria erro (IFERROR(...,0))"""
+    return a / b if b else 0
+
+
+def _detalhe(totals, column):
+    """Valor de um sistema na folha Detalhe (valores <= 0 ficam em branco)"""
+    value = _num(totals.get(column, 0))
+    return value if value > 0 else 0
+
+
+def _total(data, column):
+    return sum(_detalhe(system['totals'], column) for system in data.values())
+
+
+def _sum_items(items, *fields, divisor=1):
+    """Σ produto dos campos de cada linha (folhas de input) / divisor"""
+    total = 0
+    for item in items:
+        product = 1
+        for field in fields:
+            product *= _num(item.get(field))
+        total += product
+    return total / divisor
+
+
+# =============================================================================
+# CÁLCULO POR FOLHA
+# =============================================================================
+
+def project_totals(prev_data, ref_data):
+    """Parte do cálculo que só depende dos CSV (não das entradas).
+
+    Calculada uma vez por projecto: recalcular com outras entradas (EER/COP,
+    iluminação, ...) só refaz as folhas que dependem delas.
+    """
+    return {
+        'sistemas': [(nome, _detalhe(data['totals'], COL_CARGA_ARREF),
+                      _detalhe(data['totals'], COL_CARGA_AQUEC) * FACTOR_AQUECIMENTO)
+                     for nome, data in prev_data.items()],
+        'iluminacao': _total(prev_data, COL_ILUMINACAO),
+        'equipamentos': _total(prev_data, COL_EQUIPAMENTOS),
+        'ventilacao': sum(_total(prev_data, col) for col in COLS_VENTILACAO),
+        'ref_tipo_s': sum(_total(ref_data, col) for col in COLS_REF_TIPO_S),
+    }
+
+
+def calc_simulacao(totais, entradas):
+    """Folha Simulação: energia final e aerotermia por sistema (EER/COP)"""
+    sistemas = []
+    for nome, cool, heat in totais['sistemas']:
+        params = entradas['sistemas'].get(nome, {})
+        eer = _num(params.get('eer', entradas['eer']))
+        cop = _num(params.get('cop', entradas['cop']))
+        energia_cool = cool / eer if eer > 0 else 0
+        energia_heat = heat / cop if cop > 0 else 0
+        sistemas.append({
+            'sistema': nome,
+            'nec_cool': cool,
+            'nec_heat': heat,
+            'eer': eer,
+            'cop': cop,
+            'energia_cool': energia_cool,
+            'energia_heat': energia_heat,
+            'aero_cool': cool - energia_cool,
+            'aero_heat': heat - energia_heat,
+        })
+
+    def total(key):
+        return sum(s[key] for s in sistemas)
+
+    return {
+        'sistemas': sistemas,
+        'iluminacao': totais['iluminacao'],
+        'equipamentos': totais['equipamentos'],
+        'arrefecimento_ee': total('energia_cool'),
+        'aquecimento_ee': total('energia_heat'),
+        'arrefecimento_ren': total('aero_cool'),
+        'aquecimento_ren': total('aero_heat'),
+        'ventilacao': totais['ventilacao'],
+    }
+
+
+def calc_aqs(aqs):
+    """Folha AQS: necessidades, energia final por fonte e renováveis"""
+    qutil = (_num(aqs['pessoas']) * _num(aqs['litros_pessoa_dia']) * _num(aqs['dias'])
+             * 4.186 * (_num(aqs['temp_aqs']) - _num(aqs['temp_fria'])) / 3600)
+    solar = _num(aqs['solar_termico'])
+    necessidades = qutil - solar
+    sistema = int(_num(aqs['sistema']))
+    rendimentos = [aqs['cop_bomba_calor'], aqs['rend_caldeira'], aqs['rend_resistencia']]
+    if sistema not in (1, 2, 3):
+        raise ValueError(f"AQS: sistema deve ser 1, 2 ou 3 (recebido {aqs['sistema']})")
+    rendimento = _num(rendimentos[sistema - 1])
+    energia_final = _excel_round(necessidades / rendimento) if rendimento else 0
+    return {
+        'qutil': qutil,
+        'necessidades': necessidades,
+        'rendimento': rendimento,
+        'energia_final': energia_final,
+        'ee': energia_final if sistema in (1, 3) else 0,
+        'gn': energia_final if sistema == 2 else 0,
+        'ren_aero': necessidades - energia_final if sistema == 1 else 0,
+        'ren_solar': solar,
+    }
+
+
+def calc_pv(pv):
+    """Folha PV: produção e auto-consumo [kWh/ano]"""
+    bruta = _num(pv['potencia_kwp']) * _num(pv['horas'])
+    liquida = bruta * (1 - _num(pv['perdas_pct']) / 100)
+    return {
+        'producao_bruta': bruta,
+        'producao_liquida': liquida,
+        'autoconsumo': liquida * _num(pv['autoconsumo']),
+    }
+
+
+def calc_elevador(elevador):
+    """Energia anual de um elevador [kWh] (SCE/RECS)"""
+    sm = _num(elevador.get('paragens')) * _num(elevador.get('percurso_m'))
+    edasc = (1.08 * _num(elevador.get('carga_kg')) * _num(elevador.get('viagens')) * sm / 1000
+             + ELEVADOR_STANDBY_WH)
+    return edasc * _num(elevador.get('dias')) / 1000
+
+
+def calc_desagregacao(simulacao, entradas):
+    """Folha Desagregação: [(utilização, simulação, extra, fonte, tipo)]"""
+    aqs = calc_aqs(entradas['aqs'])
+    pv = calc_pv(entradas['pv'])
+    linhas = [
+        ('Iluminação (Simulação)', simulacao['iluminacao'], 0, 'EE', 'S'),
+        ('IluminacaoENU', 0, _sum_items(entradas['iluminacao_enu'], 'potencia_w', 'horas', divisor=1000), 'EE', 'S'),
+        ('Iluminação Exterior', 0, _sum_items(entradas['iluminacao_exterior'], 'potencia_w', 'horas', divisor=1000), 'EE', 'S'),
+        ('Arrefecimento', simulacao['arrefecimento_ee'], 0, 'EE', 'S'),
+        ('Aquecimento', simulacao['aquecimento_ee'], 0, 'EE', 'S'),
+        ('Ventilação (Simulação)', simulacao['ventilacao'], 0, 'EE', 'S'),
+        ('Ventilação (Extra)', 0, _sum_items(entradas['ventilacao_extra'], 'potencia_kw', 'horas_dia', 'dias'), 'EE', 'S'),
+        ('Bombagem', 0, _sum_items(entradas['bombagem'], 'potencia_kw', 'horas_dia', 'dias'), 'EE', 'S'),
+        ('AQS EE', 0, aqs['ee'], 'EE', 'S'),
+        ('Elevadores', 0, sum(calc_elevador(e) for e in entradas['elevadores']), 'EE', 'S'),
+        ('Equipamentos (Simulação)', simulacao['equipamentos'], 0, 'EE', 'T'),
+        ('Equipamentos (Extra)', 0, _sum_items(entradas['equipamentos_ee'], 'potencia_w', 'horas', 'qtd', divisor=1000), 'EE', 'T'),
+        ('AQS GN', 0, aqs['gn'], 'GN', 'S'),
+        ('Equipamentos GN', 0, _sum_items(entradas['equipamentos_gn'], 'consumo_kwh'), 'GN', 'T'),
+        ('Aerotermia Arrefecimento', 0, simulacao['arrefecimento_ren'], 'REN', 'REN'),
+        ('Aerotermia Aquecimento', 0, simulacao['aquecimento_ren'], 'REN', 'REN'),
+        ('Aerotermia AQS', 0, aqs['ren_aero'], 'REN', 'REN'),
+        ('Solar Térmico', 0, aqs['ren_solar'], 'REN', 'REN'),
+        ('Fotovoltaico', 0, pv['autoconsumo'], 'REN', 'REN'),
+    ]
+    return [{'utilizacao': nome, 'simulacao': sim, 'extra': extra, 'total': sim + extra,
+             'fonte': fonte, 'tipo': tipo}
+            for nome, sim, extra, fonte, tipo in linhas], aqs, pv
+
+
+def calc_energia_primaria(desagregacao, fpu=FPU):
+    """Folha Energia Primária: kWh → kWhEP por fonte (renováveis com o Fpu da EE)"""
+    fpu = {'EE': fpu['electricidade'], 'GN': fpu['gas_natural'], 'REN': fpu['electricidade']}
+    linhas = [{**linha, 'fpu': fpu[linha['fonte']], 'ep': linha['total'] * fpu[linha['fonte']]}
+              for linha in desagregacao]
+    consumo = [linha for linha in linhas if linha['fonte'] != 'REN']
+    return {
+        'linhas': linhas,
+        'total_ee': sum(l['total'] for l in consumo if l['fonte'] == 'EE'),
+        'total_gn': sum(l['total'] for l in consumo if l['fonte'] == 'GN'),
+        'total_ren': sum(l['total'] for l in linhas if l['fonte'] == 'REN'),
+        'total_final': sum(l['total'] for l in consumo),
+        'total_ep': sum(l['ep'] for l in consumo),
+        'ep_s': sum(l['ep'] for l in consumo if l['tipo'] == 'S'),
+        'ep_t': sum(l['ep'] for l in consumo if l['tipo'] == 'T'),
+        'ep_ren': sum(l['ep'] for l in linhas if l['fonte'] == 'REN'),
+    }
+
+
+def energy_class(riee):
+    """Classe energética pelo RIEE (mesmos limites que o IF da folha Classe).
+
+    Sem RIEE (IEEref,s = 0) o livro mostra '-' no RIEE e, como no Excel um
+    texto é maior que qualquer número, a folha Classe dá 'F'.
+    """
+    if riee is None:
+        return RIEE_LIMITES[-1][0]
+    for classe, _, maximo in RIEE_LIMITES[:-1]:
+        if riee <= maximo:
+            return classe
+    return RIEE_LIMITES[-1][0]
+
+
+# =============================================================================
+# CÁLCULO COMPLETO
+# =============================================================================
+
+def calculate_iee(prev_data, ref_data, entradas=None):
+    """Calcula todo o livro IEE a partir dos dados PREV/REF já lidos.
+
+    prev_data/ref_data: {sistema: {'totals': {coluna: kWh}, ...}} como
+    devolvido por hap_csv.load_project_data. entradas: dict parcial (ver
+    ENTRADAS_DEFAULT). Retorna um dict com todos os totais intermédios,
+    os IEE, o RIEE (None se IEEref,s = 0) e a classe.
+    """
+    return calculate_totals(project_totals(prev_data, ref_data), entradas)
+
+
+def calculate_totals(totais, entradas=None):
+    """calculate_iee a partir de project_totals (sem voltar aos CSV)"""
+    entradas = merge_entradas(entradas)
+    area = _num(entradas['area_util'])
+
+    simulacao = calc_simulacao(totais, entradas)
+    desagregacao, aqs, pv = calc_desagregacao(simulacao, entradas)
+    energia_primaria = calc_energia_primaria(desagregacao, entradas['fpu'])
+
+    ref_tipo_s = totais['ref_tipo_s']
+    iee_prev_s = _divide(energia_primaria['ep_s'], area)
+    iee_ref_s = _divide(ref_tipo_s * entradas['fpu']['electricidade'], area)
+    iee_ren = _divide(energia_primaria['ep_ren'], area)
+    riee = (iee_prev_s - iee_ren) / iee_ref_s if iee_ref_s else None
+
+    return {
+        'entradas': entradas,
+        'simulacao': simulacao,
+        'aqs': aqs,
+        'pv': pv,
+        'desagregacao': desagregacao,
+        'energia_primaria': energia_primaria,
+        'ref_tipo_s': ref_tipo_s,
+        'iee_prev_s': iee_prev_s,
+        'iee_ref_s': iee_ref_s,
+        'iee_ren': iee_ren,
+        'riee': riee,
+        'classe': energy_class(riee),
+    }
+
+
+def calculate_folders(prev_folder, ref_folder, entradas=None):
+    """calculate_iee a partir das pastas com os HAP51_Monthly_*.csv"""
+    return calculate_iee(load_project_data(prev_folder), load_project_data(ref_folder), entradas)
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def print_result(result):
+    print(f"\n{'Utilização':<28} {'Simulação':>10} {'Extra':>10} {'Total':>10} {'Fonte':>5} {'Tipo':>4}")
+    print('-' * 72)
+    for linha in result['desagregacao']:
+        print(f"{linha['utilizacao']:<28} {linha['simulacao']:>10.0f} {linha['extra']:>10.0f} "
+              f"{linha['total']:>10.0f} {linha['fonte']:>5} {linha['tipo']:>4}")
+
+    ep = result['energia_primaria']
+    print('-' * 72)
+    print(f"Energia final EE / GN:   {ep['total_ee']:>12.0f} / {ep['total_gn']:.0f} kWh")
+    print(f"Energia primária total:  {ep['total_ep']:>12.0f} kWhEP  (S: {ep['ep_s']:.0f}, T: {ep['ep_t']:.0f})")
+    print(f"Energia renovável:       {ep['ep_ren']:>12.0f} kWhEP")
+    print(f"Consumo tipo S REF:      {result['ref_tipo_s']:>12.0f} kWh")
+    print()
+    print(f"IEEprev,s = {result['iee_prev_s']:.2f} kWhEP/m².ano")
+    print(f"IEEref,s  = {result['iee_ref_s']:.2f} kWhEP/m².ano")
+    print(f"IEEren    = {result['iee_ren']:.2f} kWhEP/m².ano")
+    riee = '-' if result['riee'] is None else f"{result['riee']:.2f}"
+    print(f"\nRIEE = {riee}   CLASSE: {result['classe']}")
+
+
+def write_json(result, output_path):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    args = sys.argv[1:]
+    json_path, args = option(args, '--json')
+
+    if len(args) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    prev_folder, ref_folder = args[0], args[1]
+    for folder in (prev_folder, ref_folder):
+        if not os.path.isdir(folder):
+            print(f"Erro: Pasta não encontrada: {folder}")
+            sys.exit(1)
+
+    entradas = load_entradas(args[2]) if len(args) > 2 else merge_entradas()
+    if not entradas['area_util']:
+        print("AVISO: área útil não indicada - IEE = 0")
+
+    prev_data = load_project_data(prev_folder)
+    ref_data = load_project_data(ref_folder)
+    if not prev_data or not ref_data:
+        print("ERRO: CSV não encontrados")
+        sys.exit(1)
+
+    print(f"PREV: {len(prev_data)} sistemas  |  REF: {len(ref_data)} sistemas")
+    result = calculate_iee(prev_data, ref_data, entradas)
+    print_result(result)
+
+    if json_path:
+        write_json(result, json_path)
+        print(f"\nResultado gravado: {json_path}")
+
+
+if __name__ == '__main__':
+    main()
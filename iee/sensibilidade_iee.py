@@ -0,0 +1,303 @@
+"""
+Sensibilidade IEE - RIEE numa grelha de entradas e mudanças de classe
+
+Responde a "o que é preciso para chegar à classe B-?" sem editar o livro:
+o projecto é calculado uma vez com o motor_iee.py e o RIEE é depois
+avaliado em forma fechada em cada ponto da grelha. Dados os totais dos CSV,
+o RIEE só depende destes parâmetros através de somas e divisões, por isso
+cada ponto custa poucas operações.
+
+Parâmetros (cada um com uma lista 'v1,v2,...' ou um intervalo 'início:fim:passo'):
+    --eer          EER de todos os sistemas (substitui os EER por sistema)
+    --cop          COP de todos os sistemas (substitui os COP por sistema)
+    --pv           Potência PV instalada [kWp]
+    --iluminacao   Factor sobre a iluminação simulada (1 = como no HAP)
+    --fpu-ee       Fpu da electricidade
+    --fpu-gn       Fpu do gás natural
+
+A área útil não é um parâmetro: divide o IEEprev,s, o IEEren e o IEEref,s
+por igual e cancela no RIEE, por isso não muda a classe. A área das entradas
+só serve para os valores de IEE da grelha (--csv); sem ela essas colunas
+ficam vazias.
+
+Os parâmetros não indicados ficam com o valor das entradas. Para cada
+parâmetro é mostrada a variação do RIEE com os restantes no valor base e o
+valor exacto em que a classe muda.
+
+Usage:
+    python sensibilidade_iee.py <pasta_prev> <pasta_ref> [entradas.json] [--eer ...] [--cop ...]
+                                [--pv ...] [--iluminacao ...] [--fpu-ee ...] [--fpu-gn ...]
+                                [--alvo CLASSE] [--csv grelha.csv]
+
+Exemplo:
+    python sensibilidade_iee.py PREV/ REF/ entradas.json --eer 2.5:5:0.25 --pv 0:60:10 --alvo B-
+"""
+
+import os
+import sys
+import csv
+import itertools
+
+# Funções partilhadas com o extractor (../extractor)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extractor'))
+
+from hap_cli import option
+from hap_csv import load_project_data
+from motor_iee import (
+    RIEE_LIMITES, project_totals, calculate_totals, calc_pv, energy_class,
+    load_entradas, merge_entradas,
+)
+
+# (opção, chave, descrição)
+PARAMETROS = [
+    ('--eer', 'eer', 'EER'),
+    ('--cop', 'cop', 'COP'),
+    ('--pv', 'pv', 'PV [kWp]'),
+    ('--iluminacao', 'iluminacao', 'Iluminação [×]'),
+    ('--fpu-ee', 'fpu_ee', 'Fpu EE'),
+    ('--fpu-gn', 'fpu_gn', 'Fpu GN'),
+]
+
+CLASSES = [classe for classe, _, _ in RIEE_LIMITES]
+
+# Iterações da bisecção do valor exacto de mudança de classe
+BISECT_STEPS = 60
+
+
+# =============================================================================
+# MODELO
+# =============================================================================
+
+def components(totais, entradas):
+    """Termos do RIEE que não dependem dos parâmetros da grelha.
+
+    Retorna (componentes, valores base dos parâmetros, resultado base do motor).
+    """
+    base = calculate_totals(totais, entradas)
+    entradas = base['entradas']
+    sim = base['simulacao']
+    linhas = base['desagregacao']
+
+    s_ee = sum(l['total'] for l in linhas if l['fonte'] == 'EE' and l['tipo'] == 'S')
+    ren = sum(l['total'] for l in linhas if l['fonte'] == 'REN')
+    comp = {
+        'cool': sum(s['nec_cool'] for s in sim['sistemas']),
+        'heat': sum(s['nec_heat'] for s in sim['sistemas']),
+        'energia_cool': sim['arrefecimento_ee'],
+        'energia_heat': sim['aquecimento_ee'],
+        'iluminacao': sim['iluminacao'],
+        'outros_s_ee': s_ee - sim['iluminacao'] - sim['arrefecimento_ee'] - sim['aquecimento_ee'],
+        's_gn': sum(l['total'] for l in linhas if l['fonte'] == 'GN' and l['tipo'] == 'S'),
+        'outros_ren': ren - sim['arrefecimento_ren'] - sim['aquecimento_ren'] - base['pv']['autoconsumo'],
+        'pv_por_kwp': calc_pv({**entradas['pv'], 'potencia_kwp': 1})['autoconsumo'],
+        'ref_tipo_s': base['ref_tipo_s'],
+    }
+    valores_base = {
+        'eer': None,  # None = EER/COP das entradas (incluindo os por sistema)
+        'cop': None,
+        'pv': entradas['pv']['potencia_kwp'] or 0,
+        'iluminacao': 1.0,
+        'area': entradas['area_util'] or 0,
+        'fpu_ee': entradas['fpu']['electricidade'],
+        'fpu_gn': entradas['fpu']['gas_natural'],
+    }
+    return comp, valores_base, base
+
+
+def evaluate(comp, eer, cop, pv, iluminacao, area, fpu_ee, fpu_gn):
+    """(IEEprev,s, IEEren, IEEref,s, RIEE) num ponto - mesmas fórmulas que o motor_iee.
+
+    Sem área os IEE são None (o RIEE é calculado na mesma).
+    """
+    if eer is None:
+        energia_cool = comp['energia_cool']
+    else:
+        energia_cool = comp['cool'] / eer if eer > 0 else 0
+    if cop is None:
+        energia_heat = comp['energia_heat']
+    else:
+        energia_heat = comp['heat'] / cop if cop > 0 else 0
+
+    s_ee = iluminacao * comp['iluminacao'] + energia_cool + energia_heat + comp['outros_s_ee']
+    ren = (comp['cool'] - energia_cool) + (comp['heat'] - energia_heat) + comp['outros_ren'] \
+        + pv * comp['pv_por_kwp']
+    prev_s = fpu_ee * s_ee + fpu_gn * comp['s_gn']
+    ren_ep = fpu_ee * ren
+    ref_s = comp['ref_tipo_s'] * fpu_ee
+    # A área divide os três termos por igual: o RIEE não depende dela
+    riee = (prev_s - ren_ep) / ref_s if ref_s else None
+    if not area:
+        return None, None, None, riee
+    return prev_s / area, ren_ep / area, ref_s / area, riee
+
+
+def _riee(comp, point):
+    return evaluate(comp, **point)[3]
+
+
+def crossing(comp, point, key, a, b):
+    """Valor de 'key' entre a e b onde a classe muda (bisecção; o RIEE é monótono em cada parâmetro)"""
+    classe_a = energy_class(_riee(comp, {**point, key: a}))
+    for _ in range(BISECT_STEPS):
+        middle = (a + b) / 2
+        if energy_class(_riee(comp, {**point, key: middle})) == classe_a:
+            a = middle
+        else:
+            b = middle
+    return b
+
+
+def sweep_1d(comp, base, key, values):
+    """[(valor, RIEE, classe)] e [(valor exacto, classe antes, classe depois)]"""
+    line = []
+    for value in values:
+        riee = _riee(comp, {**base, key: value})
+        line.append((value, riee, energy_class(riee)))
+    crossings = []
+    for (v1, _, c1), (v2, _, c2) in zip(line, line[1:]):
+        if c1 != c2:
+            crossings.append((crossing(comp, base, key, v1, v2), c1, c2))
+    return line, crossings
+
+
+def sweep_grid(comp, base, grid):
+    """Avalia todos os pontos da grelha. grid = {chave: [valores]} (só os parâmetros variados)"""
+    keys = list(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        point = {**base, **dict(zip(keys, values))}
+        yield point, evaluate(comp, **point)
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def parse_values(text):
+    """'2.5:5:0.5' (inclusivo) ou '2.5,3,3.5'"""
+    if ':' in text:
+        start, end, step = (float(v) for v in text.split(':'))
+        if step <= 0 or end < start:
+            raise ValueError(f"Intervalo inválido: {text}")
+        n = int(round((end - start) / step))
+        return [round(start + i * step, 10) for i in range(n + 1)]
+    return [float(v) for v in text.split(',') if v.strip()]
+
+
+def _fmt(value):
+    return '-' if value is None else f"{value:.3f}"
+
+
+def _base_text(key, base, entradas):
+    if base[key] is not None:
+        return f"{base[key]:g}"
+    value = entradas[key]
+    return f"{value:g}" + (' (+ por sistema)' if any(key in p for p in entradas['sistemas'].values()) else '')
+
+
+def print_report(comp, base, grid, entradas, alvo=None):
+    riee = _riee(comp, base)
+    print(f"BASE: RIEE = {_fmt(riee)}  CLASSE: {energy_class(riee)}")
+    for _, key, label in PARAMETROS:
+        print(f"  {label:<16} {_base_text(key, base, entradas)}")
+
+    for _, key, label in PARAMETROS:
+        if key not in grid:
+            continue
+        line, crossings = sweep_1d(comp, base, key, grid[key])
+        print(f"\n[{label}] restantes parâmetros no valor base")
+        for value, r, classe in line:
+            print(f"  {value:>10g}  RIEE {_fmt(r):>7}  {classe}")
+        for value, c1, c2 in crossings:
+            print(f"  → muda de {c1} para {c2} em {label} = {value:.4g}")
+
+    if len(grid) > 1 or alvo:
+        counts = {}
+        total = 0
+        best = []
+        target = CLASSES.index(alvo) if alvo else None
+        reference = {k: entradas[k] if v is None else v for k, v in base.items()}
+        for point, (_, _, _, r) in sweep_grid(comp, base, grid):
+            classe = energy_class(r)
+            counts[classe] = counts.get(classe, 0) + 1
+            total += 1
+            if target is not None and CLASSES.index(classe) <= target:
+                best.append((_distance(point, reference, grid), r, point))
+        print(f"\nGRELHA: {total} pontos - " + ', '.join(
+            f"{c}: {counts[c]}" for c in CLASSES if c in counts))
+        if alvo:
+            print(f"\nPontos com classe {alvo} ou melhor: {len(best)}")
+            for _, r, point in sorted(best, key=lambda b: b[0])[:10]:
+                changes = ', '.join(f"{label} {point[key]:g}" for _, key, label in PARAMETROS
+                                    if key in grid and point[key] != base[key])
+                print(f"  RIEE {_fmt(r)} {energy_class(r):<3}  {changes or '(valores base)'}")
+
+
+def _distance(point, reference, grid):
+    """Distância ao ponto base, normalizada pela amplitude de cada parâmetro"""
+    total = 0
+    for key, values in grid.items():
+        span = (max(values) - min(values)) or 1
+        total += abs(point[key] - reference[key]) / span
+    return total
+
+
+def write_csv(comp, base, grid, output_path):
+    keys = [key for _, key, _ in PARAMETROS]
+    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow([label for _, _, label in PARAMETROS] + ['IEEprev,s', 'IEEren', 'IEEref,s', 'RIEE', 'Classe'])
+        for point, (iee_prev_s, iee_ren, iee_ref_s, riee) in sweep_grid(comp, base, grid):
+            writer.writerow(['' if point[k] is None else point[k] for k in keys]
+                            + ['' if v is None else round(v, 3) for v in (iee_prev_s, iee_ren, iee_ref_s)]
+                            + ['-' if riee is None else round(riee, 4), energy_class(riee)])
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    args = sys.argv[1:]
+    options = {}
+    for flag in [p[0] for p in PARAMETROS] + ['--alvo', '--csv']:
+        value, args = option(args, flag)
+        if value is not None:
+            options[flag] = value
+
+    if len(args) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    alvo = options.get('--alvo')
+    if alvo and alvo not in CLASSES:
+        print(f"Erro: Classe inválida: {alvo} (válidas: {', '.join(CLASSES)})")
+        sys.exit(1)
+
+    try:
+        grid = {key: parse_values(options[flag]) for flag, key, _ in PARAMETROS if flag in options}
+    except ValueError as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+
+    prev_folder, ref_folder = args[0], args[1]
+    for folder in (prev_folder, ref_folder):
+        if not os.path.isdir(folder):
+            print(f"Erro: Pasta não encontrada: {folder}")
+            sys.exit(1)
+
+    entradas = load_entradas(args[2]) if len(args) > 2 else merge_entradas()
+    prev_data = load_project_data(prev_folder)
+    ref_data = load_project_data(ref_folder)
+    if not prev_data or not ref_data:
+        print("ERRO: CSV não encontrados")
+        sys.exit(1)
+    comp, base, _ = components(project_totals(prev_data, ref_data), entradas)
+    print_report(comp, base, grid, entradas, alvo)
+
+    if '--csv' in options:
+        write_csv(comp, base, grid, options['--csv'])
+        print(f"\nGrelha gravada: {options['--csv']}")
+
+
+if __name__ == '__main__':
+    main()
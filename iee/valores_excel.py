@@ -0,0 +1,510 @@
+"""
+Valores das fórmulas - livros com fórmulas E valores calculados
+
+O openpyxl grava só as fórmulas (<f>) com o valor vazio, por isso quem lê o
+livro sem o abrir no Excel (openpyxl com data_only=True, geradores de
+relatórios, comparadores) vê None em todas as células calculadas.
+
+Este módulo avalia em Python as fórmulas do livro (o subconjunto usado pelos
+livros IEE: aritmética, comparações, referências a outras folhas, SUM,
+SUMIF, IF, IFERROR, ISERROR, INDEX, ROUND, OR, AND, MIN, MAX, ABS) com a
+mesma semântica do Excel (vazio = 0, texto > número nas comparações, erros
+#DIV/0! / #VALUE! propagados) e grava cada valor no <v> da célula, ao lado
+da fórmula. O Excel continua a recalcular ao abrir (fullCalcOnLoad).
+
+Uso:
+    from valores_excel import save_with_values
+    save_with_values(wb, 'livro.xlsx')     # em vez de wb.save(...)
+
+    python valores_excel.py <livro.xlsx> [saida.xlsx]   # acrescenta os valores a um livro existente
+"""
+
+import os
+import re
+import sys
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import column_index_from_string
+
+
+class ExcelError(Exception):
+    """Valor de erro do Excel (#DIV/0!, #VALUE!, #REF!, #NAME?, #N/A)"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+# =============================================================================
+# PARSER
+# =============================================================================
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<number>\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+)
+    | (?P<string>"(?:[^"]|"")*")
+    | (?P<ref>(?:(?:'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?\$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?)
+    | (?P<func>[A-Za-z][A-Za-z0-9.]*)\s*\(
+    | (?P<bool>TRUE|FALSE)\b
+    | (?P<op><>|<=|>=|[-+*/^&=<>(),])
+    )""", re.VERBOSE)
+
+_CELL = re.compile(r"\$?([A-Za-z]{1,3})\$?(\d+)")
+
+
+def tokenize(formula):
+    tokens = []
+    pos = 0
+    text = formula.rstrip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise ExcelError('#NAME?')
+        kind = m.lastgroup
+        tokens.append((kind, m.group(kind)))
+        pos = m.end()
+    return tokens
+
+
+def _split_ref(text):
+    """'Folha'!A1:B2 -> (folha ou None, (col, linha), (col, linha) ou None)"""
+    sheet = None
+    if '!' in text:
+        sheet, text = text.rsplit('!', 1)
+        if sheet.startswith("'"):
+            sheet = sheet[1:-1].replace("''", "'")
+    cells = [(column_index_from_string(m.group(1).upper()), int(m.group(2)))
+             for m in _CELL.finditer(text)]
+    return sheet, cells[0], cells[1] if len(cells) > 1 else None
+
+
+class _Parser:
+    """Descida recursiva: converte os tokens numa árvore de tuplos"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        token = self.peek()
+        if token[0] is None or (value is not None and token[1] != value):
+            raise ExcelError('#NAME?')
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.comparison()
+        if self.pos != len(self.tokens):
+            raise ExcelError('#NAME?')
+        return node
+
+    def comparison(self):
+        node = self.concat()
+        while self.peek()[1] in ('=', '<>', '<', '>', '<=', '>='):
+            op = self.take()[1]
+            node = ('cmp', op, node, self.concat())
+        return node
+
+    def concat(self):
+        node = self.additive()
+        while self.peek()[1] == '&':
+            self.take()
+            node = ('&', node, self.additive())
+        return node
+
+    def additive(self):
+        node = self.term()
+        while self.peek()[1] in ('+', '-'):
+            op = self.take()[1]
+            node = (op, node, self.term())
+        return node
+
+    def term(self):
+        node = self.power()
+        while self.peek()[1] in ('*', '/'):
+            op = self.take()[1]
+            node = (op, node, self.power())
+        return node
+
+    def power(self):
+        node = self.unary()
+        while self.peek()[1] == '^':
+            self.take()
+            node = ('^', node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek()[1] in ('-', '+'):
+            op = self.take()[1]
+            operand = self.unary()
+            return ('neg', operand) if op == '-' else operand
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == 'number':
+            return ('const', float(value) if '.' in value or 'e' in value.lower() else int(value))
+        if kind == 'string':
+            return ('const', value[1:-1].replace('""', '"'))
+        if kind == 'bool':
+            return ('const', value == 'TRUE')
+        if kind == 'ref':
+            sheet, first, last = _split_ref(value)
+            return ('range', sheet, first, last) if last else ('ref', sheet, first)
+        if kind == 'func':
+            args = []
+            if self.peek()[1] != ')':
+                args.append(self.comparison())
+                while self.peek()[1] == ',':
+                    self.take()
+                    args.append(self.comparison())
+            self.take(')')
+            return ('func', value.upper(), args)
+        if value == '(':
+            node = self.comparison()
+            self.take(')')
+            return node
+        raise ExcelError('#NAME?')
+
+
+def parse_formula(formula):
+    """'=A1+B2' -> árvore (levanta ExcelError('#NAME?') se não for suportada)"""
+    return _Parser(tokenize(formula[1:])).parse()
+
+
+# =============================================================================
+# AVALIAÇÃO
+# =============================================================================
+
+def _number(value):
+    """Operando numérico (vazio = 0, texto numérico convertido)"""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ExcelError('#VALUE!')
+
+
+def _type_rank(value):
+    # Ordem do Excel nas comparações: números < texto < lógicos
+    if isinstance(value, bool):
+        return 2
+    if isinstance(value, str):
+        return 1
+    return 0
+
+
+def _compare(op, a, b):
+    if a is None:
+        a = '' if isinstance(b, str) else 0
+    if b is None:
+        b = '' if isinstance(a, str) else 0
+    rank_a, rank_b = _type_rank(a), _type_rank(b)
+    if rank_a != rank_b:
+        a, b = rank_a, rank_b
+    elif rank_a == 1:
+        a, b = a.lower(), b.lower()
+    return {'=': a == b, '<>': a != b, '<': a < b, '>': a > b, '<=': a <= b, '>=': a >= b}[op]
+
+
+def _excel_round(value, digits):
+    factor = 10 ** digits
+    scaled = abs(value) * factor
+    rounded = int(scaled + 0.5 + 1e-9) / factor
+    return rounded if value >= 0 else -rounded
+
+
+class Evaluator:
+    """Avalia as fórmulas de um livro openpyxl (com memória dos valores já calculados)"""
+
+    def __init__(self, wb):
+        self.wb = wb
+        self.values = {}
+        self.active = set()
+        self.trees = {}
+
+    def cell_value(self, sheet, col, row):
+        key = (sheet, col, row)
+        if key in self.values:
+            return self.values[key]
+        if sheet not in self.wb.sheetnames:
+            raise ExcelError('#REF!')
+        cell = self.wb[sheet].cell(row, col)
+        raw = cell.value
+        if cell.data_type == 'f':
+            if key in self.active:
+                raise ExcelError('#REF!')  # Referência circular
+            self.active.add(key)
+            try:
+                value = self.formula_value(sheet, raw)
+            finally:
+                self.active.discard(key)
+        else:
+            value = raw
+        self.values[key] = value
+        return value
+
+    def formula_value(self, sheet, formula):
+        """Valor de uma fórmula (os erros são devolvidos como ExcelError)"""
+        try:
+            tree = self.trees.get(formula)
+            if tree is None:
+                tree = self.trees[formula] = parse_formula(formula)
+            value = self.eval(tree, sheet)
+            if isinstance(value, list):  # =A1:A3 numa só célula
+                value = value[0][0]
+            return value
+        except ExcelError as e:
+            return e
+        except (ArithmeticError, RecursionError):
+            return ExcelError('#NUM!')
+
+    def range_values(self, node, sheet):
+        _, ref_sheet, (c1, r1), (c2, r2) = node
+        ref_sheet = ref_sheet or sheet
+        return [[self.scalar(self.cell_value(ref_sheet, c, r)) for c in range(min(c1, c2), max(c1, c2) + 1)]
+                for r in range(min(r1, r2), max(r1, r2) + 1)]
+
+    @staticmethod
+    def scalar(value):
+        if isinstance(value, ExcelError):
+            raise value
+        return value
+
+    def eval(self, node, sheet):
+        kind = node[0]
+        if kind == 'const':
+            return node[1]
+        if kind == 'ref':
+            _, ref_sheet, (col, row) = node
+            return self.scalar(self.cell_value(ref_sheet or sheet, col, row))
+        if kind == 'range':
+            return self.range_values(node, sheet)
+        if kind == 'func':
+            return self.call(node[1], node[2], sheet)
+        if kind == 'neg':
+            return -_number(self.eval(node[1], sheet))
+        if kind == 'cmp':
+            return _compare(node[1], self.eval(node[2], sheet), self.eval(node[3], sheet))
+        if kind == '&':
+            parts = [self.eval(n, sheet) for n in node[1:]]
+            return ''.join('' if p is None else _text(p) for p in parts)
+
+        a = _number(self.eval(node[1], sheet))
+        b = _number(self.eval(node[2], sheet))
+        if kind == '+':
+            return a + b
+        if kind == '-':
+            return a - b
+        if kind == '*':
+            return a * b
+        if kind == '/':
+            if b == 0:
+                raise ExcelError('#DIV/0!')
+            return a / b
+        if kind == '^':
+            return a ** b
+        raise ExcelError('#NAME?')
+
+    def _numbers(self, args, sheet):
+        """Números dos argumentos (em intervalos, texto e vazios são ignorados, como no Excel)"""
+        result = []
+        for arg in args:
+            value = self.eval(arg, sheet)
+            if isinstance(value, list):
+                result.extend(v for row in value for v in row
+                              if isinstance(v, (int, float)) and not isinstance(v, bool))
+            else:
+                result.append(_number(value))
+        return result
+
+    def call(self, name, args, sheet):
+        if name == 'IF':
+            condition = self.eval(args[0], sheet)
+            if isinstance(condition, str):
+                raise ExcelError('#VALUE!')
+            if condition:
+                return self.eval(args[1], sheet) if len(args) > 1 else True
+            return self.eval(args[2], sheet) if len(args) > 2 else False
+        if name in ('IFERROR', 'ISERROR'):
+            try:
+                value = self.eval(args[0], sheet)
+            except ExcelError:
+                return self.eval(args[1], sheet) if name == 'IFERROR' else True
+            return value if name == 'IFERROR' else False
+        if name == 'SUM':
+            return sum(self._numbers(args, sheet))
+        if name == 'MIN':
+            return min(self._numbers(args, sheet), default=0)
+        if name == 'MAX':
+            return max(self._numbers(args, sheet), default=0)
+        if name == 'ABS':
+            return abs(_number(self.eval(args[0], sheet)))
+        if name in ('OR', 'AND'):
+            values = [bool(_number(v)) for v in (self.eval(a, sheet) for a in args)]
+            return any(values) if name == 'OR' else all(values)
+        if name == 'ROUND':
+            return _excel_round(_number(self.eval(args[0], sheet)), int(_number(self.eval(args[1], sheet))))
+        if name == 'INDEX':
+            table = self.eval(args[0], sheet)
+            row = int(_number(self.eval(args[1], sheet)))
+            col = int(_number(self.eval(args[2], sheet))) if len(args) > 2 else 1
+            if len(table) == 1 and len(args) == 2:  # INDEX(linha, n)
+                row, col = 1, row
+            if not (1 <= row <= len(table) and 1 <= col <= len(table[0])):
+                raise ExcelError('#REF!')
+            return table[row - 1][col - 1]
+        if name == 'SUMIF':
+            criteria_range = self.eval(args[0], sheet)
+            criterion = self.eval(args[1], sheet)
+            sum_range = self.eval(args[2], sheet) if len(args) > 2 else criteria_range
+            total = 0
+            for crit_row, sum_row in zip(criteria_range, sum_range):
+                for c, v in zip(crit_row, sum_row):
+                    if _matches(c, criterion) and isinstance(v, (int, float)) and not isinstance(v, bool):
+                        total += v
+            return total
+        raise ExcelError('#NAME?')
+
+
+def _text(value):
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _matches(value, criterion):
+    """Critério do SUMIF: igualdade (texto sem distinção de maiúsculas) ou '>x', '<=x', ..."""
+    if isinstance(criterion, str):
+        m = re.match(r'^(<>|<=|>=|<|>|=)?(.*)$', criterion)
+        op, operand = m.group(1) or '=', m.group(2)
+        try:
+            operand = float(operand)
+        except ValueError:
+            pass
+        return value is not None and _compare(op, value, operand)
+    return value is not None and _compare('=', value, criterion)
+
+
+def evaluate_workbook(wb):
+    """{folha: {coordenada: valor}} de todas as células com fórmula"""
+    evaluator = Evaluator(wb)
+    result = {}
+    for ws in wb.worksheets:
+        values = {}
+        for row in ws.iter_rows():
+            for cell in row:
+                if cell.data_type == 'f':
+                    values[cell.coordinate] = evaluator.cell_value(ws.title, cell.column, cell.row)
+        result[ws.title] = values
+    return result
+
+
+# =============================================================================
+# ESCRITA DOS VALORES NO XLSX
+# =============================================================================
+
+_NS = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+_RID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
+_FORMULA_CELL = re.compile(r'<c r="([A-Z]+\d+)"([^>]*)><f>(.*?)</f><v\s*/></c>', re.S)
+
+
+def _sheet_paths(z):
+    """{nome da folha: caminho do XML dentro do zip}"""
+    workbook = ET.fromstring(z.read('xl/workbook.xml'))
+    rels = ET.fromstring(z.read('xl/_rels/workbook.xml.rels'))
+    targets = {r.get('Id'): r.get('Target') for r in rels.findall('rel:Relationship', _NS)}
+    paths = {}
+    for sheet in workbook.findall('main:sheets/main:sheet', _NS):
+        target = targets[sheet.get(_RID)]
+        paths[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+    return paths
+
+
+def _cell_xml(ref, attrs, formula, value):
+    attrs = re.sub(r'\s+t="[^"]*"', '', attrs)
+    if isinstance(value, ExcelError):
+        return f'<c r="{ref}"{attrs} t="e"><f>{formula}</f><v>{escape(value.code)}</v></c>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{attrs} t="b"><f>{formula}</f><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        number = repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+        return f'<c r="{ref}"{attrs}><f>{formula}</f><v>{number}</v></c>'
+    if value is None:
+        return f'<c r="{ref}"{attrs}><f>{formula}</f><v>0</v></c>'
+    return f'<c r="{ref}"{attrs} t="str"><f>{formula}</f><v>{escape(str(value))}</v></c>'
+
+
+def write_values(xlsx_path, values, output_path=None):
+    """Escreve os valores calculados no <v> das células com fórmula de um xlsx gravado pelo openpyxl"""
+    output_path = output_path or xlsx_path
+    tmp_path = f'{output_path}.{os.getpid()}.tmp'
+    with zipfile.ZipFile(xlsx_path, 'r') as zin:
+        paths = {path: name for name, path in _sheet_paths(zin).items()}
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for item in zin.infolist():
+                data = zin.read(item.filename)
+                sheet = paths.get(item.filename)
+                if sheet is not None and values.get(sheet):
+                    sheet_values = values[sheet]
+
+                    def fill(m):
+                        ref = m.group(1)
+                        if ref not in sheet_values:
+                            return m.group(0)
+                        return _cell_xml(ref, m.group(2), m.group(3), sheet_values[ref])
+
+                    data = _FORMULA_CELL.sub(fill, data.decode('utf-8')).encode('utf-8')
+                zout.writestr(item, data)
+    os.replace(tmp_path, output_path)
+
+
+def save_with_values(wb, output_path):
+    """wb.save() seguido dos valores de todas as fórmulas. Retorna {folha: {coord: valor}}."""
+    values = evaluate_workbook(wb)
+    wb.save(output_path)
+    write_values(output_path, values)
+    return values
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    import openpyxl
+    input_path = sys.argv[1]
+    output_path = sys.argv[2] if len(sys.argv) > 2 else input_path
+    if not os.path.exists(input_path):
+        print(f"Erro: Ficheiro não encontrado: {input_path}")
+        sys.exit(1)
+
+    wb = openpyxl.load_workbook(input_path)
+    values = save_with_values(wb, output_path)
+    total = sum(len(v) for v in values.values())
+    errors = [(sheet, ref, v.code) for sheet, cells in values.items()
+              for ref, v in cells.items() if isinstance(v, ExcelError)]
+    print(f"{total} fórmulas calculadas ({len(errors)} com erro) -> {output_path}")
+    for sheet, ref, code in errors[:20]:
+        print(f"  {sheet}!{ref}: {code}")
+
+
+if __name__ == '__main__':
+    main()
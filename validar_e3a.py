@@ -3,170 +3,351 @@ Validador e Corrector de ficheiros HAP 5.1 (.E3A)
 
 Verifica e corrige problemas conhecidos:
 1. Calendário dos schedules com valores inválidos (>8)
-2. Default Space com schedule IDs != 0
-3. Schedule IDs inválidos nos spaces
+2. Default Space com schedule IDs != 0 (Infiltration 1-3, People, Light,
+   Equip - offsets 554/560/566/594/616/660)
+3. Schedule IDs inválidos nos spaces (os mesmos + Misc Sens/Lat - só reportados)
+4. Wall Type / Window / Roof Type / Skylight IDs fora dos limites nos spaces
+   (e roofs com exposição mas sem Roof Type - aviso)
+
+--fix corrige só 1 (calendário -> 1) e 2 (schedule IDs do Default Space -> 0);
+os restantes problemas são só reportados.
+
+Cada DAT é lido como um array de uint16 e cada campo verificado é uma coluna
+desse array (um valor por registo), por isso todas as verificações são feitas
+numa só passagem sobre os dados. As correcções são escritas de uma vez.
+Os relatórios ficam na cache do extractor (hap_cache.py, HAP_CACHE=0 desactiva),
+por isso um E3A que não mudou não volta a ser verificado.
+
+Com uma pasta valida todos os .E3A em paralelo (um processo por ficheiro),
+mostra uma tabela resumo e pode gravar o relatório em JSON e/ou JUnit XML
+(para CI). O código de saída é 1 se algum ficheiro tiver erros.
 
 Usage:
     python validar_e3a.py <ficheiro.E3A> [--fix]
+    python validar_e3a.py <pasta> [--fix] [--workers N] [--json rel.json] [--junit rel.xml]
 
 Exemplo:
     python validar_e3a.py MeuFicheiro.E3A          # Só validar
     python validar_e3a.py MeuFicheiro.E3A --fix    # Validar e corrigir
+    python validar_e3a.py entregas/ --junit validacao.xml
 """
 
 import zipfile
-import struct
 import sys
 import os
+import json
 import shutil
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# Funções partilhadas com o extractor (../extractor)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extractor'))
+
+from hap_cli import option, write_junit_report
+
+SPACE_RECORD_SIZE = 682
+SCHEDULE_RECORD_SIZE = 792
+ASSEMBLY_RECORD_SIZE = 3187
+WINDOW_RECORD_SIZE = 555
+
+# Calendário dos schedules: 108 uint16 (12 meses x 9 day-types), profiles 1-8
+CALENDAR_START = 576
+CALENDAR_END = 792
+CALENDAR_MAX = 8
+CALENDAR_FIX_VALUE = 1
+
+# Schedule IDs nos spaces (offset -> descrição). Só estes são verificados e
+# corrigidos (--fix) no Default Space.
+DEFAULT_SPACE_SCHEDULE_OFFSETS = {
+    554: "Infiltration Sch 1",
+    560: "Infiltration Sch 2",
+    566: "Infiltration Sch 3",
+    594: "People Schedule",
+    616: "Light Schedule",
+    660: "Equip Schedule",
+}
+
+# Nos restantes spaces verificam-se também os schedules Misc (só reportados)
+SCHEDULE_OFFSETS = {
+    **DEFAULT_SPACE_SCHEDULE_OFFSETS,
+    640: "Misc Sens Schedule",
+    644: "Misc Lat Schedule",
+}
+
+NO_REFERENCE = 0xFFFF
+
+# Blocos de walls/roofs nos spaces e IDs que referem outros DAT
+WALL_BLOCK_START, WALL_BLOCK_SIZE, WALL_BLOCKS = 72, 34, 8
+ROOF_BLOCK_START, ROOF_BLOCK_SIZE, ROOF_BLOCKS = 344, 24, 4
+
+BLOCK_EXPOSURE = 0           # offset da exposição (walls e roofs)
+WALL_REFERENCES = {          # offset no bloco -> (descrição, membro referido)
+    6: ("Wall Type", 'HAP51WAL.DAT'),
+    8: ("Window 1", 'HAP51WIN.DAT'),
+    10: ("Window 2", 'HAP51WIN.DAT'),
+}
+ROOF_TYPE = 8
+ROOF_REFERENCES = {
+    ROOF_TYPE: ("Roof Type", 'HAP51ROF.DAT'),
+    10: ("Skylight", 'HAP51WIN.DAT'),
+}
+
+RECORD_SIZES = {
+    'HAP51SCH.DAT': SCHEDULE_RECORD_SIZE,
+    'HAP51WAL.DAT': ASSEMBLY_RECORD_SIZE,
+    'HAP51ROF.DAT': ASSEMBLY_RECORD_SIZE,
+    'HAP51WIN.DAT': WINDOW_RECORD_SIZE,
+}
+
+# Membros lidos pelas verificações (chave dos relatórios na hap_cache)
+CHECKED_MEMBERS = ('HAP51SPC.DAT',) + tuple(RECORD_SIZES)
+
+# Incrementar sempre que as verificações mudarem (invalida relatórios em cache)
+CHECKS_VERSION = 2
+
+
+# =============================================================================
+# ARRAYS uint16
+# =============================================================================
+
+def uint16_view(data, record_size):
+    """Registos completos de `data` como array de uint16 little-endian"""
+    count = len(data) // record_size
+    view = array('H')
+    view.frombytes(bytes(data[:count * record_size]))
+    if sys.byteorder == 'big':
+        view.byteswap()
+    return view
+
+
+def column(view, record_size, offset):
+    """Valores do uint16 em `offset` de todos os registos (um por registo)"""
+    return view[offset // 2::record_size // 2]
+
+
+def out_of_bounds(values, count):
+    """Índices dos IDs >= count (0 e 0xFFFF = sem referência)"""
+    if not values or max(values) < count:
+        return []
+    return [i for i, v in enumerate(values) if v >= count and v != 0 and v != NO_REFERENCE]
+
+
+def record_name(data, index, record_size, name_len):
+    start = index * record_size
+    return bytes(data[start:start + name_len]).rstrip(b' \x00').decode('latin1', errors='ignore')
+
+
+# =============================================================================
+# VERIFICAÇÕES
+# =============================================================================
+
+def _issue(check, message, **details):
+    return dict(check=check, message=message, **details)
+
+
+def check_e3a(files, name=''):
+    """Valida os membros de um E3A e devolve um relatório estruturado.
+
+    report = {'file', 'counts', 'errors': [...], 'warnings': [...]}
+    Cada erro/aviso é um dict com 'check', 'message' e, quando corrigível,
+    'fix' = (membro, [offsets], valor novo).
+    """
+    report = {'file': name, 'counts': {}, 'errors': [], 'warnings': []}
+    errors, warnings, counts = report['errors'], report['warnings'], report['counts']
+
+    counts.update({member: len(files[member]) // size
+                   for member, size in RECORD_SIZES.items() if member in files})
+
+    # -------------------------------------------------------------------------
+    # 1. Calendário dos schedules
+    # -------------------------------------------------------------------------
+    sch_data = files.get('HAP51SCH.DAT')
+    if sch_data:
+        sch = uint16_view(sch_data, SCHEDULE_RECORD_SIZE)
+        words = SCHEDULE_RECORD_SIZE // 2
+        cal_start, cal_end = CALENDAR_START // 2, CALENDAR_END // 2
+        for i in range(counts['HAP51SCH.DAT']):
+            calendar = sch[i * words + cal_start:i * words + cal_end]
+            if max(calendar) <= CALENDAR_MAX:
+                continue
+            bad = [k for k, v in enumerate(calendar) if v > CALENDAR_MAX]
+            sch_name = record_name(sch_data, i, SCHEDULE_RECORD_SIZE, 40)
+            offsets = [i * SCHEDULE_RECORD_SIZE + CALENDAR_START + 2 * k for k in bad]
+            errors.append(_issue(
+                'calendar', f"Schedule {i} '{sch_name}': calendário com valores inválidos ({calendar[bad[0]]}, ...)",
+                member='HAP51SCH.DAT', record=i, name=sch_name, values=[calendar[k] for k in bad],
+                fix=('HAP51SCH.DAT', offsets, CALENDAR_FIX_VALUE)))
+
+    spc_data = files.get('HAP51SPC.DAT')
+    if not spc_data:
+        return report
+
+    spc = uint16_view(spc_data, SPACE_RECORD_SIZE)
+    num_spaces = counts['HAP51SPC.DAT'] = len(spc_data) // SPACE_RECORD_SIZE
+    num_schedules = counts.get('HAP51SCH.DAT', 0)
+    report['default_space'] = record_name(spc_data, 0, SPACE_RECORD_SIZE, 24)
+
+    def space_name(i):
+        return record_name(spc_data, i, SPACE_RECORD_SIZE, 24)
+
+    for offset, desc in SCHEDULE_OFFSETS.items():
+        ids = column(spc, SPACE_RECORD_SIZE, offset)
+
+        # ---------------------------------------------------------------------
+        # 2. Default Space (registo 0) com schedule IDs = 0
+        # ---------------------------------------------------------------------
+        if ids and ids[0] != 0 and offset in DEFAULT_SPACE_SCHEDULE_OFFSETS:
+            errors.append(_issue(
+                'default_space', f"Default Space: {desc} (offset {offset}) = {ids[0]} (deve ser 0)",
+                member='HAP51SPC.DAT', record=0, field=desc, value=ids[0],
+                fix=('HAP51SPC.DAT', [offset], 0)))
+
+        # ---------------------------------------------------------------------
+        # 3. Schedule IDs nos spaces
+        # ---------------------------------------------------------------------
+        if num_schedules:
+            for i in out_of_bounds(ids[1:], num_schedules):
+                i += 1
+                errors.append(_issue(
+                    'schedule_ref', f"Space {i} '{space_name(i)}': {desc} = {ids[i]} >= {num_schedules}",
+                    member='HAP51SPC.DAT', record=i, name=space_name(i), field=desc, value=ids[i]))
+
+    # -------------------------------------------------------------------------
+    # 4. IDs de walls/windows/roofs/skylights nos blocos dos spaces
+    # -------------------------------------------------------------------------
+    blocks = [(f"Wall {b + 1}", WALL_BLOCK_START + b * WALL_BLOCK_SIZE, WALL_REFERENCES)
+              for b in range(WALL_BLOCKS)]
+    blocks += [(f"Roof {b + 1}", ROOF_BLOCK_START + b * ROOF_BLOCK_SIZE, ROOF_REFERENCES)
+               for b in range(ROOF_BLOCKS)]
+
+    for block, start, references in blocks:
+        # Blocos sem exposição não são usados (podem ter lixo de versões antigas)
+        exposures = column(spc, SPACE_RECORD_SIZE, start + BLOCK_EXPOSURE)
+        for rel, (desc, member) in references.items():
+            if member not in counts:
+                continue
+            ids = column(spc, SPACE_RECORD_SIZE, start + rel)
+            for i in out_of_bounds(ids[1:], counts[member]):
+                i += 1
+                if not exposures[i]:
+                    continue
+                errors.append(_issue(
+                    'assembly_ref', f"Space {i} '{space_name(i)}': {block} {desc} = {ids[i]} >= {counts[member]}",
+                    member='HAP51SPC.DAT', record=i, name=space_name(i), field=f"{block} {desc}", value=ids[i]))
+
+        if references is ROOF_REFERENCES:
+            types = column(spc, SPACE_RECORD_SIZE, start + ROOF_TYPE)
+            for i in range(1, num_spaces):
+                if exposures[i] and not types[i]:
+                    warnings.append(_issue(
+                        'roof_type', f"Space {i} '{space_name(i)}': {block} com exposição mas sem Roof Type",
+                        member='HAP51SPC.DAT', record=i, name=space_name(i), field=block))
+
+    # -------------------------------------------------------------------------
+    # 5. Tamanho dos assemblies
+    # -------------------------------------------------------------------------
+    for member in ('HAP51WAL.DAT', 'HAP51ROF.DAT'):
+        data = files.get(member)
+        if data and len(data) % ASSEMBLY_RECORD_SIZE != 0:
+            warnings.append(_issue(
+                'assembly_size', f"{member}: tamanho {len(data)} não é múltiplo de {ASSEMBLY_RECORD_SIZE}",
+                member=member))
+
+    return report
+
+
+def cached_check(files, name=''):
+    """check_e3a via hap_cache: um E3A que não mudou não volta a ser verificado"""
+    from hap_cache import cached
+
+    report = cached(f'validacao{CHECKS_VERSION}', files, CHECKED_MEMBERS, lambda: check_e3a(files))
+    return dict(report, file=name)
+
+
+def fix_e3a(files, report):
+    """Aplica as correcções do relatório (uma escrita por membro). Retorna as mensagens."""
+    by_member = {}
+    fixes_made = []
+    for issue in report['errors']:
+        if 'fix' not in issue:
+            continue
+        member, offsets, value = issue['fix']
+        by_member.setdefault(member, []).extend((offset, value) for offset in offsets)
+        if issue['check'] == 'calendar':
+            fixes_made.append(f"Schedule {issue['record']} '{issue['name']}': calendário corrigido")
+        else:
+            fixes_made.append(f"Default Space: offset {offsets[0]} corrigido para {value}")
 
-def validate_e3a(path, fix=False):
-    """Valida um ficheiro E3A e opcionalmente corrige erros."""
+    for member, writes in by_member.items():
+        data = files[member]
+        view = uint16_view(data, 2)
+        for offset, value in writes:
+            view[offset // 2] = value
+        if sys.byteorder == 'big':
+            view.byteswap()
+        data[:len(view) * 2] = view.tobytes()
 
-    errors = []
-    warnings = []
-    fixes_made = []
+    return fixes_made
 
-    print(f"\n{'='*60}")
-    print(f"VALIDAÇÃO: {os.path.basename(path)}")
-    print(f"{'='*60}")
 
-    # Ler o ficheiro
-    with zipfile.ZipFile(path, 'r') as z:
-        files_content = {}
-        for name in z.namelist():
-            files_content[name] = bytearray(z.read(name))
+# =============================================================================
+# RELATÓRIO
+# =============================================================================
 
-    # =================================================================
-    # 1. VERIFICAR SCHEDULES (calendário)
-    # =================================================================
-    print("\n[1] Verificar Schedules...")
+def _by_check(issues, check):
+    return [i for i in issues if i['check'] == check]
 
-    sch_data = files_content.get('HAP51SCH.DAT')
-    if sch_data:
-        num_schedules = len(sch_data) // 792
-        print(f"    Schedules encontrados: {num_schedules}")
-
-        schedules_with_bad_calendar = []
-
-        for i in range(num_schedules):
-            sch_start = i * 792
-            sch_name = sch_data[sch_start:sch_start+40].rstrip(b' \x00').decode('latin1', errors='ignore')
-
-            # Verificar calendário (bytes 576-791)
-            bad_values = []
-            for j in range(576, 792, 2):
-                val = struct.unpack('<H', sch_data[sch_start+j:sch_start+j+2])[0]
-                if val > 8 and val != 0:
-                    bad_values.append((j, val))
-
-            if bad_values:
-                schedules_with_bad_calendar.append((i, sch_name, bad_values))
-                errors.append(f"Schedule {i} '{sch_name}': calendário com valores inválidos ({bad_values[0][1]}, ...)")
-
-                if fix:
-                    # Corrigir: substituir valores >8 por 1
-                    for j, val in bad_values:
-                        sch_data[sch_start+j:sch_start+j+2] = struct.pack('<H', 1)
-                    fixes_made.append(f"Schedule {i} '{sch_name}': calendário corrigido")
-
-        if schedules_with_bad_calendar:
-            print(f"    ERRO: {len(schedules_with_bad_calendar)} schedules com calendário inválido!")
+
+def print_report(report):
+    errors, warnings, counts = report['errors'], report['warnings'], report['counts']
+
+    print("\n[1] Verificar Schedules...")
+    if 'HAP51SCH.DAT' in counts:
+        print(f"    Schedules encontrados: {counts['HAP51SCH.DAT']}")
+        bad = _by_check(errors, 'calendar')
+        if bad:
+            print(f"    ERRO: {len(bad)} schedules com calendário inválido!")
         else:
             print(f"    OK: Todos os schedules têm calendário válido")
 
-    # =================================================================
-    # 2. VERIFICAR DEFAULT SPACE
-    # =================================================================
     print("\n[2] Verificar Default Space...")
-
-    spc_data = files_content.get('HAP51SPC.DAT')
-    if spc_data:
-        num_spaces = len(spc_data) // 682
-        print(f"    Spaces encontrados: {num_spaces}")
-
-        # Default Space é o primeiro (índice 0)
-        ds = spc_data[0:682]
-        ds_name = ds[0:24].rstrip(b' \x00').decode('latin1', errors='ignore')
-        print(f"    Default Space: '{ds_name}'")
-
-        schedule_offsets = {
-            554: "Infiltration Sch 1",
-            560: "Infiltration Sch 2",
-            566: "Infiltration Sch 3",
-            594: "People Schedule",
-            616: "Light Schedule",
-            660: "Equip Schedule",
-        }
-
-        ds_errors = []
-        for offset, desc in schedule_offsets.items():
-            val = struct.unpack('<H', ds[offset:offset+2])[0]
-            if val != 0:
-                ds_errors.append((offset, desc, val))
-                errors.append(f"Default Space: {desc} (offset {offset}) = {val} (deve ser 0)")
-
-                if fix:
-                    spc_data[offset:offset+2] = struct.pack('<H', 0)
-                    fixes_made.append(f"Default Space: offset {offset} corrigido para 0")
-
-        if ds_errors:
-            print(f"    ERRO: Default Space tem {len(ds_errors)} schedule IDs != 0")
+    if 'HAP51SPC.DAT' in counts:
+        print(f"    Spaces encontrados: {counts['HAP51SPC.DAT']}")
+        print(f"    Default Space: '{report['default_space']}'")
+        bad = _by_check(errors, 'default_space')
+        if bad:
+            print(f"    ERRO: Default Space tem {len(bad)} schedule IDs != 0")
         else:
             print(f"    OK: Default Space tem todos os schedule IDs = 0")
 
-    # =================================================================
-    # 3. VERIFICAR SCHEDULE IDs NOS SPACES
-    # =================================================================
     print("\n[3] Verificar Schedule IDs nos Spaces...")
-
-    if spc_data and sch_data:
-        num_schedules = len(sch_data) // 792
-        num_spaces = len(spc_data) // 682
-
-        invalid_refs = []
-
-        for i in range(1, num_spaces):  # Começar do 1 (ignorar Default Space)
-            space = spc_data[i*682:(i+1)*682]
-            space_name = space[0:24].rstrip(b' \x00').decode('latin1', errors='ignore')
-
-            for offset, desc in schedule_offsets.items():
-                val = struct.unpack('<H', space[offset:offset+2])[0]
-                if val >= num_schedules and val != 0 and val != 65535:
-                    invalid_refs.append((i, space_name, offset, desc, val))
-                    errors.append(f"Space {i} '{space_name}': {desc} = {val} >= {num_schedules}")
-
-        if invalid_refs:
-            print(f"    ERRO: {len(invalid_refs)} referências a schedules inválidos!")
+    if 'HAP51SPC.DAT' in counts and 'HAP51SCH.DAT' in counts:
+        bad = _by_check(errors, 'schedule_ref')
+        if bad:
+            print(f"    ERRO: {len(bad)} referências a schedules inválidos!")
         else:
             print(f"    OK: Todos os schedule IDs são válidos")
 
-    # =================================================================
-    # 4. VERIFICAR ASSEMBLIES (opcional)
-    # =================================================================
-    print("\n[4] Verificar Assemblies...")
-
-    wall_data = files_content.get('HAP51WAL.DAT')
-    if wall_data:
-        if len(wall_data) % 3187 != 0:
-            warnings.append(f"HAP51WAL.DAT: tamanho {len(wall_data)} não é múltiplo de 3187")
-            print(f"    AVISO: HAP51WAL.DAT tamanho irregular")
-        else:
-            num_walls = len(wall_data) // 3187
-            print(f"    Walls: {num_walls} assemblies OK")
-
-    roof_data = files_content.get('HAP51ROF.DAT')
-    if roof_data:
-        if len(roof_data) % 3187 != 0:
-            warnings.append(f"HAP51ROF.DAT: tamanho {len(roof_data)} não é múltiplo de 3187")
-            print(f"    AVISO: HAP51ROF.DAT tamanho irregular")
+    print("\n[4] Verificar Walls/Windows/Roofs nos Spaces...")
+    if 'HAP51SPC.DAT' in counts:
+        bad = _by_check(errors, 'assembly_ref')
+        if bad:
+            print(f"    ERRO: {len(bad)} referências a assemblies/windows inválidos!")
         else:
-            num_roofs = len(roof_data) // 3187
-            print(f"    Roofs: {num_roofs} assemblies OK")
+            print(f"    OK: Todos os IDs de walls/windows/roofs são válidos")
+        no_type = _by_check(warnings, 'roof_type')
+        if no_type:
+            print(f"    AVISO: {len(no_type)} roofs com exposição mas sem Roof Type")
+
+    print("\n[5] Verificar Assemblies...")
+    irregular = {i['member'] for i in _by_check(warnings, 'assembly_size')}
+    for member, label in (('HAP51WAL.DAT', 'Walls'), ('HAP51ROF.DAT', 'Roofs')):
+        if member in irregular:
+            print(f"    AVISO: {member} tamanho irregular")
+        elif member in counts:
+            print(f"    {label}: {counts[member]} assemblies OK")
 
-    # =================================================================
-    # RESULTADO
-    # =================================================================
     print(f"\n{'='*60}")
     print("RESULTADO")
     print(f"{'='*60}")
@@ -174,7 +355,7 @@ def validate_e3a(path, fix=False):
     if errors:
         print(f"\nERROS: {len(errors)}")
         for e in errors[:10]:  # Mostrar só os primeiros 10
-            print(f"  - {e}")
+            print(f"  - {e['message']}")
         if len(errors) > 10:
             print(f"  ... e mais {len(errors)-10} erros")
     else:
@@ -183,45 +364,155 @@ def validate_e3a(path, fix=False):
     if warnings:
         print(f"\nAVISOS: {len(warnings)}")
         for w in warnings:
-            print(f"  - {w}")
+            print(f"  - {w['message']}")
+
+
+# =============================================================================
+# VALIDAR FICHEIRO
+# =============================================================================
+
+def validate_e3a(path, fix=False):
+    """Valida um ficheiro E3A e opcionalmente corrige erros."""
+
+    print(f"\n{'='*60}")
+    print(f"VALIDAÇÃO: {os.path.basename(path)}")
+    print(f"{'='*60}")
+
+    # Ler o ficheiro
+    with zipfile.ZipFile(path, 'r') as z:
+        files_content = {}
+        for name in z.namelist():
+            files_content[name] = bytearray(z.read(name))
+
+    report = cached_check(files_content, os.path.basename(path))
+    print_report(report)
 
     # =================================================================
     # GRAVAR CORRECÇÕES
     # =================================================================
-    if fix and fixes_made:
+    fixes_made = fix_e3a(files_content, report) if fix else []
+    if fixes_made:
         print(f"\nCORRECÇÕES APLICADAS: {len(fixes_made)}")
         for f in fixes_made[:10]:
             print(f"  - {f}")
         if len(fixes_made) > 10:
             print(f"  ... e mais {len(fixes_made)-10} correcções")
 
-        # Actualizar dados
-        files_content['HAP51SCH.DAT'] = bytes(sch_data)
-        files_content['HAP51SPC.DAT'] = bytes(spc_data)
-
-        # Criar backup
-        backup_path = path + ".backup"
-        if not os.path.exists(backup_path):
-            shutil.copy(path, backup_path)
+        backup_path = save_fixed(path, files_content)
+        if backup_path:
             print(f"\nBackup criado: {backup_path}")
+        print(f"\nFicheiro corrigido gravado: {path}")
+
+    return len(report['errors']) == 0
+
+
+def save_fixed(path, files_content):
+    """Grava o E3A corrigido (backup .backup se ainda não existir). Retorna o backup criado."""
+    backup_path = path + ".backup"
+    created = None
+    if not os.path.exists(backup_path):
+        shutil.copy(path, backup_path)
+        created = backup_path
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+        for name, content in files_content.items():
+            z.writestr(name, bytes(content))
+    return created
+
+
+# =============================================================================
+# VALIDAR PASTA
+# =============================================================================
+
+def _plain_issues(issues):
+    """Erros/avisos sem os dados de correcção (para JSON)"""
+    return [{k: v for k, v in issue.items() if k != 'fix'} for issue in issues]
+
+
+def _validate_worker(args):
+    """Valida (e opcionalmente corrige) um ficheiro num processo do pool."""
+    path, fix = args
+    start = time.perf_counter()
+    result = {'file': os.path.basename(path), 'path': path, 'errors': [], 'warnings': [], 'fixes': 0,
+              'error': None}
+    try:
+        with zipfile.ZipFile(path, 'r') as z:
+            files_content = {name: bytearray(z.read(name)) for name in z.namelist()}
+        report = cached_check(files_content, result['file'])
+        result['errors'] = _plain_issues(report['errors'])
+        result['warnings'] = _plain_issues(report['warnings'])
+        if fix:
+            fixes_made = fix_e3a(files_content, report)
+            if fixes_made:
+                save_fixed(path, files_content)
+            result['fixes'] = len(fixes_made)
+    except (zipfile.BadZipFile, OSError) as e:
+        result['error'] = f"Erro ao ler ficheiro: {e}"
+    except Exception as e:  # Um ficheiro com problemas não impede o relatório da pasta
+        result['error'] = f"Erro ao validar ficheiro: {type(e).__name__}: {e}"
+    if result['error']:
+        result['errors'] = [{'check': 'file', 'message': result['error']}]
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def find_files(folder, extensions):
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                  if f.lower().endswith(extensions) and not f.startswith('~$'))
+
+
+def validate_folder(folder, fix=False, workers=None):
+    """Valida todos os .E3A da pasta em paralelo. Retorna a lista de resultados (ordenada)."""
+    paths = find_files(folder, ('.e3a',))
+    if not paths:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_validate_worker, [(p, fix) for p in paths]))
+
+
+def print_summary(results, title):
+    width = max([len(r['file']) for r in results] + [8])
+    print(f"\n{'='*60}")
+    print(title)
+    print(f"{'='*60}")
+    print(f"  {'Ficheiro':<{width}}  {'Erros':>6}  {'Avisos':>6}  {'Tempo':>7}  Estado")
+    print(f"  {'-'*width}  {'-'*6}  {'-'*6}  {'-'*7}  ------")
+    for r in results:
+        status = 'OK' if not r['errors'] else 'ERRO'
+        if r.get('fixes'):
+            status += f" ({r['fixes']} correcções)"
+        print(f"  {r['file']:<{width}}  {len(r['errors']):>6}  {len(r['warnings']):>6}  "
+              f"{r['seconds']:>6.2f}s  {status}")
+    failed = sum(1 for r in results if r['errors'])
+    print(f"\n  {len(results)} ficheiros: {len(results) - failed} OK, {failed} com erros")
 
-        # Gravar ficheiro corrigido
-        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
-            for name, content in files_content.items():
-                z.writestr(name, bytes(content))
 
-        print(f"\nFicheiro corrigido gravado: {path}")
+def write_json_report(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'generated': time.strftime('%Y-%m-%dT%H:%M:%S'), 'files': results},
+                  f, ensure_ascii=False, indent=2)
 
-    return len(errors) == 0
+
+def junit_cases(results):
+    """Resultados da pasta no formato de hap_cli.write_junit_report"""
+    return [{'name': r['file'], 'seconds': r['seconds'], 'error': r['error'],
+             'failures': [e['message'] for e in r['errors']],
+             'output': [w['message'] for w in r['warnings']]} for r in results]
 
 
 def main():
-    if len(sys.argv) < 2:
+    args = sys.argv[1:]
+    workers, args = option(args, '--workers', int)
+    json_path, args = option(args, '--json')
+    junit_path, args = option(args, '--junit')
+    fix = '--fix' in args
+    args = [a for a in args if a != '--fix']
+
+    if len(args) < 1:
         print(__doc__)
         sys.exit(1)
 
-    path = sys.argv[1]
-    fix = '--fix' in sys.argv
+    path = args[0]
 
     if not os.path.exists(path):
         print(f"ERRO: Ficheiro não encontrado: {path}")
@@ -231,6 +522,20 @@ def main():
         print("\n*** MODO CORRECÇÃO ACTIVO ***")
         print("O ficheiro será modificado se houver erros!")
 
+    if os.path.isdir(path):
+        results = validate_folder(path, fix=fix, workers=workers)
+        if not results:
+            print(f"ERRO: Nenhum ficheiro .E3A em {path}")
+            sys.exit(1)
+        print_summary(results, f"VALIDAÇÃO: {path}")
+        if json_path:
+            write_json_report(results, json_path)
+            print(f"\nRelatório JSON: {json_path}")
+        if junit_path:
+            write_junit_report(junit_cases(results), junit_path, 'validar_e3a')
+            print(f"Relatório JUnit: {junit_path}")
+        sys.exit(0 if not any(r['errors'] for r in results) else 1)
+
     valid = validate_e3a(path, fix=fix)
 
     sys.exit(0 if valid else 1)
@@ -0,0 +1,306 @@
+"""
+Verificador de referências cruzadas HAP 5.1 (.E3A)
+
+Verifica, para todos os spaces, os IDs que referem outros objectos:
+- 5 schedules (People, Light, Equip, Misc Sens, Misc Lat)
+- por cada wall: Wall Type, Window 1, Window 2, Door
+- por cada roof: Roof Type, Skylight
+
+contra:
+1. o nº de registos do DAT referido (SCH/WAL/WIN/DOR/ROF)
+2. as tabelas de índice do HAP51INX.MDB (ScheduleIndex, WallIndex, ...)
+3. as tabelas de links do MDB (Space_Schedule_Links, Space_Wall_Links, ...)
+
+Links ou índices em falta são a causa habitual do erro 9 "Subscript out of
+range" no HAP (ver docs/ERRO9_SUBSCRIPT_OUT_OF_RANGE.md).
+
+Os IDs de cada tipo são juntos em bitsets (um int Python por space/tabela),
+por isso cada verificação é uma operação sobre bitsets e não um ciclo por
+referência. As verificações do MDB requerem pyodbc + Microsoft Access Driver;
+sem eles só são feitas as verificações dos DAT.
+
+Usage:
+    python verificar_referencias.py <ficheiro.E3A>
+"""
+
+import os
+import sys
+import zipfile
+
+from validar_e3a import (
+    SPACE_RECORD_SIZE, SCHEDULE_RECORD_SIZE, ASSEMBLY_RECORD_SIZE, WINDOW_RECORD_SIZE,
+    WALL_BLOCK_START, WALL_BLOCK_SIZE, WALL_BLOCKS,
+    ROOF_BLOCK_START, ROOF_BLOCK_SIZE, ROOF_BLOCKS,
+    BLOCK_EXPOSURE, NO_REFERENCE, uint16_view, column, record_name,
+)
+
+DOOR_RECORD_SIZE = 287
+
+# Tipo referido -> (membro DAT, tamanho do registo, tabela de índice, tabela de links)
+TARGETS = {
+    'schedule': ('HAP51SCH.DAT', SCHEDULE_RECORD_SIZE, 'ScheduleIndex', 'Space_Schedule_Links'),
+    'wall': ('HAP51WAL.DAT', ASSEMBLY_RECORD_SIZE, 'WallIndex', 'Space_Wall_Links'),
+    'window': ('HAP51WIN.DAT', WINDOW_RECORD_SIZE, 'WindowIndex', 'Space_Window_Links'),
+    'door': ('HAP51DOR.DAT', DOOR_RECORD_SIZE, 'DoorIndex', 'Space_Door_Links'),
+    'roof': ('HAP51ROF.DAT', ASSEMBLY_RECORD_SIZE, 'RoofIndex', 'Space_Roof_Links'),
+}
+
+# Colunas das tabelas do MDB: índices (nIndex, szName, ...) e links (Space_ID, <X>_ID)
+INDEX_ID_COLUMN = 0
+LINK_SPACE_COLUMN, LINK_TARGET_COLUMN = 0, 1
+
+
+def space_references():
+    """Campos de ID dos spaces: [(descrição, tipo, offset, offset da exposição, link obrigatório)]
+
+    Os campos de walls/roofs só contam se o bloco tiver exposição. Os
+    skylights não têm link obrigatório (o conversor não os grava em
+    Space_Window_Links) - a falta é só aviso.
+    """
+    refs = [
+        ("People Schedule", 'schedule', 594, None, True),
+        ("Light Schedule", 'schedule', 616, None, True),
+        ("Equip Schedule", 'schedule', 660, None, True),
+        ("Misc Sens Schedule", 'schedule', 640, None, True),
+        ("Misc Lat Schedule", 'schedule', 644, None, True),
+    ]
+    for b in range(WALL_BLOCKS):
+        start = WALL_BLOCK_START + b * WALL_BLOCK_SIZE
+        exposure = start + BLOCK_EXPOSURE
+        refs += [
+            (f"Wall {b + 1} Wall Type", 'wall', start + 6, exposure, True),
+            (f"Wall {b + 1} Window 1", 'window', start + 8, exposure, True),
+            (f"Wall {b + 1} Window 2", 'window', start + 10, exposure, True),
+            (f"Wall {b + 1} Door", 'door', start + 16, exposure, True),
+        ]
+    for b in range(ROOF_BLOCKS):
+        start = ROOF_BLOCK_START + b * ROOF_BLOCK_SIZE
+        exposure = start + BLOCK_EXPOSURE
+        refs += [
+            (f"Roof {b + 1} Roof Type", 'roof', start + 8, exposure, True),
+            (f"Roof {b + 1} Skylight", 'window', start + 10, exposure, False),
+        ]
+    return refs
+
+
+SPACE_REFERENCES = space_references()
+
+
+# =============================================================================
+# BITSETS
+# =============================================================================
+
+def bits_of(ids):
+    """Bitset (int) com os IDs dados"""
+    bits = 0
+    for i in ids:
+        bits |= 1 << i
+    return bits
+
+
+def ids_of(bits):
+    """IDs presentes num bitset, por ordem"""
+    ids = []
+    while bits:
+        low = bits & -bits
+        ids.append(low.bit_length() - 1)
+        bits ^= low
+    return ids
+
+
+def read_mdb_tables(inx_data):
+    """Tabelas de índice/links do HAP51INX.MDB (None se pyodbc não estiver disponível).
+
+    Lidas via hap_cache: um MDB que não mudou não volta a ser aberto com pyodbc.
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extractor'))
+    from hap_cache import load_index_tables
+    return load_index_tables(inx_data)
+
+
+# =============================================================================
+# VERIFICAÇÃO
+# =============================================================================
+
+def collect_references(spc_data):
+    """Referências por space e tipo.
+
+    Retorna (refs, required, fields):
+      refs[tipo][space]      bitset de todos os IDs referidos
+      required[tipo][space]  bitset dos IDs que exigem link no MDB
+      fields[(tipo, id)]     [(space, descrição), ...] para o relatório
+    """
+    spc = uint16_view(spc_data, SPACE_RECORD_SIZE)
+    num_spaces = len(spc_data) // SPACE_RECORD_SIZE
+    refs = {t: [0] * num_spaces for t in TARGETS}
+    required = {t: [0] * num_spaces for t in TARGETS}
+    fields = {}
+
+    for desc, target, offset, exposure_offset, link_required in SPACE_REFERENCES:
+        ids = column(spc, SPACE_RECORD_SIZE, offset)
+        active = column(spc, SPACE_RECORD_SIZE, exposure_offset) if exposure_offset is not None else None
+        target_refs, target_required = refs[target], required[target]
+        for i in range(1, num_spaces):  # Ignorar o Default Space
+            v = ids[i]
+            if v == 0 or v == NO_REFERENCE or (active is not None and not active[i]):
+                continue
+            target_refs[i] |= 1 << v
+            if link_required:
+                target_required[i] |= 1 << v
+            fields.setdefault((target, v), []).append((i, desc))
+    return refs, required, fields
+
+
+def _issue(check, message, **details):
+    return dict(check=check, message=message, **details)
+
+
+def _where(fields, target, ref_id, names, limit=3):
+    places = fields.get((target, ref_id), [])
+    text = ', '.join(f"'{names(i)}' {desc}" for i, desc in places[:limit])
+    return text + (f" (+{len(places) - limit})" if len(places) > limit else '')
+
+
+def check_references(files, tables=None, name=''):
+    """Verifica as referências dos spaces contra os DAT e (se dadas) as tabelas do MDB.
+
+    tables: {tabela: [linhas]} como devolvido por read_index_tables, ou None.
+    Retorna {'file', 'counts', 'mdb', 'errors': [...], 'warnings': [...]}.
+    """
+    report = {'file': name, 'counts': {}, 'mdb': tables is not None, 'errors': [], 'warnings': []}
+    errors, warnings, counts = report['errors'], report['warnings'], report['counts']
+
+    spc_data = files.get('HAP51SPC.DAT')
+    if not spc_data:
+        errors.append(_issue('missing_member', "HAP51SPC.DAT não existe"))
+        return report
+
+    num_spaces = counts['HAP51SPC.DAT'] = len(spc_data) // SPACE_RECORD_SIZE
+    refs, required, fields = collect_references(spc_data)
+
+    def names(i):
+        return record_name(spc_data, i, SPACE_RECORD_SIZE, 24)
+
+    for target, (member, record_size, index_table, link_table) in TARGETS.items():
+        all_refs = 0
+        for bits in refs[target]:
+            all_refs |= bits
+        if not all_refs:
+            continue
+
+        # ---------------------------------------------------------------------
+        # 1. Registo existe no DAT
+        # ---------------------------------------------------------------------
+        count = counts[member] = len(files.get(member, b'')) // record_size
+        for ref_id in ids_of(all_refs >> count << count):
+            errors.append(_issue(
+                'dat_bounds', f"{member}: {target} {ref_id} não existe ({count} registos) - "
+                              f"{_where(fields, target, ref_id, names)}",
+                member=member, target=target, id=ref_id))
+
+        if tables is None:
+            continue
+
+        # ---------------------------------------------------------------------
+        # 2. ID existe na tabela de índice do MDB
+        # ---------------------------------------------------------------------
+        index_bits = bits_of(row[INDEX_ID_COLUMN] for row in tables.get(index_table, []))
+        for ref_id in ids_of(all_refs & ~index_bits):
+            errors.append(_issue(
+                'index', f"{index_table}: {target} {ref_id} em falta - {_where(fields, target, ref_id, names)}",
+                table=index_table, target=target, id=ref_id))
+
+        # ---------------------------------------------------------------------
+        # 3. Link (Space_ID, ID) existe na tabela de links do MDB
+        # ---------------------------------------------------------------------
+        links = [0] * num_spaces
+        dangling = []
+        for row in tables.get(link_table, []):
+            space_id, ref_id = row[LINK_SPACE_COLUMN], row[LINK_TARGET_COLUMN]
+            if 0 < space_id < num_spaces:
+                links[space_id] |= 1 << ref_id
+            # IDs usados mas ausentes do índice já foram reportados em 2.
+            if not 0 < space_id < num_spaces or not (index_bits | all_refs) >> ref_id & 1:
+                dangling.append(row)
+
+        for i in range(1, num_spaces):
+            for ref_id in ids_of(refs[target][i] & ~links[i]):
+                issue = _issue(
+                    'link', f"{link_table}: falta ({i}, {ref_id}) - '{names(i)}' usa {target} {ref_id}",
+                    table=link_table, space=i, name=names(i), target=target, id=ref_id)
+                (errors if required[target][i] >> ref_id & 1 else warnings).append(issue)
+
+        for row in dangling:
+            warnings.append(_issue(
+                'dangling_link', f"{link_table}: link {tuple(row[:2])} aponta para space/{target} inexistente",
+                table=link_table, row=list(row[:2])))
+
+    # -------------------------------------------------------------------------
+    # 4. Todos os spaces estão no SpaceIndex
+    # -------------------------------------------------------------------------
+    if tables is not None:
+        space_bits = bits_of(row[INDEX_ID_COLUMN] for row in tables.get('SpaceIndex', []))
+        expected = ((1 << num_spaces) - 1) & ~1  # spaces 1..N-1
+        for i in ids_of(expected & ~space_bits):
+            errors.append(_issue(
+                'index', f"SpaceIndex: space {i} '{names(i)}' em falta",
+                table='SpaceIndex', space=i, name=names(i)))
+
+    return report
+
+
+def print_report(report):
+    print(f"\n{'='*60}")
+    print(f"REFERÊNCIAS: {report['file']}")
+    print(f"{'='*60}")
+    for member, count in report['counts'].items():
+        print(f"    {member}: {count} registos")
+    if not report['mdb']:
+        print("\n    AVISO: MDB não verificado (requer pyodbc + Microsoft Access Driver)")
+
+    errors, warnings = report['errors'], report['warnings']
+    if errors:
+        print(f"\nERROS: {len(errors)}")
+        for e in errors[:20]:
+            print(f"  - {e['message']}")
+        if len(errors) > 20:
+            print(f"  ... e mais {len(errors) - 20} erros")
+    else:
+        print("\nNenhuma referência inválida!")
+
+    if warnings:
+        print(f"\nAVISOS: {len(warnings)}")
+        for w in warnings[:20]:
+            print(f"  - {w['message']}")
+        if len(warnings) > 20:
+            print(f"  ... e mais {len(warnings) - 20} avisos")
+
+
+def verify_e3a(path):
+    """Verifica as referências de um E3A. Retorna o relatório."""
+    with zipfile.ZipFile(path, 'r') as z:
+        names = set(z.namelist())
+        files = {m: z.read(m) for m in ['HAP51SPC.DAT', 'HAP51INX.MDB'] +
+                 [member for member, _, _, _ in TARGETS.values()] if m in names}
+
+    tables = read_mdb_tables(files.get('HAP51INX.MDB'))
+    return check_references(files, tables, os.path.basename(path))
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    path = sys.argv[1]
+    if not os.path.exists(path):
+        print(f"ERRO: Ficheiro não encontrado: {path}")
+        sys.exit(1)
+
+    report = verify_e3a(path)
+    print_report(report)
+    sys.exit(0 if not report['errors'] else 1)
+
+
+if __name__ == '__main__':
+    main()